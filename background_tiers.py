@@ -0,0 +1,210 @@
+"""
+Módulo de Niveles de Segundo Plano
+----------------------------------
+
+Clasifica los procesos en segundo plano en niveles, al estilo de oom_adj en
+Android, según el tiempo transcurrido desde que estuvieron en primer plano,
+si tienen ventanas visibles y su consumo muestreado de CPU y E/S. Cada nivel
+tiene su propia política de prioridad, EcoQoS, prioridad de memoria, recorte
+del working set y prioridad de E/S. El módulo es de cálculo puro: el Gestor
+aporta las muestras y aplica las políticas de los procesos que cambian de nivel.
+
+Dependencias externas:
+- time, logging: Biblioteca estándar de Python
+"""
+
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger("BackgroundTiers")
+
+TIER_RECENT = 'recent'
+TIER_VISIBLE = 'visible'
+TIER_BACKGROUND = 'background'
+TIER_IDLE = 'idle'
+TIER_HOG = 'hog'
+
+# Política por nivel. Las claves coinciden con las de apply_batched_settings:
+# - page_priority: MEMORY_PRIORITY_* (5 normal, 3 media, 2 baja, 1 muy baja)
+# - io_priority: valores de psutil en Windows (0 muy baja, 1 baja, 2 normal)
+# - working_set_trim: recorte del working set al entrar en el nivel
+TIER_POLICIES: Dict[str, Dict[str, Any]] = {
+    TIER_RECENT: {
+        'priority': 'NORMAL', 'eco_qos': False, 'page_priority': 5,
+        'working_set_trim': False, 'io_priority': 2,
+    },
+    TIER_VISIBLE: {
+        'priority': 'BELOW_NORMAL', 'eco_qos': False, 'page_priority': 3,
+        'working_set_trim': False, 'io_priority': 2,
+    },
+    TIER_BACKGROUND: {
+        'priority': 'BELOW_NORMAL', 'eco_qos': True, 'page_priority': 2,
+        'working_set_trim': False, 'io_priority': 1,
+    },
+    TIER_IDLE: {
+        'priority': 'IDLE', 'eco_qos': True, 'page_priority': 1,
+        'working_set_trim': True, 'io_priority': 0,
+    },
+    # Un proceso que acapara recursos sigue activo: recortarlo sólo
+    # provocaría fallos de página inmediatos, así que no se recorta.
+    TIER_HOG: {
+        'priority': 'IDLE', 'eco_qos': True, 'page_priority': 2,
+        'working_set_trim': False, 'io_priority': 0,
+    },
+}
+
+
+class BackgroundTierManager:
+    """
+    Mantiene el nivel de cada proceso en segundo plano a partir de muestras
+    acumuladas de CPU y E/S.
+
+    Orden de decisión: reciente > acaparador > visible > inactivo > fondo.
+    Las tasas se suavizan con una media exponencial y el nivel acaparador
+    usa histéresis para no oscilar en torno al umbral.
+    """
+
+    # Segundos desde el último primer plano durante los que un proceso es 'reciente'
+    RECENT_WINDOW = 120.0
+    # Segundos sin primer plano y sin actividad para considerar un proceso inactivo
+    IDLE_AFTER = 600.0
+    # Umbrales de actividad (CPU en % de un core, E/S en bytes/s)
+    IDLE_CPU_PERCENT = 1.0
+    IDLE_IO_RATE = 64 * 1024
+    HOG_CPU_PERCENT = 25.0
+    HOG_IO_RATE = 8 * 1024 * 1024
+    # Fracción del umbral por debajo de la cual un acaparador deja de serlo
+    HOG_EXIT_FRACTION = 0.5
+    # Factor de suavizado de las tasas muestreadas
+    EMA_ALPHA = 0.3
+
+    def __init__(self) -> None:
+        self._state: Dict[int, Dict[str, Any]] = {}
+        # PIDs que terminaron o se reutilizaron en la última actualización
+        self.removed_pids: Set[int] = set()
+
+    # --- Consultas ---
+
+    def tier_of(self, pid: int) -> str:
+        """Nivel actual de un proceso ('background' si aún no se ha muestreado)."""
+        entry = self._state.get(pid)
+        if entry is None or entry['tier'] is None:
+            return TIER_BACKGROUND
+        return entry['tier']
+
+    @staticmethod
+    def settings_for(tier: str) -> Dict[str, Any]:
+        """
+        Ajustes a aplicar al entrar en un nivel.
+
+        :return: Diccionario listo para apply_batched_settings
+        """
+        return dict(TIER_POLICIES.get(tier, TIER_POLICIES[TIER_BACKGROUND]))
+
+    def counts(self) -> Dict[str, int]:
+        """Número de procesos en cada nivel."""
+        result = {tier: 0 for tier in TIER_POLICIES}
+        for entry in self._state.values():
+            if entry['tier'] is not None:
+                result[entry['tier']] += 1
+        return result
+
+    # --- Actualización ---
+
+    def update(self, samples: Dict[int, Tuple[float, float, float]],
+               visible_pids: Iterable[int] = (),
+               foreground_pids: Iterable[int] = (),
+               now: Optional[float] = None) -> Dict[int, str]:
+        """
+        Incorpora una ronda de muestras y recalcula los niveles.
+
+        :param samples: {pid: (create_time, segundos_cpu_acumulados, bytes_io_acumulados)}
+        :param visible_pids: PIDs con ventanas visibles
+        :param foreground_pids: PIDs en primer plano (o protegidos); no reciben nivel
+        :param now: Marca de tiempo monotónica (inyectable para simulación)
+        :return: {pid: nivel} sólo de los procesos que cambiaron de nivel
+        """
+        now = time.monotonic() if now is None else now
+        visible = set(visible_pids)
+        foreground = set(foreground_pids)
+        changes: Dict[int, str] = {}
+
+        # Olvidar procesos terminados
+        self.removed_pids = {p for p in self._state if p not in samples}
+        for pid in self.removed_pids:
+            del self._state[pid]
+
+        for pid, (create_time, cpu_seconds, io_bytes) in samples.items():
+            entry = self._state.get(pid)
+            if entry is None or entry['create_time'] != create_time:
+                # Proceso nuevo o PID reutilizado
+                if entry is not None:
+                    self.removed_pids.add(pid)
+                entry = {
+                    'create_time': create_time,
+                    'tier': None,
+                    'cpu_total': cpu_seconds,
+                    'io_total': io_bytes,
+                    'sampled_at': now,
+                    'cpu_rate': 0.0,
+                    'io_rate': 0.0,
+                    'last_foreground': None,
+                    'quiet_since': now,
+                    'hog': False,
+                }
+                self._state[pid] = entry
+            else:
+                self._sample(entry, cpu_seconds, io_bytes, now)
+
+            if pid in foreground:
+                entry['last_foreground'] = now
+                entry['quiet_since'] = now
+                entry['tier'] = None
+                continue
+
+            tier = self._classify(entry, pid in visible, now)
+            if tier != entry['tier']:
+                entry['tier'] = tier
+                changes[pid] = tier
+
+        if changes:
+            logger.debug(f"[BackgroundTiers] {len(changes)} cambios de nivel: {self.counts()}")
+        return changes
+
+    def _sample(self, entry: Dict[str, Any], cpu_seconds: float, io_bytes: float, now: float) -> None:
+        """Actualiza las tasas suavizadas de un proceso ya conocido."""
+        dt = now - entry['sampled_at']
+        if dt <= 0:
+            return
+        cpu_rate = max(0.0, cpu_seconds - entry['cpu_total']) / dt * 100.0
+        io_rate = max(0.0, io_bytes - entry['io_total']) / dt
+        alpha = self.EMA_ALPHA
+        entry['cpu_rate'] = (1 - alpha) * entry['cpu_rate'] + alpha * cpu_rate
+        entry['io_rate'] = (1 - alpha) * entry['io_rate'] + alpha * io_rate
+        entry['cpu_total'] = cpu_seconds
+        entry['io_total'] = io_bytes
+        entry['sampled_at'] = now
+
+        if entry['cpu_rate'] > self.IDLE_CPU_PERCENT or entry['io_rate'] > self.IDLE_IO_RATE:
+            entry['quiet_since'] = now
+
+        if entry['hog']:
+            entry['hog'] = (entry['cpu_rate'] > self.HOG_CPU_PERCENT * self.HOG_EXIT_FRACTION
+                            or entry['io_rate'] > self.HOG_IO_RATE * self.HOG_EXIT_FRACTION)
+        else:
+            entry['hog'] = (entry['cpu_rate'] > self.HOG_CPU_PERCENT
+                            or entry['io_rate'] > self.HOG_IO_RATE)
+
+    def _classify(self, entry: Dict[str, Any], is_visible: bool, now: float) -> str:
+        """Decide el nivel de un proceso en segundo plano."""
+        last_fg = entry['last_foreground']
+        if last_fg is not None and now - last_fg < self.RECENT_WINDOW:
+            return TIER_RECENT
+        if entry['hog']:
+            return TIER_HOG
+        if is_visible:
+            return TIER_VISIBLE
+        if now - entry['quiet_since'] >= self.IDLE_AFTER:
+            return TIER_IDLE
+        return TIER_BACKGROUND
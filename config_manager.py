@@ -38,7 +38,11 @@ class ConfigManager:
             'game_mode_enabled': False,
             'ahorro_mode_enabled': False,
             'extremo_mode_enabled': False,
-            'module_manager_enabled': True
+            'module_manager_enabled': True,
+            'background_cpu_budget': 20,
+            'core_sample_interval': 1.0,
+            'smt_sibling_parking': True,
+            'global_affinity_planner': True
         }
     
     def load(self) -> bool:
@@ -51,6 +51,7 @@ PROCESS_ALL_ACCESS = 0x1F0FFF
 THREAD_ALL_ACCESS = 0x1F03FF
 THREAD_SET_INFORMATION = 0x0020
 THREAD_QUERY_INFORMATION = 0x0040
+THREAD_SET_LIMITED_INFORMATION = 0x0400
 SE_PRIVILEGE_ENABLED = 0x00000002
 TOKEN_ADJUST_PRIVILEGES = 0x0020
 TOKEN_QUERY = 0x0008
@@ -106,10 +107,15 @@ JOB_OBJECT_LIMIT_AFFINITY = 0x00000010
 JOB_OBJECT_LIMIT_PRIORITY_CLASS = 0x00000020
 JOB_OBJECT_LIMIT_PRESERVE_JOB_TIME = 0x00000040
 JOB_OBJECT_LIMIT_SCHEDULING_CLASS = 0x00000080
+JOB_OBJECT_LIMIT_BREAKAWAY_OK = 0x00000800
+JOB_OBJECT_LIMIT_SILENT_BREAKAWAY_OK = 0x00001000
 JOB_OBJECT_CPU_RATE_CONTROL_ENABLE = 0x00000001
 JOB_OBJECT_CPU_RATE_CONTROL_WEIGHT_BASED = 0x00000002
 JOB_OBJECT_CPU_RATE_CONTROL_HARD_CAP = 0x00000004
 JOB_OBJECT_CPU_RATE_CONTROL_NOTIFY = 0x00000008
+JOB_OBJECT_INFO_BASIC_ACCOUNTING = 1        # JobObjectBasicAccountingInformation
+JOB_OBJECT_INFO_CPU_RATE_CONTROL = 15       # JobObjectCpuRateControlInformation
+JOB_OBJECT_INFO_EXTENDED_LIMIT = 9          # JobObjectExtendedLimitInformation
 
 # --- Constantes para DeviceIoControl ---
 FILE_DEVICE_UNKNOWN = 0x00000022
@@ -215,12 +221,34 @@ class JOBOBJECT_BASIC_LIMIT_INFORMATION(ctypes.Structure):
         ("SchedulingClass", wintypes.DWORD),
     ]
 
+class JOBOBJECT_EXTENDED_LIMIT_INFORMATION(ctypes.Structure):
+    _fields_ = [
+        ("BasicLimitInformation", JOBOBJECT_BASIC_LIMIT_INFORMATION),
+        ("IoInfo", IO_COUNTERS),
+        ("ProcessMemoryLimit", ctypes.c_size_t),
+        ("JobMemoryLimit", ctypes.c_size_t),
+        ("PeakProcessMemoryUsed", ctypes.c_size_t),
+        ("PeakJobMemoryUsed", ctypes.c_size_t),
+    ]
+
 class JOBOBJECT_CPU_RATE_CONTROL_INFORMATION(ctypes.Structure):
     _fields_ = [
         ("ControlFlags", wintypes.DWORD),
         ("Value", wintypes.DWORD),  # Puede ser CpuRate o Weight según flags
     ]
 
+class JOBOBJECT_BASIC_ACCOUNTING_INFORMATION(ctypes.Structure):
+    _fields_ = [
+        ("TotalUserTime", ctypes.c_int64),          # Unidades de 100 ns
+        ("TotalKernelTime", ctypes.c_int64),
+        ("ThisPeriodTotalUserTime", ctypes.c_int64),
+        ("ThisPeriodTotalKernelTime", ctypes.c_int64),
+        ("TotalPageFaultCount", wintypes.DWORD),
+        ("TotalProcesses", wintypes.DWORD),
+        ("ActiveProcesses", wintypes.DWORD),
+        ("TotalTerminatedProcesses", wintypes.DWORD),
+    ]
+
 class SYSTEM_INFO(ctypes.Structure):
     _fields_ = [
         ("wProcessorArchitecture", wintypes.WORD),
@@ -236,6 +264,39 @@ class SYSTEM_INFO(ctypes.Structure):
         ("wProcessorRevision", wintypes.WORD),
     ]
 
+class PROCESSOR_POWER_INFORMATION(ctypes.Structure):
+    _fields_ = [
+        ("Number", wintypes.ULONG),
+        ("MaxMhz", wintypes.ULONG),
+        ("CurrentMhz", wintypes.ULONG),
+        ("MhzLimit", wintypes.ULONG),
+        ("MaxIdleState", wintypes.ULONG),
+        ("CurrentIdleState", wintypes.ULONG),
+    ]
+
+class SYSTEM_CPU_SET_INFORMATION(ctypes.Structure):
+    # Cabecera (Size, Type) seguida del miembro CpuSet de la unión
+    _fields_ = [
+        ("Size", wintypes.DWORD),
+        ("Type", wintypes.DWORD),
+        ("Id", wintypes.DWORD),
+        ("Group", wintypes.WORD),
+        ("LogicalProcessorIndex", wintypes.BYTE),
+        ("CoreIndex", wintypes.BYTE),
+        ("LastLevelCacheIndex", wintypes.BYTE),
+        ("NumaNodeIndex", wintypes.BYTE),
+        ("EfficiencyClass", wintypes.BYTE),
+        ("AllFlags", wintypes.BYTE),
+        ("SchedulingClass", wintypes.DWORD),
+        ("AllocationTag", ctypes.c_ulonglong),
+    ]
+
+class LASTINPUTINFO(ctypes.Structure):
+    _fields_ = [
+        ("cbSize", wintypes.UINT),
+        ("dwTime", wintypes.DWORD),
+    ]
+
 # =============================================================================
 # --- 3. CARGA DE FUNCIONES DE LA API DE WINDOWS ---
 # =============================================================================
@@ -283,10 +344,11 @@ kernel32.Thread32Next.argtypes = [wintypes.HANDLE, ctypes.POINTER(THREADENTRY32)
 kernel32.Thread32Next.restype = wintypes.BOOL
 
 # Kernel32 - Afinidad y Prioridad
-kernel32.SetProcessAffinityMask.argtypes = [wintypes.HANDLE, ctypes.POINTER(wintypes.ULONG)]
+# Las máscaras de afinidad son DWORD_PTR y se pasan por valor
+kernel32.SetProcessAffinityMask.argtypes = [wintypes.HANDLE, ctypes.c_size_t]
 kernel32.SetProcessAffinityMask.restype = wintypes.BOOL
-kernel32.SetThreadAffinityMask.argtypes = [wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD)]
-kernel32.SetThreadAffinityMask.restype = wintypes.DWORD
+kernel32.SetThreadAffinityMask.argtypes = [wintypes.HANDLE, ctypes.c_size_t]
+kernel32.SetThreadAffinityMask.restype = ctypes.c_size_t
 kernel32.SetPriorityClass.argtypes = [wintypes.HANDLE, wintypes.DWORD]
 kernel32.SetPriorityClass.restype = wintypes.BOOL
 kernel32.SetThreadPriority.argtypes = [wintypes.HANDLE, ctypes.c_int]
@@ -319,6 +381,8 @@ kernel32.SetInformationJobObject.argtypes = [wintypes.HANDLE, ctypes.c_int, wint
 kernel32.SetInformationJobObject.restype = wintypes.BOOL
 kernel32.QueryInformationJobObject.argtypes = [wintypes.HANDLE, ctypes.c_int, wintypes.LPVOID, wintypes.DWORD, ctypes.POINTER(wintypes.DWORD)]
 kernel32.QueryInformationJobObject.restype = wintypes.BOOL
+kernel32.IsProcessInJob.argtypes = [wintypes.HANDLE, wintypes.HANDLE, ctypes.POINTER(wintypes.BOOL)]
+kernel32.IsProcessInJob.restype = wintypes.BOOL
 
 # Kernel32 - DeviceIoControl (✅ NUEVO - Para comunicación con drivers)
 kernel32.CreateFileW.argtypes = [
@@ -372,6 +436,31 @@ user32.GetWindowThreadProcessId.argtypes = [wintypes.HWND, ctypes.POINTER(wintyp
 user32.GetWindowThreadProcessId.restype = wintypes.DWORD
 user32.GetForegroundWindow.argtypes = []
 user32.GetForegroundWindow.restype = wintypes.HWND
+WndEnumProcType = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+user32.EnumWindows.argtypes = [WndEnumProcType, wintypes.LPARAM]
+user32.EnumWindows.restype = wintypes.BOOL
+user32.IsWindowVisible.argtypes = [wintypes.HWND]
+user32.IsWindowVisible.restype = wintypes.BOOL
+user32.IsIconic.argtypes = [wintypes.HWND]
+user32.IsIconic.restype = wintypes.BOOL
+user32.GetLastInputInfo.argtypes = [ctypes.POINTER(LASTINPUTINFO)]
+user32.GetLastInputInfo.restype = wintypes.BOOL
+kernel32.GetTickCount.argtypes = []
+kernel32.GetTickCount.restype = wintypes.DWORD
+kernel32.GetActiveProcessorCount.argtypes = [wintypes.WORD]
+kernel32.GetActiveProcessorCount.restype = wintypes.DWORD
+
+# CPU Sets
+CPU_SET_INFORMATION_TYPE = 0  # CPU_SET_INFORMATION_TYPE.CpuSetInformation
+kernel32.GetSystemCpuSetInformation.argtypes = [wintypes.LPVOID, wintypes.ULONG, ctypes.POINTER(wintypes.ULONG), wintypes.HANDLE, wintypes.ULONG]
+kernel32.GetSystemCpuSetInformation.restype = wintypes.BOOL
+kernel32.SetThreadSelectedCpuSets.argtypes = [wintypes.HANDLE, ctypes.POINTER(wintypes.ULONG), wintypes.ULONG]
+kernel32.SetThreadSelectedCpuSets.restype = wintypes.BOOL
+
+# PowrProf
+PROCESSOR_INFORMATION_LEVEL = 11  # POWER_INFORMATION_LEVEL.ProcessorInformation
+powrprof.CallNtPowerInformation.argtypes = [ctypes.c_int, wintypes.LPVOID, wintypes.ULONG, wintypes.LPVOID, wintypes.ULONG]
+powrprof.CallNtPowerInformation.restype = wintypes.LONG
 
 # =============================================================================
 # --- 4. FUNCIONES DE PRIVILEGIOS ---
@@ -835,6 +924,103 @@ def start_foreground_hook(callback_func):
     return hook_thread
 
 
+def get_visible_window_pids():
+    """
+    Devuelve el conjunto de PIDs que tienen al menos una ventana de nivel
+    superior visible y no minimizada.
+    
+    :return: set de PIDs
+    """
+    pids = set()
+
+    def _enum_proc(hwnd, lparam):
+        if user32.IsWindowVisible(hwnd) and not user32.IsIconic(hwnd):
+            pid = wintypes.DWORD()
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+            if pid.value:
+                pids.add(pid.value)
+        return True
+
+    user32.EnumWindows(WndEnumProcType(_enum_proc), 0)
+    return pids
+
+
+def get_input_idle_seconds():
+    """
+    Segundos transcurridos desde la última entrada de teclado o ratón de la
+    sesión (GetLastInputInfo).
+    
+    :return: Segundos de inactividad del usuario
+    """
+    info = LASTINPUTINFO()
+    info.cbSize = ctypes.sizeof(LASTINPUTINFO)
+    if not user32.GetLastInputInfo(ctypes.byref(info)):
+        raise ctypes.WinError(ctypes.get_last_error())
+    # Ambos contadores son DWORD en ms: la resta módulo 2^32 tolera el desbordamiento a los 49,7 días
+    return ((kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000.0
+
+
+def get_processor_power_information():
+    """
+    Frecuencias por procesador lógico (CallNtPowerInformation/ProcessorInformation).
+    
+    :return: Lista de dicts {'number', 'max_mhz', 'current_mhz', 'mhz_limit'}
+             ordenada por número de procesador
+    """
+    count = kernel32.GetActiveProcessorCount(0xFFFF)  # ALL_PROCESSOR_GROUPS
+    buffer = (PROCESSOR_POWER_INFORMATION * count)()
+    status = powrprof.CallNtPowerInformation(
+        PROCESSOR_INFORMATION_LEVEL, None, 0, buffer, ctypes.sizeof(buffer)
+    )
+    if status != 0:
+        raise OSError(f"CallNtPowerInformation falló: 0x{status & 0xFFFFFFFF:08X}")
+    return sorted((
+        {'number': info.Number, 'max_mhz': info.MaxMhz,
+         'current_mhz': info.CurrentMhz, 'mhz_limit': info.MhzLimit}
+        for info in buffer
+    ), key=lambda info: info['number'])
+
+
+def get_cpu_set_ids():
+    """
+    Identificadores de CPU Set de cada procesador lógico (GetSystemCpuSetInformation).
+    
+    :return: Lista indexada por número global de CPU lógica (los grupos de
+             procesadores se numeran de forma consecutiva) con el Id de su CPU Set
+    """
+    length = wintypes.ULONG(0)
+    kernel32.GetSystemCpuSetInformation(None, 0, ctypes.byref(length), None, 0)
+    buffer = ctypes.create_string_buffer(length.value)
+    if not kernel32.GetSystemCpuSetInformation(buffer, length, ctypes.byref(length), None, 0):
+        raise ctypes.WinError(ctypes.get_last_error())
+    
+    entries = []
+    offset = 0
+    while offset + ctypes.sizeof(SYSTEM_CPU_SET_INFORMATION) <= length.value:
+        info = SYSTEM_CPU_SET_INFORMATION.from_buffer(buffer, offset)
+        if info.Size == 0:
+            break
+        if info.Type == CPU_SET_INFORMATION_TYPE:
+            entries.append((info.Group, info.LogicalProcessorIndex, info.Id))
+        offset += info.Size
+    return [cpu_set_id for _, _, cpu_set_id in sorted(entries)]
+
+
+def set_thread_selected_cpu_sets(thread_id, cpu_set_ids):
+    """
+    Restringe un hilo a un conjunto de CPU Sets (SetThreadSelectedCpuSets).
+    
+    :param thread_id: TID del hilo
+    :param cpu_set_ids: Ids de CPU Set; una lista vacía devuelve el hilo al planificador del sistema
+    :return: True si se aplicó
+    """
+    with thread_handle(thread_id, THREAD_SET_LIMITED_INFORMATION) as handle:
+        if not handle:
+            return False
+        ids = (wintypes.ULONG * len(cpu_set_ids))(*cpu_set_ids)
+        return bool(kernel32.SetThreadSelectedCpuSets(handle, ids if cpu_set_ids else None, len(cpu_set_ids)))
+
+
 # =============================================================================
 # --- 7. FUNCIONES AUXILIARES AVANZADAS ---
 # =============================================================================
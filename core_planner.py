@@ -0,0 +1,433 @@
+"""
+Módulo de Planificación de Cores
+--------------------------------
+
+Calcula planes de afinidad disjuntos para varios roles fijados a la vez
+(juego, codificador/streaming y voz), a partir de la topología de la CPU y
+de la carga medida de cada rol, y un plan global para todos los procesos
+que reparte el trabajo de fondo entre los cores libres minimizando la
+interferencia con el primer plano. El módulo es de cálculo puro: devuelve
+planes (o sus diferencias) y el Gestor se encarga de aplicarlos.
+
+Dependencias externas:
+- math, logging: Biblioteca estándar de Python
+"""
+
+import logging
+import math
+from collections import namedtuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("CorePlanner")
+
+# Diferencia entre dos planes globales: changes {pid: (CPUs)}, released [pids]
+AffinityPlanDiff = namedtuple('AffinityPlanDiff', ['changes', 'released'])
+
+# Nombres de proceso (en minúsculas) que identifican cada rol fijado
+ROLE_PROCESS_NAMES: Dict[str, set] = {
+    'encoder': {
+        'obs64.exe', 'obs32.exe', 'obs.exe', 'ffmpeg.exe', 'streamlabs obs.exe',
+        'xsplit.core.exe', 'handbrake.exe', 'nvidia broadcast.exe'
+    },
+    'voice': {
+        'discord.exe', 'teamspeak.exe', 'ts3client_win64.exe', 'ts3client_win32.exe',
+        'mumble.exe', 'ventrilo.exe', 'teams.exe', 'zoom.exe'
+    },
+}
+
+
+def physical_cores_from_topology(topology: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Normaliza un diccionario de topología a una lista de cores físicos.
+
+    Acepta el formato de ModuloMonitorizacion/CPPTopology ('p_cores',
+    'e_cores', 'smt_pairs' y opcionalmente 'core_rank' por CPU lógica).
+
+    :return: Lista de {'core', 'logical', 'efficiency', 'rank'} ordenada de
+             mejor a peor (P-cores primero, después mayor rango)
+    """
+    p_cores = list(topology.get('p_cores') or [])
+    e_cores = list(topology.get('e_cores') or [])
+    if not p_cores and not e_cores:
+        p_cores = list(range(int(topology.get('total', 0) or 0)))
+    ranks = topology.get('core_rank') or {}
+
+    sibling_of: Dict[int, int] = {}
+    for pair in topology.get('smt_pairs') or []:
+        if len(pair) == 2:
+            sibling_of[pair[0]] = pair[1]
+            sibling_of[pair[1]] = pair[0]
+
+    efficiency = {cpu: 1 for cpu in p_cores}
+    efficiency.update({cpu: 0 for cpu in e_cores})
+
+    cores: List[Dict[str, Any]] = []
+    seen = set()
+    for cpu in sorted(efficiency):
+        if cpu in seen:
+            continue
+        logical = [cpu]
+        sibling = sibling_of.get(cpu)
+        if sibling is not None and sibling in efficiency and sibling not in seen:
+            logical.append(sibling)
+        seen.update(logical)
+        cores.append({
+            'core': len(cores),
+            'logical': sorted(logical),
+            'efficiency': efficiency[cpu],
+            'rank': max(ranks.get(c, ranks.get(str(c), 0)) for c in logical),
+        })
+
+    cores.sort(key=lambda c: (-c['efficiency'], -c['rank'], c['logical'][0]))
+    return cores
+
+
+class CorePartitionPlanner:
+    """
+    Reparte los cores físicos entre roles fijados de forma disjunta.
+
+    - 'game': los mejores cores físicos.
+    - 'encoder': un conjunto separado, empezando por los cores menos valiosos
+      (E-cores en arquitecturas híbridas).
+    - 'voice': una pequeña porción protegida.
+    - 'shared': el resto, para el sistema y los procesos de fondo.
+
+    Las cargas medidas (en "cores equivalentes", p.ej. cpu_percent / 100)
+    redimensionan las particiones con histéresis para no mover hilos
+    continuamente.
+    """
+
+    ROLE_ORDER = ('game', 'voice', 'encoder')
+
+    # Cores físicos mínimos/máximos (fracción del total) por rol
+    ROLE_LIMITS: Dict[str, Dict[str, float]] = {
+        'game': {'min': 2, 'max_fraction': 0.75, 'default_fraction': 0.5},
+        'encoder': {'min': 1, 'max_fraction': 0.5, 'default_fraction': 0.25},
+        'voice': {'min': 1, 'max_fraction': 0.125, 'default_fraction': 0.0},
+    }
+
+    # Margen sobre la carga medida al dimensionar una partición
+    LOAD_HEADROOM = 1.25
+    # Cores físicos que siempre quedan libres para el resto del sistema
+    SHARED_RESERVE = 1
+    # Rondas consecutivas que debe mantenerse un cambio antes de aplicarlo
+    HYSTERESIS_ROUNDS = 2
+
+    def __init__(self, topology: Dict[str, Any]) -> None:
+        self.cores: List[Dict[str, Any]] = physical_cores_from_topology(topology)
+        self.plan: Dict[str, List[int]] = {}
+        self.counts: Dict[str, int] = {}
+        self._pending_counts: Optional[Dict[str, int]] = None
+        self._pending_rounds: int = 0
+
+    # --- Dimensionado ---
+
+    def _desired_counts(self, roles: Iterable[str],
+                        loads: Optional[Dict[str, float]]) -> Dict[str, int]:
+        """Calcula cuántos cores físicos recibe cada rol activo."""
+        total = len(self.cores)
+        active = [r for r in self.ROLE_ORDER if r in set(roles)]
+        if not active or total == 0:
+            return {}
+
+        available = max(len(active), total - self.SHARED_RESERVE)
+        available = min(available, total)
+
+        desired: Dict[str, int] = {}
+        for role in active:
+            limits = self.ROLE_LIMITS[role]
+            max_cores = max(int(limits['min']), int(total * limits['max_fraction']))
+            load = (loads or {}).get(role)
+            if load is not None:
+                want = math.ceil(load * self.LOAD_HEADROOM)
+            else:
+                want = round(total * limits['default_fraction'])
+            desired[role] = max(int(limits['min']), min(max_cores, want))
+
+        # Si no caben, recortar primero el codificador y después el juego:
+        # primero hasta su mínimo, luego hasta un core y, en topologías
+        # diminutas, dejando sin partición propia al rol menos prioritario.
+        overflow = sum(desired.values()) - available
+        for floor_of in (lambda r: int(self.ROLE_LIMITS[r]['min']), lambda r: 1, lambda r: 0):
+            for role in ('encoder', 'game', 'voice'):
+                if overflow <= 0:
+                    return desired
+                if role not in desired:
+                    continue
+                cut = min(desired[role] - floor_of(role), overflow)
+                if cut > 0:
+                    desired[role] -= cut
+                    overflow -= cut
+        return desired
+
+    def _assign(self, counts: Dict[str, int]) -> Dict[str, List[int]]:
+        """Asigna cores físicos concretos a partir de los tamaños por rol."""
+        remaining = list(self.cores)  # Ordenados de mejor a peor
+        plan: Dict[str, List[int]] = {}
+
+        def take_best(n: int) -> List[Dict[str, Any]]:
+            taken = remaining[:n]
+            del remaining[:n]
+            return taken
+
+        def take_worst(n: int) -> List[Dict[str, Any]]:
+            if n <= 0:
+                return []
+            taken = remaining[-n:]
+            del remaining[-n:]
+            return taken
+
+        if 'game' in counts:
+            plan['game'] = take_best(counts['game'])
+        if 'encoder' in counts:
+            plan['encoder'] = take_worst(counts['encoder'])
+        if 'voice' in counts:
+            plan['voice'] = take_best(counts['voice'])
+        plan['shared'] = remaining
+
+        return {
+            role: sorted(cpu for c in cores for cpu in c['logical'])
+            for role, cores in plan.items()
+        }
+
+    # --- API pública ---
+
+    def plan_partitions(self, roles: Iterable[str],
+                        loads: Optional[Dict[str, float]] = None) -> Dict[str, List[int]]:
+        """
+        Calcula un plan nuevo sin histéresis.
+
+        :param roles: Roles activos ('game', 'encoder', 'voice')
+        :param loads: Carga medida por rol en cores equivalentes
+        :return: {rol: [CPUs lógicas]} con conjuntos disjuntos, incluido 'shared'
+        """
+        self.counts = self._desired_counts(roles, loads)
+        self.plan = self._assign(self.counts)
+        self._pending_counts = None
+        self._pending_rounds = 0
+        return self.plan
+
+    def rebalance(self, roles: Iterable[str],
+                  loads: Optional[Dict[str, float]] = None) -> bool:
+        """
+        Reevalúa el plan con las cargas medidas.
+
+        Los cambios de tamaño sólo se aplican si persisten durante
+        HYSTERESIS_ROUNDS llamadas; un cambio en el conjunto de roles activos
+        se aplica de inmediato.
+
+        :return: True si el plan cambió
+        """
+        roles = set(roles)
+        desired = self._desired_counts(roles, loads)
+        if set(desired) != set(self.counts):
+            self.plan_partitions(roles, loads)
+            return True
+        if desired == self.counts:
+            self._pending_counts = None
+            self._pending_rounds = 0
+            return False
+
+        if desired == self._pending_counts:
+            self._pending_rounds += 1
+        else:
+            self._pending_counts = desired
+            self._pending_rounds = 1
+
+        if self._pending_rounds < self.HYSTERESIS_ROUNDS:
+            return False
+
+        logger.info(f"[CorePlanner] Rebalanceo de particiones: {self.counts} → {desired}")
+        self.counts = desired
+        self.plan = self._assign(desired)
+        self._pending_counts = None
+        self._pending_rounds = 0
+        return True
+
+
+class GlobalAffinityPlanner:
+    """
+    Plan de afinidad único para todos los procesos.
+
+    - Roles fijados ('game', 'voice', 'encoder'): sus particiones de
+      CorePartitionPlanner; el resto del árbol en primer plano
+      ('foreground') comparte la partición del juego. Sin juego no hay
+      particiones y el primer plano no se confina.
+    - Fondo ('background'): los cores compartidos se dividen en grupos por
+      L3 y clase de eficiencia, y los procesos con carga se empaquetan de
+      mayor a menor en el grupo de menor coste: ocupación tras añadirlo más
+      una penalización si el grupo comparte L3 o nodo NUMA con el primer
+      plano o son P-cores. Los procesos casi inactivos van a los grupos de
+      menor penalización. Un proceso cuyos hilos activos no caben en un
+      grupo (un CCD) no se confina: recibe todos los cores compartidos.
+
+    Las particiones son de cores físicos completos, de modo que los
+    hermanos SMT del primer plano nunca reciben trabajo de fondo. Un
+    proceso ya colocado sólo cambia de grupo si el nuevo mejora su coste en
+    MOVE_MARGIN, y plan() devuelve únicamente lo que cambió respecto al plan
+    anterior.
+    """
+
+    FOREGROUND_ROLES = ('game', 'voice', 'encoder', 'foreground')
+
+    # Carga (cores equivalentes) por debajo de la cual un proceso de fondo no se empaqueta
+    IDLE_LOAD = 0.05
+    # Penalizaciones de interferencia con el primer plano
+    SHARED_L3_PENALTY = 0.5
+    SHARED_NUMA_PENALTY = 0.25
+    P_CORE_PENALTY = 0.25
+    # Mejora de coste necesaria para mover un proceso de fondo de grupo
+    MOVE_MARGIN = 0.25
+    # Tolerancia al redondear la carga a hilos activos mínimos
+    THREAD_EPSILON = 0.05
+
+    def __init__(self, topology: Dict[str, Any]) -> None:
+        self.partitions = CorePartitionPlanner(topology)
+        self.hybrid = bool(topology.get('e_cores'))
+        self.l3_groups: List[frozenset] = [frozenset(g) for g in topology.get('l3_cache_groups') or [] if g]
+        self.numa_nodes: List[frozenset] = [frozenset(n) for n in topology.get('numa_nodes') or [] if n]
+        self.all_cpus: Tuple[int, ...] = tuple(sorted(cpu for c in self.partitions.cores for cpu in c['logical']))
+        self.role_cpus: Dict[str, Tuple[int, ...]] = {}
+        self.applied: Dict[int, Tuple[int, ...]] = {}
+        self._bin_of: Dict[int, Tuple[int, ...]] = {}
+        # Procesos de fondo movidos de un grupo L3 (CCD) a otro
+        self.cross_l3_migrations = 0
+
+    # --- Grupos de fondo ---
+
+    def _l3_index(self, cpu: int) -> int:
+        for i, group in enumerate(self.l3_groups):
+            if cpu in group:
+                return i
+        return -1
+
+    def _background_bins(self, foreground: frozenset) -> List[Dict[str, Any]]:
+        """Grupos de cores compartidos con su capacidad (cores físicos) y penalización."""
+        shared = self.role_cpus.get('shared', self.all_cpus)
+        shared_set = frozenset(shared)
+        keyed: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        for core in self.partitions.cores:
+            if shared_set.issuperset(core['logical']):
+                key = (self._l3_index(core['logical'][0]), core['efficiency'])
+                keyed.setdefault(key, []).append(core)
+
+        bins = []
+        for (l3, efficiency), cores in sorted(keyed.items()):
+            cpus = frozenset(cpu for c in cores for cpu in c['logical'])
+            penalty = 0.0
+            if foreground:
+                if l3 >= 0 and not self.l3_groups[l3].isdisjoint(foreground):
+                    penalty += self.SHARED_L3_PENALTY
+                if any(not node.isdisjoint(foreground) and not node.isdisjoint(cpus) for node in self.numa_nodes):
+                    penalty += self.SHARED_NUMA_PENALTY
+                if self.hybrid and efficiency:
+                    penalty += self.P_CORE_PENALTY
+            bins.append({'cpus': tuple(sorted(cpus)), 'capacity': float(len(cores)),
+                         'penalty': penalty, 'load': 0.0, 'l3': l3})
+        return bins
+
+    # --- API pública ---
+
+    def plan(self, processes: Dict[int, Tuple[str, float]],
+             active_threads: Optional[Dict[int, int]] = None) -> AffinityPlanDiff:
+        """
+        Calcula el plan global y lo compara con el anterior.
+
+        :param processes: {pid: (rol, carga en cores equivalentes)} de todos los
+                          procesos a colocar; rol es 'game', 'voice', 'encoder',
+                          'foreground' o 'background'
+        :param active_threads: Hilos activos medidos por PID (ProcessThreadProfiles);
+                               sin medida se toma la carga redondeada hacia arriba
+        :return: AffinityPlanDiff con las afinidades que cambiaron y los PIDs
+                 que ya no están en el plan
+        """
+        role_loads: Dict[str, float] = {}
+        foreground_load = 0.0
+        for role, load in processes.values():
+            if role == 'foreground':
+                foreground_load += load
+            elif role != 'background':
+                role_loads[role] = role_loads.get(role, 0.0) + load
+        if 'game' in role_loads:
+            # El resto del árbol en primer plano comparte la partición del juego
+            role_loads['game'] += foreground_load
+
+        if 'game' in role_loads:
+            if not self.partitions.plan:
+                self.partitions.plan_partitions(role_loads, role_loads)
+            else:
+                self.partitions.rebalance(role_loads, role_loads)
+            self.role_cpus = {role: tuple(cpus) for role, cpus in self.partitions.plan.items() if cpus}
+        else:
+            self.role_cpus = {}
+        if not self.role_cpus.get('shared'):
+            # Sin cores libres el fondo comparte todas las CPUs
+            self.role_cpus['shared'] = self.all_cpus
+
+        foreground = frozenset(cpu for role in ('game', 'voice') for cpu in self.role_cpus.get(role, ()))
+        bins = self._background_bins(foreground)
+        by_cpus = {b['cpus']: b for b in bins}
+        least = min((b['penalty'] for b in bins), default=0.0)
+        calm = [b for b in bins if b['penalty'] == least]
+        idle_cpus = tuple(sorted(cpu for b in calm for cpu in b['cpus'])) or self.role_cpus['shared']
+
+        new_plan: Dict[int, Tuple[int, ...]] = {}
+        bin_of: Dict[int, Tuple[int, ...]] = {}
+        loaded: List[Tuple[float, int]] = []
+        for pid, (role, load) in processes.items():
+            if role == 'background':
+                if load >= self.IDLE_LOAD and bins:
+                    loaded.append((load, pid))
+                else:
+                    new_plan[pid] = idle_cpus
+            else:
+                key = 'game' if role == 'foreground' else role
+                new_plan[pid] = self.role_cpus.get(key) or self.role_cpus.get('game') or self.all_cpus
+
+        # Empaquetado de mayor a menor carga en el grupo de menor coste
+        active_threads = active_threads or {}
+        total_capacity = sum(b['capacity'] for b in bins)
+        loaded.sort(key=lambda item: (-item[0], item[1]))
+        for load, pid in loaded:
+            threads = max(active_threads.get(pid, 0), math.ceil(load - self.THREAD_EPSILON))
+            fitting = [b for b in bins if threads <= len(b['cpus'])]
+            if not fitting:
+                # No cabe en un CCD: todos los cores compartidos, con la carga repartida
+                for b in bins:
+                    b['load'] += load * b['capacity'] / total_capacity
+                new_plan[pid] = self.role_cpus['shared']
+                continue
+            best = min(fitting, key=lambda b: ((b['load'] + load) / b['capacity'] + b['penalty'], b['cpus']))
+            previous = by_cpus.get(self._bin_of.get(pid))
+            if previous is not None and previous is not best and previous in fitting:
+                cost_previous = (previous['load'] + load) / previous['capacity'] + previous['penalty']
+                cost_best = (best['load'] + load) / best['capacity'] + best['penalty']
+                if cost_previous <= cost_best + self.MOVE_MARGIN:
+                    best = previous
+            if previous is not None and previous['l3'] != best['l3']:
+                self.cross_l3_migrations += 1
+            best['load'] += load
+            new_plan[pid] = bin_of[pid] = best['cpus']
+
+        changes = {pid: cpus for pid, cpus in new_plan.items() if self.applied.get(pid) != cpus}
+        released = [pid for pid in self.applied if pid not in new_plan]
+        self.applied = new_plan
+        self._bin_of = bin_of
+        if changes or released:
+            logger.debug(f"[CorePlanner] Plan global: {len(changes)} cambios, {len(released)} procesos fuera")
+        return AffinityPlanDiff(changes, released)
+
+    def forget(self, pid: int) -> None:
+        """Olvida un proceso cuya afinidad no se pudo aplicar (se reintenta en el siguiente plan)."""
+        self.applied.pop(pid, None)
+        self._bin_of.pop(pid, None)
+
+    def release_all(self) -> List[int]:
+        """Vacía el plan y devuelve los PIDs a los que restaurar todas las CPUs."""
+        released = list(self.applied)
+        self.applied = {}
+        self._bin_of = {}
+        self.role_cpus = {}
+        self.partitions.plan = {}
+        self.partitions.counts = {}
+        return released
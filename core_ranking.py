@@ -0,0 +1,313 @@
+"""
+Módulo de Clasificación de Cores Preferidos
+-------------------------------------------
+
+Ordena los cores físicos del más rápido al más lento para todas las rutas de
+colocación (particionado de roles, hilos calientes, modo extremo):
+
+- Datos estáticos: en Linux, acpi_cppc/highest_perf (el rango "preferred
+  core" que publica el firmware) y cpufreq/cpuinfo_max_freq; en Windows, la
+  frecuencia máxima por procesador de CallNtPowerInformation. Deciden el orden.
+- Micro-prueba corta de un solo hilo fijada a cada core (mediana de varias
+  rondas): sólo desempata cores con el mismo dato estático, o decide el orden
+  si no hay ninguna fuente estática. Si contradice los datos estáticos se
+  registra la discrepancia.
+
+El resultado ('core_rank', mayor es mejor, por CPU lógica) se guarda junto al
+módulo y sólo es válido durante el arranque en que se midió.
+
+Dependencias externas:
+- ctypes: Biblioteca estándar (SetThreadAffinityMask sólo se carga en Windows)
+- json, logging, os, time: Biblioteca estándar de Python
+"""
+
+import ctypes
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from topology import cpu_signature
+
+logger = logging.getLogger("CoreRanking")
+
+SYSFS_CPU = '/sys/devices/system/cpu'
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".core_rank_cache.json")
+
+# Diferencia relativa mínima para considerar que una fuente distingue cores
+MIN_SPREAD = 0.01
+# Tolerancia al comparar el instante de arranque guardado (s)
+BOOT_TIME_TOLERANCE = 2.0
+# Rondas de la micro-prueba: pocas si sólo desempata, más si es la única fuente
+BENCH_ROUNDS = 5
+BENCH_ROUNDS_ALONE = 9
+
+
+# --- Datos estáticos ---
+
+def _read_number(path: str) -> Optional[float]:
+    try:
+        with open(path, 'r') as f:
+            return float(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def read_sysfs_rank_data(root: str = SYSFS_CPU) -> Dict[int, Dict[str, float]]:
+    """
+    Lee highest_perf (CPPC) y la frecuencia máxima de cada CPU lógica en Linux.
+
+    :return: {cpu: {'highest_perf', 'max_freq_mhz'}} con las claves disponibles
+    """
+    data: Dict[int, Dict[str, float]] = {}
+    try:
+        entries = os.listdir(root)
+    except OSError:
+        return data
+    for entry in entries:
+        if not entry.startswith('cpu') or not entry[3:].isdigit():
+            continue
+        cpu = int(entry[3:])
+        values: Dict[str, float] = {}
+        highest_perf = _read_number(os.path.join(root, entry, 'acpi_cppc', 'highest_perf'))
+        if highest_perf is not None:
+            values['highest_perf'] = highest_perf
+        max_freq = _read_number(os.path.join(root, entry, 'cpufreq', 'cpuinfo_max_freq'))
+        if max_freq is not None:
+            values['max_freq_mhz'] = max_freq / 1000.0
+        if values:
+            data[cpu] = values
+    return data
+
+
+def read_windows_rank_data(power_info: Optional[Callable[[], List[Dict[str, Any]]]] = None
+                           ) -> Dict[int, Dict[str, float]]:
+    """
+    Frecuencia máxima por CPU lógica en Windows (core.get_processor_power_information).
+
+    :return: {cpu: {'max_freq_mhz'}}
+    """
+    if power_info is None:
+        import core
+        power_info = core.get_processor_power_information
+    return {info['number']: {'max_freq_mhz': float(info['max_mhz'])} for info in power_info()}
+
+
+def static_scores(data: Dict[int, Dict[str, float]], physical_cores: Sequence[Sequence[int]]):
+    """
+    Puntuación estática (0-1, relativa al mejor) de cada core físico.
+
+    Se usa highest_perf si está disponible para todos los cores y distingue
+    alguno; si no, la frecuencia máxima.
+
+    :return: (lista de puntuaciones o None, nombre de la fuente)
+    """
+    for key, source in (('highest_perf', 'cppc'), ('max_freq_mhz', 'max_freq')):
+        values = []
+        for logical in physical_cores:
+            known = [data[c][key] for c in logical if key in data.get(c, {})]
+            if not known:
+                break
+            values.append(max(known))
+        else:
+            if values and max(values) > 0 and max(values) - min(values) > MIN_SPREAD * max(values):
+                best = max(values)
+                return [v / best for v in values], source
+    return None, 'none'
+
+
+# --- Micro-prueba fijada a un core ---
+
+_kernel32 = None
+
+
+def _get_kernel32():
+    """Carga kernel32 de forma diferida para que el módulo se importe en cualquier plataforma."""
+    global _kernel32
+    if _kernel32 is None:
+        _kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        _kernel32.GetCurrentThread.restype = ctypes.c_void_p
+        _kernel32.SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        _kernel32.SetThreadAffinityMask.restype = ctypes.c_size_t
+    return _kernel32
+
+
+def pin_current_thread(cpu: int) -> Callable[[], None]:
+    """
+    Fija el hilo actual a una CPU lógica.
+
+    :return: Callable que restaura la afinidad anterior
+    :raise OSError: Si la plataforma no permite fijar el hilo
+    """
+    if hasattr(os, 'sched_setaffinity'):
+        previous = os.sched_getaffinity(0)
+        os.sched_setaffinity(0, {cpu})
+        return lambda: os.sched_setaffinity(0, previous)
+    if hasattr(ctypes, 'WinDLL') and cpu < 8 * ctypes.sizeof(ctypes.c_size_t):
+        kernel32 = _get_kernel32()
+        thread = kernel32.GetCurrentThread()
+        previous = kernel32.SetThreadAffinityMask(thread, 1 << cpu)
+        if not previous:
+            raise ctypes.WinError(ctypes.get_last_error())
+        return lambda: kernel32.SetThreadAffinityMask(thread, previous)
+    raise OSError(f"No se puede fijar el hilo a la CPU {cpu}")
+
+
+def _workload(iterations: int) -> int:
+    # Aritmética entera dependiente: sensible a la frecuencia, no a la memoria
+    x = 1
+    for i in range(iterations):
+        x = (x * 1103515245 + i) & 0xFFFFFFFF
+    return x
+
+
+def benchmark_core(cpu: int, duration: float = 0.05, rounds: int = BENCH_ROUNDS,
+                   pin: Callable[[int], Callable[[], None]] = pin_current_thread) -> Optional[float]:
+    """
+    Iteraciones por segundo de una carga de un solo hilo fijada a la CPU.
+
+    Se toma la mediana de varias rondas: una ronda con una expulsión del
+    planificador o un pico de turbo no decide el resultado.
+
+    :return: Iteraciones/s, o None si no se pudo fijar el hilo
+    """
+    try:
+        restore = pin(cpu)
+    except OSError as e:
+        logger.debug(f"[CoreRanking] Micro-prueba omitida en CPU {cpu}: {e}")
+        return None
+    try:
+        _workload(1000)  # Calentamiento tras la migración
+        rates = []
+        per_round = duration / rounds
+        for _ in range(rounds):
+            iterations = 0
+            start = time.perf_counter()
+            elapsed = 0.0
+            while elapsed < per_round:
+                _workload(2000)
+                iterations += 2000
+                elapsed = time.perf_counter() - start
+            rates.append(iterations / elapsed)
+        rates.sort()
+        middle = len(rates) // 2
+        return rates[middle] if len(rates) % 2 else (rates[middle - 1] + rates[middle]) / 2.0
+    finally:
+        restore()
+
+
+def _concordance(a: Sequence[float], b: Sequence[float]) -> float:
+    """Fracción de pares de cores ordenados igual por ambas puntuaciones."""
+    pairs = concordant = 0
+    for i in range(len(a)):
+        for j in range(i + 1, len(a)):
+            if a[i] == a[j]:
+                continue
+            pairs += 1
+            if (a[i] - a[j]) * (b[i] - b[j]) > 0:
+                concordant += 1
+    return concordant / pairs if pairs else 1.0
+
+
+def _break_ties(static: Sequence[float], tie_breaker: Sequence[float]) -> List[float]:
+    """
+    Desempata cores con la misma puntuación estática sin alterar el orden
+    entre puntuaciones distintas: cada core baja como mucho media separación
+    mínima entre valores estáticos, en proporción a lo que pierde en la
+    micro-prueba (0-1, relativa al mejor).
+    """
+    distinct = sorted(set(static))
+    gaps = [high - low for low, high in zip(distinct, distinct[1:])]
+    half_gap = (min(gaps) if gaps else 1.0) / 2.0
+    return [s - half_gap * (1.0 - t) for s, t in zip(static, tie_breaker)]
+
+
+def rank_cores(physical_cores: Sequence[Sequence[int]], static: Optional[Sequence[float]],
+               bench: Optional[Sequence[Optional[float]]]) -> Dict[str, Any]:
+    """
+    Rango por CPU lógica: los datos estáticos deciden el orden y la
+    micro-prueba sólo desempata; sin datos estáticos decide la micro-prueba.
+
+    :return: {'core_rank': {str(cpu): 0-1000}, 'agreement': concordancia entre
+             ambas fuentes o None si falta alguna}
+    """
+    bench_scores = None
+    if bench and all(b for b in bench):
+        best = max(bench)
+        bench_scores = [b / best for b in bench]
+
+    agreement = None
+    if static is not None:
+        scores = list(static)
+        if bench_scores is not None:
+            scores = _break_ties(static, bench_scores)
+            agreement = _concordance(static, bench_scores)
+    else:
+        scores = bench_scores or [1.0] * len(physical_cores)
+
+    core_rank = {str(cpu): int(round(score * 1000))
+                 for logical, score in zip(physical_cores, scores) for cpu in logical}
+    return {'core_rank': core_rank, 'agreement': agreement}
+
+
+# --- Caché por arranque ---
+
+def load_core_rank(physical_cores: Sequence[Sequence[int]], boot_time: float,
+                   cache_file: Optional[str] = DEFAULT_CACHE_FILE,
+                   rank_data: Optional[Callable[[], Dict[int, Dict[str, float]]]] = None,
+                   benchmark_duration: float = 0.05) -> Dict[str, Any]:
+    """
+    Rango de cores preferidos, de la caché si es del arranque actual o medido
+    (datos estáticos + micro-prueba por core físico) si no.
+
+    :param physical_cores: CPUs lógicas de cada core físico (topology 'physical_cores')
+    :param boot_time: Instante de arranque del sistema (psutil.boot_time())
+    :param rank_data: Fuente de datos estáticos (por defecto sysfs o Windows)
+    :param benchmark_duration: Segundos de micro-prueba por core (0 para omitirla)
+    :return: {'core_rank', 'source', 'agreement'}
+    """
+    signature = cpu_signature()
+    if cache_file:
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if (cached.get('signature') == signature
+                    and abs(cached.get('boot_time', 0.0) - boot_time) <= BOOT_TIME_TOLERANCE
+                    and 'ranking' in cached):
+                return cached['ranking']
+        except (OSError, ValueError):
+            pass
+
+    if rank_data is None:
+        rank_data = read_sysfs_rank_data if os.path.isdir(SYSFS_CPU) else read_windows_rank_data
+    try:
+        data = rank_data()
+    except Exception as e:
+        logger.warning(f"[CoreRanking] Datos de rendimiento por core no disponibles: {e}")
+        data = {}
+    static, source = static_scores(data, physical_cores)
+
+    bench = None
+    if benchmark_duration > 0:
+        rounds = BENCH_ROUNDS if static is not None else BENCH_ROUNDS_ALONE
+        bench = [benchmark_core(logical[0], benchmark_duration, rounds) for logical in physical_cores]
+        if all(bench) and source == 'none':
+            source = 'benchmark'
+
+    ranking = dict(rank_cores(physical_cores, static, bench), source=source)
+    agreement = ranking['agreement']
+    if agreement is not None and agreement < 1.0:
+        # El orden sigue siendo el de los datos estáticos; sólo se deja constancia
+        log = logger.warning if agreement < 0.5 else logger.info
+        log(f"[CoreRanking] La micro-prueba discrepa de los datos de {source} "
+            f"(concordancia {agreement:.2f}); se mantiene el orden de {source}")
+    logger.info(f"[CoreRanking] Rango de cores calculado (fuente: {source})")
+
+    if cache_file:
+        try:
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'signature': signature, 'boot_time': boot_time, 'ranking': ranking}, f, indent=4)
+        except OSError as e:
+            logger.warning(f"[CoreRanking] No se pudo guardar la caché: {e}")
+    return ranking
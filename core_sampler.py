@@ -0,0 +1,169 @@
+"""
+Módulo de Muestreo por Core
+---------------------------
+
+Calcula la utilización y la frecuencia actual de cada CPU lógica a partir
+de los contadores acumulados de psutil.cpu_times(percpu=True) (diferencias
+entre dos muestras, de forma vectorizada) y de la frecuencia por core, con
+una cadencia configurable. Expone los conjuntos de cores menos cargados y
+de mayor frecuencia para las decisiones de afinidad.
+
+En Windows psutil.cpu_freq(percpu=True) sólo devuelve un valor global; se
+puede inyectar otra fuente (p.ej. core.get_processor_power_information,
+que da la frecuencia actual de cada procesador).
+
+Dependencias externas:
+- psutil: Contadores de tiempo y frecuencia por CPU
+- numpy (opcional): Diferencias vectorizadas
+- logging, time: Biblioteca estándar de Python
+"""
+
+import logging
+import time
+from typing import Callable, Iterable, List, Optional, Sequence
+
+import psutil
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger("CoreSampler")
+
+
+def _psutil_frequencies() -> List[float]:
+    freqs = psutil.cpu_freq(percpu=True) or []
+    return [f.current for f in freqs]
+
+
+class PerCoreSampler:
+    """
+    Utilización (0-100 %) y frecuencia (MHz) por CPU lógica.
+
+    :param interval: Segundos mínimos entre muestras (las llamadas antes de
+                     tiempo devuelven False sin leer contadores)
+    :param cpu_times: Fuente de tiempos por CPU (por defecto psutil)
+    :param frequencies: Fuente de MHz por CPU; si devuelve un único valor se
+                        aplica a todas
+    """
+
+    def __init__(self, interval: float = 1.0,
+                 cpu_times: Optional[Callable[[], Sequence]] = None,
+                 frequencies: Optional[Callable[[], Sequence[float]]] = None) -> None:
+        self.interval = interval
+        self._cpu_times = cpu_times or (lambda: psutil.cpu_times(percpu=True))
+        self._frequencies = frequencies or _psutil_frequencies
+        self._last_busy = None
+        self._last_total = None
+        self.last_sample: float = 0.0
+        self.count: int = 0
+        self.utilization: List[float] = []
+        self.frequency_mhz: List[float] = []
+        self.frequency_delta_mhz: List[float] = []
+
+    @property
+    def ready(self) -> bool:
+        """True cuando hay al menos una utilización calculada."""
+        return bool(self.utilization)
+
+    def _read_counters(self):
+        """Tiempos ocupado y total acumulados por CPU."""
+        times = self._cpu_times()
+        if NUMPY_AVAILABLE:
+            matrix = np.array([tuple(t) for t in times], dtype=np.float64)
+            fields = getattr(times[0], '_fields', ())
+            idle = matrix[:, fields.index('idle')] if 'idle' in fields else matrix[:, -1]
+            if 'iowait' in fields:
+                idle = idle + matrix[:, fields.index('iowait')]
+            total = matrix.sum(axis=1)
+            return total - idle, total
+        busy, total = [], []
+        for t in times:
+            t_total = sum(t)
+            t_idle = t.idle + getattr(t, 'iowait', 0.0)
+            busy.append(t_total - t_idle)
+            total.append(t_total)
+        return busy, total
+
+    def sample(self, now: Optional[float] = None, force: bool = False) -> bool:
+        """
+        Toma una muestra si ha pasado el intervalo.
+
+        :return: True si se actualizaron los valores
+        """
+        now = time.monotonic() if now is None else now
+        if not force and self._last_total is not None and now - self.last_sample < self.interval:
+            return False
+
+        busy, total = self._read_counters()
+        if self._last_total is not None and len(total) == len(self._last_total):
+            if NUMPY_AVAILABLE:
+                d_total = total - self._last_total
+                d_busy = busy - self._last_busy
+                util = np.where(d_total > 0, d_busy / np.where(d_total > 0, d_total, 1.0) * 100.0, 0.0)
+                self.utilization = np.clip(util, 0.0, 100.0).tolist()
+            else:
+                self.utilization = [
+                    min(max((b - lb) / (t - lt) * 100.0, 0.0), 100.0) if t > lt else 0.0
+                    for b, lb, t, lt in zip(busy, self._last_busy, total, self._last_total)
+                ]
+        self._last_busy, self._last_total = busy, total
+
+        try:
+            freqs = [float(f) for f in self._frequencies()]
+        except Exception as e:
+            logger.debug(f"[CoreSampler] Frecuencias no disponibles: {e}")
+            freqs = []
+        if len(freqs) == 1:
+            freqs = freqs * len(total)
+        if len(freqs) == len(total):
+            previous = self.frequency_mhz if len(self.frequency_mhz) == len(freqs) else freqs
+            self.frequency_delta_mhz = [f - p for f, p in zip(freqs, previous)]
+            self.frequency_mhz = freqs
+
+        self.last_sample = now
+        self.count += 1
+        return True
+
+    # --- Conjuntos de cores para la afinidad ---
+
+    def _candidates(self, candidates: Optional[Iterable[int]]) -> List[int]:
+        n = len(self.utilization) or len(self.frequency_mhz)
+        if candidates is None:
+            return list(range(n))
+        return [c for c in candidates if 0 <= c < n]
+
+    def least_loaded(self, k: int, candidates: Optional[Iterable[int]] = None) -> List[int]:
+        """
+        Los k cores menos cargados (a igual carga, el de mayor frecuencia).
+
+        Sin muestras previas devuelve los primeros candidatos.
+        """
+        cores = self._candidates(candidates)
+        util = self.utilization
+        freq = self.frequency_mhz
+        if util:
+            cores.sort(key=lambda c: (util[c], -(freq[c] if freq else 0.0), c))
+        return cores[:k]
+
+    def highest_clocked(self, k: int, candidates: Optional[Iterable[int]] = None) -> List[int]:
+        """
+        Los k cores de mayor frecuencia actual (a igual frecuencia, el menos cargado).
+
+        Sin frecuencias por core equivale a least_loaded.
+        """
+        cores = self._candidates(candidates)
+        util = self.utilization
+        freq = self.frequency_mhz
+        if freq:
+            cores.sort(key=lambda c: (-freq[c], util[c] if util else 0.0, c))
+        elif util:
+            return self.least_loaded(k, cores)
+        return cores[:k]
+
+    def busy_cores(self, threshold: float = 80.0) -> List[int]:
+        """Cores con utilización por encima del umbral."""
+        return [c for c, u in enumerate(self.utilization) if u >= threshold]
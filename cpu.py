@@ -7,94 +7,230 @@ en la topología detectada por ModuloMonitorizacion.
 """
 import psutil
 import core
+from thread_profiler import ProcessThreadProfiles
+from thread_placement import HotThreadPlacer
+from l3_placement import L3GroupPlacer, is_memory_intensive
+from smt_parking import BackgroundLatencyProbe, SchedulingLatencyProbe, parking_plan, primary_cpus, sibling_map
+from core_planner import physical_cores_from_topology
+from core_ranking import pin_current_thread
+from workload_classifier import WorkloadClassifier, workload_policy
+import cpu_features
 
 class HeterogeneousScheduler:
-    """Gestiona la planificación en arquitecturas híbridas (P-cores/E-cores)."""
+    """
+    Gestiona la planificación en arquitecturas híbridas (P-cores/E-cores) y
+    coloca los hilos más calientes de los procesos sensibles a la latencia
+    en los mejores cores físicos mediante CPU Sets.
+    """
     def __init__(self, topology):
         self.p_cores = topology.get('p_cores', [])
         self.e_cores = topology.get('e_cores', [])
+        # Cores físicos del mejor al peor (P-cores primero, después mayor rango)
+        self.physical_cores = [c['logical'] for c in physical_cores_from_topology(topology)]
+        self._placers = {}
+        self._allowed = {}
+        self._cpu_set_ids = None
 
-    def classify_and_schedule_threads(self, pid, is_latency_sensitive):
-        """Devuelve una máscara de afinidad para hilos basada en sensibilidad a la latencia."""
-        if not self.e_cores:
-            return {} # No es una arquitectura híbrida
+    def classify_and_schedule_threads(self, pid, is_latency_sensitive, hot_threads=None, allowed_cpus=None):
+        """
+        Devuelve una máscara de afinidad para hilos basada en sensibilidad a la
+        latencia y, si se pasan los hilos calientes, aplica su colocación.
+        
+        :param hot_threads: (tid, fracción de core) de mayor a menor (ThreadProfiler.hot_threads)
+        :param allowed_cpus: CPUs lógicas permitidas al proceso (afinidad o partición)
+        """
+        result = {}
+        if self.e_cores:
+            result['thread_affinity'] = self.p_cores if is_latency_sensitive else self.e_cores
+        
+        if is_latency_sensitive and hot_threads is not None:
+            result['thread_placement'] = self.place_hot_threads(pid, hot_threads, allowed_cpus)
+        elif not is_latency_sensitive:
+            self.release_threads(pid)
+        return result
+
+    def place_hot_threads(self, pid, hot_threads, allowed_cpus=None):
+        """
+        Fija los K hilos más calientes a los mejores cores físicos (con
+        histéresis); el resto sigue en manos del planificador del sistema.
+        
+        :return: Colocación actual tid → CPUs lógicas
+        """
+        allowed = frozenset(allowed_cpus) if allowed_cpus is not None else None
+        placer = self._placers.get(pid)
+        if placer is None or self._allowed.get(pid) != allowed:
+            # Partición o afinidad nueva: rehacer la colocación desde cero
+            self.release_threads(pid)
+            cores = [c for c in self.physical_cores if allowed is None or allowed.issuperset(c)]
+            placer = self._placers[pid] = HotThreadPlacer(cores)
+            self._allowed[pid] = allowed
+        
+        changes = placer.update(hot_threads)
+        for tid in changes.release:
+            self._set_thread_cpus(tid, [])
+        for tid, cpus in changes.assign.items():
+            if not self._set_thread_cpus(tid, cpus):
+                placer.assigned.pop(tid, None)
+        return placer.placement()
+
+    def release_threads(self, pid):
+        """Devuelve al planificador del sistema los hilos colocados de un proceso."""
+        placer = self._placers.pop(pid, None)
+        self._allowed.pop(pid, None)
+        if placer is not None:
+            for tid in placer.release_all():
+                self._set_thread_cpus(tid, [])
 
-        target_cores = self.p_cores if is_latency_sensitive else self.e_cores
-        return {'thread_affinity': target_cores}
+    def prune(self, active_pids):
+        """Libera las colocaciones de los procesos que ya no se gestionan."""
+        for pid in [p for p in self._placers if p not in active_pids]:
+            self.release_threads(pid)
+
+    def _set_thread_cpus(self, tid, cpus):
+        try:
+            if self._cpu_set_ids is None:
+                self._cpu_set_ids = core.get_cpu_set_ids()
+            return core.set_thread_selected_cpu_sets(tid, [self._cpu_set_ids[c] for c in cpus])
+        except Exception as e:
+            print(f"Error asignando CPU Sets al thread {tid}: {e}")
+            return False
 
 class EnhancedSMTOptimizer:
-    """Optimiza la afinidad para SMT (Hyper-Threading)."""
+    """Optimiza la afinidad para SMT (Hyper-Threading) con los hermanos reales de la topología."""
+    
+    # Muestras de la sonda de latencia (unos 20-40 ms con el temporizador de 1 ms)
+    PROBE_SAMPLES = 30
+    
     def __init__(self, topology):
         self.physical_cores_count = topology.get('total_physical_cores')
         self.logical_cores_count = topology.get('total_logical_cores')
         self.all_cores = list(range(self.logical_cores_count))
+        self.siblings = sibling_map(topology)
+        self.primary_cores = primary_cpus(topology)
+        # La sonda corre en su propio hilo para no detener el bucle de control
+        self.latency_probe = BackgroundLatencyProbe(
+            SchedulingLatencyProbe(samples=self.PROBE_SAMPLES, pin=pin_current_thread)
+        )
 
     def optimize_for_latency(self, pid):
         """Devuelve máscara de afinidad solo para núcleos físicos."""
-        if self.logical_cores_count == self.physical_cores_count:
+        if not any(self.siblings.values()):
             return {} # No SMT
         
-        # Asume que los núcleos físicos son los pares (0, 2, 4...)
-        physical_only = [i for i in self.all_cores if i % 2 == 0]
-        return {'affinity': physical_only}
+        # Una CPU lógica por core físico, según la topología real
+        return {'affinity': self.primary_cores}
 
     def optimize_for_throughput(self, pid):
         """Devuelve máscara de afinidad para todos los núcleos (físicos y lógicos)."""
         return {'affinity': self.all_cores}
+
+    def sibling_parking(self, game_cpus):
+        """
+        Modo de latencia: aparca los hermanos SMT de los cores del juego.
+        Sólo aparca si el juego está confinado a parte de las CPUs.
+        
+        :param game_cpus: CPUs lógicas asignadas al juego
+        :return: {'parked': hermanos a mantener libres,
+                  'background_affinity': CPUs permitidas al trabajo de fondo
+                  (ni del juego ni aparcadas)}
+        """
+        return parking_plan(game_cpus, self.siblings, self.all_cores)
+
+    def start_latency_probe(self, cpu=None, tag=None):
+        """Lanza en segundo plano la medida de latencia de despertar (µs) en la CPU indicada."""
+        return self.latency_probe.start(cpu, tag)
+
+    def take_latency_probe(self):
+        """Medida terminada (tag, {'mean', 'p50', 'p99', 'max'}) o None."""
+        return self.latency_probe.take()
         
 class AVXInstructionOptimizer:
-    """Detecta y optimiza procesos que usan intensivamente AVX."""
-    AVX_KEYWORDS = ['render', 'encode', 'ffmpeg', 'numpy', 'premiere', 'blender', 'v-ray']
+    """
+    Adapta afinidad y prioridad a la carga observada de cada proceso (render,
+    encode, game, interactive o batch) en lugar de a su nombre.
+    """
+    def __init__(self, logical_cpus, thread_profiles=None):
+        self.classifier = WorkloadClassifier(logical_cpus)
+        self.thread_profiles = thread_profiles
 
-    def detect_and_optimize(self, process_name, all_cores):
-        if any(keyword in process_name.lower() for keyword in self.AVX_KEYWORDS):
-            # Limitar a la mitad de los núcleos para evitar thermal throttling
-            target_cores = all_cores[:len(all_cores) // 2]
-            return {
-                'affinity': target_cores,
-                'priority': 32768  # ABOVE_NORMAL_PRIORITY_CLASS
-            }
-        return {}
+    def observe(self, pid, exe, load, freq_ratio=None, io_rate=0.0, modules=None, allowed_cpus=None):
+        """
+        Añade una muestra de comportamiento del proceso.
+        
+        :param load: Carga del proceso en cores equivalentes
+        :param freq_ratio: Frecuencia actual / pico (WorkloadClassifier.frequency_ratio)
+        :param io_rate: Bytes/s de E/S del proceso
+        :param modules: Nombres de los módulos cargados (sólo hace falta la primera vez)
+        :param allowed_cpus: CPUs de la afinidad actual del proceso (None: todas)
+        :return: Etiqueta actual del proceso
+        """
+        active = None
+        if self.thread_profiles is not None:
+            active = self.thread_profiles.active_thread_count(pid)
+        if active is None:
+            active = int(round(load))
+        return self.classifier.observe(pid, exe, load, active, freq_ratio, io_rate, modules, allowed_cpus)
+
+    def detect_and_optimize(self, pid, all_cores):
+        """Afinidad y prioridad según la etiqueta del proceso ({} si aún no tiene)."""
+        return workload_policy(self.classifier.tag_of(pid), all_cores)
 
 class L3CacheOptimizer:
     """Optimiza la afinidad para mejorar la localidad de caché L3."""
-    def __init__(self, topology):
-        self.l3_groups = topology.get('l3_cache_groups', [])
-        # ... Lógica para rastrear la contención en cada grupo ...
+    def __init__(self, topology, cache_info=None):
+        # Tamaño de cada L3 en bytes (CPUIDDetector.get_cache_info), 0 si se desconoce
+        self.l3_size = (cache_info or {}).get('l3', 0)
+        # Contención por grupo L3: carga sumada de los procesos gestionados e intensidad de memoria
+        self.placer = L3GroupPlacer(topology.get('l3_cache_groups', []))
+        # El colocador descarta los grupos vacíos: sus índices son los de placer.groups
+        self.l3_groups = self.placer.groups
 
-    def optimize_process_cache_locality(self, pid):
+    def optimize_process_cache_locality(self, pid, load=0.0, working_set=0, fault_rate=0.0):
+        """Devuelve el grupo L3 del proceso (el menos disputado si es nuevo)."""
         if not self.l3_groups: return {}
-        # Lógica para encontrar el grupo L3 con menor contención
-        target_group = self.l3_groups[0] # Simplificado
-        return {'affinity': target_group}
+        memory_intensive = is_memory_intensive(working_set, fault_rate, self.l3_size)
+        target_group = self.placer.place(pid, load, memory_intensive)
+        return {'affinity': self.placer.groups[target_group]}
+
+    def rebalance(self, samples):
+        """
+        Reequilibra los grupos L3 con histéresis.
+        
+        :param samples: {pid: (carga en cores, working set en bytes, fallos de página/s)}
+                        de los procesos gestionados
+        :return: ({pid: CPUs del nuevo grupo}, PIDs que dejan de gestionarse)
+        """
+        flags = {pid: (load, is_memory_intensive(ws, faults, self.l3_size))
+                 for pid, (load, ws, faults) in samples.items()}
+        moves, released = self.placer.update(flags)
+        return {pid: self.placer.groups[group] for pid, group in moves.items()}, released
 
 class CPUIDDetector:
     """Detección de CPU usando CPUID para capacidades específicas"""
     
-    def __init__(self):
+    def __init__(self, logical_cpus=None):
+        # CPUID real (fragmento x86-64 ejecutable), cacheado por arranque
+        self.info = cpu_features.load_cpu_info(
+            psutil.boot_time(),
+            cpus=logical_cpus if logical_cpus is not None else range(psutil.cpu_count(logical=True) or 1),
+            pin=pin_current_thread
+        ) or {}
         self.vendor = self.get_vendor()
         self.features = self.detect_features()
     
     def cpuid(self, eax, ecx=0):
-        """Ejecuta instrucción CPUID usando ctypes"""
-        # Crear array para almacenar resultados
-        regs = (ctypes.c_uint32 * 4)()
-        
+        """Ejecuta instrucción CPUID (devuelve eax, ebx, ecx, edx)"""
         try:
-            # Intentar usar cpuid de psutil si está disponible
-            # Nota: implementación simplificada, requiere ensamblador real en producción
-            return (0, 0, 0, 0)  # Placeholder
-        except Exception:
+            return cpu_features.cpuid(eax, ecx)
+        except OSError:
             return (0, 0, 0, 0)
     
     def get_vendor(self):
-        """Obtiene el vendedor de la CPU"""
-        try:
-            # Usar psutil para obtener info básica
-            import platform
-            return platform.processor()
-        except Exception:
-            return "Unknown"
+        """Obtiene el vendedor de la CPU (GenuineIntel, AuthenticAMD...)"""
+        if self.info.get('vendor'):
+            return self.info['vendor']
+        import platform
+        return platform.processor() or "Unknown"
     
     def detect_features(self):
         """Detecta features de CPU disponibles"""
@@ -114,87 +250,48 @@ class CPUIDDetector:
             'hybrid_architecture': False,
             'turbo_boost': False
         }
-        
-        # Detectar arquitectura híbrida (P-cores/E-cores)
-        if 'Intel' in self.vendor and hasattr(psutil, 'cpu_freq'):
-            # CPUs híbridas tienen frecuencias variables
-            features['hybrid_architecture'] = len(set([c.current for c in psutil.cpu_freq(percpu=True)])) > 2
-        
+        features.update(self.info.get('features', {}))
         return features
     
+    def get_core_types(self):
+        """Tipo de core por CPU lógica en CPUs híbridas (CPUID 0x1A): {cpu: 'performance'|'efficiency'}"""
+        return {int(cpu): core_type for cpu, core_type in self.info.get('core_types', {}).items()}
+    
     def get_cache_info(self):
-        """Obtiene información de cachés L1, L2, L3"""
-        caches = {
-            'l1_data': 0,
-            'l1_instruction': 0,
-            'l2': 0,
-            'l3': 0
-        }
-        
-        # Usar WMI o registro de Windows para obtener info de caché
-        # Implementación simplificada
-        return caches
-
+        """Obtiene información de cachés L1, L2, L3 (bytes, CPUID hoja 4 / 0x8000001D)"""
+        return cpu_features.cache_sizes(self.info)
 
 class IntelligentThreadScheduler:
     """Clasifica y programa threads automáticamente según su comportamiento"""
     
-    def __init__(self):
-        self.thread_profiles = {}
-        import time
-        self.time = time
+    def __init__(self, thread_profiles=None):
+        # Un perfilador por proceso, alimentado con instantáneas completas. Se comparte
+        # el de ModuloMonitorizacion (el que muestrea el gestor) para no perfilar dos veces.
+        self.thread_profiles = thread_profiles if thread_profiles is not None else ProcessThreadProfiles()
+    
+    def profile_process(self, pid, records, timestamp):
+        """
+        Perfila todos los threads de un proceso a partir de una instantánea
+        (ProcessSnapshotEngine.get_all_processes(include_threads=True)).
+        
+        :return: Diccionario tid → perfil
+        """
+        # Conservar los demás procesos perfilados: update descarta los que no se piden
+        self.thread_profiles.update(records, set(self.thread_profiles.profilers) | {pid}, timestamp)
+        profiler = self.thread_profiles.get(pid)
+        return profiler.profiles() if profiler is not None else {}
     
     def profile_thread(self, thread_id):
-        """Perfila un thread para clasificarlo"""
-        profile = {
+        """Perfil más reciente de un thread (sin esperar a una nueva medición)"""
+        for profiler in self.thread_profiles.profilers.values():
+            profile = profiler.profile(thread_id)
+            if profile is not None:
+                return profile
+        return {
             'cpu_time': 0,
             'context_switches': 0,
-            'io_operations': 0,
             'classification': 'unknown'
         }
-        
-        try:
-            # Monitorear thread por breve período
-            start_time = self.time.time()
-            initial_stats = self._get_thread_stats(thread_id)
-            
-            # Esperar breve período
-            self.time.sleep(0.5)
-            
-            final_stats = self._get_thread_stats(thread_id)
-            
-            # Calcular diferencias
-            if initial_stats and final_stats:
-                cpu_delta = final_stats['cpu_time'] - initial_stats['cpu_time']
-                
-                # Clasificar basándose en uso de CPU
-                if cpu_delta > 0.4:  # Más del 40% del tiempo
-                    profile['classification'] = 'cpu_intensive'
-                elif cpu_delta < 0.1:  # Menos del 10%
-                    profile['classification'] = 'io_bound'
-                else:
-                    profile['classification'] = 'interactive'
-                
-                profile['cpu_time'] = cpu_delta
-        
-        except Exception as e:
-            print(f"Error perfilando thread {thread_id}: {e}")
-        
-        return profile
-    
-    def _get_thread_stats(self, thread_id):
-        """Obtiene estadísticas de un thread"""
-        try:
-            # Usar psutil para obtener estadísticas
-            for proc in psutil.process_iter(['pid']):
-                for thread in proc.threads():
-                    if thread.id == thread_id:
-                        return {
-                            'cpu_time': thread.user_time + thread.system_time
-                        }
-        except Exception:
-            pass
-        return None
     
     def optimize_thread(self, thread_id, profile):
         """Optimiza un thread basándose en su perfil"""
@@ -220,74 +317,50 @@ class IntelligentThreadScheduler:
 
 
 class AMDCCDOptimizer:
-    """Optimizador para arquitectura chiplet de AMD (CCDs)"""
+    """
+    Layout de CCDs (arquitectura chiplet de AMD) y recuento de hilos activos.
+    El confinamiento a un CCD lo hace L3CacheOptimizer (un grupo L3 por CCD);
+    aquí sólo se decide qué procesos caben en uno.
+    """
     
-    def __init__(self):
+    def __init__(self, topology=None, thread_profiles=None):
+        self.topology = topology or {}
+        # Perfiles de hilos (ProcessThreadProfiles) para contar los hilos activos
+        self.thread_profiles = thread_profiles
         self.ccd_topology = self.detect_ccd_layout()
     
     def detect_ccd_layout(self):
-        """Detecta layout de CCDs en procesadores AMD"""
-        # Detectar número de cores
-        cpu_count = psutil.cpu_count(logical=False)
-        
-        # Configuración típica para Ryzen
-        if cpu_count >= 16:
-            # Ryzen 9 5950X/5900X: 2 CCDs
-            topology = {
-                'num_ccds': 2,
-                'ccd_mapping': {
-                    0: list(range(0, cpu_count // 2)),
-                    1: list(range(cpu_count // 2, cpu_count))
-                },
-                'l3_shared_within_ccd': True
-            }
-        elif cpu_count >= 8:
-            # Ryzen 7: 1 o 2 CCDs
-            topology = {
-                'num_ccds': 1,
-                'ccd_mapping': {
-                    0: list(range(0, cpu_count))
-                },
-                'l3_shared_within_ccd': True
-            }
-        else:
-            # Configuración simple
-            topology = {
-                'num_ccds': 1,
-                'ccd_mapping': {
-                    0: list(range(0, cpu_count))
-                },
-                'l3_shared_within_ccd': True
-            }
-        
-        return topology
+        """Detecta layout de CCDs: un CCD por grupo de CPUs que comparte L3"""
+        groups = self.topology.get('l3_cache_groups') or [list(range(psutil.cpu_count(logical=True) or 1))]
+        return {
+            'num_ccds': len(groups),
+            'ccd_mapping': {ccd_id: list(cores) for ccd_id, cores in enumerate(groups)},
+            'l3_shared_within_ccd': True
+        }
     
-    def optimize_for_ccd_locality(self, pid):
-        """Mantiene proceso dentro de un CCD para mejor localidad de L3"""
-        try:
-            proc = psutil.Process(pid)
-            num_threads = proc.num_threads()
-            
-            # Si cabe en un CCD, confinarlo ahí para mejor localidad de caché
-            for ccd_id, cores in self.ccd_topology['ccd_mapping'].items():
-                if num_threads <= len(cores):
-                    proc.cpu_affinity(cores)
-                    print(f"Proceso {pid} confinado a CCD{ccd_id} para localidad L3")
-                    break
-        except Exception as e:
-            print(f"Error optimizando localidad CCD para PID {pid}: {e}")
+    def active_thread_count(self, pid):
+        """Hilos que consumen CPU de forma sostenida (None si el proceso aún no se ha medido)"""
+        if self.thread_profiles is None:
+            return None
+        return self.thread_profiles.active_thread_count(pid)
+    
+    def fits_in_ccd(self, pid):
+        """True si los hilos activos medidos caben en el CCD más grande"""
+        active = self.active_thread_count(pid)
+        return active is not None and active <= max(len(c) for c in self.ccd_topology['ccd_mapping'].values())
 
 
 class CPUManager:
     """Clase principal que agrupa todas las estrategias de optimización de CPU."""
     def __init__(self, monitor_module):
         self.topology = monitor_module.cpu_topology.topology
+        self.thread_scheduler = IntelligentThreadScheduler(getattr(monitor_module, 'thread_profiles', None))
         self.hetero_scheduler = HeterogeneousScheduler(self.topology)
         self.smt_optimizer = EnhancedSMTOptimizer(self.topology)
-        self.avx_optimizer = AVXInstructionOptimizer()
-        self.l3_optimizer = L3CacheOptimizer(self.topology)
+        self.avx_optimizer = AVXInstructionOptimizer(self.topology.get('total_logical_cores') or 1,
+                                                     self.thread_scheduler.thread_profiles)
+        self.cpuid_detector = CPUIDDetector(range(self.topology.get('total_logical_cores') or 1))
+        self.l3_optimizer = L3CacheOptimizer(self.topology, self.cpuid_detector.get_cache_info())
         
         # Nuevos optimizadores
-        self.cpuid_detector = CPUIDDetector()
-        self.thread_scheduler = IntelligentThreadScheduler()
-        self.amd_ccd_optimizer = AMDCCDOptimizer()
\ No newline at end of file
+        self.amd_ccd_optimizer = AMDCCDOptimizer(self.topology, self.thread_scheduler.thread_profiles)
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Módulo de Presupuesto de CPU en Segundo Plano
+---------------------------------------------
+
+Controlador en lazo cerrado que mantiene el uso total de CPU de los procesos
+en segundo plano por debajo de un objetivo mientras se juega. La medición y
+la actuación se inyectan como funciones, de modo que el mismo controlador
+sirve tanto para Job Objects reales (JOBOBJECT_CPU_RATE_CONTROL) como para
+un modelo de carga simulado en pruebas.
+
+Dependencias externas:
+- time, logging: Biblioteca estándar de Python
+"""
+
+import logging
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger("CPUBudget")
+
+
+class PIController:
+    """
+    Controlador PI en forma incremental (velocidad).
+
+    La salida es el propio estado del controlador y se limita a
+    [output_min, output_max] en cada paso, lo que evita el windup del
+    término integral sin lógica adicional.
+    """
+
+    def __init__(self, kp: float, ki: float, output_min: float, output_max: float,
+                 initial_output: Optional[float] = None) -> None:
+        self.kp: float = kp
+        self.ki: float = ki
+        self.output_min: float = output_min
+        self.output_max: float = output_max
+        self._initial: float = output_max if initial_output is None else initial_output
+        self.output: float = self._initial
+        self._prev_error: Optional[float] = None
+
+    def reset(self, output: Optional[float] = None) -> None:
+        """Reinicia el estado del controlador."""
+        self.output = self._initial if output is None else output
+        self._prev_error = None
+
+    def update(self, setpoint: float, measurement: float, dt: float) -> float:
+        """
+        Calcula la nueva salida.
+
+        :param setpoint: Valor objetivo
+        :param measurement: Valor medido
+        :param dt: Segundos transcurridos desde la última actualización
+        :return: Salida limitada del controlador
+        """
+        error = setpoint - measurement
+        prev_error = error if self._prev_error is None else self._prev_error
+        delta = self.kp * (error - prev_error) + self.ki * error * dt
+        self.output = min(self.output_max, max(self.output_min, self.output + delta))
+        self._prev_error = error
+        return self.output
+
+
+class BackgroundCPUBudgetController:
+    """
+    Ajusta el tope duro de CPU del Job Object de segundo plano para que el
+    uso total de CPU en segundo plano se mantenga bajo el objetivo.
+
+    :param measure_fn: Devuelve el % de CPU de la máquina consumido en segundo plano
+    :param apply_fn: Recibe el tope de CPU (%) a aplicar al Job Object
+    """
+
+    # Cambio mínimo del tope (en puntos %) que justifica una nueva llamada al sistema
+    APPLY_DEADBAND = 1.0
+
+    def __init__(self, measure_fn: Callable[[], Optional[float]],
+                 apply_fn: Callable[[float], object],
+                 target_percent: float = 20.0,
+                 min_cap: float = 5.0, max_cap: float = 100.0,
+                 kp: float = 0.6, ki: float = 0.9) -> None:
+        self.measure_fn = measure_fn
+        self.apply_fn = apply_fn
+        self.target_percent: float = target_percent
+        self.min_cap: float = min_cap
+        self.max_cap: float = max_cap
+        self.pi = PIController(kp, ki, min_cap, max_cap, initial_output=max_cap)
+        self.active: bool = False
+        self.applied_cap: Optional[float] = None
+        self.last_measurement: Optional[float] = None
+        self._last_step_time: Optional[float] = None
+
+    def set_target(self, target_percent: float) -> None:
+        """Cambia el objetivo de CPU en segundo plano."""
+        self.target_percent = max(self.min_cap, min(self.max_cap, float(target_percent)))
+        logger.info(f"[CPUBudget] Objetivo de CPU en segundo plano: {self.target_percent:.0f}%")
+
+    def activate(self) -> None:
+        """Activa el control (al entrar en una sesión de juego)."""
+        if self.active:
+            return
+        self.active = True
+        self.pi.reset(self.max_cap)
+        self._last_step_time = None
+        logger.info(f"[CPUBudget] Control activado (objetivo {self.target_percent:.0f}%)")
+
+    def deactivate(self) -> None:
+        """Desactiva el control y libera el tope."""
+        if not self.active:
+            return
+        self.active = False
+        self._apply(self.max_cap, force=True)
+        logger.info("[CPUBudget] Control desactivado, tope de CPU liberado")
+
+    def step(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        Ejecuta un paso del lazo de control.
+
+        :param now: Marca de tiempo monotónica (inyectable para simulación)
+        :return: Tope aplicado actualmente o None si el control está inactivo
+        """
+        if not self.active:
+            return None
+
+        now = time.monotonic() if now is None else now
+        measurement = self.measure_fn()
+        if measurement is None:
+            return self.applied_cap
+        self.last_measurement = measurement
+
+        if self._last_step_time is None:
+            # La primera medición sólo sirve de referencia temporal
+            self._last_step_time = now
+            return self.applied_cap
+
+        dt = max(1e-3, now - self._last_step_time)
+        self._last_step_time = now
+        cap = self.pi.update(self.target_percent, measurement, dt)
+        self._apply(cap)
+        return self.applied_cap
+
+    def _apply(self, cap: float, force: bool = False) -> None:
+        """Aplica el tope sólo si cambió lo suficiente."""
+        if (not force and self.applied_cap is not None
+                and abs(cap - self.applied_cap) < self.APPLY_DEADBAND):
+            return
+        try:
+            self.apply_fn(cap)
+            self.applied_cap = cap
+        except Exception as e:
+            logger.error(f"[CPUBudget] Error al aplicar tope de CPU: {e}")
+
+    def status(self) -> dict:
+        """Estado actual del controlador."""
+        return {
+            'active': self.active,
+            'target_percent': self.target_percent,
+            'applied_cap': self.applied_cap,
+            'last_measurement': self.last_measurement,
+        }
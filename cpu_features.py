@@ -0,0 +1,371 @@
+"""
+Módulo de Detección de CPU por CPUID
+------------------------------------
+
+Ejecuta la instrucción CPUID real mediante un pequeño fragmento de código
+máquina x86-64 copiado a memoria ejecutable (mmap en Linux, VirtualAlloc en
+Windows) y llamado con ctypes. A partir de los registros decodifica:
+
+- Fabricante, nombre comercial, familia, modelo y stepping
+- Extensiones SIMD (SSE…SSE4.2, AVX, AVX2, AVX-512F, FMA, AES, SHA),
+  comprobando con XGETBV que el sistema operativo guarda los registros YMM/ZMM
+- Tipo de core híbrido por CPU lógica (hoja 0x1A: P-core / E-core)
+- Descriptores de caché deterministas (hoja 4 en Intel, 0x8000001D en AMD)
+
+El resultado se guarda junto al módulo y sólo es válido durante el arranque
+en que se midió. Las funciones de decodificación reciben la función cpuid
+como parámetro, así que pueden probarse con registros grabados.
+
+Dependencias externas:
+- ctypes, mmap: Biblioteca estándar (VirtualAlloc sólo se carga en Windows)
+- json, logging, os, platform, struct: Biblioteca estándar de Python
+"""
+
+import ctypes
+import json
+import logging
+import os
+import platform
+import struct
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from topology import cpu_signature
+
+logger = logging.getLogger("CpuFeatures")
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cpu_features_cache.json")
+# Tolerancia al comparar el instante de arranque guardado (s)
+BOOT_TIME_TOLERANCE = 2.0
+
+Registers = Tuple[int, int, int, int]  # eax, ebx, ecx, edx
+CpuidFunc = Callable[[int, int], Registers]
+
+# void cpuid(uint32 leaf, uint32 subleaf, uint32 out[4])
+_CPUID_STORE = bytes([
+    0x0F, 0xA2,                     # cpuid
+    0x41, 0x89, 0x00,               # mov [r8], eax
+    0x41, 0x89, 0x58, 0x04,         # mov [r8+4], ebx
+    0x41, 0x89, 0x48, 0x08,         # mov [r8+8], ecx
+    0x41, 0x89, 0x50, 0x0C,         # mov [r8+12], edx
+    0x5B,                           # pop rbx
+    0xC3,                           # ret
+])
+CPUID_STUB_SYSV = bytes([
+    0x53,                           # push rbx (no volátil)
+    0x89, 0xF8,                     # mov eax, edi
+    0x89, 0xF1,                     # mov ecx, esi
+    0x49, 0x89, 0xD0,               # mov r8, rdx
+]) + _CPUID_STORE
+CPUID_STUB_WIN64 = bytes([
+    0x53,                           # push rbx (no volátil)
+    0x89, 0xC8,                     # mov eax, ecx
+    0x89, 0xD1,                     # mov ecx, edx
+]) + _CPUID_STORE                   # out ya está en r8
+
+# uint64 xgetbv(uint32 index)
+_XGETBV_BODY = bytes([
+    0x0F, 0x01, 0xD0,               # xgetbv
+    0x48, 0xC1, 0xE2, 0x20,         # shl rdx, 32
+    0x48, 0x09, 0xD0,               # or rax, rdx
+    0xC3,                           # ret
+])
+XGETBV_STUB_SYSV = bytes([0x89, 0xF9]) + _XGETBV_BODY    # mov ecx, edi
+XGETBV_STUB_WIN64 = _XGETBV_BODY                         # el índice ya está en ecx
+
+
+def is_supported() -> bool:
+    """CPUID sólo se ejecuta en procesos x86-64."""
+    return struct.calcsize('P') == 8 and platform.machine().lower() in ('x86_64', 'amd64')
+
+
+# --- Memoria ejecutable ---
+
+class _ExecutableStubs:
+    """Copia los fragmentos a una página ejecutable que vive lo que el proceso."""
+
+    def __init__(self) -> None:
+        windows = os.name == 'nt'
+        cpuid_code = CPUID_STUB_WIN64 if windows else CPUID_STUB_SYSV
+        xgetbv_code = XGETBV_STUB_WIN64 if windows else XGETBV_STUB_SYSV
+        code = cpuid_code + b'\xCC' * (64 - len(cpuid_code)) + xgetbv_code
+        address = self._allocate_windows(code) if windows else self._allocate_mmap(code)
+
+        self._regs = (ctypes.c_uint32 * 4)()
+        self._cpuid = ctypes.CFUNCTYPE(None, ctypes.c_uint32, ctypes.c_uint32,
+                                       ctypes.POINTER(ctypes.c_uint32 * 4))(address)
+        self._xgetbv = ctypes.CFUNCTYPE(ctypes.c_uint64, ctypes.c_uint32)(address + 64)
+
+    def _allocate_mmap(self, code: bytes) -> int:
+        import mmap
+        self._memory = mmap.mmap(-1, mmap.PAGESIZE, prot=mmap.PROT_READ | mmap.PROT_WRITE | mmap.PROT_EXEC)
+        self._memory.write(code)
+        return ctypes.addressof(ctypes.c_char.from_buffer(self._memory))
+
+    def _allocate_windows(self, code: bytes) -> int:
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.VirtualAlloc.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_ulong, ctypes.c_ulong]
+        kernel32.VirtualAlloc.restype = ctypes.c_void_p
+        kernel32.VirtualProtect.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_ulong,
+                                            ctypes.POINTER(ctypes.c_ulong)]
+        kernel32.VirtualProtect.restype = ctypes.c_int
+        MEM_COMMIT_RESERVE, PAGE_READWRITE, PAGE_EXECUTE_READ = 0x3000, 0x04, 0x20
+        address = kernel32.VirtualAlloc(None, 4096, MEM_COMMIT_RESERVE, PAGE_READWRITE)
+        if not address:
+            raise ctypes.WinError(ctypes.get_last_error())
+        ctypes.memmove(address, code, len(code))
+        old = ctypes.c_ulong(0)
+        if not kernel32.VirtualProtect(address, 4096, PAGE_EXECUTE_READ, ctypes.byref(old)):
+            raise ctypes.WinError(ctypes.get_last_error())
+        return address
+
+    def cpuid(self, leaf: int, subleaf: int = 0) -> Registers:
+        self._cpuid(leaf, subleaf, ctypes.byref(self._regs))
+        return tuple(self._regs)
+
+    def xgetbv(self, index: int = 0) -> int:
+        return self._xgetbv(index)
+
+
+_stubs: Optional[_ExecutableStubs] = None
+
+
+def _get_stubs() -> _ExecutableStubs:
+    global _stubs
+    if _stubs is None:
+        if not is_supported():
+            raise OSError(f"CPUID no disponible en {platform.machine()}")
+        _stubs = _ExecutableStubs()
+    return _stubs
+
+
+def cpuid(leaf: int, subleaf: int = 0) -> Registers:
+    """
+    Ejecuta CPUID.
+
+    :return: (eax, ebx, ecx, edx)
+    :raise OSError: Si la plataforma no es x86-64
+    """
+    return _get_stubs().cpuid(leaf, subleaf)
+
+
+def xgetbv(index: int = 0) -> int:
+    """Lee un registro de control extendido (XCR0 por defecto); requiere OSXSAVE."""
+    return _get_stubs().xgetbv(index)
+
+
+# --- Decodificación ---
+
+def _bit(value: int, bit: int) -> bool:
+    return bool((value >> bit) & 1)
+
+
+def decode_vendor(regs: Registers) -> str:
+    """Fabricante a partir de la hoja 0 (EBX, EDX, ECX)."""
+    _, ebx, ecx, edx = regs
+    return struct.pack('<III', ebx, edx, ecx).decode('ascii', 'replace')
+
+
+def decode_brand(cpuid_fn: CpuidFunc) -> str:
+    """Nombre comercial (hojas 0x80000002-0x80000004)."""
+    if cpuid_fn(0x80000000, 0)[0] < 0x80000004:
+        return ''
+    raw = b''.join(struct.pack('<IIII', *cpuid_fn(leaf, 0)) for leaf in (0x80000002, 0x80000003, 0x80000004))
+    return raw.split(b'\x00', 1)[0].decode('ascii', 'replace').strip()
+
+
+def decode_signature(eax: int) -> Dict[str, int]:
+    """Familia, modelo y stepping (hoja 1, EAX) con los campos extendidos."""
+    family = (eax >> 8) & 0xF
+    model = (eax >> 4) & 0xF
+    if family == 0xF:
+        family += (eax >> 20) & 0xFF
+    if family >= 0x6:
+        model += ((eax >> 16) & 0xF) << 4
+    return {'family': family, 'model': model, 'stepping': eax & 0xF}
+
+
+def decode_features(cpuid_fn: CpuidFunc, xgetbv_fn: Callable[[int], int]) -> Dict[str, bool]:
+    """
+    Extensiones del procesador utilizables por el sistema operativo.
+
+    AVX/AVX2/FMA exigen OSXSAVE y que XCR0 habilite los estados SSE+YMM;
+    AVX-512 además los de opmask y ZMM.
+    """
+    max_leaf = cpuid_fn(0, 0)[0]
+    _, _, ecx1, edx1 = cpuid_fn(1, 0)
+    ebx7, edx7 = (0, 0)
+    if max_leaf >= 7:
+        _, ebx7, _, edx7 = cpuid_fn(7, 0)
+    eax6 = cpuid_fn(6, 0)[0] if max_leaf >= 6 else 0
+
+    xcr0 = xgetbv_fn(0) if _bit(ecx1, 27) else 0
+    ymm_enabled = (xcr0 & 0x6) == 0x6
+    zmm_enabled = (xcr0 & 0xE6) == 0xE6
+    avx = _bit(ecx1, 28) and ymm_enabled
+
+    return {
+        'sse': _bit(edx1, 25),
+        'sse2': _bit(edx1, 26),
+        'sse3': _bit(ecx1, 0),
+        'ssse3': _bit(ecx1, 9),
+        'sse4_1': _bit(ecx1, 19),
+        'sse4_2': _bit(ecx1, 20),
+        'avx': avx,
+        'avx2': avx and _bit(ebx7, 5),
+        'avx512': _bit(ebx7, 16) and zmm_enabled,
+        'fma': avx and _bit(ecx1, 12),
+        'aes': _bit(ecx1, 25),
+        'sha': _bit(ebx7, 29),
+        'hybrid_architecture': _bit(edx7, 15),
+        'turbo_boost': _bit(eax6, 1),
+    }
+
+
+CACHE_TYPES = {1: 'data', 2: 'instruction', 3: 'unified'}
+
+
+def decode_caches(cpuid_fn: CpuidFunc, leaf: int) -> List[Dict[str, Any]]:
+    """
+    Descriptores de caché deterministas (hoja 4 o 0x8000001D, mismo formato).
+
+    :return: Lista de {'level', 'type', 'size', 'ways', 'line_size', 'sets', 'shared_by'}
+    """
+    caches = []
+    for subleaf in range(16):
+        eax, ebx, ecx, _ = cpuid_fn(leaf, subleaf)
+        cache_type = eax & 0x1F
+        if cache_type == 0:
+            break
+        ways = ((ebx >> 22) & 0x3FF) + 1
+        partitions = ((ebx >> 12) & 0x3FF) + 1
+        line_size = (ebx & 0xFFF) + 1
+        sets = ecx + 1
+        caches.append({
+            'level': (eax >> 5) & 0x7,
+            'type': CACHE_TYPES.get(cache_type, 'unknown'),
+            'size': ways * partitions * line_size * sets,
+            'ways': ways,
+            'line_size': line_size,
+            'sets': sets,
+            'shared_by': ((eax >> 14) & 0xFFF) + 1,
+        })
+    return caches
+
+
+# Tipo de core de la hoja 0x1A (EAX[31:24])
+CORE_TYPES = {0x20: 'efficiency', 0x40: 'performance'}
+
+
+def decode_core_type(regs: Registers) -> Optional[str]:
+    return CORE_TYPES.get((regs[0] >> 24) & 0xFF)
+
+
+def core_types(cpus: Iterable[int], pin: Callable[[int], Callable[[], None]],
+               cpuid_fn: CpuidFunc = cpuid) -> Dict[str, str]:
+    """
+    Tipo de core de cada CPU lógica: la hoja 0x1A describe la CPU en la que
+    se ejecuta la instrucción, así que el hilo se fija a cada una.
+
+    :param pin: Fija el hilo actual a una CPU y devuelve el restaurador
+                (core_ranking.pin_current_thread)
+    :return: {str(cpu): 'performance' | 'efficiency'}
+    """
+    types: Dict[str, str] = {}
+    for cpu in cpus:
+        try:
+            restore = pin(cpu)
+        except OSError as e:
+            logger.debug(f"[CpuFeatures] No se pudo fijar el hilo a la CPU {cpu}: {e}")
+            continue
+        try:
+            core_type = decode_core_type(cpuid_fn(0x1A, 0))
+        finally:
+            restore()
+        if core_type is not None:
+            types[str(cpu)] = core_type
+    return types
+
+
+def read_cpu_info(cpuid_fn: CpuidFunc = cpuid, xgetbv_fn: Callable[[int], int] = xgetbv,
+                  cpus: Iterable[int] = (), pin: Optional[Callable[[int], Callable[[], None]]] = None
+                  ) -> Dict[str, Any]:
+    """
+    Decodifica toda la información de CPUID.
+
+    :param cpus: CPUs lógicas en las que leer el tipo de core (sólo CPUs híbridas)
+    :return: {'vendor', 'brand', 'family', 'model', 'stepping', 'features',
+              'caches', 'core_types'}
+    """
+    leaf0 = cpuid_fn(0, 0)
+    max_leaf = leaf0[0]
+    vendor = decode_vendor(leaf0)
+    info: Dict[str, Any] = {'vendor': vendor, 'brand': decode_brand(cpuid_fn)}
+    info.update(decode_signature(cpuid_fn(1, 0)[0]))
+    info['features'] = decode_features(cpuid_fn, xgetbv_fn)
+
+    caches: List[Dict[str, Any]] = []
+    if vendor == 'GenuineIntel' and max_leaf >= 4:
+        caches = decode_caches(cpuid_fn, 4)
+    elif vendor in ('AuthenticAMD', 'HygonGenuine'):
+        max_ext = cpuid_fn(0x80000000, 0)[0]
+        # Extensiones de topología (0x80000001 ECX[22]) habilitan la hoja 0x8000001D
+        if max_ext >= 0x8000001D and _bit(cpuid_fn(0x80000001, 0)[2], 22):
+            caches = decode_caches(cpuid_fn, 0x8000001D)
+    info['caches'] = caches
+
+    info['core_types'] = {}
+    if info['features']['hybrid_architecture'] and max_leaf >= 0x1A and pin is not None:
+        info['core_types'] = core_types(cpus, pin, cpuid_fn)
+    return info
+
+
+def cache_sizes(info: Dict[str, Any]) -> Dict[str, int]:
+    """Tamaños en bytes de L1 datos/instrucciones, L2 y L3 (formato de CPUIDDetector.get_cache_info)."""
+    sizes = {'l1_data': 0, 'l1_instruction': 0, 'l2': 0, 'l3': 0}
+    for cache in info.get('caches', []):
+        if cache['level'] == 1:
+            key = 'l1_instruction' if cache['type'] == 'instruction' else 'l1_data'
+        else:
+            key = f"l{cache['level']}"
+        if key in sizes:
+            sizes[key] = max(sizes[key], cache['size'])
+    return sizes
+
+
+# --- Caché por arranque ---
+
+def load_cpu_info(boot_time: float, cache_file: Optional[str] = DEFAULT_CACHE_FILE,
+                  cpus: Iterable[int] = (), pin: Optional[Callable[[int], Callable[[], None]]] = None
+                  ) -> Optional[Dict[str, Any]]:
+    """
+    Información de CPUID, de la caché si es del arranque actual o leída si no.
+
+    :param boot_time: Instante de arranque del sistema (psutil.boot_time())
+    :return: Diccionario de read_cpu_info, o None si CPUID no está disponible
+    """
+    signature = cpu_signature()
+    if cache_file:
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if (cached.get('signature') == signature
+                    and abs(cached.get('boot_time', 0.0) - boot_time) <= BOOT_TIME_TOLERANCE
+                    and 'info' in cached):
+                return cached['info']
+        except (OSError, ValueError):
+            pass
+
+    try:
+        info = read_cpu_info(cpus=cpus, pin=pin)
+    except (OSError, ValueError) as e:
+        logger.warning(f"[CpuFeatures] CPUID no disponible: {e}")
+        return None
+    logger.info(f"[CpuFeatures] {info['vendor']} {info['brand']}")
+
+    if cache_file:
+        try:
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'signature': signature, 'boot_time': boot_time, 'info': info}, f, indent=4)
+        except OSError as e:
+            logger.warning(f"[CpuFeatures] No se pudo guardar la caché: {e}")
+    return info
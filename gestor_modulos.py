@@ -34,6 +34,23 @@ import winreg
 
 # Importar el módulo core real
 import core
+from processes import JobObjectManager, IncrementalEcoQoS
+from monitoring import ProcessSnapshotEngine, SystemMetricsSampler
+from process_scanner import scan_processes
+from cpu_budget import BackgroundCPUBudgetController
+from core_planner import CorePartitionPlanner, GlobalAffinityPlanner, ROLE_PROCESS_NAMES, physical_cores_from_topology
+from background_tiers import BackgroundTierManager, TIER_IDLE
+from top_consumers import TopConsumerTracker
+from core_sampler import PerCoreSampler
+from topology import load_topology
+from core_ranking import load_core_rank
+from smt_parking import primary_cpus
+from thread_profiler import ProcessThreadProfiles
+from cpu import (HeterogeneousScheduler, L3CacheOptimizer, EnhancedSMTOptimizer, AMDCCDOptimizer,
+                 AVXInstructionOptimizer, CPUIDDetector)
+from maintenance import IdleDetector, MaintenanceQueue, MaintenanceTask
+from storage import IntelligentTRIMScheduler
+from memory import MemoryBalloon, StandbyListCleaner
 
 # Configurar logging profesional
 logging.basicConfig(
@@ -550,9 +567,13 @@ class ModoExtremeLowLatency:
     Solo debe usarse durante sesiones de juego y desactivarse después.
     """
     
-    def __init__(self, driver_km=None):
+    def __init__(self, driver_km=None, core_sampler=None, cpu_topology=None):
         self.activo = False
         self.driver = driver_km
+        # Callable que devuelve la topología (con 'core_rank') al activar el modo
+        self.cpu_topology = cpu_topology or (lambda: {'total': psutil.cpu_count(logical=True)})
+        # Carga y frecuencia por core (PerCoreSampler) para elegir los cores del juego
+        self.core_sampler = core_sampler
         self.proceso_target = None
         self.configuracion_original = {}
         self.servicios_detenidos = []
@@ -671,23 +692,28 @@ class ModoExtremeLowLatency:
         logger.info("[ExtremeLowLatency] 🎯 Aislando cores para máximo rendimiento...")
         
         try:
-            # Detectar topología de CPU
-            cpu_info = psutil.cpu_count(logical=True)
-            physical_cores = psutil.cpu_count(logical=False)
-            
-            # Cores a reservar para el juego (los primeros cores físicos, generalmente los más rápidos)
-            if physical_cores >= 8:
-                # En CPUs con 8+ cores, reservar 4 cores físicos
-                cores_juego = [0, 2, 4, 6]  # Cores físicos (evitando hyperthreading)
-                cores_otros = list(range(8, cpu_info))
-            elif physical_cores >= 4:
-                # En CPUs con 4-6 cores, reservar 2 cores
-                cores_juego = [0, 2]
-                cores_otros = list(range(4, cpu_info))
+            # Cores físicos del mejor al peor (P-cores, después rango de core preferido)
+            cores = physical_cores_from_topology(self.cpu_topology())
+            cpu_info = sum(len(c['logical']) for c in cores)
+            
+            # Cores físicos a reservar: 4 con 8+ cores, 2 con 4-6, 1 en CPUs pequeñas
+            if len(cores) >= 8:
+                num_juego = 4
+            elif len(cores) >= 4:
+                num_juego = 2
             else:
-                # En CPUs pequeñas, reservar 1 core
-                cores_juego = [0]
-                cores_otros = list(range(2, cpu_info))
+                num_juego = 1
+            
+            if self.core_sampler is not None and self.core_sampler.ready and self.core_sampler.frequency_mhz:
+                # A igual clase y rango, los de mayor frecuencia actual
+                freq = self.core_sampler.frequency_mhz
+                cores.sort(key=lambda c: (-c['efficiency'], -c['rank'],
+                                          -max((freq[l] for l in c['logical'] if l < len(freq)), default=0.0)))
+            
+            # Un hilo lógico por core físico (evitando hyperthreading); sus hermanos SMT no se ceden a otros procesos
+            cores_juego = sorted(c['logical'][0] for c in cores[:num_juego])
+            reservados = {l for c in cores[:num_juego] for l in c['logical']}
+            cores_otros = [c for c in range(cpu_info) if c not in reservados]
             
             self.cores_aislados = cores_juego
             
@@ -1066,103 +1092,219 @@ class ModoExtremeLowLatency:
 # -----------------------------------------------------------------------------
 
 class ModuloMonitorizacion:
-    def __init__(self): 
+    def __init__(self, core_sample_interval=1.0): 
         print(" > [ModuloMonitorizacion] Inicializado.")
         self._cpu_topology = None
-        self._cache_timeout = 30
-        self._last_topology_query = 0
+        # Instantánea de todos los procesos con una sola llamada al sistema
+        self.snapshot_engine = ProcessSnapshotEngine()
+        # Utilización y frecuencia por core (cadencia configurable) para la afinidad
+        self.core_sampler = PerCoreSampler(core_sample_interval, frequencies=self._core_frequencies)
+        # Almacén de métricas: CPU/frecuencia por core, memoria, temperatura y procesos gestionados
+        self.metrics_sampler = SystemMetricsSampler(temperature_source=self._temperature_source(),
+                                                    core_sampler=self.core_sampler)
+        self.metrics = self.metrics_sampler.store
+        # Perfiles de todos los hilos de los procesos gestionados (una instantánea por intervalo)
+        self.thread_profiles = ProcessThreadProfiles()
     
-    def get_cpu_topology(self): 
-        """Detecta P-cores vs E-cores usando affinity mask y CPUID."""
-        current_time = time.time()
-        if self._cpu_topology and (current_time - self._last_topology_query) < self._cache_timeout:
-            return self._cpu_topology
-        
-        print(" > [ModuloMonitorizacion] Consultando topología de CPU...")
-        
-        cpu_count = psutil.cpu_count(logical=True)
-        physical_count = psutil.cpu_count(logical=False)
+    @staticmethod
+    def _core_frequencies():
+        """MHz actuales por CPU lógica (psutil sólo da un valor global en Windows)."""
+        return [info['current_mhz'] for info in core.get_processor_power_information()]
+    
+    @staticmethod
+    def _temperature_source():
+        """Lector de temperatura de LibreHardwareMonitor si pythonnet está disponible."""
+        try:
+            from temperature_monitor import get_temperature_monitor
+            return get_temperature_monitor().get_cpu_temperature
+        except Exception as e:
+            logger.debug(f"[ModuloMonitorizacion] Monitor de temperatura no disponible: {e}")
+            return None
+    
+    def sample_metrics(self, managed_pids=()):
+        """Registra una muestra del sistema y de los procesos gestionados en el almacén."""
+        self.metrics_sampler.sample(self.get_process_diff(), managed_pids)
+    
+    def profile_threads(self, pids):
+        """
+        Perfila todos los hilos de los procesos indicados con una única
+        instantánea (sólo backend 'nt'; Toolhelp32 no da tiempos por hilo).
         
-        if cpu_count > physical_count * 2:
-            p_cores = list(range(0, physical_count))
-            e_cores = list(range(physical_count, cpu_count))
-        else:
-            p_cores = list(range(0, cpu_count))
-            e_cores = []
+        :return: Hilos medidos en esta muestra
+        """
+        records = self.snapshot_engine.get_all_processes(include_threads=True)
+        return self.thread_profiles.update(records, pids, self.snapshot_engine.last_scan_time)
+    
+    def get_hot_threads(self, pid, n=None):
+        """Hilos calientes de un proceso perfilado: lista de (tid, fracción de core)."""
+        return self.thread_profiles.hot_threads(pid, n)
+    
+    def sample_cores(self):
+        """Actualiza la carga y frecuencia por core si ha vencido su intervalo."""
+        return self.core_sampler.sample()
+    
+    def get_core_sets(self, count, candidates=None):
+        """
+        Conjuntos de cores para las decisiones de afinidad.
         
-        self._cpu_topology = {"p_cores": p_cores, "e_cores": e_cores, "total": cpu_count}
-        self._last_topology_query = current_time
+        :param count: Tamaño de cada conjunto
+        :param candidates: CPUs lógicas entre las que elegir (por defecto todas)
+        :return: {'least_loaded': [...], 'highest_clocked': [...]}
+        """
+        return {
+            'least_loaded': self.core_sampler.least_loaded(count, candidates),
+            'highest_clocked': self.core_sampler.highest_clocked(count, candidates),
+        }
+    
+    def get_cpu_topology(self): 
+        """
+        Topología real de la CPU (GetLogicalProcessorInformationEx): P-cores y
+        E-cores por EfficiencyClass, pares SMT, grupos L3, nodos NUMA y rango
+        de cores preferidos ('core_rank').
+        """
+        if self._cpu_topology is None:
+            print(" > [ModuloMonitorizacion] Consultando topología de CPU...")
+            cpu_topology = load_topology(
+                fallback_counts=lambda: (psutil.cpu_count(logical=False), psutil.cpu_count(logical=True))
+            )
+            # Rango de cores preferidos (CPPC/frecuencia máxima + micro-prueba), por arranque
+            ranking = load_core_rank(cpu_topology['physical_cores'], psutil.boot_time())
+            self._cpu_topology = dict(cpu_topology, total=cpu_topology['total_logical_cores'],
+                                      core_rank=ranking['core_rank'])
         return self._cpu_topology
     
     def get_all_processes(self): 
-        """Escanea todos los procesos del sistema."""
-        processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'username', 'status']):
-            try:
-                pinfo = proc.info
-                processes.append({
-                    "pid": pinfo['pid'],
-                    "name": pinfo['name'],
-                    "username": pinfo.get('username', ''),
-                    "children": [child.pid for child in proc.children()],
-                })
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-        return processes
+        """
+        Escanea todos los procesos del sistema en una sola pasada.
+        
+        :return: Lista de ProcessRecord (pid, name, parent_pid, session_id,
+                 create_time, children)
+        """
+        return scan_processes(self.snapshot_engine.get_all_processes())
+    
+    def get_process_snapshot(self, include_threads=False):
+        """
+        Instantánea de todos los procesos (pid, nombre, padre, sesión, tiempos
+        de CPU, memoria y E/S) obtenida con una única llamada al sistema.
+        """
+        return self.snapshot_engine.get_all_processes(include_threads)
+    
+    def get_process_diff(self):
+        """Diferencia columnar (vectorizada) con la instantánea anterior."""
+        return self.snapshot_engine.get_process_diff()
     
     def get_process_tree(self, pid): 
-        """Obtiene todos los PIDs del árbol de procesos."""
-        tree_pids = [pid]
-        try:
-            proc = psutil.Process(pid)
-            for child in proc.children(recursive=True):
-                tree_pids.append(child.pid)
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            pass
-        return tree_pids
+        """Obtiene todos los PIDs del árbol de procesos (bosque incremental, O(subárbol))."""
+        return self.snapshot_engine.get_process_tree(pid)
     
     def is_overheating(self, thresholds): 
-        """Comprueba si el sistema está sobrecalentando."""
-        try:
-            temps = psutil.sensors_temperatures()
-            if not temps:
-                return False
-            
-            for name, entries in temps.items():
-                for entry in entries:
-                    if entry.current >= thresholds['hard']:
-                        return True
-        except Exception:
-            pass
-        return False
+        """Comprueba si el sistema está sobrecalentando (última temperatura muestreada)."""
+        temperature = self.metrics.latest_scalar('temperature.cpu')
+        return temperature is not None and temperature >= thresholds['hard']
     
     def get_system_load(self): 
-        """Obtiene la carga actual del sistema."""
+        """Obtiene la carga actual del sistema a partir del almacén de métricas."""
+        if 'cpu.percent' not in self.metrics:
+            self.sample_metrics()
+        per_core = self.metrics.latest('cpu.percent')
         return {
-            "cpu": psutil.cpu_percent(interval=0.1),
-            "memory": psutil.virtual_memory().percent,
-            "disk": psutil.disk_usage('/').percent if os.name == 'nt' else psutil.disk_usage('/').percent
+            "cpu": sum(per_core) / len(per_core) if per_core else psutil.cpu_percent(),
+            "memory": self.metrics.latest_scalar('memory.percent', 0.0),
+            "disk": psutil.disk_usage('/').percent
         }
+    
+    def get_priority_context(self):
+        """
+        Contexto de métricas para DynamicPriorityManager.evaluate: carga de CPU
+        media del último minuto, memoria disponible y temperatura.
+        """
+        if 'cpu.percent' not in self.metrics:
+            self.sample_metrics()
+        per_core = self.metrics.mean('cpu.percent', 60)
+        if per_core and per_core[0] == per_core[0]:  # NaN si aún no hay cubos cerrados
+            cpu_usage = sum(per_core) / len(per_core)
+        else:
+            cpu_usage = self.get_system_load()['cpu']
+        context = {
+            'cpu_usage': cpu_usage,
+            'memory_available_mb': self.metrics.latest_scalar('memory.available_mb', float('inf')),
+        }
+        temperature = self.metrics.latest_scalar('temperature.cpu')
+        if temperature is not None:
+            context['temperature'] = temperature
+        return context
 
 class ModuloProcesos:
     def __init__(self): 
         print(" > [ModuloProcesos] Inicializado.")
         self.job_objects = {}
+        self.job_manager = JobObjectManager()
+        # Handles reutilizados entre llamadas (antes se abría una caché nueva en cada una)
+        self.handle_cache = core.ProcessHandleCache()
+        self.eco_qos = IncrementalEcoQoS(self.handle_cache, self._enable_eco_qos)
         
     def apply_batched_settings(self, pid, settings): 
         """Aplica múltiples ajustes a un proceso de una vez."""
         logger.debug(f"[ModuloProcesos] Aplicando {len(settings)} ajustes a PID {pid}")
         
-        handle = core.ProcessHandleCache().get_handle(pid)
+        handle = self.handle_cache.get_handle(pid)
         if not handle:
             return
         
         if 'priority' in settings:
             self._set_priority(handle, settings['priority'])
-        if 'eco_qos' in settings and settings['eco_qos']:
-            self._enable_eco_qos(handle)
+        # EcoQoS pasa por su propietario para que la pasada incremental lo conozca
+        if 'eco_qos' in settings:
+            self.eco_qos.set_state(pid, handle, settings['eco_qos'])
         if 'power_throttling' in settings:
-            self._set_power_throttling(handle, settings['power_throttling'])
+            self.eco_qos.set_state(pid, handle, settings['power_throttling'])
+        if 'affinity' in settings and settings['affinity']:
+            self._set_affinity(handle, settings['affinity'])
+        if 'page_priority' in settings:
+            self._set_page_priority(handle, settings['page_priority'])
+        if settings.get('working_set_trim'):
+            self._trim_working_set(handle)
+        if 'io_priority' in settings:
+            self._set_io_priority(pid, settings['io_priority'])
+    
+    def _set_page_priority(self, handle, level):
+        """Establece la prioridad de memoria (MEMORY_PRIORITY_*) del proceso."""
+        mem_priority = core.MEMORY_PRIORITY_INFORMATION()
+        mem_priority.MemoryPriority = level
+        try:
+            core.ntdll.NtSetInformationProcess(
+                handle,
+                core.PROCESS_PAGE_PRIORITY,
+                ctypes.byref(mem_priority),
+                ctypes.sizeof(mem_priority)
+            )
+        except Exception as e:
+            logger.debug(f"Error al establecer prioridad de memoria: {e}")
+    
+    def _trim_working_set(self, handle):
+        """Recorta el working set del proceso (-1, -1 libera todo lo posible)."""
+        try:
+            core.kernel32.SetProcessWorkingSetSizeEx(handle, -1, -1, 0)
+        except Exception as e:
+            logger.debug(f"Error al recortar working set: {e}")
+    
+    def _set_io_priority(self, pid, level):
+        """Establece la prioridad de E/S (0 muy baja .. 2 normal)."""
+        try:
+            psutil.Process(pid).ionice(level)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, ValueError) as e:
+            logger.debug(f"Error al establecer prioridad de E/S: {e}")
+    
+    def _set_affinity(self, handle, cores):
+        """Establece la afinidad de CPU sobre un handle ya abierto; True si se aplicó."""
+        affinity_mask = sum(1 << core_id for core_id in cores)
+        try:
+            if core.kernel32.SetProcessAffinityMask(handle, affinity_mask):
+                return True
+            logger.debug(f"Error al establecer afinidad: {ctypes.WinError(ctypes.get_last_error())}")
+        except Exception as e:
+            logger.debug(f"Error al establecer afinidad: {e}")
+        return False
     
     def _set_priority(self, handle, level):
         """Establece la prioridad del proceso."""
@@ -1176,75 +1318,184 @@ class ModuloProcesos:
             except Exception as e:
                 logger.debug(f"Error al establecer prioridad: {e}")
     
-    def _enable_eco_qos(self, handle):
-        """Habilita EcoQoS (Efficiency Mode)."""
+    def _enable_eco_qos(self, handle, enable=True):
+        """Habilita (o deshabilita) EcoQoS (Efficiency Mode)."""
         throttling_state = core.PROCESS_POWER_THROTTLING_STATE()
         throttling_state.Version = 1
         throttling_state.ControlMask = core.PROCESS_POWER_THROTTLING_EXECUTION_SPEED
-        throttling_state.StateMask = core.PROCESS_POWER_THROTTLING_EXECUTION_SPEED
+        throttling_state.StateMask = core.PROCESS_POWER_THROTTLING_EXECUTION_SPEED if enable else 0
         
         try:
-            core.ntdll.NtSetInformationProcess(
+            status = core.ntdll.NtSetInformationProcess(
                 handle, 
                 core.PROCESS_POWER_THROTTLING, 
                 ctypes.byref(throttling_state), 
                 ctypes.sizeof(throttling_state)
             )
+            return status == 0
         except Exception as e:
-            logger.debug(f"Error al habilitar EcoQoS: {e}")
-    
-    def _set_power_throttling(self, handle, enable):
-        """Control de throttling de energía."""
-        if enable:
-            self._enable_eco_qos(handle)
+            logger.debug(f"Error al cambiar EcoQoS: {e}")
+            return False
     
     def ensure_job_for_group(self, group_name): 
         """Crea o recupera un Job Object."""
         if group_name in self.job_objects:
             return self.job_objects[group_name]
         
-        job_handle = 1  # Placeholder
+        job_handle = self.job_manager.ensure_job_for_group(group_name)
+        if not job_handle:
+            logger.error(f"[ModuloProcesos] No se pudo crear el Job Object '{group_name}': {ctypes.get_last_error()}")
+            return None
         self.job_objects[group_name] = job_handle
         return job_handle
     
     def set_job_cpu_limit(self, job_handle, limit_percent): 
-        logger.debug(f"[ModuloProcesos] Límite CPU {limit_percent}% en Job {job_handle}")
+        """Aplica un tope duro de CPU (% de la máquina) al Job Object."""
+        if not job_handle:
+            return False
+        ok = self.job_manager.set_job_cpu_limit(job_handle, limit_percent)
+        if ok:
+            logger.debug(f"[ModuloProcesos] Límite CPU {limit_percent:.1f}% en Job {job_handle}")
+        else:
+            logger.debug(f"[ModuloProcesos] Error al limitar Job {job_handle}: {ctypes.get_last_error()}")
+        return ok
+    
+    def is_process_in_job(self, job_handle, pid):
+        """True si el proceso está en el Job Object, por asignación directa o heredada."""
+        if not job_handle:
+            return False
+        return self.job_manager.is_process_in_job(job_handle, pid)
+    
+    def close_job(self, group_name):
+        """Cierra un Job Object creado con ensure_job_for_group."""
+        if self.job_objects.pop(group_name, None):
+            self.job_manager.close_job(group_name)
+    
+    def get_job_cpu_time(self, job_handle):
+        """Tiempo total de CPU consumido por el Job Object, en segundos."""
+        if not job_handle:
+            return None
+        return self.job_manager.get_job_cpu_time(job_handle)
     
     def assign_pid_to_job(self, job_handle, pid): 
-        logger.debug(f"[ModuloProcesos] PID {pid} → Job {job_handle}")
+        """Asigna un proceso a un Job Object (la asignación es permanente)."""
+        if not job_handle:
+            return False
+        ok = self.job_manager.assign_pid_to_job(job_handle, pid)
+        if ok:
+            logger.debug(f"[ModuloProcesos] PID {pid} → Job {job_handle}")
+        return ok
     
     def apply_affinity(self, pid, cores): 
-        """Establece la afinidad de CPU."""
-        handle = core.ProcessHandleCache().get_handle(pid)
+        """Establece la afinidad de CPU; devuelve True si Windows la aceptó."""
+        handle = self.handle_cache.get_handle(pid)
         if not handle:
-            return
+            return False
         
+        # La máscara se pasa por valor (DWORD_PTR, c_size_t en los argtypes de core)
         affinity_mask = sum(1 << core for core in cores)
         try:
-            core.kernel32.SetProcessAffinityMask(handle, ctypes.pointer(ctypes.c_ulong(affinity_mask)))
+            return bool(core.kernel32.SetProcessAffinityMask(handle, affinity_mask))
         except Exception as e:
             logger.debug(f"Error al establecer afinidad: {e}")
+            return False
     
-    def apply_eco_qos_to_all_background(self, foreground_pid): 
-        """Aplica EcoQoS a procesos de fondo."""
-        for proc in psutil.process_iter(['pid']):
-            try:
-                if proc.info['pid'] != foreground_pid and proc.info['pid'] > 4:
-                    handle = core.ProcessHandleCache().get_handle(proc.info['pid'])
-                    if handle:
-                        self._enable_eco_qos(handle)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
+    def apply_eco_qos_to_all_background(self, foreground_pid, processes=None, desired=None): 
+        """
+        Aplica EcoQoS a los procesos de fondo de forma incremental: sólo se tocan
+        procesos nuevos o que cambiaron de estado deseado, y se revierte en el primer plano.
+        
+        :param foreground_pid: PID (o conjunto de PIDs) en primer plano
+        :param processes: (pid, create_time) vivos; None para enumerarlos
+        :param desired: {pid: habilitar} por proceso de fondo (p. ej. según su nivel)
+        :return: Número de procesos modificados
+        """
+        if isinstance(foreground_pid, int):
+            foreground_pids = {foreground_pid}
+        else:
+            foreground_pids = set(foreground_pid or ())
+        touched = self.eco_qos.apply(foreground_pids, processes, desired)
+        if touched:
+            logger.debug(f"[ModuloProcesos] EcoQoS actualizado en {touched} procesos")
+        return touched
 
 # Módulos simplificados (los detalles ya están en la versión anterior)
 class ModuloCPU:
-    def __init__(self, topology): 
+    def __init__(self, topology, thread_profiles=None): 
         self.topology = topology
+        self.thread_profiles = thread_profiles
+        self.hetero_scheduler = HeterogeneousScheduler(topology)
+        logical_cpus = topology.get('total_logical_cores') or topology.get('total') or 1
+        # CPUID real (cacheado por arranque): tamaño de la L3 para el indicador de intensidad de memoria
+        self.cpuid_detector = CPUIDDetector(range(logical_cpus))
+        self.l3_optimizer = L3CacheOptimizer(topology, self.cpuid_detector.get_cache_info())
+        self.smt_optimizer = EnhancedSMTOptimizer(topology)
+        # CCDs (grupos L3) y recuento de hilos activos medidos
+        self.ccd_optimizer = AMDCCDOptimizer(topology, thread_profiles)
+        # Etiqueta de carga por comportamiento (render, encode, game, interactive, batch)
+        self.avx_optimizer = AVXInstructionOptimizer(logical_cpus, thread_profiles)
     def apply_intelligent_pinning(self, pid, role): pass
-    def classify_and_schedule_threads(self, pid, latency_sensitive): pass
+    def place_hot_threads(self, pid):
+        """
+        Una ronda de colocación de los hilos calientes del proceso sensible a
+        la latencia en los mejores cores físicos (CPU Sets). Se llama tras
+        cada perfilado de hilos, de modo que la histéresis cuenta rondas
+        seguidas; los demás procesos colocados vuelven al planificador del sistema.
+        
+        :return: Colocación actual tid → CPUs lógicas
+        """
+        self.hetero_scheduler.prune({pid})
+        if self.thread_profiles is None or self.thread_profiles.get(pid) is None:
+            return {}
+        try:
+            allowed_cpus = psutil.Process(pid).cpu_affinity()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return {}
+        return self.hetero_scheduler.place_hot_threads(pid, self.thread_profiles.hot_threads(pid), allowed_cpus)
+    def release_hot_threads(self, pid):
+        """Devuelve al planificador del sistema los hilos colocados de un proceso de fondo."""
+        self.hetero_scheduler.release_threads(pid)
     def assign_to_physical_cores(self, pid): pass
-    def optimize_l3_locality(self, pid): pass
-    def optimize_avx(self, pid): pass
+    def optimize_l3_locality(self, pid, load=0.0, working_set=0, fault_rate=0.0):
+        """Fija un proceso nuevo al grupo L3 menos disputado (sólo con varios grupos L3)."""
+        if len(self.l3_optimizer.l3_groups) < 2 or pid in self.l3_optimizer.placer.assignment:
+            return
+        if not self.ccd_optimizer.fits_in_ccd(pid):
+            return
+        result = self.l3_optimizer.optimize_process_cache_locality(pid, load, working_set, fault_rate)
+        self._set_affinity(pid, result['affinity'])
+    def rebalance_l3(self, samples):
+        """
+        Reequilibra los grupos L3 de los procesos gestionados y devuelve a los
+        que dejaron de gestionarse todas las CPUs.
+        
+        :param samples: {pid: (carga en cores, working set en bytes, fallos de página/s)}
+        :return: Procesos movidos de grupo
+        """
+        if len(self.l3_optimizer.l3_groups) < 2:
+            return 0
+        # Sólo se confinan los procesos cuyos hilos activos medidos caben en un grupo
+        samples = {pid: sample for pid, sample in samples.items() if self.ccd_optimizer.fits_in_ccd(pid)}
+        moves, released = self.l3_optimizer.rebalance(samples)
+        for pid, cores in moves.items():
+            self._set_affinity(pid, cores)
+        all_cores = sorted({c for group in self.l3_optimizer.l3_groups for c in group})
+        for pid in released:
+            self._set_affinity(pid, all_cores)
+        return len(moves)
+    @staticmethod
+    def _set_affinity(pid, cores):
+        try:
+            psutil.Process(pid).cpu_affinity(list(cores))
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    def observe_workload(self, pid, exe, load, freq_ratio=None, io_rate=0.0, modules=None, allowed_cpus=None):
+        """Añade una muestra de comportamiento del proceso y devuelve su etiqueta."""
+        return self.avx_optimizer.observe(pid, exe, load, freq_ratio, io_rate, modules, allowed_cpus)
+    def optimize_avx(self, pid):
+        """Afinidad y prioridad según la carga observada del proceso ({} si aún no tiene etiqueta)."""
+        all_cores = list(range(self.avx_optimizer.classifier.logical_cpus))
+        return self.avx_optimizer.detect_and_optimize(pid, all_cores)
     def optimize_numa(self, pid): pass
 
 class ModuloMemoria:
@@ -1292,6 +1543,10 @@ class GestorModulos(threading.Thread):
         from config_manager import ConfigManager
         self.config_manager = ConfigManager()
 
+        # Perfiles aprendidos por ejecutable (rol, cores, acompañantes, resultados)
+        from profile_store import ProfileStore
+        self.profile_store = ProfileStore()
+
         # --- Estado gestionado por la GUI ---
         self.game_mode = self.config_manager.get('game_mode_enabled', False)
         self.ahorro_mode = self.config_manager.get('ahorro_mode_enabled', False)
@@ -1316,14 +1571,46 @@ class GestorModulos(threading.Thread):
             logger.warning("⚠️  No se pudieron obtener privilegios de depuración")
         
         self.handle_cache = core.ProcessHandleCache()
-        self.modulo_monitorizacion = ModuloMonitorizacion()
+        self.modulo_monitorizacion = ModuloMonitorizacion(
+            core_sample_interval=self.config_manager.get('core_sample_interval', 1.0)
+        )
         self.modulo_procesos = ModuloProcesos()
         
+        # Presupuesto de CPU en segundo plano (Job Object + control PI)
+        # Un Job por sesión de juego: la pertenencia a un Job no se puede deshacer,
+        # así que el tope se libera cerrándolo y creando otro
+        self.background_job = None
+        self._background_job_name = None
+        self._background_job_generation = 0
+        self._background_job_members = set()
+        self._background_cpu_sample = None
+        self.cpu_budget = BackgroundCPUBudgetController(
+            measure_fn=self._measure_background_cpu,
+            apply_fn=self._apply_background_cap,
+            target_percent=self.config_manager.get('background_cpu_budget', 20)
+        )
+        
+        # Niveles de segundo plano (reciente/visible/inactivo/acaparador)
+        self.background_tiers = BackgroundTierManager()
+        # Rankings de mayores consumidores (CPU, working set, E/S, fallos de página)
+        self.top_consumers = TopConsumerTracker()
+        # Recorte por presión de memoria de los mayores consumidores, nunca del primer plano
+        self.memory_balloon = MemoryBalloon(top_consumers=self.top_consumers, protected_pids=self._managed_pids)
+        # Tareas pesadas (retrim, purga de Standby) sólo en inactividad
+        self.idle_detector = IdleDetector()
+        self.maintenance = MaintenanceQueue(
+            suspend=lambda process: psutil.Process(process.pid).suspend(),
+            resume=lambda process: psutil.Process(process.pid).resume()
+        )
+        self._setup_maintenance_tasks()
+        
         # ✅ NUEVO: Inicializar Driver en Kernel-Mode
         self.driver_km = DriverKernelMode()
         
         # ✅ NUEVO: Inicializar Modo Extreme Low Latency
-        self.modo_extreme = ModoExtremeLowLatency(driver_km=self.driver_km)
+        self.modo_extreme = ModoExtremeLowLatency(driver_km=self.driver_km,
+                                                  core_sampler=self.modulo_monitorizacion.core_sampler,
+                                                  cpu_topology=self.modulo_monitorizacion.get_cpu_topology)
         
         self.foreground_debouncer = core.ForegroundDebouncer(
             debounce_time_ms=300,
@@ -1340,9 +1627,27 @@ class GestorModulos(threading.Thread):
         self._modulo_red = None
         self._modulo_graficos = None
         
+        # --- Particionado de cores entre varios roles (juego/streaming/voz) ---
+        self._partition_planner = None
+        self.core_partition_plan = {}
+        self.pinned_roles = {}
+        self._partition_procs = {}
+        # Plan de afinidad global (roles, primer plano y fondo), aplicado por diferencias
+        self._global_planner = None
+        
+        # --- Aparcamiento de hermanos SMT de los cores del juego ---
+        self._parked_siblings = []
+        self._parking_affinity = None
+        # PID → (create_time, afinidad original) de los procesos desviados por el aparcamiento
+        self._parking_steered = {}
+        self.parking_latency = {}
+        # (PID, create_time) → usuario del proceso, para excluir las cuentas de sistema
+        self._usernames = {}
+        
         # --- Estado ---
         self.foreground_pid = None
         self.foreground_name = None
+        self.foreground_exe = None
         self.last_optimization_time = defaultdict(float)
         
         # --- Estadísticas ---
@@ -1351,7 +1656,10 @@ class GestorModulos(threading.Thread):
             'processes_optimized': set(),
             'foreground_changes': 0,
             'thermal_throttles': 0,
-            'extreme_mode_activations': 0
+            'extreme_mode_activations': 0,
+            'profile_hits': 0,
+            'l3_migrations': 0,
+            'affinity_plan_changes': 0
         }
 
     # --- Propiedades de Carga Diferida ---
@@ -1359,7 +1667,7 @@ class GestorModulos(threading.Thread):
     def modulo_cpu(self):
         if self._modulo_cpu is None:
             topology = self.modulo_monitorizacion.get_cpu_topology()
-            self._modulo_cpu = ModuloCPU(topology)
+            self._modulo_cpu = ModuloCPU(topology, self.modulo_monitorizacion.thread_profiles)
         return self._modulo_cpu
 
     @property
@@ -1409,6 +1717,9 @@ class GestorModulos(threading.Thread):
             start_time = time.perf_counter()
             iteration += 1
 
+            # Carga y frecuencia por core (no hace nada hasta que vence su intervalo)
+            self.modulo_monitorizacion.sample_cores()
+
             # Optimizar proceso de primer plano
             if self.foreground_pid:
                 if time.time() - self.last_optimization_time[self.foreground_pid] > 2.0:
@@ -1418,15 +1729,33 @@ class GestorModulos(threading.Thread):
             # Gestión térmica
             if iteration % 5 == 0:
                 self.manage_thermal_throttling()
+            
+            # Presupuesto de CPU en segundo plano, perfil de hilos y muestreo de métricas (1 Hz).
+            # Los hilos se perfilan primero para que las métricas reutilicen la misma instantánea
+            if iteration % 10 == 0:
+                self.manage_thread_profiling()
+                self.manage_workload_classification()
+                self.manage_background_cpu_budget(refresh_members=(iteration % 100 == 0))
+            
+            # Mantenimiento en ventanas de inactividad; con una tarea en curso se
+            # vigila en cada iteración para pausarla en cuanto vuelva el usuario
+            if iteration % 10 == 0 or self.maintenance.running is not None:
+                self.manage_maintenance()
+            
+            # Plan de afinidad global o, desactivado, particionado de roles,
+            # reparto entre grupos L3 y aparcamiento SMT por separado
+            if iteration % 30 == 0:
+                if self._global_planning_enabled():
+                    self.manage_global_affinity()
+                else:
+                    self.manage_core_partitioning()
+                    self.manage_l3_placement()
+                    self.manage_sibling_parking()
 
             # Optimizadores periódicos
             if iteration % 10 == 0:
                 self.modulo_almacenamiento.tune_cache()
                 self.modulo_red.detect_and_tune()
-                self.modulo_memoria.schedule_scrubbing()
-            
-            if iteration % 100 == 0:
-                self.modulo_almacenamiento.execute_trim()
             
             # GC manual
             gc_counter += 1
@@ -1436,8 +1765,12 @@ class GestorModulos(threading.Thread):
                     gc.collect(generation=0)
                 gc_counter = 0
             
-            # Estadísticas
+            # Estadísticas, niveles de segundo plano y aprendizaje de perfiles
             if iteration % 50 == 0:
+                self.top_consumers.update(self.modulo_monitorizacion.get_process_diff())
+                self.memory_balloon.check_and_balloon()
+                self.manage_background_tiers()
+                self._record_foreground_outcome()
                 self._print_stats()
 
             elapsed_time = time.perf_counter() - start_time
@@ -1446,7 +1779,9 @@ class GestorModulos(threading.Thread):
 
         logger.info("[GestorModulos] 🛑 Hilo de trabajo detenido")
         self.handle_cache.clear()
+        self.modulo_procesos.handle_cache.clear()
         self.driver_km.cerrar()
+        self.profile_store.close()
 
     def stop(self):
         """Detiene el gestor limpiamente."""
@@ -1456,6 +1791,22 @@ class GestorModulos(threading.Thread):
         if self.modo_extreme.activo:
             self.modo_extreme.desactivar()
         
+        # Liberar el tope de CPU del Job Object de segundo plano
+        self.cpu_budget.deactivate()
+        if self.background_job is not None:
+            self._close_background_job()
+        
+        # No dejar tareas de mantenimiento a medias o pausadas
+        self.maintenance.stop()
+        
+        # Devolver a los procesos de fondo los hermanos SMT aparcados
+        if self._parked_siblings:
+            self._release_sibling_parking()
+        
+        # Devolver todas las CPUs a los procesos del plan global
+        if self._global_planner is not None and self._global_planner.applied:
+            self._release_global_plan()
+        
         gc.enable()
     
     def set_thermal_thresholds(self, thresholds):
@@ -1509,9 +1860,37 @@ class GestorModulos(threading.Thread):
             'extreme_mode_active': self.modo_extreme.activo if hasattr(self, 'modo_extreme') else False,
             'foreground_pid': self.foreground_pid,
             'foreground_name': self.foreground_name,
+            'learned_profiles': len(self.profile_store),
+            'background_cpu_budget': self.cpu_budget.status(),
+            'core_partition_plan': self.core_partition_plan,
+            'sibling_parking': {'parked': self._parked_siblings, 'latency_us': self.parking_latency},
+            'affinity_plan': {
+                'processes': len(self._global_planner.applied),
+                'roles': self._global_planner.role_cpus,
+            } if self._global_planner is not None else {},
+            'workload_tags': {pid: self.modulo_cpu.avx_optimizer.classifier.tag_of(pid)
+                              for pid in self.modulo_cpu.avx_optimizer.classifier.exes},
+            'background_tiers': self.background_tiers.counts(),
+            'top_consumers': self.top_consumers.summary(),
+            'metrics_store': self.modulo_monitorizacion.metrics.stats(),
+            'hot_threads': self.modulo_monitorizacion.thread_profiles.summary(),
+            'maintenance': dict(self.maintenance.status(), idle=self.idle_detector.idle),
             'stats': self.stats
         }
 
+    def get_top_consumers(self, metric='cpu_percent', n=10, include_foreground=False):
+        """
+        Mayores consumidores de una métrica según la última muestra.
+        
+        :param metric: 'cpu_percent', 'ws_growth', 'io_rate', 'fault_rate' o 'working_set'
+        :param include_foreground: Si False, omite el árbol en primer plano
+        :return: Lista de (valor, pid, nombre) de mayor a menor
+        """
+        exclude = ()
+        if not include_foreground and self.foreground_pid:
+            exclude = self.modulo_monitorizacion.get_process_tree(self.foreground_pid)
+        return self.top_consumers.top(metric, n, exclude)
+
     def on_foreground_change(self, pid):
         """
         Callback cuando cambia la ventana de primer plano.
@@ -1536,10 +1915,17 @@ class GestorModulos(threading.Thread):
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 return
             
+            try:
+                process_exe = proc.exe()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                process_exe = None
+            
             # Actualizar estado
             self.foreground_pid = pid
             self.foreground_name = process_name
+            self.foreground_exe = process_exe
             self.stats['foreground_changes'] += 1
+            self._exclude_foreground_from_background_job()
             
             logger.info(f"[GestorModulos] Ventana de primer plano: {process_name} (PID: {pid})")
             
@@ -1588,13 +1974,46 @@ class GestorModulos(threading.Thread):
         
         return False
         
+    def _username_of(self, pid, create_time=None):
+        """Usuario de un proceso (cacheado por PID y create_time); None si no se puede leer."""
+        key = (pid, create_time)
+        if key not in self._usernames:
+            if len(self._usernames) > 4096:
+                self._usernames.clear()
+            try:
+                self._usernames[key] = psutil.Process(pid).username()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                self._usernames[key] = None
+        return self._usernames[key]
+    
+    def _is_protected_record(self, proc):
+        """
+        True si un proceso de la instantánea no debe tocarse: sin sesión
+        conocida (respaldo Toolhelp32), crítico o en lista blanca, de la
+        sesión 0 o de una cuenta de sistema.
+        """
+        session_id = proc.get('session_id')
+        if session_id is None:
+            return True
+        if self.is_blacklisted(proc['name'], session_id=session_id):
+            return True
+        username = self._username_of(proc['pid'], proc.get('create_time'))
+        return self.is_blacklisted(proc['name'], username, session_id)
+    
     def apply_settings_to_process_group(self, pid, is_foreground):
         """Aplica ajustes a un proceso y su árbol."""
         process_tree_pids = self.modulo_monitorizacion.get_process_tree(pid)
         
-        job_handle = self.modulo_procesos.ensure_job_for_group(f"group_{pid}")
-        cpu_limit = 95 if is_foreground else 40
-        self.modulo_procesos.set_job_cpu_limit(job_handle, cpu_limit)
+        # Perfil aprendido: búsqueda O(1) y aplicación del plan en un solo lote
+        if is_foreground and pid == self.foreground_pid and self.foreground_exe:
+            profile = self.profile_store.lookup(self.foreground_exe)
+            expected_role = "juego" if self.foreground_name in self.user_gamelist else "primer_plano"
+            if profile is not None and profile['role'] == expected_role:
+                self._apply_profile_plan(process_tree_pids, profile)
+                return
+        
+        companions = []
+        root_settings = None
 
         for child_pid in process_tree_pids:
             try:
@@ -1604,17 +2023,104 @@ class GestorModulos(threading.Thread):
                 if self.is_blacklisted(process_name):
                     continue
                 
-                self.modulo_procesos.assign_pid_to_job(job_handle, child_pid)
+                # El primer plano nunca se limita; el fondo entra al Job de la sesión
+                if not is_foreground and self.cpu_budget.active:
+                    self._add_to_background_job(child_pid)
 
-                if not is_foreground:
-                    topology = self.modulo_monitorizacion.get_cpu_topology()
-                    if topology.get("e_cores"):
-                        self.modulo_procesos.apply_affinity(child_pid, topology["e_cores"])
+                # Con el plan global la afinidad de fondo la decide el planificador
+                if not is_foreground and not self._global_planning_enabled():
+                    background_cores = self._background_affinity()
+                    if background_cores and self._parking_affinity:
+                        self._steer_for_parking(child_pid, background_cores)
+                    elif background_cores:
+                        self.modulo_procesos.apply_affinity(child_pid, background_cores)
                 
-                self.apply_all_settings(child_pid, is_foreground, process_name)
+                settings = self.apply_all_settings(child_pid, is_foreground, process_name)
                 
+                if child_pid == pid:
+                    root_settings = settings
+                else:
+                    companions.append(process_name)
+                
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        
+        if is_foreground and pid == self.foreground_pid and self.foreground_exe:
+            self._learn_profile(pid, self.foreground_exe, companions, root_settings)
+
+    def _apply_profile_plan(self, process_tree_pids, profile):
+        """
+        Aplica el plan de un perfil aprendido a todo el árbol del proceso.
+        
+        :param process_tree_pids: PIDs del árbol de procesos en primer plano
+        :param profile: Perfil devuelto por ProfileStore.lookup
+        """
+        # Misma exclusión que el cálculo completo (críticos y lista blanca del usuario)
+        targets = []
+        for child_pid in process_tree_pids:
+            try:
+                if not self.is_blacklisted(psutil.Process(child_pid).name()):
+                    targets.append(child_pid)
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 continue
+        if not targets:
+            return
+        
+        settings = dict(profile['settings'])
+        # Con particionado o plan global activo la afinidad la decide el planificador;
+        # si no, se exploran las disposiciones candidatas hasta conocer la mejor
+        if not self.core_partition_plan and not self._global_planning_enabled():
+            layout = self.profile_store.candidate_layout(self.foreground_exe, self._layout_candidates(profile))
+            if layout:
+                settings['affinity'] = layout
+        if not settings:
+            return
+        
+        for child_pid in targets:
+            self.modulo_procesos.apply_batched_settings(child_pid, settings)
+            self.stats['processes_optimized'].add(child_pid)
+        
+        self.stats['optimizations_applied'] += 1
+        self.stats['profile_hits'] += 1
+        logger.debug(f"[GestorModulos] Perfil '{profile['role']}' aplicado a {len(targets)} procesos")
+
+    def _learn_profile(self, pid, exe_path, companions, settings):
+        """Guarda el resultado del cálculo completo como perfil del ejecutable."""
+        if not settings:
+            return
+        
+        role = "juego" if self.foreground_name in self.user_gamelist else "primer_plano"
+        try:
+            core_layout = psutil.Process(pid).cpu_affinity()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            core_layout = None
+        
+        self.profile_store.save_profile(exe_path, role, core_layout, companions, settings)
+
+    def _record_foreground_outcome(self):
+        """
+        Registra como coste de la disposición de cores del proceso en primer
+        plano la fracción de sus hilos ejecutables que esperan CPU (estado
+        Ready en la instantánea de hilos), y la guarda en el almacén de métricas.
+        """
+        if not self.foreground_pid or not self.foreground_exe:
+            return
+        ready = self.modulo_monitorizacion.thread_profiles.ready_fraction(self.foreground_pid)
+        if ready is None:
+            return
+        try:
+            core_layout = psutil.Process(self.foreground_pid).cpu_affinity()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return
+        self.modulo_monitorizacion.metrics.record('sched.foreground_ready', ready)
+        if core_layout:
+            self.profile_store.record_outcome(self.foreground_exe, core_layout, ready)
+
+    def _layout_candidates(self, profile):
+        """Disposiciones a comparar: la aprendida, todas las CPUs y una CPU por core físico."""
+        topology = self.modulo_monitorizacion.get_cpu_topology()
+        all_cpus = list(range(topology.get('total_logical_cores') or psutil.cpu_count(logical=True) or 1))
+        return [profile['core_layout'], all_cpus, primary_cpus(topology)]
 
     def apply_all_settings(self, pid, is_foreground, process_name="unknown"):
         """Aplica todos los ajustes a un proceso."""
@@ -1638,34 +2144,627 @@ class GestorModulos(threading.Thread):
             # Optimizaciones normales para primer plano
             self.modulo_kernel.set_turbo_mode(True)
             self.modulo_cpu.apply_intelligent_pinning(pid, role)
-            self.modulo_cpu.classify_and_schedule_threads(pid, latency_sensitive=True)
             self.modulo_cpu.assign_to_physical_cores(pid)
             self.modulo_memoria.set_memory_priority(pid, "NORMAL")
             self.modulo_memoria.enable_large_pages(pid)
             self.modulo_memoria.enable_awe(pid)
-            self.modulo_cpu.optimize_l3_locality(pid)
-            self.modulo_cpu.optimize_avx(pid)
+            # Afinidad según la carga observada (render, encode...); la prioridad sigue siendo HIGH
+            workload = self._workload_settings(pid, foreground=is_foreground)
+            if not self._is_pinned(pid) and 'affinity' not in workload and not self._global_planning_enabled():
+                self.modulo_cpu.optimize_l3_locality(pid, *self._process_sample(pid))
             self.modulo_cpu.optimize_numa(pid)
             self.modulo_red.prioritize_foreground_traffic(pid)
             
             settings_to_apply['priority'] = 'HIGH'
             settings_to_apply['power_throttling'] = False
+            settings_to_apply.update(workload)
             
         else:
-            # Fondo
-            self.modulo_memoria.set_memory_priority(pid, "VERY_LOW")
-            self.modulo_memoria.trim_private_pages(pid)
-            self.modulo_cpu.classify_and_schedule_threads(pid, latency_sensitive=False)
-            self.modulo_memoria.enable_memory_compression(pid)
+            # Fondo: la política (prioridad, EcoQoS, memoria, recorte, E/S) depende del nivel
+            tier = self.background_tiers.tier_of(pid)
+            self.modulo_cpu.release_hot_threads(pid)
+            if tier == TIER_IDLE:
+                self.modulo_memoria.enable_memory_compression(pid)
             
-            settings_to_apply['priority'] = 'BELOW_NORMAL'
-            settings_to_apply['eco_qos'] = True
-            settings_to_apply['power_throttling'] = True
+            settings_to_apply.update(self.background_tiers.settings_for(tier))
             
         if settings_to_apply:
             self.modulo_procesos.apply_batched_settings(pid, settings_to_apply)
             self.stats['optimizations_applied'] += 1
             self.stats['processes_optimized'].add(pid)
+        
+        return settings_to_apply
+
+    # --- Particionado de Cores Multi-Rol ---
+
+    def _discover_pinned_roles(self):
+        """Localiza los procesos de juego, codificación y voz en una sola pasada."""
+        roles = defaultdict(set)
+        if self.foreground_pid:
+            roles['game'].update(self.modulo_monitorizacion.get_process_tree(self.foreground_pid))
+        
+        for proc in self.modulo_monitorizacion.get_process_snapshot():
+            name = (proc['name'] or '').lower()
+            for role, names in ROLE_PROCESS_NAMES.items():
+                if name in names and proc['pid'] not in roles['game']:
+                    roles[role].add(proc['pid'])
+        return {role: pids for role, pids in roles.items() if pids}
+
+    def _measure_role_loads(self, roles):
+        """Carga de cada rol en cores equivalentes (suma de cpu_percent / 100)."""
+        loads = {}
+        live = {}
+        for role, pids in roles.items():
+            total = 0.0
+            for pid in pids:
+                proc = self._partition_procs.get(pid)
+                try:
+                    if proc is None:
+                        proc = psutil.Process(pid)
+                        proc.cpu_percent(interval=None)  # Primera llamada: referencia
+                    else:
+                        total += proc.cpu_percent(interval=None) / 100.0
+                    live[pid] = proc
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            loads[role] = total
+        self._partition_procs = live
+        return loads
+
+    def manage_core_partitioning(self):
+        """
+        Durante una sesión de juego con streaming o chat de voz activos,
+        reparte los cores en conjuntos disjuntos por rol y los reequilibra
+        según la carga medida.
+        """
+        roles = self._discover_pinned_roles() if self._is_gaming_session() else {}
+        if 'game' not in roles or len(roles) < 2:
+            if self.core_partition_plan:
+                self._release_core_partitions()
+            return
+        
+        if self._partition_planner is None:
+            self._partition_planner = CorePartitionPlanner(self.modulo_monitorizacion.get_cpu_topology())
+        
+        first_plan = not self.core_partition_plan
+        loads = self._measure_role_loads(roles)
+        if first_plan:
+            self._partition_planner.plan_partitions(roles.keys())
+            changed = True
+        else:
+            changed = self._partition_planner.rebalance(roles.keys(), loads)
+        
+        # Aplicar si cambió el plan o aparecieron procesos nuevos en algún rol
+        if changed or roles != self.pinned_roles:
+            plan = self._partition_planner.plan
+            for role, pids in roles.items():
+                cores = plan.get(role)
+                if not cores:
+                    continue
+                for pid in pids:
+                    self.modulo_procesos.apply_affinity(pid, cores)
+            self.core_partition_plan = plan
+            logger.info(f"[GestorModulos] Particiones de cores: {plan}")
+        
+        self.pinned_roles = roles
+
+    def _is_pinned(self, pid):
+        """True si el proceso pertenece a un rol con partición de cores propia."""
+        return any(pid in pids for pids in self.pinned_roles.values())
+    
+    def _process_sample(self, pid):
+        """(carga en cores, working set en bytes, fallos de página/s) del almacén de métricas."""
+        metrics = self.modulo_monitorizacion.metrics
+        return (
+            metrics.latest_scalar(f"proc.{pid}.cpu", 0.0) / 100.0,
+            metrics.latest_scalar(f"proc.{pid}.ws_mb", 0.0) * 1024 * 1024,
+            metrics.latest_scalar(f"proc.{pid}.faults", 0.0),
+        )
+    
+    def manage_thread_profiling(self):
+        """
+        Perfila los hilos y muestrea las métricas de los procesos gestionados
+        con la misma instantánea y, con cada perfil nuevo, hace una ronda de
+        colocación de los hilos calientes del primer plano.
+        """
+        managed_pids = self._managed_pids()
+        self.modulo_monitorizacion.profile_threads(managed_pids)
+        self.modulo_monitorizacion.sample_metrics(managed_pids)
+        if self.foreground_pid and not self.modo_extreme.activo:
+            self.modulo_cpu.place_hot_threads(self.foreground_pid)
+    
+    def manage_l3_placement(self):
+        """
+        Reparte los procesos gestionados (salvo los roles con partición propia
+        y el modo extremo) entre los grupos L3 según su contención.
+        """
+        if self.modo_extreme.activo:
+            return
+        samples = {pid: self._process_sample(pid) for pid in self._managed_pids()
+                   if not self._is_pinned(pid) and 'affinity' not in self.modulo_cpu.optimize_avx(pid)}
+        moved = self.modulo_cpu.rebalance_l3(samples)
+        if moved:
+            self.stats['l3_migrations'] += moved
+            logger.info(f"[GestorModulos] {moved} procesos reequilibrados entre grupos L3")
+
+    def manage_workload_classification(self):
+        """
+        Alimenta el clasificador de cargas con la última muestra de cada proceso
+        gestionado y aplica la política de los que cambian de etiqueta. Si la
+        nueva etiqueta ya no limita la afinidad, el proceso recupera todas las CPUs.
+        """
+        managed = self._managed_pids()
+        classifier = self.modulo_cpu.avx_optimizer.classifier
+        classifier.prune(managed)
+        metrics = self.modulo_monitorizacion.metrics
+        freq_ratio = classifier.frequency_ratio(metrics.latest('cpu.freq_mhz') or [])
+        foreground = set()
+        if self.foreground_pid:
+            foreground = set(self.modulo_monitorizacion.get_process_tree(self.foreground_pid))
+        
+        for pid in managed:
+            exe = classifier.exes.get(pid)
+            modules = None
+            try:
+                proc = psutil.Process(pid)
+                # La carga "de todos los cores" se mide sobre la afinidad actual del proceso
+                allowed_cpus = len(proc.cpu_affinity())
+                if classifier.needs_modules(pid):
+                    # Ejecutable y módulos cargados sólo la primera vez (memory_maps es costoso)
+                    exe = proc.exe()
+                    modules = [os.path.basename(m.path) for m in proc.memory_maps()]
+            except (psutil.NoSuchProcess, psutil.AccessDenied, OSError):
+                continue
+            if not exe:
+                continue
+            is_foreground = pid in foreground
+            previous = classifier.tag_of(pid)
+            before = self._workload_settings(pid, is_foreground)
+            tag = self.modulo_cpu.observe_workload(
+                pid, exe,
+                metrics.latest_scalar(f"proc.{pid}.cpu", 0.0) / 100.0,
+                freq_ratio,
+                metrics.latest_scalar(f"proc.{pid}.io", 0.0),
+                modules,
+                allowed_cpus,
+            )
+            if tag != previous:
+                policy = self._workload_settings(pid, is_foreground)
+                if 'affinity' in before and 'affinity' not in policy:
+                    policy['affinity'] = list(range(classifier.logical_cpus))
+                if policy:
+                    self.modulo_procesos.apply_batched_settings(pid, policy)
+                    logger.info(f"[GestorModulos] PID {pid} clasificado como '{tag}': {policy}")
+    
+    def _workload_settings(self, pid, foreground=False):
+        """
+        Política de la carga observada. La afinidad la decide el plan global si
+        está activo, y el árbol en primer plano conserva su propia prioridad
+        (una etiqueta batch, cacheada por ejecutable, no debe bajar un IDE o un navegador).
+        """
+        if self._is_pinned(pid):
+            return {}
+        policy = self.modulo_cpu.optimize_avx(pid)
+        if self._global_planning_enabled():
+            policy.pop('affinity', None)
+        if foreground:
+            policy.pop('priority', None)
+        return policy
+    
+    def _global_planning_enabled(self):
+        """True si la afinidad la decide el plan global (config 'global_affinity_planner')."""
+        return self.config_manager.get('global_affinity_planner', True)
+    
+    def manage_global_affinity(self):
+        """
+        Calcula un único plan de afinidad para todos los procesos (roles
+        fijados, árbol en primer plano y fondo) a partir de la carga medida y
+        aplica sólo las afinidades que cambiaron respecto al plan anterior.
+        Las particiones sólo existen en una sesión de juego: un primer plano
+        que no es un juego (navegador, editor) no se confina.
+        """
+        if self._global_planner is None:
+            self._global_planner = GlobalAffinityPlanner(self.modulo_monitorizacion.get_cpu_topology())
+        if self.modo_extreme.activo:
+            # El modo extremo fija sus propias afinidades: al salir se aplica el plan completo
+            self._global_planner.release_all()
+            return
+        
+        roles = self._discover_pinned_roles() if self._is_gaming_session() else {}
+        role_of = {pid: role for role, pids in roles.items() for pid in pids}
+        foreground = set()
+        if self.foreground_pid:
+            foreground = set(self.modulo_monitorizacion.get_process_tree(self.foreground_pid))
+        
+        diff = self.modulo_monitorizacion.get_process_diff()
+        table = diff.table
+        own_pid = os.getpid()
+        processes = {}
+        for i in range(len(table)):
+            pid = int(table.pid[i])
+            if pid <= 4 or pid == own_pid:
+                continue
+            # Sesión 0, cuentas de sistema y procesos críticos no se tocan
+            session_id = int(table.session_id[i])
+            record = {'pid': pid, 'name': table.name(i), 'create_time': float(table.create_time[i]),
+                      'session_id': session_id if session_id >= 0 else None}
+            if self._is_protected_record(record):
+                continue
+            role = role_of.get(pid) or ('foreground' if pid in foreground else 'background')
+            processes[pid] = (role, float(diff.cpu_percent[i]) / 100.0)
+        
+        # Hilos activos medidos (procesos perfilados): un proceso que no cabe en un CCD no se confina
+        ccd = self.modulo_cpu.ccd_optimizer
+        active_threads = {}
+        for pid in processes:
+            count = ccd.active_thread_count(pid)
+            if count is not None:
+                active_threads[pid] = count
+        migrations = self._global_planner.cross_l3_migrations
+        plan_diff = self._global_planner.plan(processes, active_threads)
+        self.stats['l3_migrations'] += self._global_planner.cross_l3_migrations - migrations
+        for pid, cpus in plan_diff.changes.items():
+            if not self.modulo_procesos.apply_affinity(pid, cpus):
+                # No se aplicó: el siguiente plan lo vuelve a intentar
+                self._global_planner.forget(pid)
+        for pid in plan_diff.released:
+            self.modulo_procesos.handle_cache.release_handle(pid)
+        
+        self.pinned_roles = roles
+        self.core_partition_plan = {role: list(cpus) for role, cpus in self._global_planner.role_cpus.items()} if roles else {}
+        if plan_diff.changes:
+            self.stats['affinity_plan_changes'] += len(plan_diff.changes)
+            logger.debug(f"[GestorModulos] Plan de afinidad: {len(plan_diff.changes)} procesos reasignados")
+    
+    def _release_global_plan(self):
+        """Devuelve todas las CPUs a los procesos del plan global."""
+        all_cores = list(self._global_planner.all_cpus)
+        for pid in self._global_planner.release_all():
+            self.modulo_procesos.apply_affinity(pid, all_cores)
+        self.pinned_roles = {}
+        self.core_partition_plan = {}
+        logger.info("[GestorModulos] Plan de afinidad global liberado")
+    
+    def _background_affinity(self):
+        """CPUs para el trabajo de fondo: E-cores si los hay, sin los hermanos SMT aparcados."""
+        if self._parking_affinity:
+            return self._parking_affinity
+        return self.modulo_monitorizacion.get_cpu_topology().get("e_cores") or None
+    
+    def manage_sibling_parking(self):
+        """
+        Durante una sesión de juego confinada a parte de las CPUs, mantiene
+        libres de trabajo de fondo los hermanos SMT de los cores del juego.
+        El efecto se mide con la sonda de latencia de planificación en su
+        propio hilo: primero sin aparcar (se aparca al llegar esa medida) y
+        después con los hermanos ya aparcados.
+        """
+        smt = self.modulo_cpu.smt_optimizer
+        enabled = (self.config_manager.get('smt_sibling_parking', True) and self._is_gaming_session()
+                   and self.foreground_pid and not self.modo_extreme.activo)
+        if not enabled or not any(smt.siblings.values()):
+            if self._parked_siblings:
+                self._release_sibling_parking()
+            return
+        
+        try:
+            game_cpus = psutil.Process(self.foreground_pid).cpu_affinity()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return
+        parking = smt.sibling_parking(game_cpus)
+        measured = smt.take_latency_probe()
+        
+        if not parking['parked']:
+            # El juego usa todas las CPUs: no hay hermanos que aparcar
+            if self._parked_siblings:
+                self._release_sibling_parking()
+            return
+        
+        if parking['parked'] == self._parked_siblings:
+            if measured and measured[0] == 'after':
+                self.parking_latency['after'] = measured[1]
+                logger.info(f"[GestorModulos] Latencia de planificación p99: "
+                            f"{self.parking_latency['before']['p99']:.0f} µs → {measured[1]['p99']:.0f} µs")
+            elif 'before' in self.parking_latency and 'after' not in self.parking_latency:
+                smt.start_latency_probe(min(game_cpus), 'after')
+            return
+        
+        plan = ('before', tuple(parking['parked']))
+        if not measured or measured[0] != plan:
+            # Se aparca cuando llegue la medida de referencia de esta disposición
+            smt.start_latency_probe(min(game_cpus), plan)
+            return
+        
+        self.parking_latency = {'before': measured[1]}
+        e_cores = set(self.modulo_monitorizacion.get_cpu_topology().get("e_cores") or ())
+        allowed = ([c for c in parking['background_affinity'] if c in e_cores]
+                   or parking['background_affinity'])
+        self._parked_siblings = parking['parked']
+        self._parking_affinity = allowed
+        
+        protected = self._managed_pids()
+        own_pid = os.getpid()
+        for proc in self.modulo_monitorizacion.get_process_snapshot():
+            pid = proc['pid']
+            if pid <= 4 or pid == own_pid or pid in protected or self._is_protected_record(proc):
+                continue
+            self._steer_for_parking(pid, allowed)
+        logger.info(f"[GestorModulos] Hermanos SMT aparcados {self._parked_siblings}: "
+                    f"{len(self._parking_steered)} procesos de fondo desviados")
+    
+    def _steer_for_parking(self, pid, cores):
+        """Desvía un proceso de fondo a las CPUs del aparcamiento, recordando su afinidad original."""
+        if pid not in self._parking_steered:
+            try:
+                proc = psutil.Process(pid)
+                self._parking_steered[pid] = (proc.create_time(), proc.cpu_affinity())
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                return
+        self.modulo_procesos.apply_affinity(pid, cores)
+    
+    def _release_sibling_parking(self):
+        """Devuelve a los procesos desviados la afinidad que tenían antes del aparcamiento."""
+        self._parking_affinity = None
+        restored = 0
+        for pid, (create_time, original) in self._parking_steered.items():
+            try:
+                if psutil.Process(pid).create_time() != create_time:
+                    continue  # PID reutilizado por otro proceso
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            if self.modulo_procesos.apply_affinity(pid, original):
+                restored += 1
+        logger.info(f"[GestorModulos] Aparcamiento SMT desactivado ({restored} procesos restaurados)")
+        self._parked_siblings = []
+        self._parking_steered = {}
+        self.parking_latency = {}
+
+    def _release_core_partitions(self):
+        """Devuelve a los procesos fijados todos los cores."""
+        all_cores = list(range(psutil.cpu_count(logical=True) or 1))
+        for pids in self.pinned_roles.values():
+            for pid in pids:
+                self.modulo_procesos.apply_affinity(pid, all_cores)
+        self.core_partition_plan = {}
+        self.pinned_roles = {}
+        self._partition_procs = {}
+        logger.info("[GestorModulos] Particionado de cores desactivado")
+
+    # --- Niveles de Segundo Plano ---
+
+    def _setup_maintenance_tasks(self):
+        """
+        Registra las tareas pesadas que antes se disparaban por contadores del bucle.
+        
+        mdsched.exe no se programa: es interactivo (pide reiniciar) y no tiene fin acotado.
+        """
+        trim = IntelligentTRIMScheduler()
+        standby = StandbyListCleaner()
+        self.maintenance.add(MaintenanceTask('retrim', trim.start_retrim, interval=24 * 3600, max_runtime=1800))
+        self.maintenance.add(MaintenanceTask('standby_purge', standby.clear_ram_cache, interval=1800, pausable=True))
+    
+    def _maintenance_role(self):
+        """Rol que bloquea el mantenimiento: juego activo o codificación en curso (p.ej. directo sin entrada)."""
+        if self._is_gaming_session():
+            return 'game'
+        if self.pinned_roles.get('encoder'):
+            return 'encoder'
+        for role, pids in self.pinned_roles.items():
+            if self.foreground_pid in pids:
+                return role
+        return None
+    
+    def manage_maintenance(self):
+        """Actualiza el detector de inactividad y avanza la cola de mantenimiento."""
+        try:
+            input_idle = core.get_input_idle_seconds()
+        except Exception as e:
+            logger.debug(f"[GestorModulos] Error leyendo la inactividad del usuario: {e}")
+            input_idle = 0.0
+        
+        metrics = self.modulo_monitorizacion.metrics
+        idle = self.idle_detector.update(
+            input_idle,
+            self.modulo_monitorizacion.get_system_load()['cpu'],
+            metrics.latest_scalar('disk.bytes_per_s', 0.0),
+            self._maintenance_role()
+        )
+        self.maintenance.tick(idle)
+    
+    def _managed_pids(self):
+        """PIDs del árbol en primer plano y de los roles fijados (juego, streaming, voz)."""
+        pids = set()
+        if self.foreground_pid:
+            pids.update(self.modulo_monitorizacion.get_process_tree(self.foreground_pid))
+        for role_pids in self.pinned_roles.values():
+            pids.update(role_pids)
+        return pids
+    
+    def manage_background_tiers(self):
+        """
+        Muestrea CPU y E/S de los procesos en segundo plano, recalcula su nivel
+        y aplica la política sólo a los que cambiaron de nivel.
+        """
+        protected = self._managed_pids()
+        
+        try:
+            visible = core.get_visible_window_pids()
+        except Exception as e:
+            logger.debug(f"[GestorModulos] Error enumerando ventanas visibles: {e}")
+            visible = set()
+        
+        own_pid = os.getpid()
+        samples = {}
+        for proc in self.modulo_monitorizacion.get_process_snapshot():
+            pid = proc['pid']
+            if pid <= 4 or pid == own_pid or 'cpu_user' not in proc:
+                continue
+            if self.is_blacklisted(proc['name'], session_id=proc['session_id']):
+                continue
+            samples[pid] = (
+                proc['create_time'],
+                proc['cpu_user'] + proc['cpu_kernel'],
+                proc['io_read_bytes'] + proc['io_write_bytes']
+            )
+        
+        changes = self.background_tiers.update(samples, visible, protected)
+        # Los handles en caché de PIDs terminados o reutilizados ya no son válidos
+        for pid in self.background_tiers.removed_pids:
+            self.modulo_procesos.handle_cache.release_handle(pid)
+        for pid, tier in changes.items():
+            settings = self.background_tiers.settings_for(tier)
+            settings.pop('eco_qos', None)  # Lo aplica la pasada incremental de abajo
+            self.modulo_procesos.apply_batched_settings(pid, settings)
+            self.stats['processes_optimized'].add(pid)
+        
+        # EcoQoS según el nivel de cada proceso, revertido en el primer plano y los roles fijados
+        eco_qos = {pid: self.background_tiers.settings_for(self.background_tiers.tier_of(pid))['eco_qos']
+                   for pid in samples}
+        self.modulo_procesos.apply_eco_qos_to_all_background(
+            protected, processes=[(pid, sample[0]) for pid, sample in samples.items()], desired=eco_qos
+        )
+        if changes:
+            self.stats['optimizations_applied'] += 1
+            logger.debug(f"[GestorModulos] Niveles de fondo: {self.background_tiers.counts()}")
+
+    # --- Presupuesto de CPU en Segundo Plano ---
+
+    def _is_gaming_session(self):
+        """Indica si hay una sesión de juego activa."""
+        return bool(self.game_mode or (self.foreground_name and self.foreground_name in self.user_gamelist))
+
+    def manage_background_cpu_budget(self, refresh_members=False):
+        """
+        Activa el control PI del Job Object de segundo plano durante las sesiones
+        de juego y libera el tope al terminar.
+        
+        :param refresh_members: Si True, incorpora al Job los procesos nuevos
+        """
+        if not self._is_gaming_session():
+            self.cpu_budget.deactivate()
+            if self.background_job is not None:
+                self._close_background_job()
+            return
+        
+        if not self.cpu_budget.active:
+            self._populate_background_job()
+            self._background_cpu_sample = None
+            self.cpu_budget.activate()
+        elif refresh_members:
+            self._populate_background_job()
+        
+        self.cpu_budget.step()
+
+    def _ensure_background_job(self):
+        if self.background_job is None:
+            self._background_job_generation += 1
+            self._background_job_name = f"OptimizadorBackground-{os.getpid()}-{self._background_job_generation}"
+            self.background_job = self.modulo_procesos.ensure_job_for_group(self._background_job_name)
+            self._background_cpu_sample = None  # La contabilidad del Job nuevo empieza en cero
+        return self.background_job
+    
+    def _close_background_job(self):
+        """Libera el tope del Job de segundo plano y lo cierra."""
+        if self.background_job:
+            self.modulo_procesos.set_job_cpu_limit(self.background_job, 100)
+            self.modulo_procesos.close_job(self._background_job_name)
+        self.background_job = None
+        self._background_job_name = None
+        self._background_job_members = set()
+    
+    def _foreground_ancestors(self):
+        """PIDs de los ascendientes del primer plano (el lanzador del que pudo heredar el Job)."""
+        try:
+            return [parent.pid for parent in psutil.Process(self.foreground_pid).parents()]
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return []
+    
+    def _exclude_foreground_from_background_job(self):
+        """
+        Si el nuevo primer plano (o uno de sus ascendientes) está en el Job
+        limitado, por asignación directa o heredada de un Job anterior, lo
+        sustituye por uno nuevo sin ellos: los procesos no pueden salir de un Job.
+        """
+        if self.background_job is None or not self.foreground_pid:
+            return
+        foreground_tree = set(self.modulo_monitorizacion.get_process_tree(self.foreground_pid))
+        lineage = [self.foreground_pid] + self._foreground_ancestors()
+        if self._background_job_members.isdisjoint(foreground_tree) and not any(
+                self.modulo_procesos.is_process_in_job(self.background_job, pid) for pid in lineage):
+            return
+        logger.info("[GestorModulos] El primer plano estaba limitado: Job de segundo plano renovado")
+        self._close_background_job()
+        if self.cpu_budget.active:
+            self._populate_background_job()
+            if self.cpu_budget.applied_cap is not None:
+                self._apply_background_cap(self.cpu_budget.applied_cap)
+
+    def _add_to_background_job(self, pid):
+        """Asigna un PID al Job de segundo plano si aún no pertenece a él."""
+        if pid in self._background_job_members:
+            return
+        job = self._ensure_background_job()
+        if job and self.modulo_procesos.assign_pid_to_job(job, pid):
+            self._background_job_members.add(pid)
+
+    def _populate_background_job(self):
+        """Agrupa en el Job de segundo plano todos los procesos elegibles."""
+        if not self._ensure_background_job():
+            return
+        
+        # Fuera del Job: el árbol en primer plano y sus ascendientes
+        foreground_tree = set()
+        if self.foreground_pid:
+            foreground_tree = set(self.modulo_monitorizacion.get_process_tree(self.foreground_pid))
+            foreground_tree.update(self._foreground_ancestors())
+        own_pid = os.getpid()
+        alive = set()
+        
+        for proc in self.modulo_monitorizacion.get_process_snapshot():
+            pid = proc['pid']
+            alive.add(pid)
+            if pid <= 4 or pid == own_pid or pid in foreground_tree:
+                continue
+            # Sin sesión (respaldo Toolhelp32) no se distinguen los servicios de la sesión crítica
+            if proc.get('session_id') is None:
+                continue
+            if self.is_blacklisted(proc['name'], session_id=proc['session_id']):
+                continue
+            self._add_to_background_job(pid)
+        
+        # Olvidar PIDs que ya terminaron (evita confundirlos tras reutilización)
+        self._background_job_members &= alive
+
+    def _measure_background_cpu(self):
+        """
+        % de la CPU total de la máquina consumido por el Job de segundo plano
+        desde la medición anterior (contabilidad del propio Job Object).
+        """
+        cpu_seconds = self.modulo_procesos.get_job_cpu_time(self.background_job)
+        if cpu_seconds is None:
+            return None
+        
+        now = time.monotonic()
+        previous = self._background_cpu_sample
+        self._background_cpu_sample = (now, cpu_seconds)
+        if previous is None:
+            return None
+        
+        elapsed = now - previous[0]
+        if elapsed <= 0:
+            return None
+        cpu_count = psutil.cpu_count(logical=True) or 1
+        return 100.0 * (cpu_seconds - previous[1]) / (elapsed * cpu_count)
+
+    def _apply_background_cap(self, cap_percent):
+        """Aplica el tope calculado por el controlador al Job de segundo plano."""
+        self.modulo_procesos.set_job_cpu_limit(self.background_job, cap_percent)
+
+    def set_background_cpu_budget(self, target_percent):
+        """Establece el objetivo de CPU en segundo plano durante el juego."""
+        self.cpu_budget.set_target(target_percent)
+        self.config_manager.set('background_cpu_budget', self.cpu_budget.target_percent)
+        return True
 
     def manage_thermal_throttling(self):
         """Gestión térmica."""
@@ -766,7 +766,12 @@ class ControlPanelTab(ttk.Frame):
                 self._update_label("DirectX Optimizado", modules_active, "Configurado" if modules_active else "Por defecto")
                 
                 # Térmica
-                self._update_label("Monitoreo de Temperatura", modules_active, "Activo" if modules_active else "Inactivo")
+                temperature = None
+                monitor = getattr(self.module_manager, 'modulo_monitorizacion', None)
+                if monitor is not None and hasattr(monitor, 'metrics'):
+                    temperature = monitor.metrics.latest_scalar('temperature.cpu')
+                temperature_text = f"Activo ({temperature:.0f}°C)" if temperature is not None else "Activo"
+                self._update_label("Monitoreo de Temperatura", modules_active, temperature_text if modules_active else "Inactivo")
                 thermal_active = is_running and hasattr(self.module_manager, 'thermal_thresholds')
                 self._update_label("Thermal Throttling", thermal_active, "Configurado" if thermal_active else "Inactivo")
             else:
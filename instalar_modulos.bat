@@ -25,30 +25,33 @@ echo.
 echo Instalando modulos de Python necesarios...
 echo.
 
-echo [1/8] Instalando psutil (monitoreo de sistema)...
+echo [1/9] Instalando psutil (monitoreo de sistema)...
 pip install psutil
 
-echo [2/8] Instalando ttkbootstrap (interfaz grafica moderna)...
+echo [2/9] Instalando ttkbootstrap (interfaz grafica moderna)...
 pip install ttkbootstrap
 
-echo [3/8] Instalando Pillow (manejo de imagenes)...
+echo [3/9] Instalando Pillow (manejo de imagenes)...
 pip install Pillow
 
-echo [4/8] Instalando pystray (icono en bandeja del sistema)...
+echo [4/9] Instalando pystray (icono en bandeja del sistema)...
 pip install pystray
 
-echo [5/8] Instalando pythonnet (integracion con .NET para LibreHardwareMonitor)...
+echo [5/9] Instalando pythonnet (integracion con .NET para LibreHardwareMonitor)...
 pip install pythonnet
 
-echo [6/8] Instalando pywin32 (API de Windows - opcional)...
+echo [6/9] Instalando pywin32 (API de Windows - opcional)...
 pip install pywin32
 
-echo [7/8] Instalando requests (utilidades de red - opcional)...
+echo [7/9] Instalando requests (utilidades de red - opcional)...
 pip install requests
 
-echo [8/8] Instalando colorama (utilidades de consola - opcional)...
+echo [8/9] Instalando colorama (utilidades de consola - opcional)...
 pip install colorama
 
+echo [9/9] Instalando numpy (tablas de procesos vectorizadas - opcional)...
+pip install numpy
+
 echo.
 echo ============================================
 echo  INSTALACION COMPLETADA
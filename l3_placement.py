@@ -0,0 +1,165 @@
+"""
+Módulo de Colocación por Grupo L3
+---------------------------------
+
+Reparte los procesos gestionados entre los grupos de CPUs que comparten una
+caché L3 (CCDs en AMD, tiles/clústeres en otras arquitecturas) según la
+contención de cada grupo: la carga sumada de sus procesos por CPU lógica,
+ponderando más a los procesos intensivos en memoria, que son los que
+desalojan la L3 de sus vecinos.
+
+Un proceso nuevo va al grupo menos disputado; después sólo se mueve cuando
+el desequilibrio entre el grupo más y el menos disputado se mantiene varias
+rondas seguidas, y de uno en uno. El módulo es de cálculo puro: devuelve los
+movimientos y el llamador aplica la afinidad.
+
+Dependencias externas:
+- logging: Biblioteca estándar de Python
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("L3Placement")
+
+# Umbrales del indicador de intensidad de memoria
+MEMORY_INTENSIVE_FAULT_RATE = 2000.0   # fallos de página/s
+MEMORY_INTENSIVE_WS_FACTOR = 4         # working set mayor que N veces la L3
+
+
+def is_memory_intensive(working_set: float, fault_rate: float, l3_size: int = 0) -> bool:
+    """
+    Indicador de intensidad de memoria de un proceso.
+
+    :param working_set: Working set en bytes
+    :param fault_rate: Fallos de página por segundo
+    :param l3_size: Tamaño de la L3 en bytes (0 si se desconoce)
+    """
+    if fault_rate >= MEMORY_INTENSIVE_FAULT_RATE:
+        return True
+    return bool(l3_size) and working_set >= MEMORY_INTENSIVE_WS_FACTOR * l3_size
+
+
+class L3GroupPlacer:
+    """
+    Asigna procesos a grupos L3 minimizando la contención.
+
+    :param l3_groups: CPUs lógicas de cada grupo L3 (topology 'l3_cache_groups')
+    """
+
+    # Peso de la carga de un proceso intensivo en memoria
+    MEMORY_WEIGHT = 1.5
+    # Diferencia de contención (carga por CPU lógica) a partir de la cual reequilibrar
+    REBALANCE_MARGIN = 0.25
+    # Rondas consecutivas de desequilibrio antes de mover un proceso
+    HYSTERESIS_ROUNDS = 3
+
+    def __init__(self, l3_groups: Sequence[Sequence[int]]) -> None:
+        self.groups: List[List[int]] = [list(g) for g in l3_groups if g]
+        self.assignment: Dict[int, int] = {}
+        self.loads: Dict[int, float] = {}
+        self.memory_intensive: Dict[int, bool] = {}
+        self.moves: int = 0
+        self._imbalance_rounds: int = 0
+
+    def _effective(self, load: float, memory_intensive: bool) -> float:
+        return load * (self.MEMORY_WEIGHT if memory_intensive else 1.0)
+
+    def _group_loads(self) -> List[float]:
+        totals = [0.0] * len(self.groups)
+        for pid, group in self.assignment.items():
+            totals[group] += self._effective(self.loads.get(pid, 0.0), self.memory_intensive.get(pid, False))
+        return totals
+
+    def contention(self) -> List[float]:
+        """Carga efectiva por CPU lógica de cada grupo."""
+        return [total / len(group) for total, group in zip(self._group_loads(), self.groups)]
+
+    def _memory_counts(self) -> List[int]:
+        counts = [0] * len(self.groups)
+        for pid, group in self.assignment.items():
+            if self.memory_intensive.get(pid):
+                counts[group] += 1
+        return counts
+
+    def least_contended(self, load: float = 0.0, memory_intensive: bool = False) -> int:
+        """
+        Grupo con menor contención tras añadirle la carga indicada; a igualdad,
+        el que tenga menos procesos intensivos en memoria (si el nuevo lo es).
+        """
+        totals = self._group_loads()
+        memory = self._memory_counts()
+        extra = self._effective(load, memory_intensive)
+        return min(range(len(self.groups)), key=lambda g: (
+            (totals[g] + extra) / len(self.groups[g]),
+            memory[g] if memory_intensive else 0,
+            g,
+        ))
+
+    def place(self, pid: int, load: float = 0.0, memory_intensive: bool = False) -> int:
+        """Grupo del proceso; si es nuevo, el menos disputado."""
+        if pid not in self.assignment:
+            self.assignment[pid] = self.least_contended(load, memory_intensive)
+        self.loads[pid] = load
+        self.memory_intensive[pid] = memory_intensive
+        return self.assignment[pid]
+
+    def update(self, samples: Dict[int, Tuple[float, bool]]) -> Tuple[Dict[int, int], List[int]]:
+        """
+        Incorpora una ronda de medidas.
+
+        :param samples: {pid: (carga en cores equivalentes, intensivo en memoria)}
+                        de todos los procesos que deben seguir colocados
+        :return: (movimientos {pid: grupo}, PIDs que dejan de gestionarse)
+        """
+        released = [pid for pid in self.assignment if pid not in samples]
+        for pid in released:
+            del self.assignment[pid]
+            self.loads.pop(pid, None)
+            self.memory_intensive.pop(pid, None)
+
+        changes: Dict[int, int] = {}
+        if not self.groups:
+            return changes, released
+        # Los nuevos se colocan de mayor a menor carga para repartir mejor
+        for pid, (load, memory_intensive) in sorted(samples.items(), key=lambda item: -item[1][0]):
+            if pid not in self.assignment:
+                changes[pid] = self.place(pid, load, memory_intensive)
+            else:
+                self.loads[pid] = load
+                self.memory_intensive[pid] = memory_intensive
+
+        if len(self.groups) < 2:
+            return changes, released
+
+        contention = self.contention()
+        hi = max(range(len(contention)), key=lambda g: contention[g])
+        lo = min(range(len(contention)), key=lambda g: contention[g])
+        if contention[hi] - contention[lo] <= self.REBALANCE_MARGIN:
+            self._imbalance_rounds = 0
+            return changes, released
+
+        self._imbalance_rounds += 1
+        if self._imbalance_rounds < self.HYSTERESIS_ROUNDS:
+            return changes, released
+
+        # Mover el proceso del grupo más disputado que deje el menor máximo
+        best: Optional[Tuple[float, int]] = None
+        for pid, group in self.assignment.items():
+            if group != hi:
+                continue
+            moved = self._effective(self.loads.get(pid, 0.0), self.memory_intensive.get(pid, False))
+            new_hi = contention[hi] - moved / len(self.groups[hi])
+            new_lo = contention[lo] + moved / len(self.groups[lo])
+            peak = max(new_hi, new_lo)
+            if peak < contention[hi] and (best is None or peak < best[0]):
+                best = (peak, pid)
+
+        self._imbalance_rounds = 0
+        if best is not None:
+            pid = best[1]
+            self.assignment[pid] = lo
+            changes[pid] = lo
+            self.moves += 1
+            logger.debug(f"[L3Placement] PID {pid}: grupo L3 {hi} → {lo}")
+        return changes, released
@@ -0,0 +1,211 @@
+"""
+Módulo de Sondeo de Latencia Asíncrono
+--------------------------------------
+
+Mide la latencia de red contra muchos destinos a la vez con asyncio, sin
+lanzar ping.exe ni analizar su salida localizada:
+
+- TCP: tiempo hasta completar el handshake (open_connection)
+- UDP: tiempo hasta recibir la respuesta a un datagrama (eco, consulta DNS…)
+
+Cada sonda tiene un timeout estricto y todas se lanzan concurrentemente,
+así que una ronda completa tarda como mucho un timeout. Por destino se
+guarda un historial circular con pérdidas, jitter y percentiles.
+
+Dependencias externas:
+- asyncio, collections, logging, struct: Biblioteca estándar de Python
+"""
+
+import asyncio
+import logging
+import math
+import random
+import struct
+import time
+from collections import deque, namedtuple
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger("LatencyProber")
+
+# Destino de sondeo; 'payload' sólo se usa en UDP
+ProbeTarget = namedtuple('ProbeTarget', ['host', 'port', 'protocol', 'payload'], defaults=('tcp', None))
+
+# Resultado de una sonda: rtt_ms es None si se perdió (timeout, rechazo, error)
+ProbeResult = namedtuple('ProbeResult', ['target', 'rtt_ms', 'error'])
+
+
+def dns_query_payload(name: str = '', query_id: Optional[int] = None) -> bytes:
+    """
+    Consulta DNS mínima (registro NS; raíz por defecto), para sondear
+    servidores DNS por UDP, que no responden a datagramas arbitrarios.
+    """
+    query_id = random.randrange(1 << 16) if query_id is None else query_id
+    header = struct.pack('>HHHHHH', query_id, 0x0100, 1, 0, 0, 0)
+    labels = b''.join(bytes([len(part)]) + part.encode('ascii') for part in name.split('.') if part)
+    return header + labels + b'\x00' + struct.pack('>HH', 2, 1)
+
+
+# Destinos por defecto: DNS públicos por UDP/53 y TCP/443
+DEFAULT_TARGETS = (
+    ProbeTarget('8.8.8.8', 53, 'udp', dns_query_payload()),
+    ProbeTarget('1.1.1.1', 53, 'udp', dns_query_payload()),
+    ProbeTarget('8.8.8.8', 443, 'tcp'),
+    ProbeTarget('1.1.1.1', 443, 'tcp'),
+)
+
+
+def target_key(target: ProbeTarget) -> str:
+    return f"{target.protocol}://{target.host}:{target.port}"
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100.0
+    low = int(math.floor(pos))
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+async def tcp_probe(host: str, port: int, timeout: float) -> float:
+    """
+    Latencia del handshake TCP en milisegundos.
+
+    :raises asyncio.TimeoutError, OSError: Si no se conecta dentro del timeout
+    """
+    start = time.perf_counter()
+    _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    rtt_ms = (time.perf_counter() - start) * 1000.0
+    writer.close()
+    return rtt_ms
+
+
+class _UDPReply(asyncio.DatagramProtocol):
+    def __init__(self, future: 'asyncio.Future') -> None:
+        self.future = future
+
+    def datagram_received(self, data, addr) -> None:
+        if not self.future.done():
+            self.future.set_result(time.perf_counter())
+
+    def error_received(self, exc) -> None:
+        # ICMP puerto inalcanzable, etc.
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+async def udp_probe(host: str, port: int, timeout: float, payload: Optional[bytes] = None) -> float:
+    """
+    Latencia petición-respuesta UDP en milisegundos (primer datagrama recibido).
+
+    :raises asyncio.TimeoutError, OSError: Si no hay respuesta dentro del timeout
+    """
+    loop = asyncio.get_running_loop()
+    reply = loop.create_future()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _UDPReply(reply), remote_addr=(host, port)
+    )
+    try:
+        start = time.perf_counter()
+        transport.sendto(payload or b'\x00')
+        received = await asyncio.wait_for(reply, timeout)
+        return (received - start) * 1000.0
+    finally:
+        transport.close()
+
+
+class LatencyHistory:
+    """Historial circular de un destino (None = paquete perdido)."""
+
+    def __init__(self, maxlen: int = 100) -> None:
+        self.samples = deque(maxlen=maxlen)
+
+    def add(self, rtt_ms: Optional[float]) -> None:
+        self.samples.append(rtt_ms)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """
+        :return: Diccionario con sent, loss_percent, min/mean/p50/p95/p99 (ms)
+                 y jitter (media de la diferencia absoluta entre RTTs
+                 consecutivos recibidos, como en RFC 3550)
+        """
+        received = [s for s in self.samples if s is not None]
+        sent = len(self.samples)
+        result: Dict[str, Optional[float]] = {
+            'sent': sent,
+            'loss_percent': 100.0 * (sent - len(received)) / sent if sent else 0.0,
+            'last': self.samples[-1] if sent else None,
+        }
+        if not received:
+            result.update({'min': None, 'mean': None, 'p50': None, 'p95': None,
+                           'p99': None, 'jitter': None})
+            return result
+        deltas = [abs(b - a) for a, b in zip(received, received[1:])]
+        result.update({
+            'min': min(received),
+            'mean': sum(received) / len(received),
+            'p50': _percentile(received, 50),
+            'p95': _percentile(received, 95),
+            'p99': _percentile(received, 99),
+            'jitter': sum(deltas) / len(deltas) if deltas else 0.0,
+        })
+        return result
+
+
+class LatencyProber:
+    """
+    Sondea concurrentemente un conjunto de destinos y acumula su historial.
+
+    run_once() es síncrono (crea su propio bucle de eventos) para poder
+    llamarse desde los hilos de trabajo del gestor; probe_all() es la
+    corrutina equivalente para quien ya tenga un bucle.
+    """
+
+    def __init__(self, targets: Iterable[ProbeTarget] = DEFAULT_TARGETS, timeout: float = 1.0,
+                 history: int = 100, max_concurrency: int = 64) -> None:
+        self.targets: List[ProbeTarget] = list(targets)
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.history_size = history
+        self.histories: Dict[str, LatencyHistory] = {}
+        self.last_results: List[ProbeResult] = []
+
+    async def _probe(self, target: ProbeTarget, semaphore: asyncio.Semaphore) -> ProbeResult:
+        async with semaphore:
+            try:
+                if target.protocol == 'udp':
+                    rtt = await udp_probe(target.host, target.port, self.timeout, target.payload)
+                else:
+                    rtt = await tcp_probe(target.host, target.port, self.timeout)
+                return ProbeResult(target, rtt, None)
+            except asyncio.TimeoutError:
+                return ProbeResult(target, None, 'timeout')
+            except OSError as e:
+                return ProbeResult(target, None, e.__class__.__name__)
+
+    async def probe_all(self) -> List[ProbeResult]:
+        """Lanza una sonda por destino a la vez y registra los resultados."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(self._probe(t, semaphore) for t in self.targets))
+        for result in results:
+            key = target_key(result.target)
+            history = self.histories.get(key)
+            if history is None:
+                history = self.histories[key] = LatencyHistory(self.history_size)
+            history.add(result.rtt_ms)
+        self.last_results = list(results)
+        lost = sum(1 for r in results if r.rtt_ms is None)
+        logger.debug(f"[LatencyProber] {len(results)} sondas, {lost} perdidas")
+        return self.last_results
+
+    def run_once(self) -> List[ProbeResult]:
+        """Ejecuta una ronda de sondeo de forma síncrona."""
+        return asyncio.run(self.probe_all())
+
+    def latency_ms(self) -> Optional[float]:
+        """Mediana de las latencias de la última ronda (None si todas se perdieron)."""
+        received = [r.rtt_ms for r in self.last_results if r.rtt_ms is not None]
+        return _percentile(received, 50) if received else None
+
+    def stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Estadísticas por destino ('protocolo://host:puerto')."""
+        return {key: history.stats() for key, history in self.histories.items()}
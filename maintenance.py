@@ -0,0 +1,252 @@
+"""
+Módulo de Mantenimiento en Ventanas de Inactividad
+--------------------------------------------------
+
+Ejecuta las tareas pesadas de segundo plano (retrim de SSD, purga de la
+Standby List) sólo cuando el equipo está realmente inactivo, en lugar de dispararlas por contadores del bucle principal:
+
+- IdleDetector combina el tiempo sin entrada del usuario (GetLastInputInfo),
+  la carga de CPU y de disco y el rol del proceso en primer plano.
+- MaintenanceQueue arranca una tarea vencida por ventana de inactividad y,
+  en cuanto el usuario vuelve, la pausa (si la tarea lo admite) o la cancela
+  para reintentarla más tarde, con una espera que crece con cada cancelación
+  seguida para que una tarea que nunca llega a terminar no acapare las
+  ventanas de las demás.
+
+Dependencias externas:
+- logging, time: Biblioteca estándar de Python
+"""
+
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("Maintenance")
+
+
+class IdleDetector:
+    """
+    Decide si el sistema está en una ventana de inactividad.
+
+    La ventana se abre tras CONFIRM_SAMPLES muestras consecutivas sin entrada
+    del usuario y con CPU y disco por debajo de los umbrales. Se cierra en
+    cuanto hay entrada o un rol ocupado pasa a primer plano; la carga sólo se
+    usa para abrirla, porque la propia tarea de mantenimiento la eleva.
+    """
+
+    INPUT_IDLE_AFTER = 300.0               # s sin teclado/ratón
+    CPU_IDLE_PERCENT = 20.0                # % de CPU total
+    DISK_IDLE_RATE = 10 * 1024 * 1024      # bytes/s de E/S de disco
+    CONFIRM_SAMPLES = 3
+    # Roles (core_planner.ROLE_PROCESS_NAMES) que nunca se interrumpen: juego, codificación, voz
+    BUSY_ROLES = frozenset({'game', 'encoder', 'voice'})
+
+    def __init__(self) -> None:
+        self.idle: bool = False
+        self.idle_since: Optional[float] = None
+        self.quiet_samples: int = 0
+        self.last_reason: str = 'inicio'
+
+    def update(self, input_idle_s: float, cpu_percent: float, disk_bytes_per_s: float,
+               foreground_role: Optional[str] = None, now: Optional[float] = None) -> bool:
+        """
+        Incorpora una muestra.
+
+        :param input_idle_s: Segundos desde la última entrada del usuario
+        :param cpu_percent: Uso de CPU total (%)
+        :param disk_bytes_per_s: Tasa de E/S de disco
+        :param foreground_role: Rol del proceso en primer plano (o None)
+        :return: True si el sistema está en una ventana de inactividad
+        """
+        now = time.monotonic() if now is None else now
+
+        if input_idle_s < self.INPUT_IDLE_AFTER:
+            reason = 'entrada del usuario'
+        elif foreground_role in self.BUSY_ROLES:
+            reason = f'rol en primer plano: {foreground_role}'
+        else:
+            reason = None
+
+        if reason is not None:
+            self.quiet_samples = 0
+            if self.idle:
+                logger.info(f"[Maintenance] Fin de la ventana de inactividad ({reason})")
+            self.idle = False
+            self.idle_since = None
+            self.last_reason = reason
+            return False
+
+        if self.idle:
+            return True
+
+        if cpu_percent < self.CPU_IDLE_PERCENT and disk_bytes_per_s < self.DISK_IDLE_RATE:
+            self.quiet_samples += 1
+        else:
+            self.quiet_samples = 0
+            self.last_reason = 'carga de CPU o disco'
+
+        if self.quiet_samples >= self.CONFIRM_SAMPLES:
+            self.idle = True
+            self.idle_since = now
+            self.last_reason = 'inactivo'
+            logger.info("[Maintenance] Ventana de inactividad detectada")
+        return self.idle
+
+
+class MaintenanceTask:
+    """
+    Tarea de mantenimiento periódica.
+
+    'start' lanza la tarea y devuelve el proceso (objeto con poll(),
+    terminate() y pid, como subprocess.Popen) o None si terminó al instante.
+    """
+
+    # Espera tras la primera cancelación; se duplica con cada una seguida (hasta 'interval')
+    RETRY_BACKOFF = 600.0
+
+    def __init__(self, name: str, start: Callable[[], object], interval: float,
+                 pausable: bool = False, max_runtime: Optional[float] = None) -> None:
+        self.name = name
+        self.start = start
+        self.interval = interval
+        self.pausable = pausable
+        self.max_runtime = max_runtime
+        self.last_run: Optional[float] = None
+        self.last_attempt: Optional[float] = None
+        self.retry_after: float = 0.0
+        self.runs: int = 0
+        self.cancellations: int = 0
+        self.consecutive_cancellations: int = 0
+
+    def is_due(self, now: float) -> bool:
+        if now < self.retry_after:
+            return False
+        return self.last_run is None or now - self.last_run >= self.interval
+
+    def back_off(self, now: float) -> None:
+        """Aplaza el siguiente intento tras una cancelación."""
+        self.cancellations += 1
+        self.consecutive_cancellations += 1
+        delay = min(self.RETRY_BACKOFF * 2 ** (self.consecutive_cancellations - 1), self.interval)
+        self.retry_after = now + delay
+
+
+class MaintenanceQueue:
+    """
+    Cola de tareas que sólo se ejecutan dentro de ventanas de inactividad,
+    de una en una.
+
+    :param suspend: Callable(proceso) que lo pausa; sin él las tareas se cancelan
+    :param resume: Callable(proceso) que lo reanuda
+    """
+
+    def __init__(self, suspend: Optional[Callable[[object], None]] = None,
+                 resume: Optional[Callable[[object], None]] = None) -> None:
+        self.tasks: List[MaintenanceTask] = []
+        self.suspend = suspend
+        self.resume = resume
+        self.running: Optional[MaintenanceTask] = None
+        self.process = None
+        self.paused: bool = False
+        self.started_at: float = 0.0
+
+    def add(self, task: MaintenanceTask) -> None:
+        self.tasks.append(task)
+
+    def tick(self, idle: bool, now: Optional[float] = None) -> None:
+        """
+        Avanza la cola: vigila la tarea en curso, la pausa o cancela si el
+        sistema dejó de estar inactivo y arranca la siguiente tarea vencida.
+        """
+        now = time.monotonic() if now is None else now
+
+        if self.running is not None:
+            self._supervise(idle, now)
+        if self.running is not None or not idle:
+            return
+
+        due = [t for t in self.tasks if t.is_due(now)]
+        if not due:
+            return
+        # La que lleva más tiempo sin intentarse (las nunca intentadas primero)
+        task = min(due, key=lambda t: -1.0 if t.last_attempt is None else t.last_attempt)
+        self._start(task, now)
+
+    def _start(self, task: MaintenanceTask, now: float) -> None:
+        logger.info(f"[Maintenance] Iniciando tarea: {task.name}")
+        task.last_attempt = now
+        try:
+            process = task.start()
+        except Exception as e:
+            # No reintentar en bucle una tarea que no puede arrancar
+            logger.error(f"[Maintenance] Error iniciando {task.name}: {e}")
+            task.last_run = now
+            return
+        if process is None:
+            self._finish(task, now)
+            return
+        self.running = task
+        self.process = process
+        self.paused = False
+        self.started_at = now
+
+    def _supervise(self, idle: bool, now: float) -> None:
+        task = self.running
+        if self.process.poll() is not None:
+            self._finish(task, now)
+            return
+
+        if not idle:
+            if task.pausable and self.suspend is not None:
+                if not self.paused:
+                    self.suspend(self.process)
+                    self.paused = True
+                    logger.info(f"[Maintenance] Tarea pausada: {task.name}")
+            else:
+                self._cancel("usuario activo", now)
+            return
+
+        if self.paused:
+            self.resume(self.process)
+            self.paused = False
+            logger.info(f"[Maintenance] Tarea reanudada: {task.name}")
+        elif task.max_runtime is not None and now - self.started_at > task.max_runtime:
+            self._cancel("tiempo máximo superado", now)
+            task.last_run = now
+
+    def _finish(self, task: MaintenanceTask, now: float) -> None:
+        task.last_run = now
+        task.runs += 1
+        task.consecutive_cancellations = 0
+        task.retry_after = 0.0
+        self.running = None
+        self.process = None
+        self.paused = False
+        logger.info(f"[Maintenance] Tarea completada: {task.name}")
+
+    def _cancel(self, reason: str, now: float) -> None:
+        """Termina la tarea en curso; sigue vencida y se reintenta tras su espera."""
+        task = self.running
+        try:
+            if self.paused and self.resume is not None:
+                self.resume(self.process)
+            self.process.terminate()
+        except Exception as e:
+            logger.debug(f"[Maintenance] Error terminando {task.name}: {e}")
+        task.back_off(now)
+        self.running = None
+        self.process = None
+        self.paused = False
+        logger.info(f"[Maintenance] Tarea cancelada: {task.name} ({reason})")
+
+    def stop(self) -> None:
+        """Cancela la tarea en curso (al detener el gestor)."""
+        if self.running is not None:
+            self._cancel("gestor detenido", time.monotonic())
+
+    def status(self) -> Dict[str, object]:
+        return {
+            'running': self.running.name if self.running else None,
+            'paused': self.paused,
+            'tasks': {t.name: {'runs': t.runs, 'cancellations': t.cancellations} for t in self.tasks},
+        }
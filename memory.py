@@ -50,10 +50,12 @@ class StandbyListCleaner:
     def clear_ram_cache(self):
         # Asume que 'emptystandbylist.exe' está en el PATH o en el mismo directorio.
         try:
-            subprocess.Popen(['emptystandbylist.exe', 'standbylist'], creationflags=subprocess.CREATE_NO_WINDOW)
+            process = subprocess.Popen(['emptystandbylist.exe', 'standbylist'], creationflags=subprocess.CREATE_NO_WINDOW)
             print("Limpiando Standby List...")
+            return process
         except FileNotFoundError:
             print("Advertencia: 'emptystandbylist.exe' no encontrado. No se puede limpiar la caché de RAM.")
+            return None
 
 class MemoryCompressionManager:
     """Habilita la compresión de memoria del sistema."""
@@ -68,10 +70,14 @@ class MemoryCompressionManager:
 
 class MemoryScrubbingOptimizer:
     """Programa la ejecución del limpiador de memoria de Windows."""
+    def start_scrubbing(self):
+        """Lanza mdsched.exe sin esperar (lo vigila la cola de mantenimiento)."""
+        return subprocess.Popen(['mdsched.exe'], creationflags=subprocess.CREATE_NO_WINDOW)
+
     def schedule_scrubbing_low_load(self):
         # La lógica de cuándo llamar (carga <20%) está en el Gestor
         try:
-            subprocess.run(['mdsched.exe'], creationflags=subprocess.CREATE_NO_WINDOW)
+            self.start_scrubbing().wait()
         except Exception as e:
             print(f"No se pudo iniciar mdsched.exe: {e}")
 
@@ -79,9 +85,24 @@ class MemoryScrubbingOptimizer:
 class MemoryBalloon:
     """Libera memoria proactivamente cuando es necesario (Memory Ballooning)"""
     
-    def __init__(self, low_threshold_mb=2048, high_threshold_mb=4096):
+    # Procesos a recortar por pasada cuando se dispone de rankings (TopConsumerTracker)
+    RANKED_TRIM_COUNT = 20
+    
+    # Lista de procesos críticos que no deben ser recortados
+    CRITICAL_PROCESSES = {
+        'system', 'system idle process', 'registry',
+        'smss.exe', 'csrss.exe', 'wininit.exe', 'services.exe',
+        'lsass.exe', 'svchost.exe', 'dwm.exe', 'explorer.exe',
+        'winlogon.exe', 'fontdrvhost.exe'
+    }
+
+    def __init__(self, low_threshold_mb=2048, high_threshold_mb=4096, top_consumers=None, protected_pids=None):
         self.low_threshold = low_threshold_mb * 1024 * 1024  # Convertir a bytes
         self.high_threshold = high_threshold_mb * 1024 * 1024
+        # Rankings de consumidores: evita recorrer todos los procesos en cada recorte
+        self.top_consumers = top_consumers
+        # Función que devuelve los PIDs que nunca se recortan (primer plano, roles fijados)
+        self.protected_pids = protected_pids
         print(f"[MemoryBalloon] Inicializado: umbral bajo={low_threshold_mb}MB, alto={high_threshold_mb}MB")
     
     def check_and_balloon(self):
@@ -100,6 +121,11 @@ class MemoryBalloon:
         """Recorte agresivo de memoria"""
         print("[MemoryBalloon] Iniciando recorte agresivo de memoria")
         
+        if self.top_consumers is not None:
+            trimmed_count = self._trim_ranked(min_bytes=0)
+            print(f"[MemoryBalloon] Recortados {trimmed_count} procesos")
+            return
+        
         trimmed_count = 0
         for proc in psutil.process_iter(['pid', 'name', 'memory_info']):
             try:
@@ -119,6 +145,11 @@ class MemoryBalloon:
         """Recorte moderado de memoria"""
         print("[MemoryBalloon] Iniciando recorte moderado de memoria")
         
+        if self.top_consumers is not None:
+            trimmed_count = self._trim_ranked(min_bytes=100 * 1024 * 1024)
+            print(f"[MemoryBalloon] Recortados {trimmed_count} procesos")
+            return
+        
         trimmed_count = 0
         for proc in psutil.process_iter(['pid', 'name', 'memory_info']):
             try:
@@ -134,18 +165,41 @@ class MemoryBalloon:
         
         print(f"[MemoryBalloon] Recortados {trimmed_count} procesos")
     
+    def _trim_ranked(self, min_bytes):
+        """
+        Recorta los procesos con mayor working set y mayor crecimiento según
+        los rankings, sin recorrer toda la lista de procesos.
+        """
+        candidates = {}
+        for metric in ('working_set', 'ws_growth'):
+            for value, pid, name in self.top_consumers.top(metric, self.RANKED_TRIM_COUNT):
+                candidates.setdefault(pid, name)
+        
+        working_sets = {
+            pid: value
+            for value, pid, _ in self.top_consumers.top('working_set', self.top_consumers.capacity)
+        }
+        protected = set(self.protected_pids()) if self.protected_pids else set()
+        trimmed_count = 0
+        for pid, name in candidates.items():
+            if pid in protected or working_sets.get(pid, min_bytes) < min_bytes:
+                continue
+            if not self.is_trimmable_name(name):
+                continue
+            handle = kernel32.OpenProcess(0x1F0FFF, False, pid)
+            if handle:
+                kernel32.SetProcessWorkingSetSizeEx(handle, -1, -1, 0)
+                kernel32.CloseHandle(handle)
+                trimmed_count += 1
+        return trimmed_count
+    
     def is_trimmable(self, proc):
         """Determina si un proceso puede ser recortado"""
-        # Lista de procesos críticos que no deben ser recortados
-        critical_processes = [
-            'system', 'system idle process', 'registry',
-            'smss.exe', 'csrss.exe', 'wininit.exe', 'services.exe',
-            'lsass.exe', 'svchost.exe', 'dwm.exe', 'explorer.exe',
-            'winlogon.exe', 'fontdrvhost.exe'
-        ]
-        
         try:
-            name = proc.info['name'].lower()
-            return name not in critical_processes
+            return self.is_trimmable_name(proc.info['name'])
         except Exception:
-            return False
\ No newline at end of file
+            return False
+    
+    def is_trimmable_name(self, name):
+        """Determina si un proceso puede ser recortado a partir de su nombre"""
+        return bool(name) and name.lower() not in self.CRITICAL_PROCESSES
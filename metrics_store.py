@@ -0,0 +1,341 @@
+"""
+Módulo de Almacén de Métricas
+-----------------------------
+
+Almacén en memoria de series temporales con huella fija: cada serie guarda
+sus muestras en búferes circulares a varias resoluciones (1 s, 10 s y 1 min
+por defecto). Cada cubo conserva la media y el máximo de las muestras que
+recibió, y al cerrarse alimenta el cubo de la resolución siguiente, así que
+las consultas de percentiles sobre la última hora o el último día no
+necesitan guardar las muestras originales.
+
+Una serie puede ser escalar (memoria, temperatura) o vectorial (una columna
+por core). El almacén tiene un límite de memoria: las series de procesos
+(prefijo 'proc.') se desalojan por antigüedad de uso para dejar sitio, y si
+aun así no cabe una serie nueva, se rechaza. Los búferes son contiguos (un
+ndarray o un array.array por nivel), así que su tamaño es exacto; los objetos
+Python de cada serie se contabilizan con una estimación fija.
+
+Dependencias externas:
+- numpy (opcional): Búferes y percentiles vectorizados
+- array, logging, time: Biblioteca estándar de Python
+"""
+
+import logging
+import math
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger("MetricsStore")
+
+# (segundos por cubo, número de cubos): 5 minutos a 1 s, 1 hora a 10 s, 24 horas a 1 min
+RESOLUTIONS: Tuple[Tuple[float, int], ...] = ((1.0, 300), (10.0, 360), (60.0, 1440))
+
+# Prefijo de las series por proceso (desalojables)
+PROCESS_PREFIX = 'proc.'
+
+# Bytes por cubo: marca de tiempo (float64) + media y máximo (float32) por columna
+_TIME_BYTES = 8
+_VALUE_BYTES = 4
+# Estimación de los objetos Python de una serie (serie, niveles, acumuladores, clave)
+_SERIES_OVERHEAD = 2048
+
+Values = Union[float, Sequence[float]]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Percentil con interpolación lineal (mismo criterio que numpy.percentile)."""
+    ordered = sorted(values)
+    if not ordered:
+        return math.nan
+    pos = (len(ordered) - 1) * q / 100.0
+    low = int(math.floor(pos))
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+class _Level:
+    """Búfer circular de una resolución más el cubo abierto que se está llenando."""
+
+    def __init__(self, step: float, capacity: int, width: int) -> None:
+        self.step = step
+        self.capacity = capacity
+        self.width = width
+        self.head = 0
+        self.count = 0
+        if NUMPY_AVAILABLE:
+            self.times = np.zeros(capacity, dtype=np.float64)
+            self.means = np.zeros((capacity, width), dtype=np.float32)
+            self.peaks = np.zeros((capacity, width), dtype=np.float32)
+        else:
+            # Un único búfer plano por columna de datos: fila 'i' en [i*width, (i+1)*width)
+            self.times = array('d', [0.0]) * capacity
+            self.means = array('f', [0.0]) * (capacity * width)
+            self.peaks = array('f', [0.0]) * (capacity * width)
+        self._bucket: Optional[float] = None
+        self._sum = [0.0] * width
+        self._max = [-math.inf] * width
+        self._weight = 0
+
+    @staticmethod
+    def nbytes_for(capacity: int, width: int) -> int:
+        return capacity * (_TIME_BYTES + 2 * _VALUE_BYTES * width)
+
+    def add(self, timestamp: float, means: Sequence[float], peaks: Sequence[float],
+            weight: int = 1) -> Optional[Tuple[float, List[float], List[float], int]]:
+        """
+        Acumula una muestra en el cubo abierto.
+
+        :return: (inicio, medias, máximos, peso) del cubo cerrado si la muestra
+                 cae en un cubo nuevo; None en otro caso
+        """
+        bucket = math.floor(timestamp / self.step) * self.step
+        closed = None
+        if self._bucket is not None and bucket != self._bucket:
+            closed = self._flush()
+        self._bucket = bucket
+        for i in range(self.width):
+            self._sum[i] += means[i] * weight
+            if peaks[i] > self._max[i]:
+                self._max[i] = peaks[i]
+        self._weight += weight
+        return closed
+
+    def _flush(self) -> Tuple[float, List[float], List[float], int]:
+        weight = self._weight
+        means = [s / weight for s in self._sum]
+        peaks = list(self._max)
+        bucket = self._bucket
+
+        slot = self.head
+        self.times[slot] = bucket
+        if NUMPY_AVAILABLE:
+            self.means[slot] = means
+            self.peaks[slot] = peaks
+        else:
+            row = slice(slot * self.width, (slot + 1) * self.width)
+            self.means[row] = array('f', means)
+            self.peaks[row] = array('f', peaks)
+        self.head = (slot + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+        self._sum = [0.0] * self.width
+        self._max = [-math.inf] * self.width
+        self._weight = 0
+        return bucket, means, peaks, weight
+
+    def window(self, since: float, peaks: bool = False):
+        """
+        Cubos cerrados con inicio >= 'since', del más antiguo al más reciente.
+
+        :return: (marcas de tiempo, filas) como ndarrays o listas
+        """
+        start = (self.head - self.count) % self.capacity
+        order = [(start + i) % self.capacity for i in range(self.count)]
+        source = self.peaks if peaks else self.means
+        if NUMPY_AVAILABLE:
+            idx = np.asarray(order, dtype=np.int64)
+            times = self.times[idx]
+            keep = times >= since
+            return times[keep], source[idx[keep]]
+        w = self.width
+        rows = [(self.times[i], source[i * w:(i + 1) * w].tolist()) for i in order if self.times[i] >= since]
+        return [t for t, _ in rows], [r for _, r in rows]
+
+
+class MetricSeries:
+    """Serie temporal multirresolución de ancho fijo."""
+
+    def __init__(self, name: str, width: int = 1,
+                 resolutions: Sequence[Tuple[float, int]] = RESOLUTIONS) -> None:
+        self.name = name
+        self.width = width
+        self.levels = [_Level(step, capacity, width) for step, capacity in resolutions]
+        self.last_values: Optional[List[float]] = None
+        self.last_timestamp: float = 0.0
+
+    @staticmethod
+    def nbytes_for(width: int, resolutions: Sequence[Tuple[float, int]] = RESOLUTIONS) -> int:
+        return _SERIES_OVERHEAD + sum(_Level.nbytes_for(capacity, width) for _, capacity in resolutions)
+
+    @property
+    def nbytes(self) -> int:
+        return MetricSeries.nbytes_for(self.width, [(level.step, level.capacity) for level in self.levels])
+
+    def record(self, values: Values, timestamp: float) -> None:
+        """Añade una muestra; al cerrarse un cubo, su resumen pasa a la resolución siguiente."""
+        row = [float(values)] if isinstance(values, (int, float)) else [float(v) for v in values]
+        if len(row) != self.width:
+            raise ValueError(f"La serie '{self.name}' tiene ancho {self.width}, recibido {len(row)}")
+        self.last_values = row
+        self.last_timestamp = timestamp
+
+        carry = (timestamp, row, row, 1)
+        for level in self.levels:
+            carry = level.add(*carry)
+            if carry is None:
+                break
+
+    def _level_for(self, seconds: float, resolution: Optional[float]) -> _Level:
+        if resolution is not None:
+            for level in self.levels:
+                if level.step == resolution:
+                    return level
+            raise ValueError(f"Resolución no disponible: {resolution}")
+        for level in self.levels:
+            if level.step * level.capacity >= seconds:
+                return level
+        return self.levels[-1]
+
+    def window(self, seconds: float, resolution: Optional[float] = None, peaks: bool = False):
+        """
+        Cubos cerrados de los últimos 'seconds' segundos.
+
+        :param resolution: Segundos por cubo; por defecto la más fina que cubre la ventana
+        :param peaks: Si True devuelve los máximos de cada cubo en lugar de las medias
+        :return: (marcas de tiempo, filas)
+        """
+        level = self._level_for(seconds, resolution)
+        return level.window(self.last_timestamp - seconds, peaks)
+
+    def percentile(self, q: float, seconds: float, resolution: Optional[float] = None) -> List[float]:
+        """Percentil 'q' (0-100) de las medias por cubo en la ventana, por columna."""
+        _, rows = self.window(seconds, resolution)
+        if NUMPY_AVAILABLE:
+            if len(rows) == 0:
+                return [math.nan] * self.width
+            return np.percentile(rows, q, axis=0).tolist()
+        return [_percentile([r[i] for r in rows], q) for i in range(self.width)]
+
+    def mean(self, seconds: float, resolution: Optional[float] = None) -> List[float]:
+        """Media por columna en la ventana."""
+        _, rows = self.window(seconds, resolution)
+        if len(rows) == 0:
+            return [math.nan] * self.width
+        if NUMPY_AVAILABLE:
+            return rows.mean(axis=0).tolist()
+        return [sum(r[i] for r in rows) / len(rows) for i in range(self.width)]
+
+    def peak(self, seconds: float, resolution: Optional[float] = None) -> List[float]:
+        """Máximo por columna en la ventana (usa el máximo de cada cubo, no su media)."""
+        _, rows = self.window(seconds, resolution, peaks=True)
+        if len(rows) == 0:
+            return [math.nan] * self.width
+        if NUMPY_AVAILABLE:
+            return rows.max(axis=0).tolist()
+        return [max(r[i] for r in rows) for i in range(self.width)]
+
+
+class MetricStore:
+    """
+    Conjunto de series con límite de memoria.
+
+    Las series se crean al registrar su primera muestra. Las de procesos
+    (PROCESS_PREFIX) se desalojan de la menos recientemente actualizada a
+    la más reciente cuando hace falta sitio; las del sistema nunca.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024,
+                 resolutions: Sequence[Tuple[float, int]] = RESOLUTIONS) -> None:
+        self.max_bytes = max_bytes
+        self.resolutions = tuple(resolutions)
+        # Orden de actualización: la más antigua primero (para desalojar)
+        self._series: 'OrderedDict[str, MetricSeries]' = OrderedDict()
+        self.nbytes = 0
+        self.rejected = 0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._series
+
+    def names(self, prefix: str = '') -> List[str]:
+        return [name for name in self._series if name.startswith(prefix)]
+
+    def get(self, name: str) -> Optional[MetricSeries]:
+        return self._series.get(name)
+
+    def _make_room(self, needed: int) -> bool:
+        if self.nbytes + needed <= self.max_bytes:
+            return True
+        evictable = [n for n in self._series if n.startswith(PROCESS_PREFIX)]
+        reclaimable = sum(self._series[n].nbytes for n in evictable)
+        if self.nbytes - reclaimable + needed > self.max_bytes:
+            return False
+        for name in evictable:
+            self.drop(name)
+            if self.nbytes + needed <= self.max_bytes:
+                return True
+        return False
+
+    def record(self, name: str, values: Values, timestamp: Optional[float] = None) -> bool:
+        """
+        Registra una muestra, creando la serie si no existe.
+
+        :param values: Número o secuencia (una columna por core, etc.)
+        :param timestamp: Marca de tiempo monotónica (por defecto time.monotonic())
+        :return: False si la serie no cabe en el límite de memoria
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        series = self._series.get(name)
+        if series is None:
+            width = 1 if isinstance(values, (int, float)) else len(values)
+            needed = MetricSeries.nbytes_for(width, self.resolutions)
+            if not self._make_room(needed):
+                self.rejected += 1
+                logger.warning(f"[MetricsStore] Límite de memoria alcanzado, serie rechazada: {name}")
+                return False
+            series = MetricSeries(name, width, self.resolutions)
+            self._series[name] = series
+            self.nbytes += needed
+        else:
+            self._series.move_to_end(name)
+        series.record(values, timestamp)
+        return True
+
+    def drop(self, name: str) -> None:
+        series = self._series.pop(name, None)
+        if series is not None:
+            self.nbytes -= series.nbytes
+
+    def drop_prefix(self, prefix: str) -> None:
+        for name in self.names(prefix):
+            self.drop(name)
+
+    # --- Consultas (None / NaN si la serie no existe o no tiene datos) ---
+
+    def latest(self, name: str) -> Optional[List[float]]:
+        series = self._series.get(name)
+        return series.last_values if series is not None else None
+
+    def latest_scalar(self, name: str, default: Optional[float] = None) -> Optional[float]:
+        values = self.latest(name)
+        return values[0] if values else default
+
+    def percentile(self, name: str, q: float, seconds: float,
+                   resolution: Optional[float] = None) -> Optional[List[float]]:
+        series = self._series.get(name)
+        return series.percentile(q, seconds, resolution) if series is not None else None
+
+    def mean(self, name: str, seconds: float, resolution: Optional[float] = None) -> Optional[List[float]]:
+        series = self._series.get(name)
+        return series.mean(seconds, resolution) if series is not None else None
+
+    def peak(self, name: str, seconds: float, resolution: Optional[float] = None) -> Optional[List[float]]:
+        series = self._series.get(name)
+        return series.peak(seconds, resolution) if series is not None else None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'series': len(self._series),
+            'bytes': self.nbytes,
+            'max_bytes': self.max_bytes,
+            'rejected': self.rejected,
+        }
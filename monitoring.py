@@ -11,20 +11,185 @@ import json
 import os
 import time
 import ctypes
+import hashlib
+import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import psutil
 from core import kernel32, PROCESSENTRY32, TH32CS_SNAPPROCESS, INVALID_HANDLE_VALUE
+import nt_snapshot
+from process_table import ProcessTableTracker
+from process_forest import ProcessForest
+from metrics_store import MetricStore, PROCESS_PREFIX
+from latency_prober import LatencyProber, ProbeTarget, dns_query_payload
+import topology
+from core_ranking import load_core_rank
 
 class HardwareDetector:
-    """Detecta el tipo de CPU, GPU y almacenamiento usando WMIC."""
-    def __init__(self):
-        self.cpu_info = self._detect_cpu()
-        self.gpu_info = self._detect_gpu()
-        self.storage_info = self._detect_storage()
+    """
+    Detecta el tipo de CPU, GPU y almacenamiento usando WMIC.
+    
+    Las tres consultas se ejecutan en paralelo y el inventario se guarda en
+    disco indexado por una huella del hardware y el identificador de arranque.
+    En inicios posteriores se lee la caché al instante; si el equipo se ha
+    reiniciado desde entonces, el inventario se revalida en segundo plano.
+    """
+    INVENTORY_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".hardware_inventory_cache.json")
+    PROBES = ('cpu', 'gpu', 'storage')
+    # psutil.boot_time() se deriva del reloj y varía algún segundo entre llamadas
+    BOOT_TIME_TOLERANCE = 2.0
+
+    def __init__(self, use_cache=True):
+        start = time.perf_counter()
+        self.fingerprint = self._hardware_fingerprint()
+        self.boot_id = self._boot_id()
+        self.revalidation_thread = None
+        self.timing = {}
+
+        cached = self._load_inventory_cache() if use_cache else None
+        if cached is not None:
+            self._apply_inventory(cached['inventory'])
+            self.timing = {
+                'source': 'cache',
+                'probe_ms': cached.get('probe_ms', {}),
+                'serial_ms': cached.get('serial_ms', 0.0),
+            }
+            if abs(cached.get('boot_id', 0) - self.boot_id) > self.BOOT_TIME_TOLERANCE:
+                # Tras un reinicio pueden haber cambiado controladores o discos
+                self.revalidation_thread = threading.Thread(
+                    target=self._revalidate, name="HardwareRevalidation", daemon=True
+                )
+                self.revalidation_thread.start()
+        else:
+            inventory, probe_ms = self._probe_parallel()
+            self._apply_inventory(inventory)
+            self.timing = {'source': 'probe', 'probe_ms': probe_ms, 'serial_ms': sum(probe_ms.values())}
+            if self._is_complete(inventory):
+                self._save_inventory_cache(inventory, probe_ms)
+
+        self.timing['startup_ms'] = (time.perf_counter() - start) * 1000
+        print(self.timing_report())
+
+    # --- Inventario ---
+
+    def _apply_inventory(self, inventory):
+        """Publica un inventario y recalcula los indicadores derivados."""
+        self.cpu_info = inventory.get('cpu', {})
+        self.gpu_info = inventory.get('gpu', {'gpus': []})
+        self.storage_info = inventory.get('storage', [])
         
         self.is_intel = 'intel' in self.cpu_info.get('manufacturer', '').lower()
         self.is_amd = 'amd' in self.cpu_info.get('manufacturer', '').lower()
-        self.is_ssd = any(st['MediaType'] == 'SSD' for st in self.storage_info)
-        self.is_nvme = any('nvme' in st['InterfaceType'].lower() for st in self.storage_info)
+        self.is_ssd = any(st.get('MediaType') == 'SSD' for st in self.storage_info)
+        self.is_nvme = any('nvme' in st.get('InterfaceType', '').lower() for st in self.storage_info)
+
+    def _probe_parallel(self):
+        """
+        Ejecuta las tres consultas WMIC a la vez.
+        
+        :return: (inventario, milisegundos de cada consulta)
+        """
+        probes = {'cpu': self._detect_cpu, 'gpu': self._detect_gpu, 'storage': self._detect_storage}
+
+        def timed(func):
+            t0 = time.perf_counter()
+            result = func()
+            return result, (time.perf_counter() - t0) * 1000
+
+        with ThreadPoolExecutor(max_workers=len(probes), thread_name_prefix="HardwareProbe") as pool:
+            futures = {name: pool.submit(timed, func) for name, func in probes.items()}
+            results = {name: future.result() for name, future in futures.items()}
+
+        inventory = {name: result for name, (result, _) in results.items()}
+        probe_ms = {name: elapsed for name, (_, elapsed) in results.items()}
+        return inventory, probe_ms
+
+    @staticmethod
+    def _probe_succeeded(name, result):
+        """Una consulta WMIC fallida devuelve un resultado vacío."""
+        if name == 'gpu':
+            return bool(result.get('gpus'))
+        return bool(result)
+
+    def _is_complete(self, inventory):
+        """True si todas las consultas devolvieron datos (sólo entonces se guarda)."""
+        return all(self._probe_succeeded(name, inventory.get(name, {})) for name in self.PROBES)
+
+    def _revalidate(self):
+        """
+        Vuelve a consultar el hardware en segundo plano y actualiza la caché.
+        Las consultas que fallen conservan su parte del inventario anterior.
+        """
+        inventory, probe_ms = self._probe_parallel()
+        current = {'cpu': self.cpu_info, 'gpu': self.gpu_info, 'storage': self.storage_info}
+        merged = {
+            name: inventory[name] if self._probe_succeeded(name, inventory[name]) else current[name]
+            for name in self.PROBES
+        }
+        self._apply_inventory(merged)
+        self.timing['revalidated_ms'] = sum(probe_ms.values())
+        if self._is_complete(merged):
+            self._save_inventory_cache(merged, probe_ms)
+
+    @staticmethod
+    def _hardware_fingerprint():
+        """Huella barata del hardware (sin WMIC): CPU, núcleos, RAM y discos."""
+        parts = [
+            platform.node(), platform.machine(), platform.processor(),
+            str(psutil.cpu_count(logical=True)), str(psutil.cpu_count(logical=False)),
+            str(psutil.virtual_memory().total),
+        ]
+        try:
+            parts.extend(sorted(p.device for p in psutil.disk_partitions(all=False)))
+        except Exception:
+            pass
+        return hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _boot_id():
+        """Identificador del arranque actual (hora de arranque en segundos)."""
+        try:
+            return float(psutil.boot_time())
+        except Exception:
+            return 0.0
+
+    def _load_inventory_cache(self):
+        """Devuelve la entrada de caché si corresponde a este hardware, o None."""
+        try:
+            with open(self.INVENTORY_CACHE_FILE, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get('fingerprint') != self.fingerprint or 'inventory' not in cached:
+            return None
+        if not self._is_complete(cached['inventory']):
+            return None  # Caché escrita tras una consulta fallida: volver a consultar
+        return cached
+
+    def _save_inventory_cache(self, inventory, probe_ms):
+        try:
+            with open(self.INVENTORY_CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'fingerprint': self.fingerprint,
+                    'boot_id': self.boot_id,
+                    'inventory': inventory,
+                    'probe_ms': probe_ms,
+                    'serial_ms': sum(probe_ms.values()),
+                }, f, indent=4)
+        except OSError as e:
+            print(f"No se pudo guardar la caché de inventario: {e}")
+
+    def timing_report(self):
+        """Resumen del tiempo de arranque de la detección de hardware."""
+        startup = self.timing.get('startup_ms', 0.0)
+        serial = self.timing.get('serial_ms', 0.0)
+        if self.timing.get('source') == 'cache':
+            return (f"[HardwareDetector] Inventario desde caché en {startup:.1f} ms "
+                    f"(consultas en serie: {serial:.0f} ms, ahorro {serial - startup:.0f} ms)"
+                    + (", revalidando en segundo plano" if self.revalidation_thread else ""))
+        slowest = max(self.timing.get('probe_ms', {}).values(), default=0.0)
+        return (f"[HardwareDetector] Inventario consultado en paralelo en {startup:.0f} ms "
+                f"(en serie: {serial:.0f} ms, consulta más lenta: {slowest:.0f} ms)")
 
     def _execute_wmic(self, command_args):
         """
@@ -92,69 +257,67 @@ class HardwareDetector:
 
 class CPPTopology:
     """
-    Consulta y mapea la topología exacta de la CPU (P-cores, E-cores, Cachés, NUMA).
-    Utiliza un archivo de caché para acelerar inicios futuros.
+    Consulta y mapea la topología exacta de la CPU (P-cores, E-cores, Cachés, NUMA)
+    a partir de GetLogicalProcessorInformationEx, con el rango de cores preferidos. La caché se guarda junto al
+    módulo y se invalida si cambia la firma de la CPU.
     """
-    CACHE_FILE = ".cpu_topology_cache.json"
-
-    def __init__(self):
-        self.topology = {}
-        if os.path.exists(self.CACHE_FILE):
-            print("Cargando topología de CPU desde caché...")
-            with open(self.CACHE_FILE, 'r') as f:
-                self.topology = json.load(f)
-        else:
-            print("Consultando topología de CPU desde el sistema (puede tardar)...")
-            self._query_cpu_topology()
-            with open(self.CACHE_FILE, 'w') as f:
-                json.dump(self.topology, f, indent=4)
+    def __init__(self, cache_file=topology.DEFAULT_CACHE_FILE):
+        self.topology = topology.load_topology(
+            cache_file,
+            fallback_counts=lambda: (psutil.cpu_count(logical=False), psutil.cpu_count(logical=True))
+        )
+        ranking = load_core_rank(self.topology['physical_cores'], psutil.boot_time())
+        self.topology = dict(self.topology, core_rank=ranking['core_rank'])
+        print(f"Topología de CPU ({self.topology['source']}): "
+              f"{self.topology['total_physical_cores']} cores, {self.topology['total_logical_cores']} hilos")
         
         self.p_cores = self.topology.get("p_cores", [])
         self.e_cores = self.topology.get("e_cores", [])
         self.l3_cache_groups = self.topology.get("l3_cache_groups", [])
         self.numa_nodes = self.topology.get("numa_nodes", [])
 
-    def _query_cpu_topology(self):
-        # Esta es una implementación simplificada. Una real sería mucho más compleja,
-        # iterando sobre GetLogicalProcessorInformationEx y parseando las estructuras.
-        # Por ahora, usamos psutil como una aproximación de alto nivel.
-        physical_cores = psutil.cpu_count(logical=False)
-        logical_cores = psutil.cpu_count(logical=True)
-        
-        self.topology['total_physical_cores'] = physical_cores
-        self.topology['total_logical_cores'] = logical_cores
-
-        # Heurística simple para P/E cores (no siempre precisa)
-        # Una implementación real usaría `GetLogicalProcessorInformationEx`
-        # y buscaría `RelationProcessorCore` para obtener `EfficiencyClass`.
-        if logical_cores > physical_cores and physical_cores > 4: # Sugiere SMT y posiblemente P/E
-             self.topology['p_cores'] = list(range(0, physical_cores * 2, 2))
-             self.topology['e_cores'] = list(range(physical_cores * 2, logical_cores))
-             # Esto es una suposición y requeriría una lógica mucho más robusta
-             if not self.topology['e_cores']: # Fallback para SMT simple
-                 self.topology['p_cores'] = list(range(logical_cores))
-                 self.topology['smt_pairs'] = [(i, i+1) for i in range(0, logical_cores, 2)]
-        else:
-            self.topology['p_cores'] = list(range(logical_cores))
-            self.topology['e_cores'] = []
-
-        # ... Lógica para L3 y NUMA usando GetLogicalProcessorInformation(Ex) iría aquí ...
-        self.topology['l3_cache_groups'] = [self.topology['p_cores']]
-        self.topology['numa_nodes'] = [self.topology['p_cores']]
-
 class ProcessSnapshotEngine:
     """
-    Utiliza CreateToolhelp32Snapshot para listar procesos de forma rápida y eficiente.
+    Lista todos los procesos con una sola llamada a NtQuerySystemInformation
+    (tiempos de CPU, memoria, E/S, handles e hilos). Si la llamada nativa no
+    está disponible, recurre a CreateToolhelp32Snapshot (sólo pid, nombre y padre).
     """
     def __init__(self):
         self._process_cache = []
+        self._cache_has_threads = False
         self._last_scan_time = 0
         self.cache_ttl = 1.0 # segundos
+        self._nt_snapshot = nt_snapshot.NtProcessSnapshot() if nt_snapshot.is_supported() else None
+        self.backend = 'nt' if self._nt_snapshot is not None else 'toolhelp'
+        self.table_tracker = ProcessTableTracker()
+        self.forest = ProcessForest()
 
-    def get_all_processes(self):
-        if time.monotonic() - self._last_scan_time < self.cache_ttl:
+    @property
+    def last_scan_time(self):
+        """Instante (time.monotonic) de la última instantánea."""
+        return self._last_scan_time
+
+    def get_all_processes(self, include_threads=False):
+        """
+        Devuelve la lista de procesos (cacheada durante cache_ttl segundos).
+        
+        :param include_threads: Incluir los tiempos por hilo (sólo backend 'nt')
+        """
+        if (time.monotonic() - self._last_scan_time < self.cache_ttl
+                and (self._cache_has_threads or not include_threads)):
             return self._process_cache
 
+        if self._nt_snapshot is not None:
+            try:
+                self._process_cache = self._nt_snapshot.snapshot(include_threads)
+                self._cache_has_threads = include_threads
+                self._last_scan_time = time.monotonic()
+                return self._process_cache
+            except OSError as e:
+                print(f"Error en NtQuerySystemInformation, usando Toolhelp32: {e}")
+                self._nt_snapshot = None
+                self.backend = 'toolhelp'
+
         processes = []
         h_snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
         if h_snapshot == INVALID_HANDLE_VALUE:
@@ -175,9 +338,134 @@ class ProcessSnapshotEngine:
         
         kernel32.CloseHandle(h_snapshot)
         self._process_cache = processes
+        self._cache_has_threads = False
         self._last_scan_time = time.monotonic()
         return self._process_cache
 
+    def get_process_diff(self):
+        """
+        Captura una instantánea, la convierte en tabla columnar y devuelve la
+        diferencia vectorizada con la anterior (CPU %, E/S, working set,
+        procesos creados, terminados y PIDs reutilizados).
+        """
+        records = self.get_all_processes()
+        if self.table_tracker.table is not None and self.table_tracker.table.timestamp == self._last_scan_time:
+            return self.table_tracker.last_diff
+        diff = self.table_tracker.update(records, self._last_scan_time)
+        self.forest.apply_diff(diff)
+        return diff
+
+    def get_process_tree(self, root_pid):
+        """
+        PIDs del árbol con raíz en root_pid, a partir del bosque de procesos
+        mantenido incrementalmente (O(tamaño del subárbol)).
+        """
+        self.get_process_diff()
+        return self.forest.subtree(root_pid)
+
+class SystemMetricsSampler:
+    """
+    Muestrea en una sola pasada CPU y frecuencia por core, memoria y
+    temperatura, más la CPU, el working set y los fallos de página de los procesos gestionados
+    (a partir de la diferencia de instantáneas), y lo guarda en un
+    MetricStore. Los consumidores leen del almacén en lugar de consultar
+    psutil cada uno por su cuenta.
+    """
+    def __init__(self, store=None, temperature_source=None, core_sampler=None):
+        self.store = store if store is not None else MetricStore()
+        # Callable que devuelve °C o None (p.ej. TemperatureMonitor.get_cpu_temperature)
+        self.temperature_source = temperature_source
+        # PerCoreSampler compartido con la lógica de afinidad (evita muestrear dos veces)
+        self.core_sampler = core_sampler
+        self._process_pids = set()
+        self._last_disk = None
+        psutil.cpu_percent(percpu=True)  # Referencia: la primera medida es desde aquí
+
+    def _read_temperature(self):
+        try:
+            if self.temperature_source is not None:
+                return self.temperature_source()
+            if hasattr(psutil, 'sensors_temperatures'):
+                temps = psutil.sensors_temperatures()
+                cpu_temps = temps.get('coretemp', []) or temps.get('k10temp', [])
+                if cpu_temps:
+                    return max(t.current for t in cpu_temps)
+        except Exception:
+            pass
+        return None
+
+    def sample(self, diff=None, managed_pids=(), timestamp=None):
+        """
+        Toma una muestra de todas las métricas del sistema.
+
+        :param diff: SnapshotDiff de la última instantánea (para las series por proceso)
+        :param managed_pids: PIDs cuyos valores se guardan en series 'proc.<pid>.*'
+        :param timestamp: Marca de tiempo monotónica (por defecto time.monotonic())
+        """
+        ts = time.monotonic() if timestamp is None else timestamp
+        store = self.store
+
+        if self.core_sampler is not None:
+            self.core_sampler.sample()
+            if self.core_sampler.ready:
+                store.record('cpu.percent', self.core_sampler.utilization, ts)
+            else:
+                # El muestreador necesita dos lecturas; hasta entonces, la medida de psutil
+                store.record('cpu.percent', psutil.cpu_percent(percpu=True), ts)
+            if self.core_sampler.frequency_mhz:
+                store.record('cpu.freq_mhz', self.core_sampler.frequency_mhz, ts)
+        else:
+            store.record('cpu.percent', psutil.cpu_percent(percpu=True), ts)
+            try:
+                freqs = psutil.cpu_freq(percpu=True)
+                if freqs:
+                    store.record('cpu.freq_mhz', [f.current for f in freqs], ts)
+            except Exception:
+                pass
+
+        memory = psutil.virtual_memory()
+        store.record('memory.percent', memory.percent, ts)
+        store.record('memory.available_mb', memory.available / (1024 * 1024), ts)
+
+        self._sample_disk(ts)
+
+        temperature = self._read_temperature()
+        if temperature is not None:
+            store.record('temperature.cpu', temperature, ts)
+
+        if diff is not None:
+            self._sample_processes(diff, set(managed_pids), ts)
+
+    def _sample_disk(self, ts):
+        """Tasa de E/S de disco (lectura + escritura, bytes/s) desde la muestra anterior."""
+        try:
+            counters = psutil.disk_io_counters()
+        except Exception:
+            return
+        if counters is None:
+            return
+        total = counters.read_bytes + counters.write_bytes
+        if self._last_disk is not None and ts > self._last_disk[0]:
+            rate = max(total - self._last_disk[1], 0) / (ts - self._last_disk[0])
+            self.store.record('disk.bytes_per_s', rate, ts)
+        self._last_disk = (ts, total)
+
+    def _sample_processes(self, diff, managed, ts):
+        # Las series de procesos terminados (o con PID reutilizado) se descartan
+        for pid in set(diff.exited) | (self._process_pids - managed):
+            self.store.drop_prefix(f"{PROCESS_PREFIX}{pid}.")
+            self._process_pids.discard(pid)
+
+        table = diff.table
+        for i in range(len(table)):
+            pid = int(table.pid[i])
+            if pid in managed:
+                self.store.record(f"{PROCESS_PREFIX}{pid}.cpu", float(diff.cpu_percent[i]), ts)
+                self.store.record(f"{PROCESS_PREFIX}{pid}.ws_mb", table.working_set[i] / (1024 * 1024), ts)
+                self.store.record(f"{PROCESS_PREFIX}{pid}.faults", float(diff.fault_rate[i]), ts)
+                self.store.record(f"{PROCESS_PREFIX}{pid}.io", float(diff.io_rate[i]), ts)
+                self._process_pids.add(pid)
+
 class SystemMonitor:
     """Clase principal de monitorización que agrupa todas las funcionalidades."""
     def __init__(self):
@@ -185,54 +473,37 @@ class SystemMonitor:
         self.cpu_topology = CPPTopology()
         self.snapshot_engine = ProcessSnapshotEngine()
         self.process_tree_cache = {}
+        self.metrics = SystemMetricsSampler()
+        self.latency_probers = {}
 
     def get_process_tree(self, root_pid):
-        """Construye y devuelve un árbol de procesos a partir de un PID raíz."""
-        all_procs = self.snapshot_engine.get_all_processes()
-        # Construir un mapa de padre a hijos para una búsqueda eficiente
-        parent_map = {}
-        for p in all_procs:
-            parent_id = p['parent_pid']
-            if parent_id not in parent_map:
-                parent_map[parent_id] = []
-            parent_map[parent_id].append(p['pid'])
-            
-        tree = {root_pid}
-        queue = [root_pid]
-        while queue:
-            current_pid = queue.pop(0)
-            if current_pid in parent_map:
-                children = parent_map[current_pid]
-                for child_pid in children:
-                    if child_pid not in tree:
-                        tree.add(child_pid)
-                        queue.append(child_pid)
-        return list(tree)
+        """Devuelve los PIDs del árbol de procesos a partir de un PID raíz."""
+        return self.snapshot_engine.get_process_tree(root_pid)
+
+    def sample_metrics(self, managed_pids=()):
+        """Registra una muestra del sistema (y de los procesos indicados) en el almacén de métricas."""
+        self.metrics.sample(self.snapshot_engine.get_process_diff(), managed_pids)
 
     def measure_network_latency(self, target='8.8.8.8'):
+        """Latencia en ms al destino (DNS UDP/53 y TCP/443 en paralelo); 100 si no responde."""
+        prober = self.latency_probers.get(target)
+        if prober is None:
+            prober = self.latency_probers[target] = LatencyProber([
+                ProbeTarget(target, 53, 'udp', dns_query_payload()),
+                ProbeTarget(target, 443, 'tcp'),
+            ])
         try:
-            result = subprocess.run(
-                ['ping', '-n', '1', '-w', '1000', target],
-                capture_output=True, text=True, check=True, creationflags=subprocess.CREATE_NO_WINDOW
-            )
-            for line in result.stdout.splitlines():
-                if 'Average' in line or 'Media' in line:
-                    return int(line.split(' = ')[-1].replace('ms', ''))
-            return 100 # Fallback
+            prober.run_once()
         except Exception:
             return 100 # Fallback
+        latency = prober.latency_ms()
+        return int(round(latency)) if latency is not None else 100
 
     def is_overheating(self, thresholds):
-        """Compara las temperaturas actuales con los umbrales del usuario."""
-        temps = psutil.sensors_temperatures()
-        if not temps:
+        """Compara la última temperatura de CPU muestreada con los umbrales del usuario."""
+        if 'temperature.cpu' not in self.metrics.store:
+            self.sample_metrics()
+        current_max_temp = self.metrics.store.latest_scalar('temperature.cpu')
+        if current_max_temp is None:
             return False
-            
-        # Buscar la temperatura del paquete de la CPU
-        cpu_temps = temps.get('coretemp', []) or temps.get('k10temp', [])
-        if not cpu_temps:
-            return False
-
-        # Asumimos que la temperatura más alta es la relevante
-        current_max_temp = max(t.current for t in cpu_temps)
         return current_max_temp >= thresholds['soft']
\ No newline at end of file
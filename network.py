@@ -3,9 +3,10 @@ Módulo Red
 ----------
 
 Gestiona todas las optimizaciones de la pila de red, tanto
-estáticas (Registro) como dinámicas (PowerShell, Ping).
+estáticas (Registro) como dinámicas (PowerShell, sondeo de latencia).
 """
 from kernel import RegistryManager
+from latency_prober import LatencyProber
 import subprocess
 import psutil
 import winreg
@@ -124,43 +125,26 @@ class QoSManager:
 
 
 class NetworkLatencyOptimizer:
-    """Optimiza latencia de red dinámicamente con monitoreo de ping"""
+    """Optimiza latencia de red dinámicamente con sondeo TCP/UDP concurrente"""
     
     def __init__(self):
         from collections import deque
         self.latency_history = deque(maxlen=100)
-        self.target_servers = ['8.8.8.8', '1.1.1.1']  # Google DNS y Cloudflare
+        # Google DNS y Cloudflare, por DNS UDP/53 y TCP/443
+        self.prober = LatencyProber()
         print("[NetLatency] Optimizador de latencia inicializado")
     
     def measure_latency(self):
-        """Mide latencia actual haciendo ping a servidores"""
-        latencies = []
-        
-        for server in self.target_servers:
-            try:
-                # Usar ping de Windows
-                result = subprocess.run(
-                    ['ping', '-n', '1', '-w', '1000', server],
-                    capture_output=True,
-                    text=True,
-                    timeout=2,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                )
-                
-                # Parsear resultado
-                if 'tiempo=' in result.stdout or 'time=' in result.stdout:
-                    # Extraer tiempo en ms
-                    import re
-                    match = re.search(r'(?:tiempo|time)[=<](\d+)', result.stdout)
-                    if match:
-                        latencies.append(int(match.group(1)))
-            except Exception:
-                pass
-        
-        if latencies:
-            avg_latency = sum(latencies) / len(latencies)
-            return avg_latency
-        return None
+        """Mide la latencia actual sondeando todos los servidores a la vez (mediana en ms o None)"""
+        try:
+            self.prober.run_once()
+        except Exception:
+            return None
+        return self.prober.latency_ms()
+    
+    def get_latency_stats(self):
+        """Pérdidas, jitter y percentiles por servidor"""
+        return self.prober.stats()
     
     def adaptive_optimization(self):
         """Optimiza basándose en latencia medida"""
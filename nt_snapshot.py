@@ -0,0 +1,241 @@
+"""
+Módulo de Instantáneas Nativas de Procesos
+------------------------------------------
+
+Captura todos los procesos del sistema con una única llamada a
+NtQuerySystemInformation(SystemProcessInformation) y analiza el búfer
+resultante sin copias (memoryview + struct.unpack_from / struct.iter_unpack).
+Cada registro incluye tiempos de CPU, working set, contadores de handles e
+hilos, E/S acumulada y, opcionalmente, los tiempos de cada hilo.
+
+El analizador es independiente de la plataforma: puede probarse en Linux con
+búferes capturados en Windows (ver save_capture / load_capture) o sintéticos.
+
+Dependencias externas:
+- ctypes: Biblioteca estándar (la llamada a ntdll sólo se carga en Windows)
+- struct, logging: Biblioteca estándar de Python
+"""
+
+import ctypes
+import logging
+import struct
+from collections import namedtuple
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger("NtSnapshot")
+
+SYSTEM_PROCESS_INFORMATION_CLASS = 5
+STATUS_SUCCESS = 0
+STATUS_INFO_LENGTH_MISMATCH = 0xC0000004
+
+# Diferencia entre la época FILETIME (1601) y la época Unix, en unidades de 100 ns
+FILETIME_UNIX_EPOCH = 116444736000000000
+# Los tiempos del kernel se expresan en unidades de 100 ns
+TICKS_PER_SECOND = 10_000_000
+
+# SYSTEM_PROCESS_INFORMATION (x64, 256 bytes). Orden de campos:
+#  NextEntryOffset, NumberOfThreads, WorkingSetPrivateSize, HardFaultCount,
+#  NumberOfThreadsHighWatermark, CycleTime, CreateTime, UserTime, KernelTime,
+#  ImageName.Length, ImageName.MaximumLength, ImageName.Buffer, BasePriority,
+#  UniqueProcessId, InheritedFromUniqueProcessId, HandleCount, SessionId,
+#  UniqueProcessKey, PeakVirtualSize, VirtualSize, PageFaultCount,
+#  PeakWorkingSetSize, WorkingSetSize, QuotaPeakPagedPoolUsage,
+#  QuotaPagedPoolUsage, QuotaPeakNonPagedPoolUsage, QuotaNonPagedPoolUsage,
+#  PagefileUsage, PeakPagefileUsage, PrivatePageCount, Read/Write/Other
+#  OperationCount y Read/Write/Other TransferCount
+PROCESS_ENTRY_FORMAT = '<IIqIIQqqqHH4xQi4xQQIIQQQI4xQQQQQQQQQqqqqqq'
+PROCESS_ENTRY = struct.Struct(PROCESS_ENTRY_FORMAT)
+
+# SYSTEM_THREAD_INFORMATION (x64, 80 bytes): KernelTime, UserTime, CreateTime,
+#  WaitTime, StartAddress, ClientId.UniqueProcess, ClientId.UniqueThread,
+#  Priority, BasePriority, ContextSwitches, ThreadState, WaitReason
+THREAD_ENTRY_FORMAT = '<qqqI4xQQQiiIII4x'
+THREAD_ENTRY = struct.Struct(THREAD_ENTRY_FORMAT)
+
+ThreadInfo = namedtuple(
+    'ThreadInfo',
+    ['tid', 'user_time', 'kernel_time', 'priority', 'base_priority',
+     'context_switches', 'state', 'wait_reason', 'start_address']
+)
+
+
+def filetime_to_unix(filetime: int) -> float:
+    """Convierte un FILETIME (100 ns desde 1601) a segundos de época Unix."""
+    if filetime <= 0:
+        return 0.0
+    return (filetime - FILETIME_UNIX_EPOCH) / TICKS_PER_SECOND
+
+
+def parse_process_buffer(buffer: Any, base_address: int = 0,
+                         include_threads: bool = True) -> List[Dict[str, Any]]:
+    """
+    Analiza un búfer SystemProcessInformation.
+
+    :param buffer: Objeto compatible con el protocolo de búfer (bytes, bytearray,
+                   array de ctypes, memoryview)
+    :param base_address: Dirección en memoria del búfer cuando se capturó; se
+                         usa para resolver los punteros de ImageName.Buffer
+    :param include_threads: Si True, incluye los tiempos de cada hilo
+    :return: Lista de diccionarios, uno por proceso
+    """
+    view = memoryview(buffer).cast('B')
+    size = len(view)
+    entry_size = PROCESS_ENTRY.size
+    thread_size = THREAD_ENTRY.size
+    processes: List[Dict[str, Any]] = []
+
+    offset = 0
+    while offset + entry_size <= size:
+        (next_offset, thread_count, private_ws, hard_faults, _threads_hwm, cycle_time,
+         create_time, user_time, kernel_time, name_len, _name_max, name_ptr, base_priority,
+         pid, parent_pid, handle_count, session_id, _key, _peak_vm, virtual_size,
+         page_faults, peak_ws, working_set, _qppp, _qpp, _qpnp, _qnp, pagefile,
+         _peak_pagefile, private_bytes, read_ops, write_ops, other_ops,
+         read_bytes, write_bytes, other_bytes) = PROCESS_ENTRY.unpack_from(view, offset)
+
+        name = ''
+        if name_len and name_ptr:
+            name_offset = name_ptr - base_address
+            if 0 <= name_offset and name_offset + name_len <= size:
+                name = bytes(view[name_offset:name_offset + name_len]).decode('utf-16-le', 'replace')
+        elif pid == 0:
+            name = 'System Idle Process'
+
+        record: Dict[str, Any] = {
+            'pid': pid,
+            'name': name,
+            'parent_pid': parent_pid,
+            'session_id': session_id,
+            'create_time': filetime_to_unix(create_time),
+            'cpu_user': user_time / TICKS_PER_SECOND,
+            'cpu_kernel': kernel_time / TICKS_PER_SECOND,
+            'cycle_time': cycle_time,
+            'base_priority': base_priority,
+            'thread_count': thread_count,
+            'handle_count': handle_count,
+            'working_set': working_set,
+            'peak_working_set': peak_ws,
+            'private_working_set': private_ws,
+            'private_bytes': private_bytes,
+            'pagefile_usage': pagefile,
+            'virtual_size': virtual_size,
+            'page_faults': page_faults,
+            'hard_faults': hard_faults,
+            'io_read_ops': read_ops,
+            'io_write_ops': write_ops,
+            'io_other_ops': other_ops,
+            'io_read_bytes': read_bytes,
+            'io_write_bytes': write_bytes,
+            'io_other_bytes': other_bytes,
+        }
+
+        if include_threads:
+            threads_start = offset + entry_size
+            threads_end = min(threads_start + thread_count * thread_size, size)
+            threads_end -= (threads_end - threads_start) % thread_size
+            record['threads'] = [
+                ThreadInfo(tid, t_user / TICKS_PER_SECOND, t_kernel / TICKS_PER_SECOND,
+                           priority, t_base_priority, switches, state, wait_reason, start)
+                for (t_kernel, t_user, _t_create, _wait, start, _owner, tid, priority,
+                     t_base_priority, switches, state, wait_reason)
+                in struct.iter_unpack(THREAD_ENTRY_FORMAT, view[threads_start:threads_end])
+            ]
+
+        processes.append(record)
+        if next_offset == 0:
+            break
+        offset += next_offset
+
+    view.release()
+    return processes
+
+
+# --- Llamada nativa (sólo Windows) ---
+
+_ntdll = None
+
+
+def _get_ntdll():
+    """Carga ntdll de forma diferida para que el módulo se importe en cualquier plataforma."""
+    global _ntdll
+    if _ntdll is None:
+        _ntdll = ctypes.WinDLL('ntdll')
+        _ntdll.NtQuerySystemInformation.argtypes = [
+            ctypes.c_ulong, ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(ctypes.c_ulong)
+        ]
+        _ntdll.NtQuerySystemInformation.restype = ctypes.c_long
+    return _ntdll
+
+
+def is_supported() -> bool:
+    """Indica si la captura nativa está disponible (Windows de 64 bits)."""
+    if struct.calcsize('P') != 8 or not hasattr(ctypes, 'WinDLL'):
+        return False
+    try:
+        _get_ntdll()
+        return True
+    except OSError:
+        return False
+
+
+class NtProcessSnapshot:
+    """
+    Captura instantáneas con NtQuerySystemInformation reutilizando el mismo
+    búfer entre llamadas; sólo crece cuando el sistema informa de que no cabe.
+    """
+
+    INITIAL_BUFFER_SIZE = 512 * 1024
+    # Margen extra al redimensionar: la lista de procesos puede crecer entre llamadas
+    GROWTH_MARGIN = 64 * 1024
+
+    def __init__(self) -> None:
+        self._buffer = ctypes.create_string_buffer(self.INITIAL_BUFFER_SIZE)
+        self._valid_length: int = 0
+
+    def query(self) -> Tuple[memoryview, int]:
+        """
+        Ejecuta la llamada nativa.
+
+        :return: (vista de los bytes válidos, dirección base del búfer)
+        :raise OSError: Si la llamada falla
+        """
+        ntdll = _get_ntdll()
+        needed = ctypes.c_ulong(0)
+        while True:
+            status = ntdll.NtQuerySystemInformation(
+                SYSTEM_PROCESS_INFORMATION_CLASS, self._buffer,
+                len(self._buffer), ctypes.byref(needed)
+            ) & 0xFFFFFFFF
+            if status == STATUS_INFO_LENGTH_MISMATCH:
+                self._buffer = ctypes.create_string_buffer(needed.value + self.GROWTH_MARGIN)
+                continue
+            if status != STATUS_SUCCESS:
+                raise OSError(f"NtQuerySystemInformation falló con NTSTATUS 0x{status:08X}")
+            self._valid_length = needed.value or len(self._buffer)
+            return memoryview(self._buffer)[:self._valid_length], ctypes.addressof(self._buffer)
+
+    def snapshot(self, include_threads: bool = True) -> List[Dict[str, Any]]:
+        """Captura y analiza todos los procesos del sistema."""
+        view, base_address = self.query()
+        try:
+            return parse_process_buffer(view, base_address, include_threads)
+        finally:
+            view.release()
+
+    def save_capture(self, path: str) -> None:
+        """Guarda el búfer crudo (con su dirección base) para pruebas fuera de Windows."""
+        view, base_address = self.query()
+        try:
+            with open(path, 'wb') as f:
+                f.write(struct.pack('<Q', base_address))
+                f.write(view)
+        finally:
+            view.release()
+
+
+def load_capture(path: str, include_threads: bool = True) -> List[Dict[str, Any]]:
+    """Analiza un búfer guardado con NtProcessSnapshot.save_capture."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    (base_address,) = struct.unpack_from('<Q', data, 0)
+    return parse_process_buffer(memoryview(data)[8:], base_address, include_threads)
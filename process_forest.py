@@ -0,0 +1,180 @@
+"""
+Módulo de Bosque de Procesos
+----------------------------
+
+Índice padre→hijos de todos los procesos, mantenido de forma incremental a
+partir de las diferencias entre instantáneas (process_table.SnapshotDiff).
+Las consultas de árbol cuestan O(tamaño del subárbol) y su resultado se
+cachea por raíz hasta que cambia algún proceso de ese subárbol.
+
+Windows conserva el PID del padre aunque éste haya terminado, y ese PID puede
+reutilizarse. Un enlace hijo→padre sólo se acepta si el padre se creó antes
+que el hijo, así un proceso nuevo con un PID reutilizado nunca hereda los
+hijos del proceso anterior.
+
+Dependencias externas:
+- collections, logging: Biblioteca estándar de Python
+"""
+
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger("ProcessForest")
+
+
+class ProcessForest:
+    """Bosque de procesos con consultas de subárbol cacheadas."""
+
+    def __init__(self) -> None:
+        self._parent: Dict[int, int] = {}
+        self._children: Dict[int, Set[int]] = {}
+        self._create_time: Dict[int, float] = {}
+        # Hijos cuyo padre declarado aún no está en el bosque: ppid → {pid}
+        self._waiting: Dict[int, Set[int]] = {}
+        self._declared_parent: Dict[int, int] = {}
+        self._subtree_cache: Dict[int, Tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._create_time)
+
+    def __contains__(self, pid: int) -> bool:
+        return pid in self._create_time
+
+    # --- Actualización incremental ---
+
+    def apply_diff(self, diff) -> None:
+        """
+        Aplica una SnapshotDiff: elimina los procesos terminados (incluidos los
+        PIDs reutilizados) y añade los creados.
+        """
+        for pid in diff.exited:
+            self.remove(int(pid))
+
+        table = diff.table
+        added = []
+        for i in diff.spawned_indices():
+            pid = int(table.pid[i])
+            self._insert(pid, int(table.parent_pid[i]), float(table.create_time[i]))
+            added.append(pid)
+        for pid in added:
+            self._link(pid)
+
+    def add(self, pid: int, parent_pid: int, create_time: float) -> None:
+        """Añade un proceso (sustituye al existente si el PID se reutilizó)."""
+        if pid in self._create_time:
+            if self._create_time[pid] == create_time:
+                return
+            self.remove(pid)
+        self._insert(pid, parent_pid, create_time)
+        self._link(pid)
+
+    def rebuild(self, processes: Iterable[Tuple[int, int, float]]) -> None:
+        """Reconstruye el bosque completo a partir de (pid, ppid, create_time)."""
+        self.__init__()
+        added = []
+        for pid, parent_pid, create_time in processes:
+            self._insert(pid, parent_pid, create_time)
+            added.append(pid)
+        for pid in added:
+            self._link(pid)
+
+    def remove(self, pid: int) -> None:
+        """Elimina un proceso; sus hijos quedan huérfanos (como en Windows)."""
+        if pid not in self._create_time:
+            return
+        self._invalidate_from(pid)
+
+        parent = self._parent.pop(pid, None)
+        if parent is not None:
+            self._children[parent].discard(pid)
+        declared = self._declared_parent.pop(pid, None)
+        if declared is not None and declared in self._waiting:
+            self._waiting[declared].discard(pid)
+            if not self._waiting[declared]:
+                del self._waiting[declared]
+
+        for child in self._children.pop(pid, ()):
+            # El hijo conserva su PID de padre declarado por si no se reutiliza,
+            # pero queda desenlazado hasta que aparezca un padre válido.
+            del self._parent[child]
+            self._waiting.setdefault(pid, set()).add(child)
+
+        del self._create_time[pid]
+
+    def _insert(self, pid: int, parent_pid: int, create_time: float) -> None:
+        self._create_time[pid] = create_time
+        self._children.setdefault(pid, set())
+        self._declared_parent[pid] = parent_pid
+
+    def _link(self, pid: int) -> None:
+        """Enlaza un proceso con su padre y adopta a los hijos que lo esperaban."""
+        parent_pid = self._declared_parent.get(pid)
+        if parent_pid is not None and pid not in self._parent:
+            if self._is_valid_parent(parent_pid, pid):
+                self._parent[pid] = parent_pid
+                self._children[parent_pid].add(pid)
+                self._invalidate_from(parent_pid)
+            elif parent_pid != pid:
+                self._waiting.setdefault(parent_pid, set()).add(pid)
+
+        waiting = self._waiting.get(pid)
+        if waiting:
+            for child in list(waiting):
+                if self._is_valid_parent(pid, child):
+                    waiting.discard(child)
+                    self._parent[child] = pid
+                    self._children[pid].add(child)
+            if not waiting:
+                del self._waiting[pid]
+            self._invalidate_from(pid)
+
+    def _is_valid_parent(self, parent_pid: int, child_pid: int) -> bool:
+        """El padre debe existir, ser distinto del hijo y haberse creado antes."""
+        if parent_pid == child_pid or parent_pid not in self._create_time:
+            return False
+        return self._create_time[parent_pid] <= self._create_time[child_pid]
+
+    def _invalidate_from(self, pid: Optional[int]) -> None:
+        """Invalida la caché del proceso y de todos sus ancestros (O(profundidad))."""
+        seen = set()
+        while pid is not None and pid not in seen:
+            seen.add(pid)
+            self._subtree_cache.pop(pid, None)
+            pid = self._parent.get(pid)
+
+    # --- Consultas ---
+
+    def parent_of(self, pid: int) -> Optional[int]:
+        """Padre vivo y válido de un proceso o None."""
+        return self._parent.get(pid)
+
+    def children_of(self, pid: int) -> List[int]:
+        """Hijos directos de un proceso."""
+        return list(self._children.get(pid, ()))
+
+    def subtree(self, root: int) -> List[int]:
+        """
+        PIDs del subárbol con raíz en 'root' (la raíz primero).
+
+        :return: Lista de PIDs; [root] si el proceso no está en el bosque
+        """
+        cached = self._subtree_cache.get(root)
+        if cached is not None:
+            return list(cached)
+        if root not in self._create_time:
+            return [root]
+
+        # 'seen' protege frente a ciclos cuando no hay horas de creación (Toolhelp32)
+        result = [root]
+        seen = {root}
+        queue = deque([root])
+        while queue:
+            for child in self._children.get(queue.popleft(), ()):
+                if child not in seen:
+                    seen.add(child)
+                    result.append(child)
+                    queue.append(child)
+
+        self._subtree_cache[root] = tuple(result)
+        return result
@@ -0,0 +1,121 @@
+"""
+Módulo de Escaneo de Procesos en una Pasada
+-------------------------------------------
+
+Convierte una instantánea de procesos en registros compactos (__slots__) con
+la lista de hijos de cada proceso, construida en una sola pasada a partir de
+los PIDs padre. Sustituye al escaneo anterior, que llamaba a
+psutil.Process.children() por cada proceso (cada llamada recorre toda la
+tabla de procesos, es decir, O(n²) en total).
+
+Ejecutar este módulo directamente muestra la curva de escalado con 100 a
+10.000 procesos sintéticos.
+
+Dependencias externas:
+- time, random: Biblioteca estándar de Python (sólo para la prueba de rendimiento)
+"""
+
+from typing import Any, Dict, Iterable, List
+
+
+class ProcessRecord:
+    """Registro compacto de un proceso."""
+
+    __slots__ = ('pid', 'name', 'parent_pid', 'session_id', 'create_time', 'children')
+
+    def __init__(self, pid: int, name: str, parent_pid: int, session_id: Any = None,
+                 create_time: float = 0.0) -> None:
+        self.pid = pid
+        self.name = name
+        self.parent_pid = parent_pid
+        self.session_id = session_id
+        self.create_time = create_time
+        self.children: List[int] = []
+
+    def __getitem__(self, key: str) -> Any:
+        # Compatibilidad con los consumidores que esperaban diccionarios
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def __repr__(self) -> str:
+        return f"ProcessRecord(pid={self.pid}, name={self.name!r}, children={len(self.children)})"
+
+
+def scan_processes(snapshot: Iterable[Dict[str, Any]]) -> List[ProcessRecord]:
+    """
+    Construye los registros y sus listas de hijos en una sola pasada.
+
+    Un hijo sólo se asigna a un padre creado antes que él, para no confundir
+    un PID padre reutilizado con el padre original.
+
+    :param snapshot: Registros de ProcessSnapshotEngine.get_all_processes
+    :return: Lista de ProcessRecord en el mismo orden que la instantánea
+    """
+    records: List[ProcessRecord] = []
+    by_pid: Dict[int, ProcessRecord] = {}
+    for proc in snapshot:
+        record = ProcessRecord(
+            proc['pid'], proc.get('name', ''), proc.get('parent_pid', 0),
+            proc.get('session_id'), proc.get('create_time', 0.0)
+        )
+        records.append(record)
+        by_pid[record.pid] = record
+
+    for record in records:
+        parent = by_pid.get(record.parent_pid)
+        if parent is not None and parent is not record and parent.create_time <= record.create_time:
+            parent.children.append(record.pid)
+    return records
+
+
+# =============================================================================
+# --- MAIN (Pruebas de rendimiento) ---
+# =============================================================================
+
+def _synthetic_snapshot(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Genera una instantánea sintética con un árbol de procesos aleatorio."""
+    import random
+    rng = random.Random(seed)
+    snapshot = [{'pid': 4, 'name': 'System', 'parent_pid': 0, 'session_id': 0, 'create_time': 0.0}]
+    for i in range(1, count):
+        parent = snapshot[rng.randrange(len(snapshot))]
+        snapshot.append({
+            'pid': 4 + 4 * i, 'name': f'proc{i}.exe', 'parent_pid': parent['pid'],
+            'session_id': 1, 'create_time': float(i),
+        })
+    return snapshot
+
+
+def _quadratic_scan(snapshot: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Réplica del algoritmo anterior: children() recorre toda la tabla por cada proceso."""
+    result = []
+    for proc in snapshot:
+        children = [p['pid'] for p in snapshot if p['parent_pid'] == proc['pid']]
+        result.append({'pid': proc['pid'], 'name': proc['name'], 'children': children})
+    return result
+
+
+if __name__ == "__main__":
+    import time
+
+    # Por encima de este tamaño el algoritmo cuadrático tarda demasiado en medirse
+    QUADRATIC_LIMIT = 3000
+
+    print(f"{'procesos':>10} {'una pasada (ms)':>17} {'cuadrático (ms)':>17} {'aceleración':>12}")
+    for count in (100, 300, 1000, 3000, 10000):
+        snapshot = _synthetic_snapshot(count)
+
+        start = time.perf_counter()
+        records = scan_processes(snapshot)
+        linear_ms = (time.perf_counter() - start) * 1000
+
+        if count <= QUADRATIC_LIMIT:
+            start = time.perf_counter()
+            expected = _quadratic_scan(snapshot)
+            quadratic_ms = (time.perf_counter() - start) * 1000
+            assert [r.children for r in records] == [e['children'] for e in expected]
+            print(f"{count:>10} {linear_ms:>17.2f} {quadratic_ms:>17.2f} {quadratic_ms / linear_ms:>11.0f}x")
+        else:
+            print(f"{count:>10} {linear_ms:>17.2f} {'(omitido)':>17} {'-':>12}")
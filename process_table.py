@@ -0,0 +1,280 @@
+"""
+Módulo de Tabla de Procesos Columnar
+------------------------------------
+
+Representa cada instantánea de procesos como una tabla columnar (una columna
+por métrica) con los nombres internados como enteros, y calcula las
+diferencias entre dos instantáneas de forma vectorizada: % de CPU, tasa de
+E/S, crecimiento del working set y fallos de página, además de los procesos
+creados, terminados y los PIDs reutilizados.
+
+Con NumPy las columnas son ndarrays y el emparejamiento entre instantáneas
+usa searchsorted; sin NumPy se usan columnas array.array de la biblioteca
+estándar y bucles equivalentes.
+
+Dependencias externas:
+- numpy (opcional): Columnas y operaciones vectorizadas
+- array, logging: Biblioteca estándar de Python
+"""
+
+import logging
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger("ProcessTable")
+
+# Columnas de la tabla: nombre → typecode de array.array
+COLUMNS: Dict[str, str] = {
+    'pid': 'q',
+    'parent_pid': 'q',
+    'name_id': 'q',
+    'create_time': 'd',
+    'cpu_time': 'd',
+    'io_bytes': 'd',
+    'working_set': 'q',
+    'page_faults': 'q',
+    'session_id': 'q',
+}
+
+_NUMPY_DTYPES = {'q': 'int64', 'd': 'float64'}
+
+
+def make_column(typecode: str, values: Iterable[Any]):
+    """Crea una columna (ndarray con NumPy, array.array sin él)."""
+    if NUMPY_AVAILABLE:
+        return np.fromiter(values, dtype=_NUMPY_DTYPES[typecode])
+    return array(typecode, values)
+
+
+class NameInterner:
+    """
+    Asigna un identificador entero estable a cada nombre de proceso, de modo
+    que las comparaciones por nombre sean comparaciones de enteros.
+    """
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, name: Optional[str]) -> int:
+        """Devuelve el identificador del nombre, creándolo si no existe."""
+        name = (name or '').lower()
+        name_id = self._ids.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self._ids[name] = name_id
+            self.names.append(name)
+        return name_id
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Identificador de un nombre ya internado o None."""
+        return self._ids.get(name.lower())
+
+    def name_of(self, name_id: int) -> str:
+        return self.names[name_id]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class ProcessTable:
+    """
+    Instantánea columnar de procesos. Cada columna de COLUMNS es un atributo
+    con una entrada por proceso, en el mismo orden.
+    """
+
+    def __init__(self, columns: Dict[str, Any], timestamp: float, interner: NameInterner) -> None:
+        self.columns = columns
+        self.timestamp: float = timestamp
+        self.interner: NameInterner = interner
+        for column_name, values in columns.items():
+            setattr(self, column_name, values)
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]], timestamp: float,
+                     interner: NameInterner) -> 'ProcessTable':
+        """
+        Construye la tabla a partir de los registros de ProcessSnapshotEngine.
+
+        Los campos ausentes (p.ej. con el backend Toolhelp32) valen 0, salvo
+        la sesión, que vale -1.
+        """
+        columns = {
+            'pid': make_column('q', (r['pid'] for r in records)),
+            'parent_pid': make_column('q', (r.get('parent_pid', 0) for r in records)),
+            'name_id': make_column('q', (interner.intern(r.get('name')) for r in records)),
+            'create_time': make_column('d', (r.get('create_time', 0.0) for r in records)),
+            'cpu_time': make_column('d', (r.get('cpu_user', 0.0) + r.get('cpu_kernel', 0.0) for r in records)),
+            'io_bytes': make_column('d', (r.get('io_read_bytes', 0) + r.get('io_write_bytes', 0) for r in records)),
+            'working_set': make_column('q', (r.get('working_set', 0) for r in records)),
+            'page_faults': make_column('q', (r.get('page_faults', 0) for r in records)),
+            # -1: sesión desconocida (respaldo Toolhelp32)
+            'session_id': make_column('q', (-1 if r.get('session_id') is None else r['session_id'] for r in records)),
+        }
+        return cls(columns, timestamp, interner)
+
+    def __len__(self) -> int:
+        return len(self.pid)
+
+    def name(self, index: int) -> str:
+        """Nombre del proceso en la posición indicada."""
+        return self.interner.name_of(int(self.name_id[index]))
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Fila como diccionario (para consumidores no vectorizados)."""
+        result = {column: self.columns[column][index] for column in COLUMNS}
+        result['name'] = self.name(index)
+        return result
+
+    def mask_by_names(self, names: Iterable[str]):
+        """Máscara booleana de los procesos cuyo nombre está en 'names'."""
+        ids = {self.interner.lookup(n) for n in names}
+        ids.discard(None)
+        if NUMPY_AVAILABLE:
+            return np.isin(self.name_id, list(ids))
+        return [name_id in ids for name_id in self.name_id]
+
+
+class SnapshotDiff:
+    """
+    Diferencia entre dos instantáneas, alineada con la tabla actual.
+
+    - prev_index: posición del mismo proceso en la tabla anterior (-1 si es nuevo)
+    - cpu_percent: % de un core consumido entre ambas instantáneas
+    - io_rate: bytes/s de E/S
+    - ws_growth: bytes/s de crecimiento del working set (negativo si encoge)
+    - fault_rate: fallos de página por segundo
+    - spawned / exited / reused: PIDs creados, terminados y reutilizados
+    """
+
+    def __init__(self, table: ProcessTable, elapsed: float, prev_index, cpu_percent,
+                 io_rate, ws_growth, fault_rate, spawned: List[int],
+                 exited: List[int], reused: List[int]) -> None:
+        self.table = table
+        self.elapsed = elapsed
+        self.prev_index = prev_index
+        self.cpu_percent = cpu_percent
+        self.io_rate = io_rate
+        self.ws_growth = ws_growth
+        self.fault_rate = fault_rate
+        self.spawned = spawned
+        self.exited = exited
+        self.reused = reused
+
+    @property
+    def has_changes(self) -> bool:
+        """True si cambió el conjunto de procesos."""
+        return bool(self.spawned or self.exited or self.reused)
+
+    def spawned_indices(self) -> List[int]:
+        """Posiciones en la tabla actual de los procesos creados (o con PID reutilizado)."""
+        if NUMPY_AVAILABLE:
+            return np.flatnonzero(self.prev_index < 0).tolist()
+        return [i for i, j in enumerate(self.prev_index) if j < 0]
+
+
+def diff_tables(prev: Optional[ProcessTable], curr: ProcessTable) -> SnapshotDiff:
+    """
+    Calcula la diferencia entre dos instantáneas.
+
+    Un proceso se empareja si coinciden PID y hora de creación; si sólo
+    coincide el PID se informa como reutilizado (y también como terminado y
+    creado) y no se calculan tasas para él.
+    """
+    n = len(curr)
+    if prev is None or len(prev) == 0:
+        def zeros():
+            return make_column('d', (0.0 for _ in range(n)))
+        pids = [int(p) for p in curr.pid]
+        return SnapshotDiff(curr, 0.0, make_column('q', (-1 for _ in range(n))),
+                            zeros(), zeros(), zeros(), zeros(), pids, [], [])
+
+    elapsed = curr.timestamp - prev.timestamp
+    scale = 1.0 / elapsed if elapsed > 0 else 0.0
+
+    if NUMPY_AVAILABLE:
+        order = np.argsort(prev.pid, kind='stable')
+        sorted_pids = prev.pid[order]
+        pos = np.minimum(np.searchsorted(sorted_pids, curr.pid), len(sorted_pids) - 1)
+        candidate = order[pos]
+        pid_match = sorted_pids[pos] == curr.pid
+        same = pid_match & (prev.create_time[candidate] == curr.create_time)
+        prev_index = np.where(same, candidate, -1)
+
+        cpu_percent = np.where(same, np.maximum(curr.cpu_time - prev.cpu_time[candidate], 0.0) * scale * 100.0, 0.0)
+        io_rate = np.where(same, np.maximum(curr.io_bytes - prev.io_bytes[candidate], 0.0) * scale, 0.0)
+        ws_growth = np.where(same, (curr.working_set - prev.working_set[candidate]) * scale, 0.0)
+        fault_rate = np.where(same, np.maximum(curr.page_faults - prev.page_faults[candidate], 0) * scale, 0.0)
+
+        spawned = curr.pid[~same].tolist()
+        reused = curr.pid[pid_match & ~same].tolist()
+        seen = np.zeros(len(prev), dtype=bool)
+        seen[prev_index[same]] = True
+        exited = prev.pid[~seen].tolist()
+    else:
+        index = {pid: i for i, pid in enumerate(prev.pid)}
+        prev_index = array('q', [-1]) * n
+        cpu_percent = array('d', [0.0]) * n
+        io_rate = array('d', [0.0]) * n
+        ws_growth = array('d', [0.0]) * n
+        fault_rate = array('d', [0.0]) * n
+        spawned: List[int] = []
+        reused: List[int] = []
+        seen = set()
+        for i in range(n):
+            pid = curr.pid[i]
+            j = index.get(pid)
+            if j is None:
+                spawned.append(pid)
+                continue
+            if prev.create_time[j] != curr.create_time[i]:
+                spawned.append(pid)
+                reused.append(pid)
+                continue
+            seen.add(j)
+            prev_index[i] = j
+            cpu_percent[i] = max(curr.cpu_time[i] - prev.cpu_time[j], 0.0) * scale * 100.0
+            io_rate[i] = max(curr.io_bytes[i] - prev.io_bytes[j], 0.0) * scale
+            ws_growth[i] = (curr.working_set[i] - prev.working_set[j]) * scale
+            fault_rate[i] = max(curr.page_faults[i] - prev.page_faults[j], 0) * scale
+        exited = [pid for j, pid in enumerate(prev.pid) if j not in seen]
+
+    return SnapshotDiff(curr, elapsed, prev_index, cpu_percent, io_rate,
+                        ws_growth, fault_rate, spawned, exited, reused)
+
+
+class ProcessTableTracker:
+    """
+    Mantiene la última tabla y produce la diferencia con cada instantánea
+    nueva. Los nombres se internan en un único NameInterner compartido, así
+    que sus identificadores son estables entre instantáneas.
+    """
+
+    def __init__(self) -> None:
+        self.interner = NameInterner()
+        self.table: Optional[ProcessTable] = None
+        self.last_diff: Optional[SnapshotDiff] = None
+
+    def update(self, records: List[Dict[str, Any]], timestamp: float) -> SnapshotDiff:
+        """
+        Incorpora una instantánea.
+
+        :param records: Registros de ProcessSnapshotEngine.get_all_processes
+        :param timestamp: Marca de tiempo monotónica de la captura
+        :return: Diferencia respecto a la instantánea anterior
+        """
+        table = ProcessTable.from_records(records, timestamp, self.interner)
+        diff = diff_tables(self.table, table)
+        if diff.has_changes and self.table is not None:
+            logger.debug(f"[ProcessTable] +{len(diff.spawned)} -{len(diff.exited)} "
+                         f"reutilizados={len(diff.reused)}")
+        self.table = table
+        self.last_diff = diff
+        return diff
@@ -7,7 +7,15 @@ a procesos y hilos específicos en tiempo real, según las instrucciones
 del Gestor.
 """
 import ctypes
+from ctypes import wintypes
 from core import kernel32, ntdll, advapi32, ProcessHandleCache, PROCESS_POWER_THROTTLING_STATE, TH32CS_SNAPTHREAD, THREADENTRY32
+from core import (
+    JOBOBJECT_CPU_RATE_CONTROL_INFORMATION, JOBOBJECT_BASIC_ACCOUNTING_INFORMATION,
+    JOBOBJECT_EXTENDED_LIMIT_INFORMATION,
+    JOB_OBJECT_CPU_RATE_CONTROL_ENABLE, JOB_OBJECT_CPU_RATE_CONTROL_HARD_CAP,
+    JOB_OBJECT_INFO_CPU_RATE_CONTROL, JOB_OBJECT_INFO_BASIC_ACCOUNTING, JOB_OBJECT_INFO_EXTENDED_LIMIT,
+    JOB_OBJECT_LIMIT_BREAKAWAY_OK, JOB_OBJECT_LIMIT_SILENT_BREAKAWAY_OK
+)
 import psutil
 
 class BatchedSettingsApplicator:
@@ -58,14 +66,14 @@ class BatchedSettingsApplicator:
     
     def _apply_affinity(self, handle, cores_list):
         mask = sum(1 << core for core in cores_list)
-        kernel32.SetProcessAffinityMask(handle, ctypes.pointer(ctypes.c_ulong(mask)))
+        return bool(kernel32.SetProcessAffinityMask(handle, mask))
 
     def _apply_eco_qos(self, handle, enable):
         state = PROCESS_POWER_THROTTLING_STATE()
         state.Version = 1
         state.ControlMask = 1 # PROCESS_POWER_THROTTLING_EXECUTION_SPEED
         state.StateMask = 1 if enable else 0
-        ntdll.NtSetInformationProcess(handle, 77, ctypes.byref(state), ctypes.sizeof(state))
+        return ntdll.NtSetInformationProcess(handle, 77, ctypes.byref(state), ctypes.sizeof(state)) == 0
     
     def _apply_thread_io_priority(self, pid, priority):
         h_snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPTHREAD, 0)
@@ -84,6 +92,117 @@ class BatchedSettingsApplicator:
                     break
         kernel32.CloseHandle(h_snapshot)
 
+class IncrementalEcoQoS:
+    """
+    Aplica EcoQoS de forma incremental. Recuerda el estado aplicado a cada
+    proceso, indexado por (pid, create_time), y en cada pasada sólo toca los
+    procesos nuevos o cuyo estado deseado cambió. Al pasar a primer plano se
+    revierte EcoQoS. Los handles se reutilizan entre pasadas y se liberan
+    cuando el proceso termina o su PID se reutiliza.
+
+    Es el único propietario del estado EcoQoS: los cambios puntuales
+    (apply_batched_settings) pasan por set_state para que la siguiente
+    pasada no deshaga ni repita lo ya aplicado.
+    """
+    def __init__(self, handle_cache, set_eco_qos):
+        """
+        :param handle_cache: ProcessHandleCache compartida
+        :param set_eco_qos: Función (handle, habilitar) que aplica el cambio
+        """
+        self.handle_cache = handle_cache
+        self.set_eco_qos = set_eco_qos
+        self.applied = {}
+        self._key_of = {}  # pid -> clave (pid, create_time) vigente
+
+    def _record(self, key, enable):
+        self.applied[key] = enable
+        self._key_of[key[0]] = key
+
+    def plan(self, processes, foreground_pids, desired=None):
+        """
+        Calcula los cambios necesarios sin tocar ningún proceso.
+
+        :param processes: Iterable de (pid, create_time) vivos
+        :param foreground_pids: PIDs en primer plano
+        :param desired: {pid: habilitar} por proceso de fondo (por defecto habilitado)
+        :return: ({(pid, create_time): habilitar}, PIDs terminados o reutilizados)
+        """
+        desired = desired or {}
+        alive = {}
+        for key in processes:
+            if key[0] > 4:
+                alive[key] = key[0] not in foreground_pids and bool(desired.get(key[0], True))
+
+        # Estados fijados con set_state antes de conocer el create_time del proceso
+        alive_key = {key[0]: key for key in alive}
+        for key in [k for k in self.applied if k[1] is None]:
+            state = self.applied.pop(key)
+            if key[0] in alive_key:
+                self.applied[alive_key[key[0]]] = state
+
+        stale_pids = {pid for (pid, create_time) in self.applied if (pid, create_time) not in alive}
+        self.applied = {key: state for key, state in self.applied.items() if key in alive}
+        self._key_of = {key[0]: key for key in self.applied}
+
+        changes = {}
+        for key, enable in alive.items():
+            current = self.applied.get(key)
+            if current == enable:
+                continue
+            if not enable and not current:
+                # Nunca tuvo EcoQoS: basta con recordar su estado
+                self._record(key, False)
+                continue
+            changes[key] = enable
+        return changes, stale_pids
+
+    def apply(self, foreground_pids, processes=None, desired=None):
+        """
+        Ejecuta una pasada incremental.
+
+        :param foreground_pids: PIDs en primer plano (EcoQoS revertido)
+        :param processes: (pid, create_time) vivos; si es None se enumeran con psutil
+        :param desired: {pid: habilitar} por proceso de fondo (ver plan)
+        :return: Número de procesos modificados
+        """
+        if processes is None:
+            processes = []
+            for p in psutil.process_iter(['pid', 'create_time']):
+                if p.info['create_time'] is not None:
+                    processes.append((p.info['pid'], p.info['create_time']))
+
+        changes, stale_pids = self.plan(processes, set(foreground_pids), desired)
+        for pid in stale_pids:
+            self.handle_cache.release_handle(pid)
+
+        touched = 0
+        for key, enable in changes.items():
+            handle = self.handle_cache.get_handle(key[0])
+            if not handle:
+                continue
+            try:
+                if self.set_eco_qos(handle, enable) is not False:
+                    self._record(key, enable)
+                    touched += 1
+            except Exception as e:
+                print(f"Error aplicando EcoQoS a PID {key[0]}: {e}")
+        return touched
+
+    def set_state(self, pid, handle, enable):
+        """
+        Cambio puntual de EcoQoS en un proceso, registrado en el estado aplicado.
+
+        :return: True si el proceso queda en el estado pedido
+        """
+        enable = bool(enable)
+        key = self._key_of.get(pid, (pid, None))
+        if self.applied.get(key) == enable:
+            return True
+        if self.set_eco_qos(handle, enable) is False:
+            return False
+        self._record(key, enable)
+        return True
+
 class ProcessSuspensionManager:
     """Gestiona la suspensión y reanudación de procesos."""
     def suspend_process(self, pid):
@@ -110,21 +229,82 @@ class JobObjectManager:
             return self.jobs[group_name]
         
         job_handle = kernel32.CreateJobObjectW(None, group_name)
+        if not job_handle:
+            return None
+        # Los hijos de un miembro (un juego lanzado desde Steam o explorer.exe)
+        # no deben heredar el tope del Job: sin esto, no se crea
+        if not self.allow_breakaway(job_handle):
+            print(f"Error habilitando breakaway en el Job '{group_name}': {ctypes.get_last_error()}")
+            kernel32.CloseHandle(job_handle)
+            return None
         self.jobs[group_name] = job_handle
         return job_handle
 
+    def allow_breakaway(self, job_handle):
+        """Los procesos hijos de los miembros nacen fuera del Job (JOB_OBJECT_LIMIT_SILENT_BREAKAWAY_OK)."""
+        info = JOBOBJECT_EXTENDED_LIMIT_INFORMATION()
+        info.BasicLimitInformation.LimitFlags = JOB_OBJECT_LIMIT_BREAKAWAY_OK | JOB_OBJECT_LIMIT_SILENT_BREAKAWAY_OK
+        return bool(kernel32.SetInformationJobObject(
+            job_handle, JOB_OBJECT_INFO_EXTENDED_LIMIT, ctypes.byref(info), ctypes.sizeof(info)
+        ))
+
+    def is_process_in_job(self, job_handle, pid):
+        """True si el proceso pertenece al Job (también si lo heredó de su padre)."""
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        proc_handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not proc_handle:
+            return False
+        try:
+            result = wintypes.BOOL()
+            if not kernel32.IsProcessInJob(proc_handle, job_handle, ctypes.byref(result)):
+                return False
+            return bool(result.value)
+        finally:
+            kernel32.CloseHandle(proc_handle)
+
     def set_job_cpu_limit(self, job_handle, limit_percent):
-        # Implementación simplificada usando ctypes
-        # En producción se usarían las estructuras JOBOBJECT_*_INFORMATION completas
-        pass
+        """
+        Aplica un tope duro de CPU (JOBOBJECT_CPU_RATE_CONTROL) al Job Object.
+        El porcentaje es sobre la CPU total de la máquina; 100 o más elimina el tope.
+        """
+        info = JOBOBJECT_CPU_RATE_CONTROL_INFORMATION()
+        if limit_percent >= 100:
+            info.ControlFlags = 0  # Deshabilita el control de tasa
+            info.Value = 0
+        else:
+            info.ControlFlags = JOB_OBJECT_CPU_RATE_CONTROL_ENABLE | JOB_OBJECT_CPU_RATE_CONTROL_HARD_CAP
+            # CpuRate se expresa en centésimas de porcentaje (1..10000)
+            info.Value = max(1, min(10000, int(limit_percent * 100)))
+        return bool(kernel32.SetInformationJobObject(
+            job_handle, JOB_OBJECT_INFO_CPU_RATE_CONTROL, ctypes.byref(info), ctypes.sizeof(info)
+        ))
+    
+    def get_job_cpu_time(self, job_handle):
+        """Devuelve el tiempo total de CPU (user + kernel) del Job en segundos, o None."""
+        info = JOBOBJECT_BASIC_ACCOUNTING_INFORMATION()
+        if not kernel32.QueryInformationJobObject(
+            job_handle, JOB_OBJECT_INFO_BASIC_ACCOUNTING, ctypes.byref(info), ctypes.sizeof(info), None
+        ):
+            return None
+        return (info.TotalUserTime + info.TotalKernelTime) / 1e7
     
+    def close_job(self, group_name):
+        """Cierra el handle de un Job; los procesos siguen en él, pero sin nuevos límites."""
+        job_handle = self.jobs.pop(group_name, None)
+        if job_handle:
+            kernel32.CloseHandle(job_handle)
+
     def assign_pid_to_job(self, job_handle, pid):
         PROCESS_SET_QUOTA = 0x0100
         PROCESS_TERMINATE = 0x0001
         proc_handle = kernel32.OpenProcess(PROCESS_SET_QUOTA | PROCESS_TERMINATE, False, pid)
-        if proc_handle:
-            kernel32.AssignProcessToJobObject(job_handle, proc_handle)
-            # No cerramos el handle del proceso aquí; el Job Object lo gestiona
+        if not proc_handle:
+            return False
+        try:
+            return bool(kernel32.AssignProcessToJobObject(job_handle, proc_handle))
+        finally:
+            # El Job Object mantiene su propia referencia al proceso
+            kernel32.CloseHandle(proc_handle)
 
 class AdvancedJobManager:
     """Gestión avanzada de Job Objects con control exhaustivo"""
@@ -481,8 +661,7 @@ class ProcessManager:
         # Nuevos gestores
         self.advanced_job_manager = AdvancedJobManager()
         self.services_manager = OptimizedServicesManager()
+        self.eco_qos = IncrementalEcoQoS(self.handle_cache, self.settings_applicator._apply_eco_qos)
 
     def apply_eco_qos_to_all_background(self, foreground_pid):
-        for p in psutil.process_iter(['pid']):
-            if p.pid != foreground_pid:
-                self.settings_applicator.apply_batched_settings(p.pid, {'eco_qos': True})
\ No newline at end of file
+        return self.eco_qos.apply({foreground_pid})
\ No newline at end of file
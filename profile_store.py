@@ -0,0 +1,283 @@
+"""
+Módulo de Perfiles Aprendidos por Ejecutable
+--------------------------------------------
+
+Almacén persistente de perfiles de optimización indexados por ejecutable.
+Cada perfil registra el rol asignado, la mejor disposición de cores observada,
+los procesos acompañantes y los resultados medidos, de forma que un cambio de
+ventana en primer plano se resuelva con una búsqueda O(1) en memoria y el plan
+guardado se aplique en un solo lote.
+
+Dependencias externas:
+- sqlite3: Biblioteca estándar de Python para la persistencia en disco
+- json: Biblioteca estándar para serializar los campos compuestos
+- os, threading, time, logging: Biblioteca estándar
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("ProfileStore")
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "optimizer_profiles.db")
+
+
+class ProfileStore:
+    """
+    Almacén de perfiles por ejecutable respaldado por SQLite.
+
+    Todos los perfiles se cargan en un diccionario al iniciar; las consultas
+    nunca tocan el disco y las escrituras se hacen en modo write-through.
+    """
+
+    # Factor de suavizado para la media exponencial de los resultados medidos
+    OUTCOME_EMA_ALPHA = 0.2
+    # Muestras mínimas antes de que una disposición pueda desbancar a la actual
+    MIN_SAMPLES_TO_PROMOTE = 5
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS profiles (
+            exe_key     TEXT PRIMARY KEY,
+            exe_path    TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            role        TEXT NOT NULL,
+            core_layout TEXT NOT NULL,
+            companions  TEXT NOT NULL,
+            settings    TEXT NOT NULL,
+            outcome     TEXT NOT NULL,
+            updated     REAL NOT NULL
+        )
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH) -> None:
+        self.db_path: str = db_path
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._open()
+
+    # --- Persistencia ---
+
+    def _open(self) -> None:
+        """Abre la base de datos y carga todos los perfiles en memoria."""
+        try:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(self._SCHEMA)
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT exe_key, exe_path, fingerprint, role, core_layout, "
+                "companions, settings, outcome, updated FROM profiles"
+            ).fetchall()
+            for row in rows:
+                self._profiles[row[0]] = {
+                    'exe_path': row[1],
+                    'fingerprint': row[2],
+                    'role': row[3],
+                    'core_layout': json.loads(row[4]),
+                    'companions': json.loads(row[5]),
+                    'settings': json.loads(row[6]),
+                    'outcome': json.loads(row[7]),
+                    'updated': row[8],
+                }
+            logger.info(f"✓ {len(self._profiles)} perfiles cargados desde {self.db_path}")
+        except (sqlite3.Error, ValueError) as e:
+            logger.error(f"Error al abrir el almacén de perfiles: {e}")
+            self._conn = None
+
+    def _persist(self, key: str, profile: Dict[str, Any]) -> None:
+        """Escribe un perfil en disco (se llama con el lock tomado)."""
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    profile['exe_path'],
+                    profile['fingerprint'],
+                    profile['role'],
+                    json.dumps(profile['core_layout']),
+                    json.dumps(profile['companions']),
+                    json.dumps(profile['settings']),
+                    json.dumps(profile['outcome']),
+                    profile['updated'],
+                )
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error al guardar perfil de {profile['exe_path']}: {e}")
+
+    def _delete(self, key: str) -> None:
+        """Elimina un perfil de memoria y de disco (se llama con el lock tomado)."""
+        self._profiles.pop(key, None)
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute("DELETE FROM profiles WHERE exe_key = ?", (key,))
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error al eliminar perfil {key}: {e}")
+
+    def close(self) -> None:
+        """Cierra la conexión con la base de datos."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # --- Claves ---
+
+    @staticmethod
+    def make_key(exe_path: str) -> str:
+        """Normaliza la ruta del ejecutable para usarla como clave."""
+        return os.path.normcase(os.path.normpath(exe_path))
+
+    @staticmethod
+    def fingerprint(exe_path: str) -> str:
+        """
+        Huella barata del ejecutable (tamaño y fecha de modificación).
+        Cambia cuando el programa se actualiza, invalidando el perfil aprendido.
+        """
+        try:
+            st = os.stat(exe_path)
+            return f"{st.st_size}:{int(st.st_mtime)}"
+        except OSError:
+            return ""
+
+    # --- Consultas ---
+
+    def lookup(self, exe_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Devuelve el perfil guardado para un ejecutable o None.
+
+        Si el ejecutable ha cambiado en disco desde que se aprendió el perfil,
+        éste se descarta para volver a aprenderlo.
+        """
+        if not exe_path:
+            return None
+        key = self.make_key(exe_path)
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is None:
+                return None
+            current = self.fingerprint(exe_path)
+            if current and profile['fingerprint'] and current != profile['fingerprint']:
+                logger.info(f"[ProfileStore] Ejecutable modificado, descartando perfil: {exe_path}")
+                self._delete(key)
+                return None
+            return profile
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    # --- Escrituras ---
+
+    def save_profile(self, exe_path: str, role: str,
+                     core_layout: Optional[List[int]] = None,
+                     companions: Optional[Iterable[str]] = None,
+                     settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Crea o actualiza el perfil de un ejecutable.
+
+        Los resultados medidos previamente se conservan; los acompañantes se
+        acumulan en lugar de reemplazarse.
+        """
+        key = self.make_key(exe_path)
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is None:
+                profile = {
+                    'exe_path': exe_path,
+                    'fingerprint': self.fingerprint(exe_path),
+                    'role': role,
+                    'core_layout': [],
+                    'companions': [],
+                    'settings': {},
+                    'outcome': {'layouts': {}},
+                    'updated': 0.0,
+                }
+                self._profiles[key] = profile
+
+            profile['role'] = role
+            if core_layout is not None:
+                profile['core_layout'] = sorted(core_layout)
+            if companions:
+                merged = set(profile['companions'])
+                merged.update(name.lower() for name in companions)
+                profile['companions'] = sorted(merged)
+            if settings is not None:
+                profile['settings'] = dict(settings)
+            profile['updated'] = time.time()
+            self._persist(key, profile)
+            return profile
+
+    def record_outcome(self, exe_path: str, core_layout: List[int], cost: float) -> Optional[List[int]]:
+        """
+        Registra un resultado medido para la disposición de cores usada.
+
+        El coste es menor cuanto mejor (p.ej. la fracción de hilos ejecutables
+        del proceso que esperan CPU con esa disposición). Mantiene una media
+        exponencial por disposición y promueve como 'core_layout' del perfil
+        la de menor coste entre las que tienen muestras suficientes.
+
+        :return: La mejor disposición conocida o None si no hay perfil
+        """
+        key = self.make_key(exe_path)
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is None:
+                return None
+
+            layouts = profile['outcome'].setdefault('latency', {})
+            layout_key = self._layout_key(core_layout)
+            entry = layouts.get(layout_key)
+            if entry is None:
+                entry = {'cost': float(cost), 'samples': 1}
+                layouts[layout_key] = entry
+            else:
+                alpha = self.OUTCOME_EMA_ALPHA
+                entry['cost'] = (1 - alpha) * entry['cost'] + alpha * float(cost)
+                entry['samples'] += 1
+
+            best_key = min(
+                (k for k, v in layouts.items() if v['samples'] >= self.MIN_SAMPLES_TO_PROMOTE),
+                key=lambda k: layouts[k]['cost'],
+                default=None
+            )
+            if best_key is not None:
+                profile['core_layout'] = [int(c) for c in best_key.split(",") if c]
+            profile['updated'] = time.time()
+            self._persist(key, profile)
+            return profile['core_layout']
+
+    def candidate_layout(self, exe_path: str, candidates: Iterable[List[int]]) -> Optional[List[int]]:
+        """
+        Disposición a usar en la próxima sesión del ejecutable: la primera
+        candidata sin muestras suficientes (para explorarla) o, si todas las
+        tienen, la mejor conocida.
+
+        :param candidates: Disposiciones alternativas (p.ej. todas las CPUs o
+                           una CPU por core físico)
+        """
+        key = self.make_key(exe_path)
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is None:
+                return None
+            layouts = profile['outcome'].get('latency', {})
+            for layout in candidates:
+                if not layout:
+                    continue
+                entry = layouts.get(self._layout_key(layout))
+                if entry is None or entry['samples'] < self.MIN_SAMPLES_TO_PROMOTE:
+                    return sorted(layout)
+            return profile['core_layout'] or None
+
+    @staticmethod
+    def _layout_key(core_layout: Iterable[int]) -> str:
+        return ",".join(str(c) for c in sorted(core_layout))
@@ -0,0 +1,183 @@
+"""
+Módulo de Hermanos SMT y Aparcamiento
+-------------------------------------
+
+Obtiene los hermanos SMT (Hyper-Threading) de la topología real en lugar de
+suponer que los cores físicos son los índices pares, y calcula el
+"aparcamiento de hermanos": mientras se juega, los hermanos SMT de los cores
+del juego quedan libres de trabajo de fondo para que el hilo del juego no
+comparta unidades de ejecución ni cachés L1/L2 con otro proceso.
+
+Incluye una sonda de latencia de planificación (al estilo de cyclictest):
+un hilo duerme intervalos cortos y mide cuánto tarda el sistema en
+despertarlo, para cuantificar el efecto del aparcamiento.
+
+Dependencias externas:
+- logging, threading, time: Biblioteca estándar de Python
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("SMTParking")
+
+
+def physical_core_groups(topology: Dict[str, Any]) -> List[List[int]]:
+    """CPUs lógicas de cada core físico ('physical_cores' o, si falta, 'smt_pairs')."""
+    cores = topology.get('physical_cores')
+    if cores:
+        return [sorted(c) for c in cores]
+    paired = {cpu for pair in topology.get('smt_pairs') or [] for cpu in pair}
+    total = int(topology.get('total_logical_cores') or topology.get('total') or 0)
+    singles = [[cpu] for cpu in range(total) if cpu not in paired]
+    return sorted([sorted(p) for p in topology.get('smt_pairs') or []] + singles)
+
+
+def sibling_map(topology: Dict[str, Any]) -> Dict[int, List[int]]:
+    """CPU lógica → las demás CPUs lógicas de su core físico."""
+    return {cpu: [other for other in core if other != cpu]
+            for core in physical_core_groups(topology) for cpu in core}
+
+
+def primary_cpus(topology: Dict[str, Any]) -> List[int]:
+    """Una CPU lógica por core físico (la de menor índice)."""
+    return sorted(core[0] for core in physical_core_groups(topology) if core)
+
+
+def parked_siblings(game_cpus: Iterable[int], siblings: Dict[int, List[int]]) -> List[int]:
+    """
+    Hermanos SMT a mantener libres: de cada core físico que usa el juego se
+    conserva la CPU de menor índice y se aparcan las demás.
+    """
+    game = sorted(set(game_cpus))
+    parked = set()
+    kept = set()
+    for cpu in game:
+        if cpu in parked or any(s in kept for s in siblings.get(cpu, ())):
+            parked.add(cpu)
+            continue
+        kept.add(cpu)
+        parked.update(siblings.get(cpu, ()))
+    return sorted(parked - kept)
+
+
+def parking_plan(game_cpus: Iterable[int], siblings: Dict[int, List[int]],
+                 all_cpus: Iterable[int]) -> Dict[str, List[int]]:
+    """
+    Aparcamiento para un juego confinado a parte de las CPUs.
+
+    El trabajo de fondo queda fuera tanto de las CPUs del juego como de los
+    hermanos aparcados. Si el juego usa todas las CPUs (o no queda ninguna
+    para el fondo) no hay nada que aparcar.
+
+    :return: {'parked': hermanos a mantener libres,
+              'background_affinity': CPUs permitidas al trabajo de fondo}
+    """
+    cpus = sorted(set(all_cpus))
+    game = set(game_cpus)
+    if game and not game >= set(cpus):
+        parked = parked_siblings(game, siblings)
+        excluded = game | set(parked)
+        background = [c for c in cpus if c not in excluded]
+        if background:
+            return {'parked': parked, 'background_affinity': background}
+    return {'parked': [], 'background_affinity': cpus}
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * q / 100.0)))]
+
+
+class SchedulingLatencyProbe:
+    """
+    Mide la latencia de despertar de un hilo: duerme 'interval' segundos
+    'samples' veces y registra el exceso sobre lo pedido.
+
+    :param pin: Fija el hilo actual a una CPU y devuelve el restaurador
+                (core_ranking.pin_current_thread); sin él no se fija
+    """
+
+    def __init__(self, interval: float = 0.001, samples: int = 100,
+                 pin: Optional[Callable[[int], Callable[[], None]]] = None) -> None:
+        self.interval = interval
+        self.samples = samples
+        self.pin = pin
+
+    def run(self, cpu: Optional[int] = None) -> Dict[str, float]:
+        """
+        Ejecuta la sonda (bloquea unos samples × interval segundos).
+
+        :param cpu: CPU lógica en la que medir (None para no fijar el hilo)
+        :return: Exceso de latencia en microsegundos: {'mean', 'p50', 'p99', 'max'}
+        """
+        restore = None
+        if cpu is not None and self.pin is not None:
+            try:
+                restore = self.pin(cpu)
+            except OSError as e:
+                logger.debug(f"[SMTParking] Sonda sin fijar a la CPU {cpu}: {e}")
+        overshoot: List[float] = []
+        try:
+            for _ in range(self.samples):
+                start = time.perf_counter()
+                time.sleep(self.interval)
+                overshoot.append(max(0.0, time.perf_counter() - start - self.interval) * 1e6)
+        finally:
+            if restore is not None:
+                restore()
+        overshoot.sort()
+        return {
+            'mean': sum(overshoot) / len(overshoot),
+            'p50': _percentile(overshoot, 50),
+            'p99': _percentile(overshoot, 99),
+            'max': overshoot[-1],
+        }
+
+
+class BackgroundLatencyProbe:
+    """
+    Ejecuta una SchedulingLatencyProbe en un hilo aparte para que la sonda
+    (que bloquea samples × interval segundos, más con el temporizador por
+    defecto de Windows) no detenga el bucle de control. Una medida a la vez.
+    """
+
+    def __init__(self, probe: SchedulingLatencyProbe) -> None:
+        self.probe = probe
+        self._thread: Optional[threading.Thread] = None
+        self._result: Optional[Tuple[Any, Dict[str, float]]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, cpu: Optional[int], tag: Any = None) -> bool:
+        """
+        Lanza una medida en la CPU indicada.
+
+        :param tag: Dato que se devuelve junto al resultado (p.ej. la disposición medida)
+        :return: False si ya hay una medida en curso
+        """
+        if self.running:
+            return False
+        self._thread = threading.Thread(target=self._run, args=(cpu, tag), daemon=True,
+                                        name="SchedulingLatencyProbe")
+        self._thread.start()
+        return True
+
+    def _run(self, cpu: Optional[int], tag: Any) -> None:
+        try:
+            stats = self.probe.run(cpu)
+        except Exception as e:
+            logger.debug(f"[SMTParking] Sonda de latencia fallida: {e}")
+            return
+        with self._lock:
+            self._result = (tag, stats)
+
+    def take(self) -> Optional[Tuple[Any, Dict[str, float]]]:
+        """Resultado terminado (tag, estadísticas) o None; cada resultado se entrega una vez."""
+        with self._lock:
+            result, self._result = self._result, None
+        return result
@@ -52,11 +52,15 @@ class CustomIOScheduler(RegistryManager):
 
 class IntelligentTRIMScheduler:
     """Ejecuta TRIM en SSDs durante periodos de inactividad."""
+    def start_retrim(self, drive='C:'):
+        """Lanza 'defrag /L' sin esperar; la cola de mantenimiento lo vigila y cancela."""
+        return subprocess.Popen(['defrag', '/L', drive], creationflags=subprocess.CREATE_NO_WINDOW)
+
     def execute_trim(self, is_gaming, cpu_load):
         # La lógica de tiempo e inactividad está en el Gestor
         if not is_gaming and cpu_load < 10.0:
             try:
-                subprocess.run(['defrag', '/L', 'C:'], creationflags=subprocess.CREATE_NO_WINDOW)
+                self.start_retrim().wait()
             except Exception as e:
                 print(f"Error al ejecutar TRIM: {e}")
 
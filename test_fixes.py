@@ -161,6 +161,1122 @@ try:
 except Exception as e:
     print(f"  ✗ Error en test de GUI: {e}")
 
+# Test 7: Presupuesto de CPU en segundo plano contra un modelo simulado
+print("\n[Test 7] BackgroundCPUBudgetController - Modelo de carga simulado")
+try:
+    from cpu_budget import BackgroundCPUBudgetController
+    
+    # Modelo: el fondo demanda 'demand'% de la máquina; el Job lo limita a 'cap'
+    # y el uso medido sigue al valor permitido con un retardo de primer orden.
+    sim = {'cap': 100.0, 'usage': 0.0}
+    controller = BackgroundCPUBudgetController(
+        measure_fn=lambda: sim['usage'],
+        apply_fn=lambda cap: sim.__setitem__('cap', cap),
+        target_percent=20.0
+    )
+    controller.activate()
+    
+    demand_profile = [70.0] * 40 + [10.0] * 20 + [90.0] * 40
+    usage_trace = []
+    for t, demand in enumerate(demand_profile):
+        sim['usage'] += 0.7 * (min(demand, sim['cap']) - sim['usage'])
+        controller.step(now=float(t))
+        usage_trace.append(sim['usage'])
+    
+    assert abs(usage_trace[39] - 20.0) < 2.0, f"No converge bajo carga: {usage_trace[39]:.1f}%"
+    assert abs(usage_trace[59] - 10.0) < 2.0, "Limita carga que ya está bajo el objetivo"
+    assert abs(usage_trace[-1] - 20.0) < 2.0, f"No converge tras pico: {usage_trace[-1]:.1f}%"
+    
+    controller.deactivate()
+    assert sim['cap'] == 100.0, "El tope no se liberó al desactivar"
+    
+    print(f"  ✓ Uso en segundo plano estabilizado en {usage_trace[-1]:.1f}% (objetivo 20%)")
+    print("  ✓ Tope liberado al desactivar el control")
+except Exception as e:
+    print(f"  ✗ Error en BackgroundCPUBudgetController: {e}")
+
+# Test 8: Analizador de SystemProcessInformation con búfer capturado
+print("\n[Test 8] nt_snapshot - Análisis de búfer SystemProcessInformation")
+try:
+    import struct
+    from nt_snapshot import (
+        parse_process_buffer, PROCESS_ENTRY_FORMAT, THREAD_ENTRY_FORMAT, FILETIME_UNIX_EPOCH
+    )
+    
+    base_address = 0x7FF000000000
+    entry_size = struct.calcsize(PROCESS_ENTRY_FORMAT)
+    thread_size = struct.calcsize(THREAD_ENTRY_FORMAT)
+    
+    def build_entry(pid, ppid, name, threads, next_offset, name_address):
+        name_bytes = name.encode('utf-16-le')
+        header = struct.pack(
+            PROCESS_ENTRY_FORMAT,
+            next_offset, len(threads), 4096, 7, len(threads), 123456,
+            FILETIME_UNIX_EPOCH + 1_700_000_000 * 10_000_000, 25_000_000, 5_000_000,
+            len(name_bytes), len(name_bytes) + 2, name_address if name else 0, 8,
+            pid, ppid, 150, 1, 0, 0, 1 << 30, 999, 0, 200 * 1024 * 1024,
+            0, 0, 0, 0, 0, 0, 64 * 1024 * 1024, 10, 20, 30, 1000, 2000, 3000
+        )
+        body = b"".join(
+            struct.pack(THREAD_ENTRY_FORMAT, k, u, 0, 0, 0x1000, pid, tid, 10, 8, 42, 5, 0)
+            for tid, u, k in threads
+        )
+        return header + body, name_bytes
+    
+    # Dos procesos; los nombres van al final del búfer, como en una captura real
+    threads_a = [(100, 10_000_000, 2_000_000), (101, 5_000_000, 0)]
+    size_a = entry_size + len(threads_a) * thread_size
+    size_b = entry_size + thread_size
+    names_start = size_a + size_b
+    entry_a, name_a = build_entry(1234, 4, "game.exe", threads_a, size_a, base_address + names_start)
+    entry_b, name_b = build_entry(5678, 1234, "helper.exe", [(200, 0, 0)], 0,
+                                  base_address + names_start + 16)
+    buffer = entry_a + entry_b + name_a.ljust(16, b"\0") + name_b
+    
+    procs = parse_process_buffer(bytearray(buffer), base_address)
+    assert [p['pid'] for p in procs] == [1234, 5678], "PIDs incorrectos"
+    assert procs[0]['name'] == "game.exe" and procs[1]['name'] == "helper.exe", "Nombres incorrectos"
+    assert procs[1]['parent_pid'] == 1234, "PID padre incorrecto"
+    assert abs(procs[0]['cpu_user'] - 2.5) < 1e-9 and abs(procs[0]['cpu_kernel'] - 0.5) < 1e-9
+    assert abs(procs[0]['create_time'] - 1_700_000_000) < 1e-6, "CreateTime mal convertido"
+    assert procs[0]['working_set'] == 200 * 1024 * 1024 and procs[0]['handle_count'] == 150
+    assert [t.tid for t in procs[0]['threads']] == [100, 101], "Hilos incorrectos"
+    assert abs(procs[0]['threads'][0].user_time - 1.0) < 1e-9
+    assert 'threads' not in parse_process_buffer(buffer, base_address, include_threads=False)[0]
+    
+    print(f"  ✓ {len(procs)} procesos y {sum(len(p['threads']) for p in procs)} hilos analizados sin copias")
+except Exception as e:
+    print(f"  ✗ Error en nt_snapshot: {e}")
+
+# Test 9: Escaneo de procesos en una pasada
+print("\n[Test 9] process_scanner - Hijos en una sola pasada")
+try:
+    from process_scanner import scan_processes, _synthetic_snapshot, _quadratic_scan
+    
+    snapshot = _synthetic_snapshot(500)
+    records = scan_processes(snapshot)
+    expected = _quadratic_scan(snapshot)
+    assert [r.children for r in records] == [e['children'] for e in expected], "Hijos incorrectos"
+    assert not hasattr(records[0], '__dict__'), "Los registros deberían usar __slots__"
+    
+    # Un padre con PID reutilizado (creado después del hijo) no adopta al hijo
+    reused = scan_processes([
+        {'pid': 8, 'name': 'nuevo.exe', 'parent_pid': 4, 'create_time': 50.0},
+        {'pid': 12, 'name': 'huerfano.exe', 'parent_pid': 8, 'create_time': 10.0},
+    ])
+    assert reused[0].children == [], "Se adoptó un hijo a través de un PID reutilizado"
+    
+    print(f"  ✓ {len(records)} registros con hijos correctos (ejecute process_scanner.py para la curva de escalado)")
+except Exception as e:
+    print(f"  ✗ Error en process_scanner: {e}")
+
+# Test 10: Sondeo de latencia concurrente contra servidores locales
+print("\n[Test 10] latency_prober - Sondas TCP/UDP contra servidores locales")
+try:
+    import socket
+    import threading
+    import time
+    from latency_prober import LatencyProber, ProbeTarget, dns_query_payload
+    
+    tcp_server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    tcp_server.bind(('127.0.0.1', 0))
+    tcp_server.listen(16)
+    
+    udp_echo = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    udp_echo.bind(('127.0.0.1', 0))
+    
+    def echo_loop():
+        while True:
+            try:
+                data, addr = udp_echo.recvfrom(512)
+                udp_echo.sendto(data, addr)
+            except OSError:
+                break
+    threading.Thread(target=echo_loop, daemon=True).start()
+    
+    # Un socket UDP que nunca responde: la sonda debe perderse por timeout
+    udp_silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    udp_silent.bind(('127.0.0.1', 0))
+    
+    timeout = 0.3
+    prober = LatencyProber([
+        ProbeTarget('127.0.0.1', tcp_server.getsockname()[1], 'tcp'),
+        ProbeTarget('127.0.0.1', udp_echo.getsockname()[1], 'udp', dns_query_payload()),
+        ProbeTarget('127.0.0.1', udp_silent.getsockname()[1], 'udp'),
+    ] * 5, timeout=timeout)
+    
+    rounds = 3
+    start = time.perf_counter()
+    for _ in range(rounds):
+        results = prober.run_once()
+    elapsed = time.perf_counter() - start
+    
+    assert all(r.rtt_ms is not None for r in results[:2]), "Sondas locales sin respuesta"
+    assert results[2].rtt_ms is None and results[2].error == 'timeout', "Se esperaba timeout"
+    # Las 15 sondas de cada ronda son concurrentes: una ronda dura ~1 timeout
+    assert elapsed < rounds * timeout * 2, f"Las sondas no son concurrentes ({elapsed:.2f}s)"
+    
+    stats = prober.stats()
+    tcp_stats = stats[f"tcp://127.0.0.1:{tcp_server.getsockname()[1]}"]
+    silent_stats = stats[f"udp://127.0.0.1:{udp_silent.getsockname()[1]}"]
+    assert tcp_stats['sent'] == 5 * rounds and tcp_stats['loss_percent'] == 0.0
+    assert tcp_stats['p50'] <= tcp_stats['p99'] and tcp_stats['jitter'] is not None
+    assert silent_stats['loss_percent'] == 100.0 and silent_stats['p50'] is None
+    
+    for sock in (tcp_server, udp_echo, udp_silent):
+        sock.close()
+    print(f"  ✓ {len(results) * rounds} sondas en {elapsed:.2f}s, mediana {prober.latency_ms():.2f} ms")
+except Exception as e:
+    print(f"  ✗ Error en latency_prober: {e}")
+
+# Test 11: Topología real desde un búfer de GetLogicalProcessorInformationEx
+print("\n[Test 11] topology - Análisis de búfer GetLogicalProcessorInformationEx")
+try:
+    import struct
+    from topology import parse_logical_processor_information, build_topology
+    
+    def record(relationship, body):
+        body += b"\0" * (-(len(body) + 8) % 8)  # Registros alineados a 8 bytes
+        return struct.pack('<II', relationship, len(body) + 8) + body
+    
+    def affinity(cpus, group=0):
+        return struct.pack('<QH6x', sum(1 << c for c in cpus), group)
+    
+    def core(cpus, efficiency_class):
+        flags = 1 if len(cpus) > 1 else 0
+        return record(0, struct.pack('<BB20xH', flags, efficiency_class, 1) + affinity(cpus))
+    
+    def cache_record(level, cpus, size):
+        return record(2, struct.pack('<BBHII18xH', level, 12, 64, size, 0, 1) + affinity(cpus))
+    
+    def numa(node, cpus, group_count=1):
+        return record(1, struct.pack('<I18xH', node, group_count) + affinity(cpus))
+    
+    def groups(active_counts):
+        infos = b"".join(struct.pack('<BB38xQ', 64, n, (1 << n) - 1) for n in active_counts)
+        return record(4, struct.pack('<HH20x', len(active_counts), len(active_counts)) + infos)
+    
+    # Híbrido: 2 P-cores con SMT (CPUs 0-3, clase 1) y 4 E-cores (CPUs 4-7, clase 0)
+    hybrid = b"".join([
+        groups([8]),
+        core([0, 1], 1), core([2, 3], 1), core([4], 0), core([5], 0), core([6], 0), core([7], 0),
+        cache_record(2, [0, 1], 1 << 21), cache_record(2, [2, 3], 1 << 21), cache_record(2, [4, 5, 6, 7], 1 << 22),
+        cache_record(3, list(range(8)), 24 << 20),
+        record(3, struct.pack('<BB20xH', 1, 0, 1) + affinity(list(range(8)))),
+        numa(0, list(range(8)), group_count=0),  # GroupCount 0: formato antiguo con una máscara
+    ])
+    topo = build_topology(parse_logical_processor_information(hybrid))
+    assert topo['hybrid'] and topo['p_cores'] == [0, 1, 2, 3], f"P-cores incorrectos: {topo['p_cores']}"
+    assert topo['e_cores'] == [4, 5, 6, 7], f"E-cores incorrectos: {topo['e_cores']}"
+    assert topo['smt_pairs'] == [[0, 1], [2, 3]] and topo['total_physical_cores'] == 6
+    assert topo['l2_cache_groups'] == [[0, 1], [2, 3], [4, 5, 6, 7]]
+    assert topo['l3_cache_groups'] == [list(range(8))] and topo['numa_nodes'] == [list(range(8))]
+    
+    # No híbrido con dos CCD (un L3 por CCD), dos nodos NUMA y dos grupos de 8 CPUs
+    ccd = b"".join(
+        [groups([8, 8])]
+        + [core([i % 8, i % 8 + 1], 0) for i in range(0, 8, 2)]
+        + [record(0, struct.pack('<BB20xH', 1, 0, 1) + affinity([i, i + 1], group=1)) for i in range(0, 8, 2)]
+        + [record(2, struct.pack('<BBHII18xH', 3, 16, 64, 32 << 20, 0, 1) + affinity(list(range(8)), group=g))
+           for g in (0, 1)]
+        + [record(1, struct.pack('<I18xH', g, 1) + affinity(list(range(8)), group=g)) for g in (1, 0)]
+    )
+    topo = build_topology(parse_logical_processor_information(ccd))
+    assert not topo['hybrid'] and topo['e_cores'] == [] and topo['total_logical_cores'] == 16
+    assert topo['l3_cache_groups'] == [list(range(8)), list(range(8, 16))], "Grupos L3 incorrectos"
+    assert topo['numa_nodes'] == [list(range(8)), list(range(8, 16))], "Nodos NUMA incorrectos"
+    assert [14, 15] in topo['smt_pairs'], "Hermanos SMT del segundo grupo mal numerados"
+    
+    print("  ✓ Topología híbrida y multi-CCD analizadas (P/E, SMT, L2/L3, NUMA, grupos)")
+except Exception as e:
+    print(f"  ✗ Error en topology: {e}")
+
+# Test 12: Colocación por grupo L3 sobre topologías sintéticas
+print("\n[Test 12] l3_placement - Contención por grupo L3 con histéresis")
+try:
+    from l3_placement import L3GroupPlacer, is_memory_intensive
+    
+    # Dos CCD de 8 CPUs lógicas: los procesos nuevos se reparten por carga
+    placer = L3GroupPlacer([list(range(8)), list(range(8, 16))])
+    moves, released = placer.update({1: (4.0, False), 2: (3.0, False), 3: (1.0, False)})
+    assert moves == {1: 0, 2: 1, 3: 1}, f"Reparto inicial incorrecto: {moves}"
+    
+    # Un intensivo en memoria va al grupo con menos intensivos a igual contención
+    memory_placer = L3GroupPlacer([list(range(8)), list(range(8, 16))])
+    memory_placer.update({10: (1.0, True), 11: (1.5, False)})
+    assert memory_placer.place(12, 0.0, True) != memory_placer.assignment[10], \
+        "Intensivos en memoria agrupados en la misma L3"
+    
+    # Desequilibrio sostenido: sólo se mueve tras HYSTERESIS_ROUNDS rondas y de uno en uno
+    placer.place(4, 0.0, True)
+    skewed = {1: (0.5, False), 2: (6.0, False), 3: (3.0, True), 4: (0.0, True)}
+    rounds_until_move = 0
+    for _ in range(L3GroupPlacer.HYSTERESIS_ROUNDS + 1):
+        rounds_until_move += 1
+        moves, _ = placer.update(skewed)
+        if moves:
+            break
+    assert rounds_until_move == L3GroupPlacer.HYSTERESIS_ROUNDS, f"Movimiento tras {rounds_until_move} rondas"
+    assert len(moves) == 1 and placer.moves == 1, f"Movimientos inesperados: {moves}"
+    contention = placer.contention()
+    assert max(contention) - min(contention) < 0.5, f"Contención sin equilibrar: {contention}"
+    
+    # Sin desequilibrio no hay más movimientos; los procesos que salen se liberan
+    for _ in range(5):
+        moves, _ = placer.update(skewed)
+        assert not moves, "Movimiento sin desequilibrio (falta histéresis)"
+    _, released = placer.update({2: (6.0, False)})
+    assert sorted(released) == [1, 3, 4], f"Liberados incorrectos: {released}"
+    
+    # Cuatro grupos L3 desiguales: la contención se mide por CPU lógica
+    quad = L3GroupPlacer([[0, 1, 2, 3], [4, 5, 6, 7], [8, 9], [10, 11]])
+    moves, _ = quad.update({pid: (1.0, False) for pid in range(6)})
+    assert sorted(moves.values()) == [0, 0, 1, 1, 2, 3], f"Reparto por capacidad incorrecto: {moves}"
+    
+    # Un solo grupo L3: todo va a él y nunca se reequilibra
+    single = L3GroupPlacer([list(range(8))])
+    moves, _ = single.update({1: (8.0, True), 2: (0.1, False)})
+    assert moves == {1: 0, 2: 0} and single.moves == 0
+    
+    assert is_memory_intensive(0, 5000.0) and is_memory_intensive(200 << 20, 0.0, 32 << 20)
+    assert not is_memory_intensive(64 << 20, 10.0, 32 << 20)
+    
+    print("  ✓ Reparto inicial por contención y preferencia por grupos sin intensivos en memoria")
+    print(f"  ✓ Reequilibrio tras {L3GroupPlacer.HYSTERESIS_ROUNDS} rondas de desequilibrio, un proceso por vez")
+except Exception as e:
+    print(f"  ✗ Error en l3_placement: {e}")
+
+# Test 13: Plan de afinidad global con 500 procesos en 32 hilos
+print("\n[Test 13] core_planner - Plan de afinidad global aplicado por diferencias")
+try:
+    import random
+    import time
+    from core_planner import GlobalAffinityPlanner
+
+    # 16 cores físicos con SMT (32 hilos) en dos grupos L3 de 8 cores
+    topology = {
+        'p_cores': list(range(32)), 'e_cores': [], 'total': 32,
+        'smt_pairs': [[i, i + 16] for i in range(16)],
+        'l3_cache_groups': [list(range(8)) + list(range(16, 24)), list(range(8, 16)) + list(range(24, 32))],
+        'numa_nodes': [list(range(32))],
+    }
+    planner = GlobalAffinityPlanner(topology)
+    rng = random.Random(7)
+    processes = {pid: ('background', rng.choice([0.0, 0.0, 0.01, 0.2, 0.5, 1.5])) for pid in range(100, 596)}
+    processes.update({10: ('game', 3.0), 11: ('foreground', 0.3), 12: ('encoder', 2.0), 13: ('voice', 0.2)})
+
+    start = time.perf_counter()
+    plan_diff = planner.plan(processes)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    assert elapsed_ms < 50, f"Plan demasiado lento: {elapsed_ms:.1f} ms"
+    assert len(plan_diff.changes) == len(processes), "El primer plan debe asignar todos los procesos"
+
+    # Particiones disjuntas de cores físicos completos (hermanos SMT incluidos)
+    roles = planner.role_cpus
+    game = set(roles['game'])
+    assert all((cpu + 16) % 32 in game for cpu in game), f"Partición del juego sin sus hermanos SMT: {game}"
+    for role in ('voice', 'encoder', 'shared'):
+        assert game.isdisjoint(roles[role]), f"'{role}' comparte CPUs con el juego"
+    assert planner.applied[11] == planner.applied[10], "El árbol en primer plano no comparte la partición del juego"
+
+    # El fondo nunca toca el primer plano y los inactivos evitan el grupo L3 del juego
+    foreground = game | set(roles['voice'])
+    assert all(foreground.isdisjoint(planner.applied[pid]) for pid in range(100, 596))
+    game_l3 = next(set(g) for g in topology['l3_cache_groups'] if game & set(g))
+    idle = [pid for pid, (_, load) in processes.items() if load == 0.0 and pid >= 100]
+    assert all(game_l3.isdisjoint(planner.applied[pid]) for pid in idle), "Procesos inactivos en la L3 del juego"
+
+    # Sin cambios de carga el plan es estable; sólo se informa de lo que cambia
+    assert planner.plan(processes) == ({}, []), "Plan inestable sin cambios de carga"
+    # Una afinidad que no se pudo aplicar se olvida y se reintenta en el siguiente plan
+    expected = planner.applied[11]
+    planner.forget(11)
+    assert planner.plan(processes) == ({11: expected}, []), "Afinidad fallida no reintentada"
+    del processes[595]
+    processes[100] = ('background', processes[100][1] * 1.05)
+    plan_diff = planner.plan(processes)
+    assert plan_diff.released == [595] and not plan_diff.changes, f"Diferencia inesperada: {plan_diff}"
+
+    # Sin primer plano no hay particiones: el fondo vuelve a todas las CPUs
+    background_only = {pid: ('background', 0.0) for pid in range(100, 110)}
+    plan_diff = planner.plan(background_only)
+    assert all(cpus == planner.all_cpus for cpus in plan_diff.changes.values()) and len(plan_diff.changes) == 10
+
+    # Un primer plano que no es un juego (navegador, editor) no crea particiones ni se confina
+    browser = GlobalAffinityPlanner(topology)
+    browser.plan({11: ('foreground', 1.5), 100: ('background', 0.0)})
+    assert browser.applied[11] == browser.all_cpus and 'game' not in browser.role_cpus
+    assert browser.role_cpus['shared'] == browser.all_cpus
+
+    print(f"  ✓ 500 procesos en 32 hilos planificados en {elapsed_ms:.1f} ms")
+    print("  ✓ Particiones sin hermanos SMT compartidos, fondo fuera de la L3 del juego y diferencias mínimas")
+except Exception as e:
+    print(f"  ✗ Error en plan de afinidad global: {e}")
+
+# Test 14: Perfiles aprendidos con coste de latencia y exploración de disposiciones
+print("\n[Test 14] profile_store - Disposición de menor latencia y persistencia")
+try:
+    import shutil
+    import tempfile
+    from profile_store import ProfileStore
+
+    workdir = tempfile.mkdtemp()
+    exe_path = os.path.join(workdir, "game.exe")
+    with open(exe_path, 'wb') as f:
+        f.write(b'MZ')
+    db_path = os.path.join(workdir, "profiles.db")
+
+    store = ProfileStore(db_path)
+    store.save_profile(exe_path, "juego", [0, 1, 2, 3], ["Discord.exe"], {'priority': 'HIGH'})
+    assert store.lookup(exe_path)['companions'] == ["discord.exe"]
+
+    # Se exploran las candidatas sin muestras antes de fijar la mejor
+    candidates = [[0, 1, 2, 3], [0, 1, 2, 3, 4, 5, 6, 7], [0, 2, 4, 6]]
+    assert store.candidate_layout(exe_path, candidates) == [0, 1, 2, 3]
+    for _ in range(ProfileStore.MIN_SAMPLES_TO_PROMOTE):
+        store.record_outcome(exe_path, [0, 1, 2, 3], 400.0)
+    assert store.candidate_layout(exe_path, candidates) == [0, 1, 2, 3, 4, 5, 6, 7]
+    for _ in range(ProfileStore.MIN_SAMPLES_TO_PROMOTE):
+        store.record_outcome(exe_path, [0, 1, 2, 3, 4, 5, 6, 7], 900.0)
+    for _ in range(ProfileStore.MIN_SAMPLES_TO_PROMOTE - 1):
+        store.record_outcome(exe_path, [0, 2, 4, 6], 150.0)
+    # Menor latencia gana, pero sólo con muestras suficientes
+    assert store.lookup(exe_path)['core_layout'] == [0, 1, 2, 3]
+    best = store.record_outcome(exe_path, [6, 4, 2, 0], 150.0)
+    assert best == [0, 2, 4, 6], f"Disposición promovida incorrecta: {best}"
+    assert store.candidate_layout(exe_path, candidates) == [0, 2, 4, 6]
+    store.close()
+
+    # Persistencia y descarte del perfil al cambiar el ejecutable
+    reopened = ProfileStore(db_path)
+    assert reopened.lookup(exe_path)['core_layout'] == [0, 2, 4, 6] and len(reopened) == 1
+    with open(exe_path, 'wb') as f:
+        f.write(b'MZ-updated')
+    os.utime(exe_path, (1, 1))
+    assert reopened.lookup(exe_path) is None and len(reopened) == 0, "Perfil de un ejecutable modificado no descartado"
+    assert reopened.record_outcome(exe_path, [0], 1.0) is None
+    reopened.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print("  ✓ Candidatas exploradas y promoción de la disposición de menor latencia")
+    print("  ✓ Perfiles persistidos y descartados al actualizarse el ejecutable")
+except Exception as e:
+    print(f"  ✗ Error en profile_store: {e}")
+
+# Test 15: Particiones disjuntas por rol
+print("\n[Test 15] core_planner - Particiones disjuntas de juego, voz y codificador")
+try:
+    from core_planner import CorePartitionPlanner
+
+    # Híbrido: 8 P-cores con SMT (0-15) y 8 E-cores (16-23)
+    hybrid = {'p_cores': list(range(16)), 'e_cores': list(range(16, 24)),
+              'smt_pairs': [[2 * i, 2 * i + 1] for i in range(8)], 'total': 24}
+    planner = CorePartitionPlanner(hybrid)
+    roles = ['game', 'encoder', 'voice']
+    plan = planner.plan_partitions(roles)
+    cpus = [cpu for cores in plan.values() for cpu in cores]
+    assert len(cpus) == len(set(cpus)) == 24, f"Particiones solapadas o incompletas: {plan}"
+    assert set(plan['game']) <= set(range(16)), "El juego no está en los P-cores"
+    assert set(plan['encoder']) <= set(range(16, 24)), "El codificador no está en los E-cores"
+    assert plan['shared'], "No quedan cores para el sistema"
+    assert all((cpu ^ 1) in plan['game'] for cpu in plan['game']), "Hermanos SMT repartidos entre roles"
+
+    # Un cambio de carga sólo se aplica tras HYSTERESIS_ROUNDS rondas
+    loads = {'game': 6.0, 'encoder': 1.0, 'voice': 0.1}
+    changed = [planner.rebalance(roles, loads) for _ in range(CorePartitionPlanner.HYSTERESIS_ROUNDS)]
+    assert changed == [False] * (CorePartitionPlanner.HYSTERESIS_ROUNDS - 1) + [True], f"Histéresis incorrecta: {changed}"
+    assert planner.counts['encoder'] == 2, f"Codificador no redimensionado: {planner.counts}"
+    assert not planner.rebalance(roles, loads), "Cambio sin variación de carga"
+
+    # Topología diminuta: los roles siguen siendo disjuntos
+    tiny = CorePartitionPlanner({'total': 2}).plan_partitions(roles)
+    tiny_cpus = [cpu for cores in tiny.values() for cpu in cores]
+    assert len(tiny_cpus) == len(set(tiny_cpus)) and tiny['game'], f"Plan diminuto incorrecto: {tiny}"
+
+    print("  ✓ Juego en P-cores, codificador en E-cores, sin CPUs compartidas entre roles")
+    print(f"  ✓ Redimensionado tras {CorePartitionPlanner.HYSTERESIS_ROUNDS} rondas de carga sostenida")
+except Exception as e:
+    print(f"  ✗ Error en particiones por rol: {e}")
+
+# Test 16: Transiciones de nivel de segundo plano con tiempo simulado
+print("\n[Test 16] background_tiers - Transiciones reciente/visible/fondo/inactivo/acaparador")
+try:
+    from background_tiers import (BackgroundTierManager, TIER_RECENT, TIER_VISIBLE, TIER_BACKGROUND,
+                                  TIER_IDLE, TIER_HOG)
+
+    tiers = BackgroundTierManager()
+    # pid 1: estuvo en primer plano; 2: ventana visible; 3: oculto y quieto; 4: consume CPU
+    samples = {1: (10.0, 0.0, 0), 2: (20.0, 0.0, 0), 3: (30.0, 0.0, 0), 4: (40.0, 0.0, 0)}
+    assert tiers.update(samples, foreground_pids=[1], now=0.0) == \
+        {2: TIER_BACKGROUND, 3: TIER_BACKGROUND, 4: TIER_BACKGROUND}
+    changes = tiers.update(samples, visible_pids=[2], now=10.0)
+    assert changes == {1: TIER_RECENT, 2: TIER_VISIBLE}, f"Transición inicial incorrecta: {changes}"
+
+    # El acaparador entra con histéresis: sigue siéndolo hasta bajar de la mitad del umbral
+    cpu = 0.0
+    for t in range(20, 120, 10):
+        cpu += 10.0 * 0.6  # 60% de un core
+        tiers.update({**samples, 4: (40.0, cpu, 0)}, visible_pids=[2], now=float(t))
+    assert tiers.tier_of(4) == TIER_HOG, "Proceso que consume CPU no marcado como acaparador"
+    for t in range(120, 150, 10):
+        cpu += 10.0 * 0.2  # 20%: bajo el umbral de entrada, sobre el de salida
+        tiers.update({**samples, 4: (40.0, cpu, 0)}, visible_pids=[2], now=float(t))
+    assert tiers.tier_of(4) == TIER_HOG, "El acaparador oscila sin histéresis"
+
+    # Pasada la ventana de reciente y sin actividad: fondo y después inactivo
+    tiers.update({**samples, 4: (40.0, cpu, 0)}, visible_pids=[2], now=200.0)
+    assert tiers.tier_of(1) == TIER_BACKGROUND
+    tiers.update({**samples, 4: (40.0, cpu, 0)}, visible_pids=[2], now=700.0)
+    assert tiers.tier_of(3) == TIER_IDLE and tiers.tier_of(2) == TIER_VISIBLE
+    assert tiers.settings_for(TIER_IDLE)['working_set_trim'] is True
+
+    # PID reutilizado (otro create_time) empieza de cero y se informa como eliminado
+    tiers.update({3: (99.0, 0.0, 0)}, now=710.0)
+    assert 3 in tiers.removed_pids and {1, 2, 4} <= tiers.removed_pids
+    assert tiers.tier_of(3) == TIER_BACKGROUND
+
+    print("  ✓ Reciente → fondo → inactivo, visibles y acaparadores con histéresis")
+    print("  ✓ PIDs terminados o reutilizados olvidados")
+except Exception as e:
+    print(f"  ✗ Error en niveles de segundo plano: {e}")
+
+# Test 17: EcoQoS incremental como único propietario del estado
+print("\n[Test 17] processes - IncrementalEcoQoS.plan y set_state")
+try:
+    from processes import IncrementalEcoQoS
+
+    class _Handles:
+        def get_handle(self, pid):
+            return pid
+        def release_handle(self, pid):
+            pass
+
+    calls = []
+    eco = IncrementalEcoQoS(_Handles(), lambda handle, enable: calls.append((handle, enable)))
+    alive = [(10, 1.0), (11, 2.0), (12, 3.0)]
+
+    # Primera pasada: fondo habilitado salvo el primer plano y lo que su nivel excluye
+    changes, stale = eco.plan(alive, {10}, desired={12: False})
+    assert changes == {(11, 2.0): True} and not stale, f"Plan inicial incorrecto: {changes}"
+    eco.apply({10}, alive, desired={12: False})
+    assert eco.apply({10}, alive, desired={12: False}) == 0, "Una pasada sin cambios tocó procesos"
+
+    # Un cambio puntual queda registrado y la pasada siguiente no lo repite ni lo deshace
+    calls.clear()
+    assert eco.set_state(12, 12, True) and calls == [(12, True)]
+    assert eco.plan(alive, {10}, desired={12: True}) == ({}, set())
+    assert eco.set_state(10, 10, False) and calls == [(12, True)], "Revertir un proceso sin EcoQoS lo tocó"
+
+    # Paso a primer plano: se revierte; PID reutilizado: se olvida y se vuelve a aplicar
+    changes, stale = eco.plan([(10, 1.0), (11, 2.0), (12, 9.0)], {11}, desired={12: True})
+    assert changes == {(10, 1.0): True, (11, 2.0): False, (12, 9.0): True}, f"Transición incorrecta: {changes}"
+    assert stale == {12}, f"PID reutilizado no detectado: {stale}"
+
+    print("  ✓ Pasadas incrementales sin cambios redundantes")
+    print("  ✓ Cambios puntuales (set_state) compartidos con la pasada incremental")
+except Exception as e:
+    print(f"  ✗ Error en EcoQoS incremental: {e}")
+
+# Test 18: Diferencias columnares con y sin NumPy
+print("\n[Test 18] process_table - diff_tables con NumPy y con el respaldo array.array")
+try:
+    import process_table
+
+    def _records(rows):
+        return [{'pid': pid, 'parent_pid': 1, 'name': name, 'create_time': ct, 'cpu_user': cpu,
+                 'cpu_kernel': 0.0, 'io_read_bytes': io, 'io_write_bytes': 0,
+                 'working_set': ws, 'page_faults': pf} for pid, name, ct, cpu, io, ws, pf in rows]
+
+    before = _records([(30, 'a.exe', 1.0, 2.0, 1000, 4096, 10), (10, 'b.exe', 2.0, 5.0, 0, 8192, 0),
+                       (20, 'c.exe', 3.0, 1.0, 0, 4096, 5), (40, 'd.exe', 4.0, 0.0, 0, 0, 0)])
+    after = _records([(10, 'b.exe', 2.0, 6.0, 500, 4096, 4), (30, 'a.exe', 1.0, 2.5, 3000, 8192, 30),
+                      (20, 'c2.exe', 9.0, 0.0, 0, 4096, 0), (50, 'e.exe', 5.0, 0.0, 0, 0, 0)])
+
+    def _run(use_numpy):
+        saved = process_table.NUMPY_AVAILABLE
+        process_table.NUMPY_AVAILABLE = use_numpy
+        try:
+            interner = process_table.NameInterner()
+            prev = process_table.ProcessTable.from_records(before, 100.0, interner)
+            curr = process_table.ProcessTable.from_records(after, 102.0, interner)
+            diff = process_table.diff_tables(prev, curr)
+            return ([int(i) for i in diff.prev_index], [round(float(v), 6) for v in diff.cpu_percent],
+                    [float(v) for v in diff.io_rate], [float(v) for v in diff.ws_growth],
+                    [float(v) for v in diff.fault_rate], sorted(diff.spawned), sorted(diff.exited),
+                    sorted(diff.reused), diff.spawned_indices())
+        finally:
+            process_table.NUMPY_AVAILABLE = saved
+
+    fallback = _run(False)
+    assert fallback[0] == [1, 0, -1, -1], f"Emparejamiento incorrecto: {fallback[0]}"
+    assert fallback[1] == [50.0, 25.0, 0.0, 0.0] and fallback[2] == [250.0, 1000.0, 0.0, 0.0]
+    assert fallback[3] == [-2048.0, 2048.0, 0.0, 0.0] and fallback[4] == [2.0, 10.0, 0.0, 0.0]
+    assert fallback[5:8] == ([20, 50], [20, 40], [20]), f"Creados/terminados/reutilizados: {fallback[5:8]}"
+    print("  ✓ Respaldo sin NumPy: tasas, PIDs reutilizados, creados y terminados")
+    if process_table.NUMPY_AVAILABLE:
+        assert _run(True) == fallback, "NumPy y el respaldo no coinciden"
+        print("  ✓ La ruta NumPy coincide con el respaldo")
+    else:
+        print("  ✓ NumPy no disponible: sólo se comprueba el respaldo")
+except Exception as e:
+    print(f"  ✗ Error en diferencias de tabla: {e}")
+
+# Test 19: Bosque de procesos con PIDs reutilizados
+print("\n[Test 19] process_forest - Subárboles incrementales y PIDs reutilizados")
+try:
+    from process_forest import ProcessForest
+    from process_table import ProcessTableTracker
+
+    def _snapshot(rows):
+        return [{'pid': pid, 'parent_pid': ppid, 'name': f'p{pid}.exe', 'create_time': ct}
+                for pid, ppid, ct in rows]
+
+    tracker = ProcessTableTracker()
+    forest = ProcessForest()
+    forest.apply_diff(tracker.update(_snapshot([(100, 4, 1.0), (200, 100, 2.0), (201, 100, 3.0),
+                                                (300, 200, 4.0)]), 0.0))
+    assert sorted(forest.subtree(100)) == [100, 200, 201, 300], f"Subárbol incorrecto: {forest.subtree(100)}"
+    assert forest.subtree(200) == [200, 300]
+
+    # El padre termina y su PID se reutiliza: el proceso nuevo no hereda los hijos anteriores
+    forest.apply_diff(tracker.update(_snapshot([(100, 4, 10.0), (200, 100, 2.0), (201, 100, 3.0),
+                                                (300, 200, 4.0)]), 1.0))
+    assert forest.subtree(100) == [100], f"El PID reutilizado heredó hijos: {forest.subtree(100)}"
+    assert forest.parent_of(200) is None and forest.subtree(200) == [200, 300]
+
+    # Un hijo creado después del proceso nuevo sí se enlaza con él (y la caché se invalida)
+    forest.apply_diff(tracker.update(_snapshot([(100, 4, 10.0), (200, 100, 2.0), (201, 100, 3.0),
+                                                (300, 200, 4.0), (400, 100, 11.0)]), 2.0))
+    assert forest.subtree(100) == [100, 400] and forest.parent_of(400) == 100
+
+    # La ruta add() trata igual la reutilización
+    forest.add(300, 200, 12.0)
+    assert forest.subtree(200) == [200, 300] and len(forest) == 5
+    forest.add(200, 100, 13.0)
+    assert forest.parent_of(300) is None and sorted(forest.subtree(100)) == [100, 200, 400]
+
+    print("  ✓ Subárboles cacheados actualizados con cada diferencia")
+    print("  ✓ Un PID reutilizado no hereda los hijos del proceso anterior")
+except Exception as e:
+    print(f"  ✗ Error en bosque de procesos: {e}")
+
+# Test 20: Almacén de métricas con y sin NumPy
+print("\n[Test 20] metrics_store - Percentiles, desalojo y límite de memoria")
+try:
+    import metrics_store
+    from metrics_store import MetricStore, MetricSeries
+
+    resolutions = ((1.0, 10), (10.0, 6))
+
+    def _summary(use_numpy):
+        saved = metrics_store.NUMPY_AVAILABLE
+        metrics_store.NUMPY_AVAILABLE = use_numpy
+        try:
+            store = MetricStore(resolutions=resolutions)
+            for t in range(12):
+                store.record('cpu.percent', float(t), timestamp=float(t))
+                store.record('cpu.cores', [float(t), 2.0 * t], timestamp=float(t))
+            # Cubos cerrados de 1 s: 1..10 (el de t=0 ya salió del búfer circular de 10)
+            return ([round(v, 4) for v in store.percentile('cpu.percent', 50, 100, resolution=1.0)],
+                    [round(v, 4) for v in store.percentile('cpu.cores', 90, 100, resolution=1.0)],
+                    store.mean('cpu.percent', 5, resolution=1.0), store.peak('cpu.cores', 100, resolution=1.0),
+                    store.latest('cpu.cores'))
+        finally:
+            metrics_store.NUMPY_AVAILABLE = saved
+
+    fallback = _summary(False)
+    assert fallback[0] == [5.5] and fallback[1] == [9.1, 18.2], f"Percentiles incorrectos: {fallback[:2]}"
+    assert fallback[2] == [8.0] and fallback[3] == [10.0, 20.0] and fallback[4] == [11.0, 22.0]
+    print("  ✓ Percentiles, media y máximo del respaldo sin NumPy")
+    if metrics_store.NUMPY_AVAILABLE:
+        assert _summary(True) == fallback, "NumPy y el respaldo no coinciden"
+        print("  ✓ La ruta NumPy coincide con el respaldo")
+
+    # Límite de memoria: se desalojan series de procesos, nunca las del sistema
+    one = MetricSeries.nbytes_for(1, resolutions)
+    store = MetricStore(max_bytes=2 * one, resolutions=resolutions)
+    assert store.record('cpu.percent', 1.0, 0.0) and store.record('proc.1.cpu', 1.0, 0.0)
+    assert store.record('proc.2.cpu', 1.0, 1.0) and 'proc.1.cpu' not in store
+    assert store.record('memory.percent', 1.0, 2.0) and 'proc.2.cpu' not in store
+    assert not store.record('temperature.cpu', 1.0, 3.0) and store.rejected == 1
+    assert store.nbytes <= store.max_bytes and store.nbytes == sum(store.get(n).nbytes for n in store.names())
+
+    print("  ✓ Desalojo de series de procesos y rechazo al agotar el límite")
+except Exception as e:
+    print(f"  ✗ Error en almacén de métricas: {e}")
+
+# Test 21: Cola de mantenimiento con cancelaciones y espera creciente
+print("\n[Test 21] maintenance - Cancelación con espera y sin acaparar la ventana")
+try:
+    from maintenance import MaintenanceQueue, MaintenanceTask
+
+    class _Process:
+        def __init__(self):
+            self.done = False
+            self.terminated = False
+        def poll(self):
+            return 0 if self.done or self.terminated else None
+        def terminate(self):
+            self.terminated = True
+
+    launched = []
+    def _launcher(name):
+        def start():
+            process = _Process()
+            launched.append((name, process))
+            return process
+        return start
+
+    queue = MaintenanceQueue()
+    retrim = MaintenanceTask('retrim', _launcher('retrim'), interval=24 * 3600)
+    purge = MaintenanceTask('standby_purge', _launcher('standby_purge'), interval=7200)
+    queue.add(retrim)
+    queue.add(purge)
+
+    queue.tick(idle=True, now=0.0)
+    assert queue.running is retrim
+    queue.tick(idle=False, now=10.0)
+    assert queue.running is None and launched[0][1].terminated and retrim.cancellations == 1
+    assert retrim.last_run is None and retrim.retry_after == 10.0 + MaintenanceTask.RETRY_BACKOFF
+
+    # La siguiente ventana es para la otra tarea, no para reintentar la cancelada
+    queue.tick(idle=True, now=20.0)
+    assert queue.running is purge, "La tarea cancelada acapara la ventana"
+    launched[-1][1].done = True
+    queue.tick(idle=True, now=30.0)
+    assert purge.runs == 1 and queue.running is None
+
+    # Pasada la espera se reintenta; una segunda cancelación duplica la espera
+    queue.tick(idle=True, now=620.0)
+    assert queue.running is retrim
+    queue.tick(idle=False, now=630.0)
+    assert retrim.retry_after == 630.0 + 2 * MaintenanceTask.RETRY_BACKOFF
+    queue.tick(idle=True, now=1900.0)
+    assert queue.running is retrim
+    launched[-1][1].done = True
+    queue.tick(idle=True, now=1910.0)
+    assert retrim.runs == 1 and retrim.consecutive_cancellations == 0 and retrim.retry_after == 0.0
+    assert queue.status()['tasks']['retrim'] == {'runs': 1, 'cancellations': 2}
+
+    print("  ✓ Una tarea cancelada espera y deja paso a las demás")
+    print("  ✓ La espera crece con cancelaciones seguidas y se reinicia al completar")
+except Exception as e:
+    print(f"  ✗ Error en cola de mantenimiento: {e}")
+
+# Test 22: Muestreo por core antes y después de estar listo
+print("\n[Test 22] core_sampler - PerCoreSampler listo tras dos lecturas")
+try:
+    from collections import namedtuple
+    from core_sampler import PerCoreSampler
+
+    CpuTimes = namedtuple('CpuTimes', ['user', 'system', 'idle'])
+    readings = [
+        [CpuTimes(10.0, 0.0, 90.0), CpuTimes(0.0, 0.0, 100.0)],
+        [CpuTimes(40.0, 10.0, 150.0), CpuTimes(0.0, 0.0, 200.0)],
+        [CpuTimes(40.0, 10.0, 250.0), CpuTimes(100.0, 0.0, 200.0)],
+    ]
+    sampler = PerCoreSampler(interval=1.0, cpu_times=lambda: readings.pop(0), frequencies=lambda: [3600.0])
+
+    assert not sampler.ready and sampler.least_loaded(1) == []
+    assert sampler.sample(now=0.0) and not sampler.ready, "Listo con una sola lectura"
+    assert sampler.frequency_mhz == [3600.0, 3600.0], "Frecuencia global no repartida entre CPUs"
+    assert not sampler.sample(now=0.5), "Muestra tomada antes del intervalo"
+    assert sampler.sample(now=1.0) and sampler.ready
+    assert [round(u, 6) for u in sampler.utilization] == [40.0, 0.0], f"Utilización: {sampler.utilization}"
+    assert sampler.least_loaded(1) == [1] and sampler.busy_cores(30.0) == [0]
+    assert sampler.sample(now=1.2, force=True) and sampler.utilization == [0.0, 100.0]
+
+    print("  ✓ Sin utilización hasta la segunda lectura (los consumidores deben comprobar 'ready')")
+    print("  ✓ Intervalo respetado, forzado y utilización por diferencia de contadores")
+except Exception as e:
+    print(f"  ✗ Error en muestreo por core: {e}")
+
+# Test 23: Perfilado de hilos con y sin NumPy
+print("\n[Test 23] thread_profiler - Rutas NumPy y de respaldo, TIDs reutilizados")
+try:
+    from collections import namedtuple
+    import thread_profiler
+    from thread_profiler import ThreadProfiler, ProcessThreadProfiles
+
+    Thread = namedtuple('Thread', ['tid', 'user_time', 'kernel_time', 'context_switches'])
+    # (tid, cpu acumulada, cambios de contexto) por instantánea, una por segundo
+    snapshots = [
+        [(8, 0.0, 0), (4, 0.0, 0), (12, 0.0, 0)],
+        [(4, 0.9, 100), (8, 0.1, 500), (12, 0.0, 10)],
+        [(4, 1.8, 200), (8, 0.15, 900), (16, 0.0, 0)],
+        [(4, 2.6, 300), (8, 0.0, 5), (16, 0.5, 50)],   # TID 8 reutilizado: contadores menores
+    ]
+
+    def _run(use_numpy):
+        saved = thread_profiler.NUMPY_AVAILABLE
+        thread_profiler.NUMPY_AVAILABLE = use_numpy
+        try:
+            profiler = ThreadProfiler(alpha=0.5, hot_threshold=0.25)
+            measured = [profiler.update([Thread(t, c, 0.0, s) for t, c, s in rows], float(i))
+                        for i, rows in enumerate(snapshots)]
+            profiles = {tid: (round(p['cpu_time'], 6), round(p['context_switches'], 6), p['samples'],
+                              p['classification']) for tid, p in profiler.profiles().items()}
+            return measured, profiles, [(tid, round(share, 6)) for tid, share in profiler.hot_threads()]
+        finally:
+            thread_profiler.NUMPY_AVAILABLE = saved
+
+    measured, profiles, hot = _run(False)
+    assert measured == [0, 3, 2, 2], f"Hilos medidos: {measured}"
+    assert profiles[4] == (0.85, 100.0, 3, 'cpu_intensive'), f"Perfil del hilo 4: {profiles[4]}"
+    assert profiles[8][2] == 0 and profiles[8][3] == 'unknown', "El TID reutilizado heredó el perfil"
+    assert profiles[16] == (0.5, 50.0, 1, 'cpu_intensive') and 12 not in profiles
+    assert hot == [(4, 0.85), (16, 0.5)]
+    print("  ✓ Respaldo sin NumPy: medias suavizadas, hilos nuevos, terminados y TIDs reutilizados")
+    if thread_profiler.NUMPY_AVAILABLE:
+        assert _run(True) == (measured, profiles, hot), "NumPy y el respaldo no coinciden"
+        print("  ✓ La ruta NumPy coincide con el respaldo")
+
+    # Varios procesos: un PID reutilizado reinicia el perfil; los hilos activos exigen dos muestras
+    shared = ProcessThreadProfiles(alpha=0.5)
+    def _record(pid, create_time, rows):
+        return {'pid': pid, 'create_time': create_time, 'threads': [Thread(t, c, 0.0, s) for t, c, s in rows]}
+    shared.update([_record(100, 1.0, snapshots[0]), _record(200, 2.0, [(1, 0.0, 0)])], [100, 200], 0.0)
+    assert shared.active_thread_count(100) is None
+    shared.update([_record(100, 1.0, snapshots[1]), _record(200, 2.0, [(1, 0.0, 0)])], [100, 200], 1.0)
+    assert shared.active_thread_count(100) == 2 and shared.active_thread_count(200) == 0
+    shared.update([_record(100, 5.0, snapshots[2])], [100], 2.0)
+    assert shared.active_thread_count(100) is None and shared.get(200) is None
+
+    print("  ✓ PIDs reutilizados y procesos terminados en ProcessThreadProfiles")
+
+    # Contención en los cores del proceso: hilos listos (1) frente a los que corren (2); 5 = en espera
+    StatefulThread = namedtuple('StatefulThread', ['tid', 'user_time', 'kernel_time', 'context_switches', 'state'])
+    def _states(pid, states):
+        return {'pid': pid, 'create_time': 1.0,
+                'threads': [StatefulThread(tid, 0.0, 0.0, 0, st) for tid, st in enumerate(states)]}
+    contended = ProcessThreadProfiles(alpha=0.5)
+    contended.update([_states(300, [5, 5])], [300], 0.0)
+    assert contended.ready_fraction(300) is None, "Sin hilos ejecutables no hay medida"
+    contended.update([_states(300, [2, 1, 1, 5])], [300], 1.0)
+    assert abs(contended.ready_fraction(300) - 2 / 3) < 1e-9
+    contended.update([_states(300, [2, 2, 5, 5])], [300], 2.0)
+    assert abs(contended.ready_fraction(300) - 1 / 3) < 1e-9
+    assert contended.ready_fraction(400) is None
+    print("  ✓ Fracción suavizada de hilos listos sin CPU por proceso")
+except Exception as e:
+    print(f"  ✗ Error en perfilado de hilos: {e}")
+
+# Test 24: Colocación de hilos calientes con histéresis
+print("\n[Test 24] thread_placement - HotThreadPlacer con histéresis y sustitución")
+try:
+    from thread_placement import HotThreadPlacer
+
+    placer = HotThreadPlacer([[0, 1], [2, 3], [4, 5], [6, 7]], top_k=2)
+    hot = [(10, 0.9), (11, 0.8), (12, 0.3)]
+    assert placer.update(hot) == ({}, []), "Hilo colocado en su primera ronda"
+    changes = placer.update(hot)
+    assert changes.assign == {10: [0, 1], 11: [2, 3]} and not changes.release
+
+    # El hilo 11 se enfría y el 12 sube: lo sustituye tras enter_rounds, en el mismo core
+    hot = [(10, 0.9), (12, 0.7), (11, 0.2)]
+    assert placer.update(hot) == ({}, [])
+    changes = placer.update(hot)
+    assert changes.assign == {12: [2, 3]} and changes.release == [11], f"Sustitución: {changes}"
+
+    # Una salida breve del top-K no libera el hilo ni le cambia el core
+    assert placer.update([(13, 0.95), (12, 0.8), (10, 0.5)]) == ({}, [])
+    assert placer.update([(10, 0.9), (12, 0.8)]) == ({}, [])
+    assert placer.placement() == {10: [0, 1], 12: [2, 3]}
+
+    # Fuera del top-K durante exit_rounds rondas: se libera
+    for _ in range(placer.exit_rounds - 1):
+        assert placer.update([(12, 0.8)]).release == []
+    assert placer.update([(12, 0.8)]).release == [10]
+    assert placer.release_all() == [12] and placer.placement() == {}
+
+    print("  ✓ Entrada tras varias rondas, salida sólo tras exit_rounds rondas fuera")
+    print("  ✓ Sustitución del hilo enfriado conservando los cores de los demás")
+except Exception as e:
+    print(f"  ✗ Error en colocación de hilos: {e}")
+
+# Test 25: Rango de cores preferidos (datos estáticos primero)
+print("\n[Test 25] core_ranking - static_scores, rank_cores y load_core_rank")
+try:
+    import json
+    import tempfile
+    import shutil
+    from core_ranking import static_scores, rank_cores, load_core_rank, BOOT_TIME_TOLERANCE
+
+    cores = [[0, 1], [2, 3], [4, 5], [6, 7]]
+    # CPPC completo: se prefiere a la frecuencia
+    cppc = {0: {'highest_perf': 166, 'max_freq_mhz': 5000}, 2: {'highest_perf': 166, 'max_freq_mhz': 5000},
+            4: {'highest_perf': 200, 'max_freq_mhz': 5000}, 6: {'highest_perf': 100, 'max_freq_mhz': 4000}}
+    static, source = static_scores(cppc, cores)
+    assert source == 'cppc' and static == [0.83, 0.83, 1.0, 0.5], f"Puntuación CPPC: {static}"
+    # CPPC incompleto: se usa la frecuencia; sin diferencias: sin datos estáticos
+    del cppc[6]['highest_perf']
+    assert static_scores(cppc, cores) == ([1.0, 1.0, 1.0, 0.8], 'max_freq')
+    assert static_scores({c: {'max_freq_mhz': 4000} for c in range(8)}, cores) == (None, 'none')
+
+    # La micro-prueba sólo desempata: el core 0 gana al 1 (mismo dato estático), pero
+    # que contradiga al resto de cores no altera el orden estático
+    ranking = rank_cores(cores, [0.83, 0.83, 1.0, 0.5], [90.0, 100.0, 80.0, 95.0])
+    rank = ranking['core_rank']
+    order = sorted(range(4), key=lambda i: -rank[str(cores[i][0])])
+    assert order == [2, 1, 0, 3], f"Orden incorrecto: {order}"
+    assert rank['0'] == rank['1'] and rank['2'] == rank['3'], "CPUs del mismo core con rangos distintos"
+    assert all(abs(rank[str(c[0])] - s * 1000) <= 85 for c, s in zip(cores, [0.83, 0.83, 1.0, 0.5]))
+    assert ranking['agreement'] is not None and ranking['agreement'] < 1.0
+    # Sin datos estáticos decide la micro-prueba; sin ninguna fuente, todos iguales
+    assert rank_cores(cores, None, [50.0, 100.0, 75.0, 100.0])['core_rank']['0'] == 500
+    assert set(rank_cores(cores, None, [50.0, None, 75.0, 100.0])['core_rank'].values()) == {1000}
+
+    # Caché por arranque, válida dentro de la tolerancia
+    cache_dir = tempfile.mkdtemp()
+    try:
+        cache_file = os.path.join(cache_dir, 'rank.json')
+        calls = []
+        def rank_data():
+            calls.append(1)
+            return {0: {'max_freq_mhz': 5000}, 2: {'max_freq_mhz': 4000}}
+        first = load_core_rank([[0, 1], [2, 3]], 1000.0, cache_file, rank_data, benchmark_duration=0)
+        assert first['source'] == 'max_freq' and first['core_rank'] == {'0': 1000, '1': 1000, '2': 800, '3': 800}
+        assert load_core_rank([[0, 1], [2, 3]], 1000.0 + BOOT_TIME_TOLERANCE / 2, cache_file, rank_data,
+                              benchmark_duration=0) == first and len(calls) == 1
+        load_core_rank([[0, 1], [2, 3]], 1000.0 + 2 * BOOT_TIME_TOLERANCE, cache_file, rank_data,
+                       benchmark_duration=0)
+        assert len(calls) == 2, "Caché reutilizada tras un reinicio"
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            assert json.load(f)['boot_time'] == 1000.0 + 2 * BOOT_TIME_TOLERANCE
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print("  ✓ Fuente estática: CPPC, frecuencia máxima o ninguna")
+    print("  ✓ Orden estático con la micro-prueba sólo como desempate")
+    print("  ✓ Caché por arranque con tolerancia en la hora de arranque")
+except Exception as e:
+    print(f"  ✗ Error en rango de cores: {e}")
+
+# Test 26: Decodificación de CPUID con registros grabados
+print("\n[Test 26] cpu_features - Decodificación de registros CPUID grabados (híbrida Intel)")
+try:
+    import struct
+    from cpu_features import read_cpu_info, cache_sizes
+
+    brand = b'12th Gen Intel(R) Core(TM) i7-12700K'.ljust(48, b'\x00')
+    brand_regs = [struct.unpack('<IIII', brand[i:i + 16]) for i in (0, 16, 32)]
+    registers = {
+        (0x0, 0): (0x20, 0x756E6547, 0x6C65746E, 0x49656E69),
+        (0x1, 0): (0x00090672, 0x00800800, 0x7FFAFBFF, 0xBFEBFBFF),
+        (0x6, 0): (0x00DFCFF7, 0x00000002, 0x00000409, 0x00000003),
+        (0x7, 0): (0x00000002, 0x239CA7EB, 0x98C027AC, 0xFC1CC410),
+        # Hoja 4: L1d 48 KiB, L1i 32 KiB, L2 1,25 MiB, L3 25 MiB
+        (0x4, 0): (0x1C004121, 0x02C0003F, 0x0000003F, 0x0),
+        (0x4, 1): (0x1C004122, 0x01C0003F, 0x0000003F, 0x0),
+        (0x4, 2): (0x1C004143, 0x0240003F, 0x000007FF, 0x0),
+        (0x4, 3): (0x1C03C163, 0x0240003F, 0x00009FFF, 0x4),
+        (0x80000000, 0): (0x80000008, 0x0, 0x0, 0x0),
+        (0x80000002, 0): brand_regs[0],
+        (0x80000003, 0): brand_regs[1],
+        (0x80000004, 0): brand_regs[2],
+    }
+    current_cpu = [0]
+    def cpuid_fn(leaf, subleaf=0):
+        if leaf == 0x1A:
+            return (0x40000001 if current_cpu[0] < 16 else 0x20000001, 0, 0, 0)
+        return registers.get((leaf, subleaf), (0, 0, 0, 0))
+    def pin(cpu):
+        current_cpu[0] = cpu
+        return lambda: None
+
+    info = read_cpu_info(cpuid_fn, lambda index: 0x207, cpus=[0, 16], pin=pin)
+    assert info['vendor'] == 'GenuineIntel' and info['brand'] == '12th Gen Intel(R) Core(TM) i7-12700K'
+    assert (info['family'], info['model'], info['stepping']) == (6, 0x97, 2)
+    features = info['features']
+    assert features['avx2'] and features['fma'] and features['sha'] and not features['avx512']
+    assert features['hybrid_architecture'] and features['turbo_boost'] and features['sse4_2']
+    assert cache_sizes(info) == {'l1_data': 48 * 1024, 'l1_instruction': 32 * 1024,
+                                 'l2': 1280 * 1024, 'l3': 25 * 1024 * 1024}, f"Cachés: {cache_sizes(info)}"
+    assert info['caches'][3]['shared_by'] == 16
+    assert info['core_types'] == {'0': 'performance', '16': 'efficiency'}
+
+    # Sin estado YMM habilitado por el sistema (XCR0), AVX no es utilizable
+    features = read_cpu_info(cpuid_fn, lambda index: 0x3)['features']
+    assert not features['avx'] and not features['avx2'] and not features['fma'] and features['aes']
+
+    print("  ✓ Fabricante, marca, familia/modelo y extensiones utilizables")
+    print("  ✓ Tamaños de caché (hoja 4) y tipo de core por CPU (hoja 0x1A)")
+except Exception as e:
+    print(f"  ✗ Error en decodificación de CPUID: {e}")
+
+# Test 27: Aparcamiento de hermanos SMT
+print("\n[Test 27] smt_parking - Aparcamiento de hermanos SMT y sonda en segundo plano")
+try:
+    import time as _time
+    from smt_parking import parked_siblings, parking_plan, BackgroundLatencyProbe
+
+    siblings = {c: [c ^ 1] for c in range(8)}
+    all_cpus = list(range(8))
+    assert parked_siblings([0, 1, 2, 3], siblings) == [1, 3]
+    assert parked_siblings([0, 2], siblings) == [1, 3]
+
+    # El fondo no usa ni las CPUs del juego ni los hermanos aparcados
+    plan = parking_plan([0, 2], siblings, all_cpus)
+    assert plan == {'parked': [1, 3], 'background_affinity': [4, 5, 6, 7]}, f"Plan: {plan}"
+    plan = parking_plan([0, 1, 2, 3], siblings, all_cpus)
+    assert plan['background_affinity'] == [4, 5, 6, 7]
+
+    # Juego en todas las CPUs (o sin afinidad conocida): no se aparca nada
+    for game in (all_cpus, []):
+        plan = parking_plan(game, siblings, all_cpus)
+        assert plan == {'parked': [], 'background_affinity': all_cpus}, f"Plan: {plan}"
+
+    class _FakeProbe:
+        def run(self, cpu):
+            _time.sleep(0.05)
+            return {'mean': 10.0, 'p50': 9.0, 'p99': 20.0 + cpu, 'max': 30.0}
+
+    probe = BackgroundLatencyProbe(_FakeProbe())
+    assert probe.start(2, 'before') and probe.running
+    assert not probe.start(3, 'after'), "Sólo una medida a la vez"
+    assert probe.take() is None
+    probe._thread.join()
+    tag, stats = probe.take()
+    assert tag == 'before' and stats['p99'] == 22.0
+    assert probe.take() is None, "Cada resultado se entrega una vez"
+
+    print("  ✓ El fondo excluye las CPUs del juego y los hermanos aparcados")
+    print("  ✓ Sin aparcamiento si el juego usa todas las CPUs")
+    print("  ✓ La sonda de latencia corre en su propio hilo")
+except Exception as e:
+    print(f"  ✗ Error en aparcamiento SMT: {e}")
+
+# Test 28: Clasificación de cargas por comportamiento
+print("\n[Test 28] workload_classifier - classify, workload_policy y ventana con decaimiento")
+try:
+    from workload_classifier import (WorkloadFingerprint, WorkloadClassifier, classify, workload_policy,
+                                     TAG_RENDER, TAG_ENCODE, TAG_GAME, TAG_INTERACTIVE, TAG_BATCH)
+
+    def fingerprint(samples, modules=()):
+        fp = WorkloadFingerprint()
+        fp.modules = frozenset(modules)
+        for load, cpus, threads, freq, io in samples:
+            fp.add(load, cpus, threads, freq, io)
+        return fp
+
+    assert classify(fingerprint([(7.5, 8, 8, 0.85, 0.0)] * 20)) == TAG_RENDER
+    assert classify(fingerprint([(7.5, 8, 8, 0.99, 0.0)] * 20)) == TAG_BATCH
+    assert classify(fingerprint([(7.5, 8, 8, 0.99, 0.0)] * 20, ['avcodec-60.dll'])) == TAG_ENCODE
+    assert classify(fingerprint([(7.5, 8, 8, 0.99, 8e6)] * 20)) == TAG_ENCODE
+    assert classify(fingerprint([(0.5, 8, 2, None, 0.0)] * 20, ['d3d11.dll', 'steam_api64.dll'])) == TAG_GAME
+    assert classify(fingerprint([(0.1, 8, 1, None, 0.0)] * 20)) == TAG_INTERACTIVE
+    # Poca carga repartida en muchos hilos activos: trabajo de fondo, no interactivo
+    assert classify(fingerprint([(0.2, 8, 6, None, 0.0)] * 20)) == TAG_BATCH
+
+    # Un render confinado a la mitad de los cores sigue cargando todos los suyos
+    fp = fingerprint([(7.5, 8, 8, 0.85, 0.0)] * 20 + [(3.8, 4, 4, 0.85, 0.0)] * 60)
+    assert classify(fp) == TAG_RENDER, f"Fracción: {fp.all_core_fraction}"
+
+    # Ventana con decaimiento: el comportamiento reciente domina
+    fp = fingerprint([(7.5, 8, 8, 0.99, 0.0)] * 100 + [(0.1, 8, 1, None, 0.0)] * 40)
+    assert fp.all_core_fraction < 0.05 and classify(fp) == TAG_INTERACTIVE
+
+    cores = list(range(8))
+    assert workload_policy(TAG_RENDER, cores) == {'affinity': [0, 1, 2, 3], 'priority': 'ABOVE_NORMAL'}
+    assert workload_policy(TAG_ENCODE, cores)['affinity'] == [0, 1, 2, 3]
+    assert workload_policy(TAG_BATCH, cores) == {'priority': 'BELOW_NORMAL'}
+    assert workload_policy(TAG_GAME, cores) == {} and workload_policy(None, cores) == {}
+
+    classifier = WorkloadClassifier(8, min_samples=5, cache_file=None)
+    for _ in range(5):
+        tag = classifier.observe(10, 'C:\\Render\\Blender.exe', 3.8, 4, 0.85, 0.0, allowed_cpus=4)
+    assert tag == TAG_RENDER and classifier.tags['c:\\render\\blender.exe'] == TAG_RENDER
+    classifier.prune([])
+    classifier.observe(11, 'C:\\Render\\blender.exe', 0.0, 0, None, 0.0)
+    assert classifier.tag_of(11) == TAG_RENDER, "Etiqueta cacheada por ejecutable"
+
+    print("  ✓ render, encode, game, interactive y batch según el comportamiento")
+    print("  ✓ Carga de todos los cores medida sobre la afinidad del proceso")
+    print("  ✓ Medias con decaimiento y etiqueta cacheada por ejecutable")
+except Exception as e:
+    print(f"  ✗ Error en clasificación de cargas: {e}")
+
+# Test 29: Colocación de hilos calientes desde el bucle del gestor
+print("\n[Test 29] gestor_modulos - Colocación de hilos calientes en cada perfilado")
+try:
+    from collections import namedtuple
+    from types import SimpleNamespace
+    from gestor_modulos import GestorModulos, ModuloCPU
+    from cpu import HeterogeneousScheduler
+    from thread_profiler import ProcessThreadProfiles
+
+    Thread = namedtuple('Thread', ['tid', 'user_time', 'kernel_time', 'context_switches'])
+
+    class _Monitor:
+        """Una instantánea por perfilado: el hilo 7 consume 0,9 cores de forma sostenida."""
+        def __init__(self):
+            self.thread_profiles = ProcessThreadProfiles(alpha=0.5)
+            self.ticks = 0
+        def get_process_tree(self, pid):
+            return [pid]
+        def profile_threads(self, pids):
+            self.ticks += 1
+            records = [{'pid': pid, 'create_time': 1.0,
+                        'threads': [Thread(7, 0.9 * self.ticks, 0.0, 0), Thread(8, 0.0, 0.0, 0)]}
+                       for pid in pids]
+            return self.thread_profiles.update(records, pids, float(self.ticks))
+        def sample_metrics(self, managed_pids=()):
+            pass
+
+    placed = []
+    monitor = _Monitor()
+    modulo_cpu = ModuloCPU.__new__(ModuloCPU)
+    modulo_cpu.thread_profiles = monitor.thread_profiles
+    modulo_cpu.hetero_scheduler = HeterogeneousScheduler({'p_cores': [0, 1], 'e_cores': [], 'smt_pairs': []})
+    modulo_cpu.hetero_scheduler._set_thread_cpus = lambda tid, cpus: placed.append((tid, list(cpus))) or True
+
+    gestor = GestorModulos.__new__(GestorModulos)
+    gestor.foreground_pid = os.getpid()
+    gestor.pinned_roles = {}
+    gestor.modulo_monitorizacion = monitor
+    gestor._modulo_cpu = modulo_cpu
+    gestor.modo_extreme = SimpleNamespace(activo=False)
+
+    # Tick 1: primera instantánea (sin cuota aún); tick 2: primera ronda en el top-K; tick 3: colocado
+    for _ in range(2):
+        gestor.manage_thread_profiling()
+    assert placed == [], f"Colocado antes de enter_rounds: {placed}"
+    gestor.manage_thread_profiling()
+    assert placed == [(7, [0])], f"Colocación tras 3 perfilados: {placed}"
+    gestor.manage_thread_profiling()
+    assert placed == [(7, [0])], "Un hilo ya colocado no se reasigna"
+
+    print("  ✓ El hilo caliente del primer plano se coloca tras enter_rounds perfilados")
+except Exception as e:
+    print(f"  ✗ Error en colocación desde el gestor: {e}")
+
+# Test 30: Plan global con hilos activos por CCD
+print("\n[Test 30] core_planner - Hilos activos y migraciones entre grupos L3 en el plan global")
+try:
+    from core_planner import GlobalAffinityPlanner
+
+    # Dos CCDs de 4 cores sin SMT
+    topology = {'p_cores': list(range(8)), 'e_cores': [], 'total': 8, 'smt_pairs': [],
+                'l3_cache_groups': [[0, 1, 2, 3], [4, 5, 6, 7]], 'numa_nodes': [list(range(8))]}
+    planner = GlobalAffinityPlanner(topology)
+    processes = {10: ('background', 2.0), 20: ('background', 1.0), 30: ('background', 1.0)}
+    planner.plan(processes, {10: 6})
+    assert planner.applied[10] == tuple(range(8)), "Seis hilos activos confinados a un CCD de 4 CPUs"
+    assert planner.applied[20] == (0, 1, 2, 3) and planner.applied[30] == (4, 5, 6, 7)
+    assert planner.cross_l3_migrations == 0
+
+    # Sin medida de hilos se usa la carga: 3 cores caben en un CCD
+    processes[40] = ('background', 3.0)
+    plan_diff = planner.plan(processes, {10: 6})
+    assert planner.applied[40] == (0, 1, 2, 3)
+    assert plan_diff.changes == {20: (4, 5, 6, 7), 40: (0, 1, 2, 3)}, f"Cambios: {plan_diff.changes}"
+    assert planner.cross_l3_migrations == 1, "Migración entre CCDs no contabilizada"
+
+    print("  ✓ Un proceso con más hilos activos que un CCD recibe todos los cores")
+    print("  ✓ Migraciones entre grupos L3 contabilizadas")
+except Exception as e:
+    print(f"  ✗ Error en plan global por CCD: {e}")
+
 print("\n" + "="*60)
 print("Tests completados")
 print("="*60)
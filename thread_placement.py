@@ -0,0 +1,124 @@
+"""
+Módulo de Colocación de Hilos Calientes
+---------------------------------------
+
+Decide qué hilos de un proceso en primer plano se fijan a cada core físico:
+los K hilos más calientes (según thread_profiler) van a los cores físicos
+mejor clasificados y el resto queda en manos del planificador del sistema.
+
+La colocación se reevalúa en cada ronda con histéresis: un hilo sólo entra
+tras varias rondas seguidas en el top-K, sólo sale tras varias rondas fuera
+de él, y un hilo ya colocado conserva su core mientras siga caliente. El
+módulo es de cálculo puro: devuelve los cambios y el llamador los aplica
+(p.ej. con SetThreadSelectedCpuSets).
+
+Dependencias externas:
+- logging: Biblioteca estándar de Python
+"""
+
+import logging
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("ThreadPlacement")
+
+# Cambios de una ronda: assign {tid: [CPUs lógicas]}, release [tids]
+PlacementChanges = namedtuple('PlacementChanges', ['assign', 'release'])
+
+
+class HotThreadPlacer:
+    """
+    Asigna los hilos más calientes de un proceso a los mejores cores físicos.
+
+    :param cores: CPUs lógicas de cada core físico, del mejor al peor
+                  (p.ej. core_planner.physical_cores_from_topology)
+    :param top_k: Hilos a colocar como máximo (por defecto la mitad de los cores)
+    :param enter_rounds: Rondas seguidas en el top-K para colocar un hilo
+    :param exit_rounds: Rondas seguidas fuera del top-K para liberarlo
+    :param swap_margin: Un hilo nuevo desplaza al colocado más frío que ya
+                        no está en el top-K si lo supera en este factor
+    """
+
+    def __init__(self, cores: Sequence[Sequence[int]], top_k: Optional[int] = None,
+                 enter_rounds: int = 2, exit_rounds: int = 3, swap_margin: float = 1.5) -> None:
+        self.cores: List[List[int]] = [list(c) for c in cores]
+        if top_k is None:
+            top_k = max(1, len(self.cores) // 2)
+        self.top_k = min(top_k, len(self.cores))
+        self.enter_rounds = enter_rounds
+        self.exit_rounds = exit_rounds
+        self.swap_margin = swap_margin
+        self.assigned: Dict[int, int] = {}        # tid → índice de core
+        self._in_rounds: Dict[int, int] = {}
+        self._out_rounds: Dict[int, int] = {}
+
+    def _free_slots(self) -> List[int]:
+        used = set(self.assigned.values())
+        return [i for i in range(self.top_k) if i not in used]
+
+    def update(self, hot_threads: Iterable[Tuple[int, float]]) -> PlacementChanges:
+        """
+        Incorpora una ronda de medidas.
+
+        :param hot_threads: (tid, fracción de core) de los hilos calientes,
+                            de mayor a menor (ThreadProfiler.hot_threads)
+        :return: PlacementChanges con las asignaciones nuevas y los hilos a liberar
+        """
+        hot = list(hot_threads)
+        share = dict(hot)
+        candidates = [tid for tid, _ in hot[:self.top_k]]
+        in_top = set(candidates)
+
+        for tid in in_top:
+            self._in_rounds[tid] = self._in_rounds.get(tid, 0) + 1
+            self._out_rounds.pop(tid, None)
+        for tid in list(self._in_rounds):
+            if tid not in in_top:
+                del self._in_rounds[tid]
+
+        release: List[int] = []
+        for tid in list(self.assigned):
+            if tid in in_top:
+                continue
+            self._out_rounds[tid] = self._out_rounds.get(tid, 0) + 1
+            if self._out_rounds[tid] >= self.exit_rounds:
+                release.append(self._release(tid))
+
+        assign: Dict[int, List[int]] = {}
+        for tid in candidates:
+            if tid in self.assigned or self._in_rounds.get(tid, 0) < self.enter_rounds:
+                continue
+            free = self._free_slots()
+            if not free:
+                # Desplazar al colocado más frío que haya salido del top-K
+                outgoing = [t for t in self.assigned if t not in in_top]
+                if not outgoing:
+                    break
+                coldest = min(outgoing, key=lambda t: share.get(t, 0.0))
+                if share[tid] < self.swap_margin * share.get(coldest, 0.0):
+                    continue
+                release.append(self._release(coldest))
+                free = self._free_slots()
+            self.assigned[tid] = free[0]
+            assign[tid] = self.cores[free[0]]
+
+        if assign or release:
+            logger.debug(f"[ThreadPlacement] {len(assign)} hilos colocados, {len(release)} liberados")
+        return PlacementChanges(assign, release)
+
+    def _release(self, tid: int) -> int:
+        del self.assigned[tid]
+        self._out_rounds.pop(tid, None)
+        return tid
+
+    def release_all(self) -> List[int]:
+        """Libera todos los hilos colocados (el proceso sale del primer plano)."""
+        released = list(self.assigned)
+        self.assigned.clear()
+        self._in_rounds.clear()
+        self._out_rounds.clear()
+        return released
+
+    def placement(self) -> Dict[int, List[int]]:
+        """Colocación actual: tid → CPUs lógicas."""
+        return {tid: self.cores[i] for tid, i in self.assigned.items()}
@@ -0,0 +1,305 @@
+"""
+Módulo de Perfilado de Hilos por Lotes
+--------------------------------------
+
+Perfila a la vez todos los hilos de un proceso a partir de una única
+instantánea por intervalo (nt_snapshot, registros con 'threads'), en lugar de
+medir cada hilo por separado con una espera de 0,5 s y recorrer la lista de
+hilos de todos los procesos para leer un solo contador.
+
+Por hilo se calcula, de forma vectorizada entre dos instantáneas, la
+fracción de un core consumida y la tasa de cambios de contexto; ambas se
+suavizan con medias de decaimiento exponencial para clasificar el hilo
+('cpu_intensive', 'interactive', 'io_bound') y detectar los hilos calientes.
+
+Dependencias externas:
+- numpy (opcional): Alineación y diferencias vectorizadas
+- logging: Biblioteca estándar de Python
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger("ThreadProfiler")
+
+# Umbrales de clasificación (fracción de un core, media suavizada)
+CPU_INTENSIVE_SHARE = 0.4
+IO_BOUND_SHARE = 0.1
+# Fracción de core a partir de la cual un hilo cuenta como activo
+ACTIVE_THREAD_SHARE = 0.05
+# Estados de hilo (KTHREAD_STATE): listo para ejecutarse sin CPU (Ready, Standby, DeferredReady) o en ejecución
+READY_STATES = frozenset({1, 3, 7})
+RUNNING_STATE = 2
+
+
+def classify(cpu_share: float, samples: int) -> str:
+    """Clasificación de un hilo según su uso medio de CPU."""
+    if samples == 0:
+        return 'unknown'
+    if cpu_share >= CPU_INTENSIVE_SHARE:
+        return 'cpu_intensive'
+    if cpu_share < IO_BOUND_SHARE:
+        return 'io_bound'
+    return 'interactive'
+
+
+class ThreadProfiler:
+    """
+    Perfil de todos los hilos de un proceso.
+
+    :param alpha: Peso de la muestra nueva en la media de decaimiento (0-1)
+    :param hot_threshold: Fracción de core mínima para considerar caliente un hilo
+    """
+
+    def __init__(self, alpha: float = 0.3, hot_threshold: float = 0.25) -> None:
+        self.alpha = alpha
+        self.hot_threshold = hot_threshold
+        self.timestamp: Optional[float] = None
+        self.updates: int = 0
+        # Columnas ordenadas por TID
+        self.tids: Sequence[int] = []
+        self.cpu_seconds: Sequence[float] = []
+        self.switches: Sequence[float] = []
+        self.cpu_share: Sequence[float] = []
+        self.switch_rate: Sequence[float] = []
+        self.samples: Sequence[int] = []
+        # Fracción suavizada de los hilos ejecutables que esperan CPU (None sin datos de estado)
+        self.ready_share: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.tids)
+
+    def update(self, threads: Iterable[Any], timestamp: float) -> int:
+        """
+        Incorpora los hilos de una instantánea.
+
+        Los hilos nuevos (o con contadores menores que los previos, TID
+        reutilizado) empiezan sin muestras; los que ya no aparecen se descartan.
+
+        :param threads: nt_snapshot.ThreadInfo del proceso
+        :param timestamp: Instante de la captura (segundos, monótono)
+        :return: Número de hilos con una muestra nueva
+        """
+        if self.timestamp is not None and timestamp <= self.timestamp:
+            return 0
+        elapsed = timestamp - self.timestamp if self.timestamp is not None else 0.0
+        threads = list(threads)
+        self._update_ready([getattr(t, 'state', None) for t in threads])
+        rows = sorted((t.tid, t.user_time + t.kernel_time, t.context_switches) for t in threads)
+
+        if NUMPY_AVAILABLE:
+            measured = self._update_numpy(rows, elapsed)
+        else:
+            measured = self._update_python(rows, elapsed)
+        self.timestamp = timestamp
+        self.updates += 1
+        return measured
+
+    def _update_ready(self, states: List[Optional[int]]) -> None:
+        """Suaviza la fracción de hilos listos que no tienen CPU en el instante de la captura."""
+        ready = sum(1 for s in states if s in READY_STATES)
+        runnable = ready + sum(1 for s in states if s == RUNNING_STATE)
+        if not runnable:
+            return
+        sample = ready / runnable
+        if self.ready_share is None:
+            self.ready_share = sample
+        else:
+            self.ready_share += self.alpha * (sample - self.ready_share)
+
+    def _update_numpy(self, rows: List[Tuple[int, float, int]], elapsed: float) -> int:
+        count = len(rows)
+        tids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=count)
+        cpu = np.fromiter((r[1] for r in rows), dtype=np.float64, count=count)
+        switches = np.fromiter((r[2] for r in rows), dtype=np.float64, count=count)
+        share = np.zeros(count)
+        rate = np.zeros(count)
+        samples = np.zeros(count, dtype=np.int64)
+
+        prev_tids = np.asarray(self.tids, dtype=np.int64)
+        if elapsed > 0 and len(prev_tids):
+            pos = np.minimum(np.searchsorted(prev_tids, tids), len(prev_tids) - 1)
+            d_cpu = cpu - np.asarray(self.cpu_seconds)[pos]
+            d_switches = switches - np.asarray(self.switches)[pos]
+            known = (prev_tids[pos] == tids) & (d_cpu >= 0) & (d_switches >= 0)
+
+            new_share = d_cpu / elapsed
+            new_rate = d_switches / elapsed
+            prev_samples = np.asarray(self.samples)[pos]
+            first = known & (prev_samples == 0)
+            again = known & (prev_samples > 0)
+            share[first] = new_share[first]
+            rate[first] = new_rate[first]
+            prev_share = np.asarray(self.cpu_share)[pos]
+            prev_rate = np.asarray(self.switch_rate)[pos]
+            share[again] = prev_share[again] + self.alpha * (new_share[again] - prev_share[again])
+            rate[again] = prev_rate[again] + self.alpha * (new_rate[again] - prev_rate[again])
+            samples[known] = prev_samples[known] + 1
+            measured = int(known.sum())
+        else:
+            measured = 0
+
+        self.tids, self.cpu_seconds, self.switches = tids, cpu, switches
+        self.cpu_share, self.switch_rate, self.samples = share, rate, samples
+        return measured
+
+    def _update_python(self, rows: List[Tuple[int, float, int]], elapsed: float) -> int:
+        index = {tid: i for i, tid in enumerate(self.tids)} if elapsed > 0 else {}
+        share, rate, samples = [], [], []
+        measured = 0
+        for tid, cpu, switches in rows:
+            i = index.get(tid)
+            d_cpu = cpu - self.cpu_seconds[i] if i is not None else -1.0
+            d_switches = switches - self.switches[i] if i is not None else -1.0
+            if d_cpu < 0 or d_switches < 0:
+                share.append(0.0)
+                rate.append(0.0)
+                samples.append(0)
+                continue
+            new_share, new_rate = d_cpu / elapsed, d_switches / elapsed
+            if self.samples[i] == 0:
+                share.append(new_share)
+                rate.append(new_rate)
+            else:
+                share.append(self.cpu_share[i] + self.alpha * (new_share - self.cpu_share[i]))
+                rate.append(self.switch_rate[i] + self.alpha * (new_rate - self.switch_rate[i]))
+            samples.append(self.samples[i] + 1)
+            measured += 1
+
+        self.tids = [r[0] for r in rows]
+        self.cpu_seconds = [r[1] for r in rows]
+        self.switches = [r[2] for r in rows]
+        self.cpu_share, self.switch_rate, self.samples = share, rate, samples
+        return measured
+
+    def hot_threads(self, n: Optional[int] = None,
+                    threshold: Optional[float] = None) -> List[Tuple[int, float]]:
+        """
+        Hilos cuyo uso medio supera el umbral, de mayor a menor.
+
+        :param n: Máximo de hilos a devolver (todos por defecto)
+        :param threshold: Fracción de core mínima (por defecto hot_threshold)
+        :return: Lista de (tid, fracción de core)
+        """
+        threshold = self.hot_threshold if threshold is None else threshold
+        if NUMPY_AVAILABLE and len(self.tids):
+            share = np.asarray(self.cpu_share)
+            idx = np.flatnonzero((share >= threshold) & (np.asarray(self.samples) > 0))
+            idx = idx[np.argsort(-share[idx], kind='stable')]
+            hot = [(int(self.tids[i]), float(share[i])) for i in idx]
+        else:
+            hot = sorted(
+                ((tid, s) for tid, s, c in zip(self.tids, self.cpu_share, self.samples)
+                 if c > 0 and s >= threshold),
+                key=lambda item: -item[1]
+            )
+        return hot if n is None else hot[:n]
+
+    def profile(self, tid: int) -> Optional[Dict[str, Any]]:
+        """Perfil de un hilo (None si no se ha visto)."""
+        for i, known in enumerate(self.tids):
+            if known == tid:
+                return self._profile_at(i)
+        return None
+
+    def profiles(self) -> Dict[int, Dict[str, Any]]:
+        """Perfil de todos los hilos, por TID."""
+        return {int(tid): self._profile_at(i) for i, tid in enumerate(self.tids)}
+
+    def _profile_at(self, i: int) -> Dict[str, Any]:
+        share = float(self.cpu_share[i])
+        samples = int(self.samples[i])
+        return {
+            'cpu_time': share,
+            'context_switches': float(self.switch_rate[i]),
+            'samples': samples,
+            'classification': classify(share, samples),
+        }
+
+
+class ProcessThreadProfiles:
+    """
+    Perfiladores de hilos de varios procesos alimentados por la misma instantánea.
+
+    Un PID reutilizado (create_time distinto) reinicia su perfil.
+    """
+
+    def __init__(self, alpha: float = 0.3, hot_threshold: float = 0.25) -> None:
+        self.alpha = alpha
+        self.hot_threshold = hot_threshold
+        self.profilers: Dict[int, ThreadProfiler] = {}
+        self._create_times: Dict[int, float] = {}
+
+    def update(self, records: Iterable[Dict[str, Any]], pids: Iterable[int], timestamp: float) -> int:
+        """
+        Actualiza los perfiles de los PIDs indicados.
+
+        :param records: Registros de ProcessSnapshotEngine.get_all_processes(include_threads=True)
+        :param pids: Procesos a perfilar; los demás perfiles se descartan
+        :param timestamp: Instante de la captura
+        :return: Hilos medidos en esta muestra
+        """
+        wanted = set(pids)
+        measured = 0
+        seen = set()
+        for record in records:
+            pid = record.get('pid')
+            if pid not in wanted or 'threads' not in record:
+                continue
+            seen.add(pid)
+            create_time = record.get('create_time', 0.0)
+            profiler = self.profilers.get(pid)
+            if profiler is None or self._create_times.get(pid) != create_time:
+                profiler = self.profilers[pid] = ThreadProfiler(self.alpha, self.hot_threshold)
+                self._create_times[pid] = create_time
+            measured += profiler.update(record['threads'], timestamp)
+
+        for pid in list(self.profilers):
+            if pid not in seen:
+                del self.profilers[pid]
+                self._create_times.pop(pid, None)
+        logger.debug(f"[ThreadProfiler] {measured} hilos medidos en {len(seen)} procesos")
+        return measured
+
+    def get(self, pid: int) -> Optional[ThreadProfiler]:
+        return self.profilers.get(pid)
+
+    def hot_threads(self, pid: int, n: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Hilos calientes de un proceso (vacío si no se está perfilando)."""
+        profiler = self.profilers.get(pid)
+        return profiler.hot_threads(n) if profiler is not None else []
+
+    def active_thread_count(self, pid: int, threshold: float = ACTIVE_THREAD_SHARE) -> Optional[int]:
+        """
+        Hilos del proceso que consumen CPU de forma sostenida.
+
+        :return: Número de hilos, o None si el proceso aún no tiene dos muestras
+        """
+        profiler = self.profilers.get(pid)
+        if profiler is None or profiler.updates < 2:
+            return None
+        return len(profiler.hot_threads(threshold=threshold))
+
+    def ready_fraction(self, pid: int) -> Optional[float]:
+        """
+        Fracción suavizada de los hilos ejecutables del proceso que esperan CPU
+        (estado Ready): mide la contención de planificación en sus cores.
+
+        :return: Fracción 0-1, o None si aún no se ha visto ningún hilo ejecutable
+        """
+        profiler = self.profilers.get(pid)
+        return profiler.ready_share if profiler is not None else None
+
+    def summary(self, n: int = 5) -> Dict[int, List[Dict[str, float]]]:
+        """Hilos calientes por proceso en formato serializable."""
+        return {
+            pid: [{'tid': tid, 'cpu_share': round(share, 3)} for tid, share in profiler.hot_threads(n)]
+            for pid, profiler in self.profilers.items()
+        }
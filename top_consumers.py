@@ -0,0 +1,133 @@
+"""
+Módulo de Principales Consumidores de Recursos
+----------------------------------------------
+
+Mantiene, para cada métrica (CPU, crecimiento del working set, tasa de E/S,
+fallos de página y working set), los N procesos que más consumen, calculados
+sobre las diferencias entre instantáneas (process_table.SnapshotDiff). Cada
+muestra cuesta O(n log N) con montículos de tamaño acotado (o argpartition
+con NumPy) en lugar de ordenar la lista completa de procesos.
+
+Dependencias externas:
+- numpy (opcional): Selección vectorizada con argpartition
+- heapq, logging: Biblioteca estándar de Python
+"""
+
+import heapq
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger("TopConsumers")
+
+# Métrica → atributo de SnapshotDiff (o columna de la tabla para 'working_set')
+METRICS: Dict[str, str] = {
+    'cpu_percent': 'cpu_percent',
+    'ws_growth': 'ws_growth',
+    'io_rate': 'io_rate',
+    'fault_rate': 'fault_rate',
+    'working_set': 'working_set',
+}
+
+# Entrada de un ranking: (valor, pid, nombre)
+Ranked = Tuple[float, int, str]
+
+
+class TopConsumerTracker:
+    """
+    Rankings de los N mayores consumidores por métrica, actualizados en cada muestra.
+
+    Se conservan 'n + slack' candidatos por métrica para poder excluir
+    procesos (primer plano, protegidos) en la consulta sin perder posiciones.
+    """
+
+    def __init__(self, n: int = 10, slack: int = 10,
+                 metrics: Optional[Iterable[str]] = None) -> None:
+        self.n: int = n
+        self.capacity: int = n + slack
+        self.metrics: List[str] = list(metrics) if metrics is not None else list(METRICS)
+        self.rankings: Dict[str, List[Ranked]] = {metric: [] for metric in self.metrics}
+        self.samples: int = 0
+
+    def _values(self, diff: Any, metric: str):
+        if metric == 'working_set':
+            return diff.table.working_set
+        return getattr(diff, METRICS[metric])
+
+    def _select(self, values) -> List[Tuple[float, int]]:
+        """Devuelve (valor, posición) de los 'capacity' mayores, de mayor a menor."""
+        k = self.capacity
+        count = len(values)
+        if count == 0:
+            return []
+        if NUMPY_AVAILABLE:
+            values = np.asarray(values)
+            if count > k:
+                idx = np.argpartition(values, count - k)[count - k:]
+            else:
+                idx = np.arange(count)
+            idx = idx[np.argsort(values[idx])[::-1]]
+            return [(float(values[i]), int(i)) for i in idx if values[i] > 0]
+
+        # Montículo mínimo de tamaño k: O(n log k)
+        heap: List[Tuple[float, int]] = []
+        for i, value in enumerate(values):
+            if value <= 0:
+                continue
+            if len(heap) < k:
+                heapq.heappush(heap, (value, i))
+            elif value > heap[0][0]:
+                heapq.heapreplace(heap, (value, i))
+        return sorted(heap, reverse=True)
+
+    def update(self, diff: Any) -> None:
+        """
+        Incorpora una muestra (SnapshotDiff) y recalcula los rankings.
+
+        La primera diferencia no tiene tasas (no hay instantánea previa), así
+        que sólo actualiza el ranking de working set.
+        """
+        table = diff.table
+        for metric in self.metrics:
+            if diff.elapsed <= 0 and metric != 'working_set':
+                continue
+            selected = self._select(self._values(diff, metric))
+            self.rankings[metric] = [
+                (value, int(table.pid[i]), table.name(i)) for value, i in selected
+            ]
+        self.samples += 1
+
+    def top(self, metric: str, n: Optional[int] = None,
+            exclude: Iterable[int] = ()) -> List[Ranked]:
+        """
+        Mayores consumidores de una métrica.
+
+        :param metric: Una de METRICS
+        :param n: Número de entradas (por defecto self.n)
+        :param exclude: PIDs a omitir (p.ej. el árbol en primer plano)
+        :return: Lista de (valor, pid, nombre) de mayor a menor
+        """
+        n = self.n if n is None else n
+        excluded = set(exclude)
+        result = []
+        for entry in self.rankings.get(metric, ()):
+            if entry[1] in excluded:
+                continue
+            result.append(entry)
+            if len(result) >= n:
+                break
+        return result
+
+    def summary(self, n: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+        """Rankings en formato serializable (para la GUI y get_status)."""
+        return {
+            metric: [{'pid': pid, 'name': name, 'value': round(value, 2)}
+                     for value, pid, name in self.top(metric, n)]
+            for metric in self.metrics
+        }
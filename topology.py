@@ -0,0 +1,319 @@
+"""
+Módulo de Topología de CPU
+--------------------------
+
+Obtiene la topología real de la CPU a partir del búfer que devuelve
+GetLogicalProcessorInformationEx(RelationAll): cores físicos con su
+EfficiencyClass (P-cores/E-cores en arquitecturas híbridas) y sus hermanos
+SMT, grupos de CPUs que comparten cada caché L2/L3, paquetes y nodos NUMA.
+
+El analizador es independiente de la plataforma: puede probarse con búferes
+capturados en Windows (save_capture / load_capture) o sintéticos. La
+topología resultante se guarda en caché junto al módulo, indexada por la
+firma de la CPU, de modo que un cambio de procesador la invalida.
+
+Dependencias externas:
+- ctypes: Biblioteca estándar (la llamada a kernel32 sólo se carga en Windows)
+- struct, hashlib, json, os, platform, logging: Biblioteca estándar de Python
+"""
+
+import ctypes
+import hashlib
+import json
+import logging
+import os
+import platform
+import struct
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("Topology")
+
+# LOGICAL_PROCESSOR_RELATIONSHIP
+RELATION_PROCESSOR_CORE = 0
+RELATION_NUMA_NODE = 1
+RELATION_CACHE = 2
+RELATION_PROCESSOR_PACKAGE = 3
+RELATION_GROUP = 4
+RELATION_ALL = 0xFFFF
+
+# PROCESSOR_RELATIONSHIP.Flags
+LTP_PC_SMT = 0x1
+
+# PROCESSOR_CACHE_TYPE
+CACHE_TYPES = {0: 'unified', 1: 'instruction', 2: 'data', 3: 'trace'}
+
+ERROR_INSUFFICIENT_BUFFER = 122
+
+# Cabecera de SYSTEM_LOGICAL_PROCESSOR_INFORMATION_EX: Relationship, Size
+HEADER = struct.Struct('<II')
+# GROUP_AFFINITY (x64, 16 bytes): Mask (KAFFINITY), Group, Reserved[3]
+GROUP_AFFINITY = struct.Struct('<QH6x')
+# PROCESSOR_RELATIONSHIP: Flags, EfficiencyClass, Reserved[20], GroupCount; GroupMask[] en +24
+PROCESSOR_RELATIONSHIP = struct.Struct('<BB20xH')
+# NUMA_NODE_RELATIONSHIP: NodeNumber, Reserved[18], GroupCount; GroupMask(s) en +24
+NUMA_NODE_RELATIONSHIP = struct.Struct('<I18xH')
+# CACHE_RELATIONSHIP: Level, Associativity, LineSize, CacheSize, Type, Reserved[18], GroupCount; GroupMask(s) en +32
+CACHE_RELATIONSHIP = struct.Struct('<BBHII18xH')
+# GROUP_RELATIONSHIP: MaximumGroupCount, ActiveGroupCount, Reserved[20]; GroupInfo[] en +24
+GROUP_RELATIONSHIP = struct.Struct('<HH20x')
+# PROCESSOR_GROUP_INFO (48 bytes): MaximumProcessorCount, ActiveProcessorCount, Reserved[38], ActiveProcessorMask
+PROCESSOR_GROUP_INFO = struct.Struct('<BB38xQ')
+
+# Desplazamientos de los GROUP_AFFINITY respecto al inicio de cada estructura (tras la cabecera)
+_PROCESSOR_MASKS_OFFSET = 24
+_NUMA_MASKS_OFFSET = 24
+_CACHE_MASKS_OFFSET = 32
+_GROUP_INFO_OFFSET = 24
+
+
+def _bits(mask: int) -> List[int]:
+    result = []
+    bit = 0
+    while mask:
+        if mask & 1:
+            result.append(bit)
+        mask >>= 1
+        bit += 1
+    return result
+
+
+def parse_logical_processor_information(buffer: Any) -> Dict[str, Any]:
+    """
+    Analiza el búfer de GetLogicalProcessorInformationEx(RelationAll).
+
+    Las CPUs se numeran de forma global: el bit b del grupo g es la CPU
+    (CPUs activas de los grupos anteriores) + b, como las numera Windows.
+
+    :param buffer: bytes, bytearray o memoryview con los registros
+    :return: {'cores', 'caches', 'packages', 'numa_nodes', 'groups'}; cada
+             core es {'logical', 'efficiency_class', 'smt'} y cada caché
+             {'level', 'type', 'size', 'line_size', 'associativity', 'logical'}
+    """
+    view = memoryview(buffer)
+    records = []
+    groups: List[int] = []
+    offset = 0
+    while offset + HEADER.size <= len(view):
+        relationship, size = HEADER.unpack_from(view, offset)
+        if size < HEADER.size:
+            break
+        body = offset + HEADER.size
+        records.append((relationship, body))
+        if relationship == RELATION_GROUP:
+            _, active_groups = GROUP_RELATIONSHIP.unpack_from(view, body)
+            for g in range(active_groups):
+                _, active, _ = PROCESSOR_GROUP_INFO.unpack_from(
+                    view, body + _GROUP_INFO_OFFSET + g * PROCESSOR_GROUP_INFO.size
+                )
+                groups.append(active)
+        offset += size
+
+    group_base = [sum(groups[:g]) for g in range(len(groups))]
+
+    def logical_from_masks(start: int, count: int) -> List[int]:
+        cpus = []
+        for i in range(max(count, 1)):  # GroupCount 0 en sistemas antiguos = una sola máscara
+            mask, group = GROUP_AFFINITY.unpack_from(view, start + i * GROUP_AFFINITY.size)
+            base = group_base[group] if group < len(group_base) else group * 64
+            cpus.extend(base + bit for bit in _bits(mask))
+        return sorted(cpus)
+
+    result: Dict[str, Any] = {'cores': [], 'caches': [], 'packages': [], 'numa_nodes': [], 'groups': groups}
+    for relationship, body in records:
+        if relationship in (RELATION_PROCESSOR_CORE, RELATION_PROCESSOR_PACKAGE):
+            flags, efficiency_class, group_count = PROCESSOR_RELATIONSHIP.unpack_from(view, body)
+            logical = logical_from_masks(body + _PROCESSOR_MASKS_OFFSET, group_count)
+            if relationship == RELATION_PROCESSOR_CORE:
+                result['cores'].append({
+                    'logical': logical,
+                    'efficiency_class': efficiency_class,
+                    'smt': bool(flags & LTP_PC_SMT),
+                })
+            else:
+                result['packages'].append(logical)
+        elif relationship == RELATION_NUMA_NODE:
+            node, group_count = NUMA_NODE_RELATIONSHIP.unpack_from(view, body)
+            result['numa_nodes'].append({
+                'node': node,
+                'logical': logical_from_masks(body + _NUMA_MASKS_OFFSET, group_count),
+            })
+        elif relationship == RELATION_CACHE:
+            level, associativity, line_size, size, cache_type, group_count = \
+                CACHE_RELATIONSHIP.unpack_from(view, body)
+            result['caches'].append({
+                'level': level,
+                'type': CACHE_TYPES.get(cache_type, 'unknown'),
+                'size': size,
+                'line_size': line_size,
+                'associativity': associativity,
+                'logical': logical_from_masks(body + _CACHE_MASKS_OFFSET, group_count),
+            })
+    result['numa_nodes'].sort(key=lambda n: n['node'])
+    return result
+
+
+def build_topology(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convierte el resultado del analizador al diccionario de topología que usan
+    CPPTopology, cpu.py y core_planner ('p_cores', 'e_cores', 'smt_pairs',
+    'l3_cache_groups', 'numa_nodes', ...).
+
+    Con más de una EfficiencyClass, los cores de la clase más alta son
+    P-cores y el resto E-cores; con una sola clase todos son P-cores.
+    """
+    cores = sorted(parsed['cores'], key=lambda c: c['logical'][0] if c['logical'] else 0)
+    classes = {c['efficiency_class'] for c in cores}
+    top_class = max(classes) if classes else 0
+    hybrid = len(classes) > 1
+
+    p_cores: List[int] = []
+    e_cores: List[int] = []
+    for c in cores:
+        (p_cores if not hybrid or c['efficiency_class'] == top_class else e_cores).extend(c['logical'])
+
+    def cache_groups(level: int) -> List[List[int]]:
+        groups = {tuple(c['logical']) for c in parsed['caches']
+                  if c['level'] == level and c['type'] in ('unified', 'data') and c['logical']}
+        return [list(g) for g in sorted(groups)]
+
+    logical_total = sorted({cpu for c in cores for cpu in c['logical']})
+    return {
+        'source': 'glpiex',
+        'total_physical_cores': len(cores),
+        'total_logical_cores': len(logical_total),
+        'hybrid': hybrid,
+        'p_cores': sorted(p_cores),
+        'e_cores': sorted(e_cores),
+        'smt_pairs': [list(c['logical']) for c in cores if len(c['logical']) > 1],
+        'efficiency_class': {str(cpu): c['efficiency_class'] for c in cores for cpu in c['logical']},
+        'physical_cores': [list(c['logical']) for c in cores],
+        'l2_cache_groups': cache_groups(2),
+        'l3_cache_groups': cache_groups(3) or [logical_total],
+        'numa_nodes': [n['logical'] for n in parsed['numa_nodes']] or [logical_total],
+        'packages': parsed['packages'],
+    }
+
+
+def guess_topology(physical_cores: int, logical_cores: int) -> Dict[str, Any]:
+    """
+    Topología aproximada a partir de los recuentos (sólo cuando no se puede
+    consultar GetLogicalProcessorInformationEx, p.ej. fuera de Windows).
+    Supone hermanos SMT consecutivos y ninguna arquitectura híbrida.
+    """
+    per_core = max(1, logical_cores // max(1, physical_cores))
+    cores = [list(range(i, min(i + per_core, logical_cores)))
+             for i in range(0, logical_cores, per_core)]
+    all_cpus = list(range(logical_cores))
+    return {
+        'source': 'guess',
+        'total_physical_cores': len(cores),
+        'total_logical_cores': logical_cores,
+        'hybrid': False,
+        'p_cores': all_cpus,
+        'e_cores': [],
+        'smt_pairs': [c for c in cores if len(c) > 1],
+        'efficiency_class': {str(cpu): 0 for cpu in all_cpus},
+        'physical_cores': cores,
+        'l2_cache_groups': [],
+        'l3_cache_groups': [all_cpus],
+        'numa_nodes': [all_cpus],
+        'packages': [all_cpus],
+    }
+
+
+# --- Consulta en Windows ---
+
+_kernel32 = None
+
+
+def _get_kernel32():
+    """Carga kernel32 de forma diferida para que el módulo se importe en cualquier plataforma."""
+    global _kernel32
+    if _kernel32 is None:
+        _kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        _kernel32.GetLogicalProcessorInformationEx.argtypes = [
+            ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(ctypes.c_ulong)
+        ]
+        _kernel32.GetLogicalProcessorInformationEx.restype = ctypes.c_int
+    return _kernel32
+
+
+def query_logical_processor_information() -> bytes:
+    """
+    Llama a GetLogicalProcessorInformationEx(RelationAll).
+
+    :return: Búfer crudo con todos los registros
+    :raise OSError: Si la llamada falla
+    """
+    kernel32 = _get_kernel32()
+    length = ctypes.c_ulong(0)
+    kernel32.GetLogicalProcessorInformationEx(RELATION_ALL, None, ctypes.byref(length))
+    error = ctypes.get_last_error()
+    if error != ERROR_INSUFFICIENT_BUFFER:
+        raise ctypes.WinError(error)
+    buffer = ctypes.create_string_buffer(length.value)
+    if not kernel32.GetLogicalProcessorInformationEx(RELATION_ALL, buffer, ctypes.byref(length)):
+        raise ctypes.WinError(ctypes.get_last_error())
+    return buffer.raw[:length.value]
+
+
+def save_capture(path: str) -> None:
+    """Guarda el búfer crudo de este equipo para pruebas fuera de Windows."""
+    with open(path, 'wb') as f:
+        f.write(query_logical_processor_information())
+
+
+def load_capture(path: str) -> Dict[str, Any]:
+    """Construye la topología a partir de un búfer guardado con save_capture."""
+    with open(path, 'rb') as f:
+        return build_topology(parse_logical_processor_information(f.read()))
+
+
+# --- Caché indexada por la firma de la CPU ---
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cpu_topology_cache.json")
+
+
+def cpu_signature() -> str:
+    """
+    Firma de la CPU: identificador del procesador (en Windows incluye
+    familia, modelo y stepping), arquitectura y número de CPUs lógicas.
+    """
+    parts = [platform.processor(), platform.machine(), str(os.cpu_count())]
+    return hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()
+
+
+def load_topology(cache_file: Optional[str] = DEFAULT_CACHE_FILE, fallback_counts=None) -> Dict[str, Any]:
+    """
+    Devuelve la topología de la CPU, de la caché si su firma coincide o
+    consultando el sistema (y actualizando la caché) si no.
+
+    :param cache_file: Ruta de la caché (None para no usarla)
+    :param fallback_counts: Callable que devuelve (cores físicos, lógicos) si
+                            la consulta nativa no está disponible
+    """
+    signature = cpu_signature()
+    if cache_file:
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('signature') == signature and 'topology' in cached:
+                return cached['topology']
+        except (OSError, ValueError):
+            pass
+
+    try:
+        topology = build_topology(parse_logical_processor_information(query_logical_processor_information()))
+    except (OSError, AttributeError) as e:
+        logger.warning(f"[Topology] GetLogicalProcessorInformationEx no disponible ({e}); topología aproximada")
+        physical, logical = fallback_counts() if fallback_counts else (os.cpu_count() or 1, os.cpu_count() or 1)
+        # Una topología aproximada no se guarda: se reintenta la consulta real en el siguiente inicio
+        return guess_topology(physical, logical)
+
+    if cache_file:
+        try:
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'signature': signature, 'topology': topology}, f, indent=4)
+        except OSError as e:
+            logger.warning(f"[Topology] No se pudo guardar la caché: {e}")
+    return topology
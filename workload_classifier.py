@@ -0,0 +1,261 @@
+"""
+Módulo de Clasificación de Cargas por Comportamiento
+----------------------------------------------------
+
+Etiqueta cada proceso como render, encode, game, interactive o batch a partir
+de lo que hace y no de cómo se llama:
+
+- Carga sostenida en todos los cores (fracción de muestras en las que el
+  proceso ocupa casi todas las CPUs lógicas que tiene permitidas).
+- Hilos activos (hilos con una fracción de core apreciable, thread_profiler).
+- Caída de frecuencia bajo carga (las cargas AVX pesadas bajan el reloj).
+- Patrón de E/S (un codificador lee y escribe de forma continua).
+- Módulos cargados (APIs gráficas, runtimes de juego, bibliotecas de códec).
+
+Las medias decaen (ventana exponencial), de modo que la etiqueta sigue al
+comportamiento reciente del proceso. La etiqueta se guarda por ejecutable
+junto al módulo, de modo que una nueva instancia de un programa conocido
+recibe su política desde el primer momento; la observación continúa y la
+corrige si el comportamiento cambia.
+
+Dependencias externas:
+- json, logging, os: Biblioteca estándar de Python
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger("WorkloadClassifier")
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".workload_tags.json")
+
+TAG_RENDER = 'render'
+TAG_ENCODE = 'encode'
+TAG_GAME = 'game'
+TAG_INTERACTIVE = 'interactive'
+TAG_BATCH = 'batch'
+TAGS = (TAG_RENDER, TAG_ENCODE, TAG_GAME, TAG_INTERACTIVE, TAG_BATCH)
+
+# Módulos que delatan el tipo de carga (nombres en minúsculas)
+GRAPHICS_MODULES = frozenset({'d3d9.dll', 'd3d11.dll', 'd3d12.dll', 'vulkan-1.dll', 'opengl32.dll'})
+GAME_RUNTIME_MODULES = frozenset({
+    'xinput1_3.dll', 'xinput1_4.dll', 'xinput9_1_0.dll', 'dinput8.dll',
+    'steam_api.dll', 'steam_api64.dll', 'eossdk-win64-shipping.dll', 'gameoverlayrenderer64.dll',
+})
+MEDIA_MODULE_PREFIXES = ('avcodec', 'x264', 'x265', 'libx264', 'libx265', 'svtav1', 'libsvtav1',
+                         'nvencodeapi', 'amfrt', 'libmfxhw', 'mfh264enc', 'mfh265enc')
+
+# Umbrales de clasificación
+ALL_CORE_LOAD = 0.75          # fracción de las CPUs lógicas para contar una muestra como "todos los cores"
+SUSTAINED_FRACTION = 0.6      # fracción de muestras a carga de todos los cores
+FREQUENCY_DROP = 0.92         # frecuencia/pico por debajo del cual el reloj ha bajado
+STREAMING_IO_RATE = 4 * 1024 * 1024   # bytes/s de E/S continua de un codificador
+GAME_LOAD = 1.0               # cores de carga media de un juego
+INTERACTIVE_LOAD = 0.3        # cores de carga media de un programa interactivo
+INTERACTIVE_THREADS = 2.0     # hilos activos medios de un programa interactivo
+WINDOW_ALPHA = 0.1            # peso de la muestra nueva en las medias (≈ últimas 20 muestras)
+
+
+class WorkloadFingerprint:
+    """
+    Medias con decaimiento exponencial del comportamiento observado de un proceso.
+
+    :param alpha: Peso de la muestra nueva en las medias (0-1)
+    """
+
+    def __init__(self, alpha: float = WINDOW_ALPHA) -> None:
+        self.alpha = alpha
+        self.samples = 0
+        self.mean_load = 0.0
+        self.all_core_fraction = 0.0
+        self.mean_threads = 0.0
+        self.mean_io_rate = 0.0
+        self.loaded_freq_ratio: Optional[float] = None
+        self.modules: frozenset = frozenset()
+
+    def _decay(self, mean: float, value: float) -> float:
+        return mean + self.alpha * (value - mean)
+
+    def add(self, load: float, allowed_cpus: int, active_threads: int,
+            freq_ratio: Optional[float], io_rate: float) -> None:
+        """
+        Incorpora una muestra.
+
+        :param load: Carga del proceso en cores equivalentes
+        :param allowed_cpus: CPUs lógicas que el proceso tiene permitidas (su afinidad)
+        :param active_threads: Hilos con una fracción de core apreciable
+        :param freq_ratio: Frecuencia actual / pico observado (None si se desconoce)
+        :param io_rate: Bytes/s de E/S del proceso
+        """
+        all_core = load >= ALL_CORE_LOAD * max(allowed_cpus, 1)
+        self.samples += 1
+        if self.samples == 1:
+            self.mean_load = load
+            self.all_core_fraction = 1.0 if all_core else 0.0
+            self.mean_threads = float(active_threads)
+            self.mean_io_rate = io_rate
+        else:
+            self.mean_load = self._decay(self.mean_load, load)
+            self.all_core_fraction = self._decay(self.all_core_fraction, 1.0 if all_core else 0.0)
+            self.mean_threads = self._decay(self.mean_threads, active_threads)
+            self.mean_io_rate = self._decay(self.mean_io_rate, io_rate)
+        # La frecuencia sólo es significativa mientras el proceso carga todos sus cores
+        if all_core and freq_ratio is not None:
+            if self.loaded_freq_ratio is None:
+                self.loaded_freq_ratio = freq_ratio
+            else:
+                self.loaded_freq_ratio = self._decay(self.loaded_freq_ratio, freq_ratio)
+
+
+def classify(fingerprint: WorkloadFingerprint) -> str:
+    """
+    Etiqueta de un proceso según su comportamiento.
+
+    - Carga sostenida en todos los cores: encode si hay E/S continua o
+      bibliotecas de códec; render si el reloj cae (AVX); batch si no.
+    - API gráfica con runtime de juego o carga de al menos un core: game.
+    - Carga media baja con pocos hilos activos: interactive; el resto
+      (incluido el trabajo repartido en muchos hilos poco cargados), batch.
+    """
+    modules = fingerprint.modules
+    media = any(m.startswith(MEDIA_MODULE_PREFIXES) for m in modules)
+    if fingerprint.all_core_fraction >= SUSTAINED_FRACTION:
+        if media or fingerprint.mean_io_rate >= STREAMING_IO_RATE:
+            return TAG_ENCODE
+        ratio = fingerprint.loaded_freq_ratio
+        if ratio is not None and ratio <= FREQUENCY_DROP:
+            return TAG_RENDER
+        return TAG_BATCH
+    if modules & GRAPHICS_MODULES and (modules & GAME_RUNTIME_MODULES or fingerprint.mean_load >= GAME_LOAD):
+        return TAG_GAME
+    if fingerprint.mean_load < INTERACTIVE_LOAD and fingerprint.mean_threads <= INTERACTIVE_THREADS:
+        return TAG_INTERACTIVE
+    return TAG_BATCH
+
+
+def workload_policy(tag: Optional[str], all_cores: Sequence[int]) -> Dict[str, object]:
+    """
+    Afinidad y prioridad para una etiqueta.
+
+    Render y encode se limitan a la mitad de los cores para contener el
+    thermal throttling de AVX; batch baja de prioridad. Game e interactive
+    no cambian (los gestionan sus propias rutas).
+
+    :return: {'affinity': [CPUs], 'priority': nombre de clase} con las claves que apliquen
+    """
+    half = list(all_cores[:max(1, len(all_cores) // 2)])
+    if tag == TAG_RENDER:
+        return {'affinity': half, 'priority': 'ABOVE_NORMAL'}
+    if tag == TAG_ENCODE:
+        return {'affinity': half, 'priority': 'NORMAL'}
+    if tag == TAG_BATCH:
+        return {'priority': 'BELOW_NORMAL'}
+    return {}
+
+
+class WorkloadClassifier:
+    """
+    Observa los procesos gestionados y mantiene su etiqueta, cacheada por ejecutable.
+
+    :param logical_cpus: CPUs lógicas del sistema
+    :param min_samples: Muestras necesarias antes de clasificar un proceso
+    :param cache_file: Fichero JSON de etiquetas por ejecutable (None para no persistir)
+    """
+
+    def __init__(self, logical_cpus: int, min_samples: int = 20,
+                 cache_file: Optional[str] = DEFAULT_CACHE_FILE) -> None:
+        self.logical_cpus = max(int(logical_cpus), 1)
+        self.min_samples = min_samples
+        self.cache_file = cache_file
+        self.tags: Dict[str, str] = self._load()
+        self.fingerprints: Dict[int, WorkloadFingerprint] = {}
+        self.exes: Dict[int, str] = {}
+        self.observed: Dict[int, str] = {}
+        self.peak_freq: List[float] = []
+
+    def _load(self) -> Dict[str, str]:
+        if not self.cache_file:
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return {exe: tag for exe, tag in json.load(f).items() if tag in TAGS}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _save(self) -> None:
+        if not self.cache_file:
+            return
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(self.tags, f, indent=4, sort_keys=True)
+        except OSError as e:
+            logger.warning(f"[WorkloadClassifier] No se pudo guardar la caché: {e}")
+
+    def frequency_ratio(self, frequencies: Sequence[float]) -> Optional[float]:
+        """
+        Frecuencia media actual respecto al pico observado por CPU.
+
+        :param frequencies: Frecuencia actual de cada CPU lógica (MHz)
+        :return: Cociente 0-1, o None sin datos
+        """
+        if not frequencies:
+            return None
+        if len(self.peak_freq) != len(frequencies):
+            self.peak_freq = list(frequencies)
+        else:
+            self.peak_freq = [max(p, f) for p, f in zip(self.peak_freq, frequencies)]
+        peak = sum(self.peak_freq)
+        return sum(frequencies) / peak if peak > 0 else None
+
+    def needs_modules(self, pid: int) -> bool:
+        """True si aún no se han leído los módulos cargados del proceso."""
+        return pid not in self.fingerprints
+
+    def observe(self, pid: int, exe: str, load: float, active_threads: int,
+                freq_ratio: Optional[float], io_rate: float,
+                modules: Optional[Iterable[str]] = None,
+                allowed_cpus: Optional[int] = None) -> Optional[str]:
+        """
+        Incorpora una muestra de un proceso y lo (re)clasifica al reunir suficientes.
+
+        :param exe: Ruta del ejecutable (clave de la caché)
+        :param modules: Nombres de los módulos cargados (basta con pasarlos la primera vez)
+        :param allowed_cpus: CPUs de la afinidad del proceso (None: todas las CPUs lógicas);
+                             un render confinado a la mitad sigue contando como carga de todos sus cores
+        :return: Etiqueta actual del proceso
+        """
+        exe = exe.lower()
+        fingerprint = self.fingerprints.get(pid)
+        if fingerprint is None or self.exes.get(pid) != exe:
+            fingerprint = self.fingerprints[pid] = WorkloadFingerprint()
+            self.exes[pid] = exe
+            self.observed.pop(pid, None)
+        if modules is not None:
+            fingerprint.modules = frozenset(m.lower() for m in modules)
+        fingerprint.add(load, allowed_cpus or self.logical_cpus, active_threads, freq_ratio, io_rate)
+
+        if fingerprint.samples >= self.min_samples and fingerprint.samples % self.min_samples == 0:
+            tag = classify(fingerprint)
+            self.observed[pid] = tag
+            if self.tags.get(exe) != tag:
+                logger.info(f"[WorkloadClassifier] {os.path.basename(exe)}: {self.tags.get(exe)} → {tag}")
+                self.tags[exe] = tag
+                self._save()
+        return self.tag_of(pid)
+
+    def tag_of(self, pid: int) -> Optional[str]:
+        """Etiqueta observada del proceso o, si aún no la hay, la cacheada de su ejecutable."""
+        tag = self.observed.get(pid)
+        if tag is None and pid in self.exes:
+            tag = self.tags.get(self.exes[pid])
+        return tag
+
+    def prune(self, active_pids: Iterable[int]) -> None:
+        """Olvida los procesos que ya no se gestionan (la caché por ejecutable se conserva)."""
+        active = set(active_pids)
+        for pid in [p for p in self.fingerprints if p not in active]:
+            del self.fingerprints[pid]
+            self.exes.pop(pid, None)
+            self.observed.pop(pid, None)